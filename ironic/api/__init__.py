@@ -27,6 +27,16 @@ API_SERVICE_OPTS = [
                default=1000,
                help='The maximum number of items returned in a single '
                     'response from a collection resource.'),
+    cfg.IntOpt('enrollment_batch_size',
+               default=500,
+               help='The maximum number of nodes created in a single '
+                    'database transaction by a bulk enrollment request.'),
+    cfg.IntOpt('state_change_batch_size',
+               default=50,
+               help='The maximum number of nodes sent in a single RPC '
+                    'call to a conductor by a bulk state change request. '
+                    'The conductor locks and validates the nodes of a '
+                    'call one after the other before replying.'),
     ]
 
 CONF = cfg.CONF
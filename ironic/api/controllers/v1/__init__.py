@@ -61,7 +61,9 @@ MIN_VER_STR = '1.1'
 # v1.4: Add MANAGEABLE state
 # v1.5: Add logical node names
 # v1.6: Add INSPECT* states
-MAX_VER_STR = '1.6'
+# v1.7: Add bulk node enrollment
+# v1.8: Add bulk power and provision state changes
+MAX_VER_STR = '1.8'
 
 
 MIN_VER = base.Version({base.Version.string: MIN_VER_STR},
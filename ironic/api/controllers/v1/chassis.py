@@ -154,10 +154,10 @@ class ChassisController(rest.RestController):
         marker_obj = None
         if marker:
             marker_obj = objects.Chassis.get_by_uuid(pecan.request.context,
-                                                     marker)
+                                                     marker, use_slave=True)
         chassis = objects.Chassis.list(pecan.request.context, limit,
                                        marker_obj, sort_key=sort_key,
-                                       sort_dir=sort_dir)
+                                       sort_dir=sort_dir, use_slave=True)
         return ChassisCollection.convert_with_links(chassis, limit,
                                                     url=resource_url,
                                                     expand=expand,
@@ -203,7 +203,8 @@ class ChassisController(rest.RestController):
         :param chassis_uuid: UUID of a chassis.
         """
         rpc_chassis = objects.Chassis.get_by_uuid(pecan.request.context,
-                                                  chassis_uuid)
+                                                  chassis_uuid,
+                                                  use_slave=True)
         return Chassis.convert_with_links(rpc_chassis)
 
     @expose.expose(Chassis, body=Chassis, status_code=201)
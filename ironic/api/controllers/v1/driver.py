@@ -13,6 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import threading
+
 import pecan
 from pecan import rest
 import wsme
@@ -25,25 +27,73 @@ from ironic.common import exception
 from ironic.common.i18n import _
 
 
-# Property information for drivers:
-#   key = driver name;
-#   value = dictionary of properties of that driver:
-#             key = property name.
-#             value = description of the property.
-# NOTE(rloo). This is cached for the lifetime of the API service. If one or
-# more conductor services are restarted with new driver versions, the API
-# service should be restarted.
-_DRIVER_PROPERTIES = {}
+class DriverRegistry(object):
+    """Cache of the drivers supported by the active conductors.
+
+    The drivers and the hosts supporting them are reloaded from the
+    database when the version of the active conductors changes (see
+    get_active_conductors_version()). The information about a driver
+    which is got from the conductors (its properties, its vendor
+    methods...) is kept until the set of hosts supporting the driver
+    changes, eg when a conductor is restarted with a new driver version.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._drivers = {}
+        # key = (driver name, kind of information); value = the information
+        self._info = {}
+
+    def clear(self):
+        with self._lock:
+            self._version = None
+            self._drivers = {}
+            self._info = {}
+
+    def get_drivers(self, dbapi):
+        """Return a dict which maps driver names to their set of hosts."""
+        version = dbapi.get_active_conductors_version()
+        if version == self._version:
+            return self._drivers
+
+        drivers = dbapi.get_active_driver_dict()
+        with self._lock:
+            for key in list(self._info):
+                if drivers.get(key[0]) != self._drivers.get(key[0]):
+                    del self._info[key]
+            self._drivers = drivers
+            self._version = version
+        return drivers
+
+    def get_info(self, dbapi, driver_name, kind, loader):
+        """Return some information about a driver.
+
+        :param dbapi: the database API.
+        :param driver_name: name of the driver.
+        :param kind: name of the kind of information, eg 'properties'.
+        :param loader: callable without arguments returning the
+                       information when it is not cached.
+        """
+        # Drop the information made stale by a change of the conductors
+        self.get_drivers(dbapi)
+        key = (driver_name, kind)
+        try:
+            return self._info[key]
+        except KeyError:
+            pass
+        info = loader()
+        with self._lock:
+            self._info[key] = info
+        return info
+
+
+_REGISTRY = DriverRegistry()
 
-# Vendor information for drivers:
-#   key = driver name;
-#   value = dictionary of vendor methods of that driver:
-#             key = method name.
-#             value = dictionary with the metadata of that method.
-# NOTE(lucasagomes). This is cached for the lifetime of the API
-# service. If one or more conductor services are restarted with new driver
-# versions, the API service should be restarted.
-_VENDOR_METHODS = {}
+
+def get_registry():
+    """Return the driver registry of the API service."""
+    return _REGISTRY
 
 
 class Driver(base.APIBase):
@@ -124,13 +174,13 @@ class DriverPassthruController(rest.RestController):
         :raises: DriverNotFound if the driver name is invalid or the
                  driver cannot be loaded.
         """
-        if driver_name not in _VENDOR_METHODS:
+        def load():
             topic = pecan.request.rpcapi.get_topic_for_driver(driver_name)
-            ret = pecan.request.rpcapi.get_driver_vendor_passthru_methods(
+            return pecan.request.rpcapi.get_driver_vendor_passthru_methods(
                         pecan.request.context, driver_name, topic=topic)
-            _VENDOR_METHODS[driver_name] = ret
 
-        return _VENDOR_METHODS[driver_name]
+        return get_registry().get_info(pecan.request.dbapi, driver_name,
+                                       'vendor_methods', load)
 
     @expose.expose(wtypes.text, wtypes.text, wtypes.text,
                          body=wtypes.text)
@@ -173,21 +223,16 @@ class DriversController(rest.RestController):
         #              will break from a single-line doc string.
         #              This is a result of a bug in sphinxcontrib-pecanwsme
         # https://github.com/dreamhost/sphinxcontrib-pecanwsme/issues/8
-        driver_list = pecan.request.dbapi.get_active_driver_dict()
+        driver_list = get_registry().get_drivers(pecan.request.dbapi)
         return DriverList.convert_with_links(driver_list)
 
     @expose.expose(Driver, wtypes.text)
     def get_one(self, driver_name):
         """Retrieve a single driver."""
-        # NOTE(russell_h): There is no way to make this more efficient than
-        # retrieving a list of drivers using the current sqlalchemy schema, but
-        # this path must be exposed for Pecan to route any paths we might
-        # choose to expose below it.
-
-        driver_dict = pecan.request.dbapi.get_active_driver_dict()
-        for name, hosts in driver_dict.items():
-            if name == driver_name:
-                return Driver.convert_with_links(name, list(hosts))
+        hosts = get_registry().get_drivers(pecan.request.dbapi).get(
+            driver_name)
+        if hosts:
+            return Driver.convert_with_links(driver_name, list(hosts))
 
         raise exception.DriverNotFound(driver_name=driver_name)
 
@@ -201,10 +246,10 @@ class DriversController(rest.RestController):
         :raises: DriverNotFound (HTTP 404) if the driver name is invalid or
                  the driver cannot be loaded.
         """
-        if driver_name not in _DRIVER_PROPERTIES:
+        def load():
             topic = pecan.request.rpcapi.get_topic_for_driver(driver_name)
-            properties = pecan.request.rpcapi.get_driver_properties(
-                             pecan.request.context, driver_name, topic=topic)
-            _DRIVER_PROPERTIES[driver_name] = properties
+            return pecan.request.rpcapi.get_driver_properties(
+                       pecan.request.context, driver_name, topic=topic)
 
-        return _DRIVER_PROPERTIES[driver_name]
+        return get_registry().get_info(pecan.request.dbapi, driver_name,
+                                       'properties', load)
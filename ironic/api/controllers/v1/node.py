@@ -14,6 +14,7 @@
 #    under the License.
 
 import ast
+import collections
 import datetime
 
 from oslo_config import cfg
@@ -22,18 +23,21 @@ from oslo_utils import strutils
 from oslo_utils import uuidutils
 import pecan
 from pecan import rest
+import six
 import wsme
 from wsme import types as wtypes
 
 from ironic.api.controllers import base
 from ironic.api.controllers import link
 from ironic.api.controllers.v1 import collection
+from ironic.api.controllers.v1 import driver
 from ironic.api.controllers.v1 import port
 from ironic.api.controllers.v1 import types
 from ironic.api.controllers.v1 import utils as api_utils
 from ironic.api import expose
 from ironic.common import exception
 from ironic.common.i18n import _
+from ironic.common.i18n import _LE
 from ironic.common import states as ir_states
 from ironic import objects
 
@@ -44,16 +48,6 @@ CONF.import_opt('heartbeat_timeout', 'ironic.conductor.manager',
 
 LOG = log.getLogger(__name__)
 
-# Vendor information for node's driver:
-#   key = driver name;
-#   value = dictionary of node vendor methods of that driver:
-#             key = method name.
-#             value = dictionary with the metadata of that method.
-# NOTE(lucasagomes). This is cached for the lifetime of the API
-# service. If one or more conductor services are restarted with new driver
-# versions, the API service should be restarted.
-_VENDOR_METHODS = {}
-
 
 def hide_fields_in_newer_versions(obj):
     # if requested version is < 1.3, hide driver_internal_info
@@ -87,6 +81,65 @@ def check_allow_management_verbs(verb):
                 raise exception.NotAcceptable()
 
 
+def check_power_target(rpc_node, node_ident, target):
+    """Check that a node can be set to a power state.
+
+    :param rpc_node: the RPC node.
+    :param node_ident: the UUID or logical name of the node, as requested.
+    :param target: the desired power state of the node.
+    :raises: InvalidStateRequested if the target state is not valid or if
+             the node is in CLEANING state.
+    """
+    # TODO(lucasagomes): Test if it's able to transition to the
+    #                    target state from the current one
+    if target not in [ir_states.POWER_ON,
+                      ir_states.POWER_OFF,
+                      ir_states.REBOOT]:
+        raise exception.InvalidStateRequested(
+                action=target, node=node_ident,
+                state=rpc_node.power_state)
+
+    # Don't change power state for nodes in cleaning
+    elif rpc_node.provision_state == ir_states.CLEANING:
+        raise exception.InvalidStateRequested(
+                action=target, node=node_ident,
+                state=rpc_node.provision_state)
+
+
+def check_provision_target(rpc_node, target):
+    """Check that a node can be moved to a provision state.
+
+    :param rpc_node: the RPC node.
+    :param target: the desired provision state of the node.
+    :raises: NodeLocked if the node is currently locked.
+    :raises: NodeInMaintenance if the node is in maintenance mode and the
+             target is deploying or rebuilding it.
+    :raises: InvalidStateRequested if the requested transition is not
+             possible from the current state.
+    """
+    # Normally, we let the task manager recognize and deal with
+    # NodeLocked exceptions. However, that isn't done until the RPC calls
+    # below. In order to main backward compatibility with our API HTTP
+    # response codes, we have this check here to deal with cases where
+    # a node is already being operated on (DEPLOYING or such) and we
+    # want to continue returning 409. Without it, we'd return 400.
+    if rpc_node.reservation:
+        raise exception.NodeLocked(node=rpc_node.uuid,
+                                   host=rpc_node.reservation)
+
+    if (target in (ir_states.ACTIVE, ir_states.REBUILD)
+            and rpc_node.maintenance):
+        raise exception.NodeInMaintenance(op=_('provisioning'),
+                                          node=rpc_node.uuid)
+
+    m = ir_states.machine.copy()
+    m.initialize(rpc_node.provision_state)
+    if not m.is_valid_event(ir_states.VERBS.get(target, target)):
+        raise exception.InvalidStateRequested(
+                action=target, node=rpc_node.uuid,
+                state=rpc_node.provision_state)
+
+
 class NodePatchType(types.JsonPatchType):
 
     @staticmethod
@@ -311,7 +364,7 @@ class NodeStatesController(rest.RestController):
         # NOTE(lucasagomes): All these state values come from the
         # DB. Ironic counts with a periodic task that verify the current
         # power states of the nodes and update the DB accordingly.
-        rpc_node = api_utils.get_rpc_node(node_ident)
+        rpc_node = api_utils.get_rpc_node(node_ident, use_slave=True)
         return NodeStates.convert(rpc_node)
 
     @expose.expose(None, types.uuid_or_name, wtypes.text,
@@ -327,23 +380,9 @@ class NodeStatesController(rest.RestController):
                  state is not valid or if the node is in CLEANING state.
 
         """
-        # TODO(lucasagomes): Test if it's able to transition to the
-        #                    target state from the current one
         rpc_node = api_utils.get_rpc_node(node_ident)
         topic = pecan.request.rpcapi.get_topic_for(rpc_node)
-
-        if target not in [ir_states.POWER_ON,
-                          ir_states.POWER_OFF,
-                          ir_states.REBOOT]:
-            raise exception.InvalidStateRequested(
-                    action=target, node=node_ident,
-                    state=rpc_node.power_state)
-
-        # Don't change power state for nodes in cleaning
-        elif rpc_node.provision_state == ir_states.CLEANING:
-            raise exception.InvalidStateRequested(
-                    action=target, node=node_ident,
-                    state=rpc_node.provision_state)
+        check_power_target(rpc_node, node_ident, target)
 
         pecan.request.rpcapi.change_node_power_state(pecan.request.context,
                                                      rpc_node.uuid, target,
@@ -380,28 +419,7 @@ class NodeStatesController(rest.RestController):
         check_allow_management_verbs(target)
         rpc_node = api_utils.get_rpc_node(node_ident)
         topic = pecan.request.rpcapi.get_topic_for(rpc_node)
-
-        # Normally, we let the task manager recognize and deal with
-        # NodeLocked exceptions. However, that isn't done until the RPC calls
-        # below. In order to main backward compatibility with our API HTTP
-        # response codes, we have this check here to deal with cases where
-        # a node is already being operated on (DEPLOYING or such) and we
-        # want to continue returning 409. Without it, we'd return 400.
-        if rpc_node.reservation:
-            raise exception.NodeLocked(node=rpc_node.uuid,
-                                       host=rpc_node.reservation)
-
-        if (target in (ir_states.ACTIVE, ir_states.REBUILD)
-                and rpc_node.maintenance):
-            raise exception.NodeInMaintenance(op=_('provisioning'),
-                                              node=rpc_node.uuid)
-
-        m = ir_states.machine.copy()
-        m.initialize(rpc_node.provision_state)
-        if not m.is_valid_event(ir_states.VERBS.get(target, target)):
-            raise exception.InvalidStateRequested(
-                    action=target, node=rpc_node.uuid,
-                    state=rpc_node.provision_state)
+        check_provision_target(rpc_node, target)
 
         if configdrive and target != ir_states.ACTIVE:
             msg = (_('Adding a config drive is only supported when setting '
@@ -658,6 +676,155 @@ class NodeCollection(collection.Collection):
         return sample
 
 
+class NodeEnrollmentPort(base.APIBase):
+    """API representation of a port to create along with its node."""
+
+    uuid = types.uuid
+    """Unique UUID for this port"""
+
+    address = wsme.wsattr(types.macaddress, mandatory=True)
+    """MAC Address for this port"""
+
+    extra = {wtypes.text: types.jsontype}
+    """This port's meta data"""
+
+
+class NodeEnrollment(base.APIBase):
+    """API representation of a node to enroll, with its ports."""
+
+    uuid = types.uuid
+    """Unique UUID for this node"""
+
+    instance_uuid = types.uuid
+    """The UUID of the instance in nova-compute"""
+
+    name = wsme.wsattr(wtypes.text)
+    """The logical name for this node"""
+
+    chassis_uuid = types.uuid
+    """The UUID of the chassis this node belongs"""
+
+    maintenance = types.boolean
+    """Indicates whether the node is in maintenance mode."""
+
+    driver = wsme.wsattr(wtypes.text, mandatory=True)
+    """The driver responsible for controlling the node"""
+
+    driver_info = {wtypes.text: types.jsontype}
+    """This node's driver configuration"""
+
+    instance_info = {wtypes.text: types.jsontype}
+    """This node's instance info."""
+
+    properties = {wtypes.text: types.jsontype}
+    """The physical characteristics of this node"""
+
+    extra = {wtypes.text: types.jsontype}
+    """This node's meta data"""
+
+    ports = [NodeEnrollmentPort]
+    """The ports to create on this node"""
+
+    _node_fields = ('uuid', 'instance_uuid', 'name', 'maintenance', 'driver',
+                   'driver_info', 'instance_info', 'properties', 'extra')
+    _port_fields = ('uuid', 'address', 'extra')
+
+    def get_values(self):
+        """Return the DB values of the node and of its ports."""
+        node_values = dict((k, getattr(self, k)) for k in self._node_fields
+                           if getattr(self, k) not in (wtypes.Unset, None))
+        ports_values = [dict((k, getattr(p, k)) for k in self._port_fields
+                             if getattr(p, k) not in (wtypes.Unset, None))
+                        for p in self.ports or []]
+        return node_values, ports_values
+
+
+class NodeEnrollmentCollection(base.APIBase):
+    """API representation of a list of nodes to enroll."""
+
+    nodes = wsme.wsattr([NodeEnrollment], mandatory=True)
+    """A list of the nodes to enroll"""
+
+
+class NodeEnrollmentResult(base.APIBase):
+    """API representation of the outcome of the enrollment of a node."""
+
+    uuid = types.uuid
+    """Unique UUID of the node"""
+
+    name = wsme.wsattr(wtypes.text)
+    """The logical name of the node"""
+
+    ports = [types.uuid]
+    """The UUIDs of the ports created on the node"""
+
+    error = wsme.wsattr(wtypes.text)
+    """Why the node was not created, or None if it was"""
+
+    links = wsme.wsattr([link.Link], readonly=True)
+    """A list containing a self link and associated node links, if the
+    node was created"""
+
+    @classmethod
+    def convert_with_links(cls, node_values, ports_values, error=None):
+        result = cls(uuid=node_values['uuid'],
+                     name=node_values.get('name'), error=None)
+        if error is not None:
+            result.error = six.text_type(error)
+            return result
+
+        result.ports = [port_values['uuid'] for port_values in ports_values]
+        url = pecan.request.host_url
+        result.links = [link.Link.make_link('self', url, 'nodes',
+                                            result.uuid),
+                        link.Link.make_link('bookmark', url, 'nodes',
+                                            result.uuid, bookmark=True)
+                        ]
+        return result
+
+
+class NodeEnrollmentResultCollection(base.APIBase):
+    """API representation of the outcome of a bulk enrollment."""
+
+    nodes = [NodeEnrollmentResult]
+    """A list with the outcome of each node, in the order of the
+    request"""
+
+
+class NodeStatesBulk(base.APIBase):
+    """API representation of a state change of several nodes."""
+
+    nodes = wsme.wsattr([types.uuid_or_name], mandatory=True)
+    """The UUIDs or logical names of the nodes"""
+
+    target = wsme.wsattr(wtypes.text, mandatory=True)
+    """The desired power or provision state of the nodes"""
+
+
+class NodeStateChangeResult(base.APIBase):
+    """API representation of the outcome of the state change of a node."""
+
+    node = wsme.wsattr(wtypes.text)
+    """The UUID or logical name of the node, as requested"""
+
+    uuid = types.uuid
+    """Unique UUID of the node, if it was found"""
+
+    accepted = types.boolean
+    """Whether the state change was started"""
+
+    error = wsme.wsattr(wtypes.text)
+    """Why the state change was not started, or None if it was"""
+
+
+class NodeStateChangeResultCollection(base.APIBase):
+    """API representation of the outcome of a bulk state change."""
+
+    nodes = [NodeStateChangeResult]
+    """A list with the outcome of each node, in the order of the
+    request"""
+
+
 class NodeVendorPassthruController(rest.RestController):
     """REST controller for VendorPassthru.
 
@@ -682,13 +849,13 @@ class NodeVendorPassthruController(rest.RestController):
         # Raise an exception if node is not found
         rpc_node = api_utils.get_rpc_node(node_ident)
 
-        if rpc_node.driver not in _VENDOR_METHODS:
+        def load():
             topic = pecan.request.rpcapi.get_topic_for(rpc_node)
-            ret = pecan.request.rpcapi.get_node_vendor_passthru_methods(
+            return pecan.request.rpcapi.get_node_vendor_passthru_methods(
                         pecan.request.context, rpc_node.uuid, topic=topic)
-            _VENDOR_METHODS[rpc_node.driver] = ret
 
-        return _VENDOR_METHODS[rpc_node.driver]
+        return driver.get_registry().get_info(
+            pecan.request.dbapi, rpc_node.driver, 'node_vendor_methods', load)
 
     @expose.expose(wtypes.text, types.uuid_or_name, wtypes.text,
                          body=wtypes.text)
@@ -784,6 +951,8 @@ class NodesController(rest.RestController):
     _custom_actions = {
         'detail': ['GET'],
         'validate': ['GET'],
+        'bulk': ['POST'],
+        'bulk_states': ['PUT'],
     }
 
     def _get_nodes_collection(self, chassis_uuid, instance_uuid, associated,
@@ -799,7 +968,7 @@ class NodesController(rest.RestController):
         marker_obj = None
         if marker:
             marker_obj = objects.Node.get_by_uuid(pecan.request.context,
-                                                  marker)
+                                                  marker, use_slave=True)
         if instance_uuid:
             nodes = self._get_nodes_by_instance(instance_uuid)
         else:
@@ -813,7 +982,7 @@ class NodesController(rest.RestController):
 
             nodes = objects.Node.list(pecan.request.context, limit, marker_obj,
                                       sort_key=sort_key, sort_dir=sort_dir,
-                                      filters=filters)
+                                      filters=filters, use_slave=True)
 
         parameters = {'sort_key': sort_key, 'sort_dir': sort_dir}
         if associated:
@@ -832,7 +1001,8 @@ class NodesController(rest.RestController):
         """
         try:
             node = objects.Node.get_by_instance_uuid(pecan.request.context,
-                                                     instance_uuid)
+                                                     instance_uuid,
+                                                     use_slave=True)
             return [node]
         except exception.InstanceNotFound:
             return []
@@ -931,7 +1101,7 @@ class NodesController(rest.RestController):
         if self.from_chassis:
             raise exception.OperationNotPermitted
 
-        rpc_node = api_utils.get_rpc_node(node_ident)
+        rpc_node = api_utils.get_rpc_node(node_ident, use_slave=True)
         return Node.convert_with_links(rpc_node)
 
     @expose.expose(Node, body=Node, status_code=201)
@@ -976,6 +1146,182 @@ class NodesController(rest.RestController):
         pecan.response.location = link.build_url('nodes', new_node.uuid)
         return Node.convert_with_links(new_node)
 
+    def _check_enrollment(self, enrollment, node_values, drivers, chassis):
+        """Check a node to enroll and set the ID of its chassis.
+
+        :param enrollment: a NodeEnrollment.
+        :param node_values: the DB values of the node.
+        :param drivers: a dict caching the driver checks.
+        :param chassis: a dict caching the chassis IDs.
+        :returns: None, or the exception telling why the node is invalid.
+        """
+        if enrollment.driver not in drivers:
+            # NOTE: get_topic_for checks if the driver is in the hash
+            #       ring, each driver is only checked once.
+            try:
+                pecan.request.rpcapi.get_topic_for(enrollment)
+                drivers[enrollment.driver] = None
+            except exception.NoValidHost as e:
+                drivers[enrollment.driver] = e
+        if drivers[enrollment.driver] is not None:
+            return drivers[enrollment.driver]
+
+        if enrollment.name and not api_utils.is_valid_node_name(
+                enrollment.name):
+            return exception.InvalidParameterValue(
+                _("Cannot create node with invalid name %(name)s") %
+                {'name': enrollment.name})
+
+        if enrollment.chassis_uuid:
+            if enrollment.chassis_uuid not in chassis:
+                try:
+                    chassis[enrollment.chassis_uuid] = objects.Chassis.get(
+                        pecan.request.context, enrollment.chassis_uuid).id
+                except exception.ChassisNotFound as e:
+                    chassis[enrollment.chassis_uuid] = e
+            chassis_id = chassis[enrollment.chassis_uuid]
+            if isinstance(chassis_id, exception.ChassisNotFound):
+                return chassis_id
+            node_values['chassis_id'] = chassis_id
+
+    @expose.expose(NodeEnrollmentResultCollection,
+                   body=NodeEnrollmentCollection)
+    def bulk(self, enrollment):
+        """Create several nodes and their ports.
+
+        The nodes are checked and inserted in batches (see the
+        [api]enrollment_batch_size option), rather than with a request
+        per node and per port. A node is created with all its ports or
+        not at all; a node which can not be created does not prevent
+        the other nodes from being created.
+
+        :param enrollment: a list of nodes, with their ports.
+        :returns: the outcome of each node, in the same order.
+        """
+        if self.from_chassis:
+            raise exception.OperationNotPermitted
+
+        if not api_utils.allow_bulk_enrollment():
+            raise exception.NotAcceptable()
+
+        results = []
+        drivers = {}
+        chassis = {}
+        batch_size = max(CONF.api.enrollment_batch_size, 1)
+        for start in range(0, len(enrollment.nodes), batch_size):
+            batch = []
+            for node in enrollment.nodes[start:start + batch_size]:
+                if not node.uuid:
+                    node.uuid = uuidutils.generate_uuid()
+                node_values, ports_values = node.get_values()
+                error = self._check_enrollment(node, node_values, drivers,
+                                               chassis)
+                batch.append((node_values, ports_values, error))
+
+            valid = [(nv, pv) for nv, pv, err in batch if err is None]
+            errors = iter(pecan.request.dbapi.create_nodes(valid))
+            for node_values, ports_values, error in batch:
+                if error is None:
+                    error = next(errors)
+                results.append(NodeEnrollmentResult.convert_with_links(
+                    node_values, ports_values, error))
+
+        return NodeEnrollmentResultCollection(nodes=results)
+
+    @expose.expose(NodeStateChangeResultCollection, wtypes.text,
+                   body=NodeStatesBulk, status_code=202)
+    def bulk_states(self, action, request):
+        """Change the power or provision state of several nodes.
+
+        The nodes are grouped by conductor service, and RPC calls of
+        batches of nodes (see the [api]state_change_batch_size option)
+        start the state changes of the nodes of each conductor. As with
+        the state change of a single node, the client should GET the
+        status of the nodes to observe the progress of the changes.
+
+        :param action: "power" or "provision".
+        :param request: the nodes and their desired state. Config drives
+                        are not supported.
+        :returns: for each node, in the order of the request, whether its
+                  state change was started or why it was not.
+        :raises: NotAcceptable (HTTP 406) if the API version specified does
+                 not allow the requested state transition.
+        :raises: InvalidStateRequested (HTTP 400) if the target provision
+                 state is not valid.
+        """
+        if self.from_chassis:
+            raise exception.OperationNotPermitted
+
+        if not api_utils.allow_bulk_state_change():
+            raise exception.NotAcceptable()
+
+        target = request.target
+        if action == 'provision':
+            check_allow_management_verbs(target)
+            if target not in (ir_states.ACTIVE, ir_states.REBUILD,
+                              ir_states.DELETED, ir_states.VERBS['inspect'],
+                              ir_states.VERBS['manage'],
+                              ir_states.VERBS['provide']):
+                msg = (_('The requested action "%(action)s" could not be '
+                         'understood.') % {'action': target})
+                raise exception.InvalidStateRequested(message=msg)
+        elif action != 'power':
+            raise exception.HTTPNotFound
+
+        errors = {}
+        rpc_nodes = collections.OrderedDict()
+        uuids = {}
+        for node_ident in request.nodes:
+            try:
+                rpc_node = api_utils.get_rpc_node(node_ident)
+                if action == 'power':
+                    check_power_target(rpc_node, node_ident, target)
+                else:
+                    check_provision_target(rpc_node, target)
+            except exception.IronicException as e:
+                errors[node_ident] = six.text_type(e)
+                continue
+            uuids[node_ident] = rpc_node.uuid
+            rpc_nodes[rpc_node.uuid] = rpc_node
+
+        topics, topic_errors = pecan.request.rpcapi.get_topics_for(
+            list(rpc_nodes.values()))
+        node_errors = dict((uuid, six.text_type(e))
+                           for uuid, e in topic_errors.items())
+        batch_size = max(CONF.api.state_change_batch_size, 1)
+        for topic, nodes in topics.items():
+            node_uuids = [node.uuid for node in nodes]
+            for start in range(0, len(node_uuids), batch_size):
+                batch = node_uuids[start:start + batch_size]
+                try:
+                    node_errors.update(
+                        pecan.request.rpcapi.change_nodes_state(
+                            pecan.request.context, batch, action, target,
+                            topic))
+                except Exception as e:
+                    # NOTE: the state changes of the nodes of the other
+                    # batches may have been started already, the failure
+                    # is only reported for the nodes of this batch.
+                    LOG.exception(_LE('Failed to change the %(action)s '
+                                      'state of %(count)d nodes on topic '
+                                      '%(topic)s.'),
+                                  {'action': action, 'count': len(batch),
+                                   'topic': topic})
+                    node_errors.update((uuid, six.text_type(e))
+                                       for uuid in batch)
+
+        results = []
+        for node_ident in request.nodes:
+            uuid = uuids.get(node_ident)
+            if uuid is None:
+                error = errors[node_ident]
+            else:
+                error = node_errors.get(uuid)
+            results.append(NodeStateChangeResult(
+                node=node_ident, uuid=uuid, accepted=error is None,
+                error=error))
+        return NodeStateChangeResultCollection(nodes=results)
+
     @wsme.validate(types.uuid, [NodePatchType])
     @expose.expose(Node, types.uuid_or_name, body=[NodePatchType])
     def patch(self, node_ident, patch):
@@ -189,24 +189,25 @@ class PortsController(rest.RestController):
         marker_obj = None
         if marker:
             marker_obj = objects.Port.get_by_uuid(pecan.request.context,
-                                                  marker)
+                                                  marker, use_slave=True)
 
         if node_ident:
             # FIXME(comstud): Since all we need is the node ID, we can
             #                 make this more efficient by only querying
             #                 for that column. This will get cleaned up
             #                 as we move to the object interface.
-            node = api_utils.get_rpc_node(node_ident)
+            node = api_utils.get_rpc_node(node_ident, use_slave=True)
             ports = objects.Port.list_by_node_id(pecan.request.context,
                                                  node.id, limit, marker_obj,
                                                  sort_key=sort_key,
-                                                 sort_dir=sort_dir)
+                                                 sort_dir=sort_dir,
+                                                 use_slave=True)
         elif address:
             ports = self._get_ports_by_address(address)
         else:
             ports = objects.Port.list(pecan.request.context, limit,
                                       marker_obj, sort_key=sort_key,
-                                      sort_dir=sort_dir)
+                                      sort_dir=sort_dir, use_slave=True)
 
         return PortCollection.convert_with_links(ports, limit,
                                                  url=resource_url,
@@ -223,7 +224,8 @@ class PortsController(rest.RestController):
 
         """
         try:
-            port = objects.Port.get_by_address(pecan.request.context, address)
+            port = objects.Port.get_by_address(pecan.request.context, address,
+                                               use_slave=True)
             return [port]
         except exception.PortNotFound:
             return []
@@ -309,7 +311,8 @@ class PortsController(rest.RestController):
         if self.from_nodes:
             raise exception.OperationNotPermitted
 
-        rpc_port = objects.Port.get_by_uuid(pecan.request.context, port_uuid)
+        rpc_port = objects.Port.get_by_uuid(pecan.request.context, port_uuid,
+                                            use_slave=True)
         return Port.convert_with_links(rpc_port)
 
     @expose.expose(Port, body=Port, status_code=201)
@@ -72,10 +72,23 @@ def allow_node_logical_names():
     return pecan.request.version.minor >= 5
 
 
-def get_rpc_node(node_ident):
+def allow_bulk_enrollment():
+    # v1.7 added the bulk enrollment of nodes
+    return pecan.request.version.minor >= 7
+
+
+def allow_bulk_state_change():
+    # v1.8 added the bulk power and provision state changes
+    return pecan.request.version.minor >= 8
+
+
+def get_rpc_node(node_ident, use_slave=False):
     """Get the RPC node from the node uuid or logical name.
 
     :param node_ident: the UUID or logical name of a node.
+    :param use_slave: if True, read the node from the replica database, if
+                      one is configured. Only for the read-only requests,
+                      the node may be slightly stale.
 
     :returns: The RPC Node.
     :raises: InvalidUuidOrName if the name or uuid provided is not valid.
@@ -84,12 +97,14 @@ def get_rpc_node(node_ident):
     # Check to see if the node_ident is a valid UUID.  If it is, treat it
     # as a UUID.
     if uuidutils.is_uuid_like(node_ident):
-        return objects.Node.get_by_uuid(pecan.request.context, node_ident)
+        return objects.Node.get_by_uuid(pecan.request.context, node_ident,
+                                        use_slave=use_slave)
 
     # We can refer to nodes by their name, if the client supports it
     if allow_node_logical_names():
         if utils.is_hostname_safe(node_ident):
-            return objects.Node.get_by_name(pecan.request.context, node_ident)
+            return objects.Node.get_by_name(pecan.request.context, node_ident,
+                                            use_slave=use_slave)
         raise exception.InvalidUuidOrName(name=node_ident)
 
     # Ensure we raise the same exception as we did for the Juno release
@@ -16,14 +16,18 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import threading
+
 from oslo_config import cfg
 from pecan import hooks
 from webob import exc
 
 from ironic.common import context
+from ironic.common import metrics
 from ironic.common import policy
 from ironic.conductor import rpcapi
 from ironic.db import api as dbapi
+from ironic.db import query_stats
 
 
 class ConfigHook(hooks.PecanHook):
@@ -40,6 +44,22 @@ class DBHook(hooks.PecanHook):
         state.request.dbapi = dbapi.get_instance()
 
 
+class QueryStatsHook(hooks.PecanHook):
+    """Account the database queries issued while handling a request."""
+
+    def before(self, state):
+        request = state.request
+        request.query_stats = query_stats.start(
+            '%s %s' % (request.method, request.path_qs))
+
+    def after(self, state):
+        # NOTE: 'after' hooks also run when a previous 'before' hook failed
+        scope = getattr(state.request, 'query_stats', None)
+        if scope is not None:
+            query_stats.stop(*scope)
+            del state.request.query_stats
+
+
 class ContextHook(hooks.PecanHook):
     """Configures a request context and attaches it to the request.
 
@@ -79,10 +99,10 @@ class ContextHook(hooks.PecanHook):
         # NOTE(adam_g): We also check the previous 'admin' rule to ensure
         # compat with default juno policy.json.  This double check may be
         # removed in L.
-        is_admin = (policy.enforce('admin_api', creds, creds) or
-                    policy.enforce('admin', creds, creds))
+        is_admin = (policy.check_creds('admin_api', creds) or
+                    policy.check_creds('admin', creds))
         is_public_api = state.request.environ.get('is_public_api', False)
-        show_password = policy.enforce('show_password', creds, creds)
+        show_password = policy.check_creds('show_password', creds)
 
         state.request.context = context.RequestContext(
             is_admin=is_admin,
@@ -92,10 +112,29 @@ class ContextHook(hooks.PecanHook):
 
 
 class RPCHook(hooks.PecanHook):
-    """Attach the rpcapi object to the request so controllers can get to it."""
+    """Attach the rpcapi object to the request so controllers can get to it.
+
+    A single ConductorAPI, created on the first request, is shared by all
+    the requests: its RPC client and hash rings are safe to use from
+    several threads.
+    """
+
+    def __init__(self):
+        super(RPCHook, self).__init__()
+        self._rpcapi = None
+        self._lock = threading.Lock()
 
     def before(self, state):
-        state.request.rpcapi = rpcapi.ConductorAPI()
+        rpcapi_obj = self._rpcapi
+        if rpcapi_obj is None:
+            with self._lock:
+                if self._rpcapi is None:
+                    self._rpcapi = rpcapi.ConductorAPI()
+                    metrics.get_metrics().incr('api.rpcapi.created')
+                rpcapi_obj = self._rpcapi
+        else:
+            metrics.get_metrics().incr('api.rpcapi.reused')
+        state.request.rpcapi = rpcapi_obj
 
 
 class TrustedCallHook(hooks.PecanHook):
@@ -110,8 +149,10 @@ class TrustedCallHook(hooks.PecanHook):
         ctx = state.request.context
         if ctx.is_public_api:
             return
-        policy.enforce('admin_api', ctx.to_dict(), ctx.to_dict(),
-                       do_raise=True, exc=exc.HTTPForbidden)
+        # NOTE: the credentials differ from the ones of ContextHook, they
+        # include is_admin which the Juno 'admin_api' rule depends on
+        policy.check_creds('admin_api', ctx.to_dict(),
+                           do_raise=True, exc=exc.HTTPForbidden)
 
 
 class NoExceptionTracebackHook(hooks.PecanHook):
@@ -544,6 +544,11 @@ class SwiftOperationError(IronicException):
     message = _("Swift operation '%(operation)s' failed: %(error)s")
 
 
+class SwiftObjectNotFoundError(SwiftOperationError):
+    message = _("Swift object %(obj)s from container %(container)s "
+                "not found. Operation '%(operation)s' failed.")
+
+
 class SNMPFailure(IronicException):
     message = _("SNMP operation '%(operation)s' failed: %(error)s")
 
@@ -576,3 +581,8 @@ class PathNotFound(IronicException):
 
 class DirectoryNotWritable(IronicException):
     message = _("Directory %(dir)s is not writable.")
+
+
+class AgentConnectionFailed(IronicException):
+    message = _("Connection to the agent of node %(node)s failed: "
+                "%(reason)s")
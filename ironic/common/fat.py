@@ -0,0 +1,401 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Creation of small FAT12/FAT16 file system images.
+
+The image is built in memory and written to a file, so neither root
+privileges nor a loop device are needed. The file names which do not fit
+the 8.3 format are stored as VFAT long file names.
+"""
+
+import collections
+import string
+import struct
+import time
+
+from ironic.common import exception
+from ironic.common.i18n import _
+
+SECTOR_SIZE = 512
+DIR_ENTRY_SIZE = 32
+RESERVED_SECTORS = 1
+NUM_FATS = 2
+ROOT_ENTRIES = 512
+MEDIA_DESCRIPTOR = 0xF8
+
+# A FAT file system with less clusters than this is a FAT12 one
+FAT16_MIN_CLUSTERS = 4085
+FAT16_MAX_CLUSTERS = 65524
+
+ATTR_VOLUME_ID = 0x08
+ATTR_DIRECTORY = 0x10
+ATTR_ARCHIVE = 0x20
+ATTR_LONG_NAME = 0x0F
+
+LONG_NAME_MAX_LEN = 255
+# Number of UCS-2 characters of a long name held by a directory entry
+LONG_NAME_CHARS_PER_ENTRY = 13
+
+_SHORT_NAME_CHARS = frozenset(string.ascii_uppercase + string.digits +
+                              "!#$%&'()-@^_`{}~")
+
+
+def _error(error):
+    return exception.ImageCreationFailed(image_type='vfat', error=error)
+
+
+class _Node(object):
+    """A file or a directory of the image."""
+
+    def __init__(self, name, data=None):
+        self.name = name
+        # None for a directory
+        self.data = data
+        # By lower case name, FAT names are case insensitive
+        self.children = collections.OrderedDict()
+        self.short_name = None
+        self.long_name = False
+        self.cluster = 0
+
+    @property
+    def is_dir(self):
+        return self.data is None
+
+    def get_dir(self, name):
+        node = self.children.get(name.lower())
+        if node is None:
+            node = self.children[name.lower()] = _Node(name)
+        elif not node.is_dir:
+            raise _error(_("%s is both a file and a directory") % name)
+        return node
+
+    def add_file(self, name, data):
+        if name.lower() in self.children:
+            raise _error(_("%s is given twice") % name)
+        self.children[name.lower()] = _Node(name, data)
+
+
+def _split_name(name):
+    if '.' in name[1:]:
+        base, ext = name.rsplit('.', 1)
+    else:
+        base, ext = name, ''
+    return base, ext
+
+
+def _filter_short_name(part):
+    """Returns the short name version of a part of a name.
+
+    :returns: a tuple (short name, whether information was lost).
+    """
+    chars = []
+    lossy = False
+    for char in part.upper():
+        if char in ' .':
+            lossy = True
+        elif char in _SHORT_NAME_CHARS:
+            chars.append(char)
+        else:
+            chars.append('_')
+            lossy = True
+    return ''.join(chars), lossy
+
+
+def _make_short_name(name, taken):
+    """Generates the 8.3 name of a file, as Windows does.
+
+    :param name: the name of the file.
+    :param taken: the short names already used in the directory.
+    :returns: a tuple (11 bytes short name, whether a long name entry is
+        needed).
+    """
+    base, ext = _split_name(name)
+    short_base, base_lossy = _filter_short_name(base)
+    short_ext, ext_lossy = _filter_short_name(ext)
+    lossy = (base_lossy or ext_lossy or not short_base or
+             len(short_base) > 8 or len(short_ext) > 3)
+    short_ext = short_ext[:3]
+
+    short_name = (short_base.ljust(8) + short_ext.ljust(3)).encode('ascii')
+    if not lossy and short_name not in taken:
+        return short_name, name != _short_name_to_str(short_name)
+
+    for index in range(1, 1000000):
+        tail = '~%d' % index
+        candidate = ((short_base[:8 - len(tail)] + tail).ljust(8) +
+                     short_ext.ljust(3)).encode('ascii')
+        if candidate not in taken:
+            return candidate, True
+    raise _error(_("Too many files named like %s") % name)
+
+
+def _short_name_to_str(short_name):
+    base = short_name[:8].decode('ascii').rstrip()
+    ext = short_name[8:].decode('ascii').rstrip()
+    return '%s.%s' % (base, ext) if ext else base
+
+
+def _long_name_checksum(short_name):
+    checksum = 0
+    for char in bytearray(short_name):
+        checksum = (((checksum & 1) << 7) + (checksum >> 1) + char) & 0xFF
+    return checksum
+
+
+def _long_name_entries(name, short_name):
+    """Returns the VFAT long name entries of a file, in on-disk order."""
+    if len(name) > LONG_NAME_MAX_LEN:
+        raise _error(_("File name %s is too long") % name)
+    data = name.encode('utf-16-le')
+    per_entry = LONG_NAME_CHARS_PER_ENTRY * 2
+    if len(data) % per_entry:
+        # The name is terminated by a null character and padded with 0xFFFF
+        data += b'\x00\x00'
+        data += b'\xff' * (-len(data) % per_entry)
+
+    checksum = _long_name_checksum(short_name)
+    count = len(data) // per_entry
+    entries = []
+    for index in range(count):
+        chunk = data[index * per_entry:(index + 1) * per_entry]
+        order = index + 1
+        if order == count:
+            order |= 0x40
+        entries.append(struct.pack('<B10sBBB12sH4s', order, chunk[:10],
+                                   ATTR_LONG_NAME, 0, checksum,
+                                   chunk[10:22], 0, chunk[22:]))
+    return entries[::-1]
+
+
+def _dir_entry(short_name, attr, cluster, size, stamp):
+    date, tm = stamp
+    return struct.pack('<11sBBBHHHHHHHI', short_name, attr, 0, 0, tm, date,
+                       date, 0, tm, date, cluster, size)
+
+
+def _get_timestamp(now):
+    date = (max(now.tm_year - 1980, 0) << 9) | (now.tm_mon << 5) | now.tm_mday
+    tm = (now.tm_hour << 11) | (now.tm_min << 5) | (now.tm_sec // 2)
+    return date, tm
+
+
+def _get_geometry(total_sectors):
+    """Chooses the FAT type and the cluster size of a file system.
+
+    :returns: a tuple (FAT bits, sectors per cluster, sectors per FAT,
+        number of clusters).
+    """
+    root_sectors = ROOT_ENTRIES * DIR_ENTRY_SIZE // SECTOR_SIZE
+    for cluster_sectors in (1, 2, 4, 8, 16, 32, 64):
+        for fat_bits in (12, 16):
+            fat_sectors = 1
+            while True:
+                data_sectors = (total_sectors - RESERVED_SECTORS -
+                                NUM_FATS * fat_sectors - root_sectors)
+                clusters = max(data_sectors // cluster_sectors, 0)
+                fat_bytes = ((clusters + 2) * fat_bits + 7) // 8
+                needed = (fat_bytes + SECTOR_SIZE - 1) // SECTOR_SIZE
+                if needed <= fat_sectors:
+                    break
+                fat_sectors = needed
+            if fat_bits == 12 and 0 < clusters < FAT16_MIN_CLUSTERS:
+                return fat_bits, cluster_sectors, fat_sectors, clusters
+            if (fat_bits == 16 and
+                    FAT16_MIN_CLUSTERS <= clusters <= FAT16_MAX_CLUSTERS):
+                return fat_bits, cluster_sectors, fat_sectors, clusters
+    raise _error(_("Unsupported file system size of %d sectors") %
+                 total_sectors)
+
+
+class _ImageBuilder(object):
+
+    def __init__(self, size, label):
+        self.total_sectors = size // SECTOR_SIZE
+        (self.fat_bits, self.cluster_sectors, self.fat_sectors,
+         self.clusters) = _get_geometry(self.total_sectors)
+        self.cluster_size = self.cluster_sectors * SECTOR_SIZE
+        self.root_offset = (RESERVED_SECTORS + NUM_FATS *
+                            self.fat_sectors) * SECTOR_SIZE
+        self.data_offset = self.root_offset + ROOT_ENTRIES * DIR_ENTRY_SIZE
+        self.label = label
+        self.stamp = _get_timestamp(time.localtime())
+
+        self.image = bytearray(self.total_sectors * SECTOR_SIZE)
+        eoc = (1 << self.fat_bits) - 1
+        self.eoc = eoc
+        self.fat = [0] * (self.clusters + 2)
+        self.fat[0] = (eoc & ~0xFF) | MEDIA_DESCRIPTOR
+        self.fat[1] = eoc
+        self.next_cluster = 2
+
+    def _allocate(self, size):
+        """Allocates a chain of contiguous clusters.
+
+        :returns: the first cluster, 0 if size is 0.
+        """
+        count = (size + self.cluster_size - 1) // self.cluster_size
+        if not count:
+            return 0
+        first = self.next_cluster
+        if first + count > len(self.fat):
+            raise _error(_("Not enough space in the file system"))
+        for cluster in range(first, first + count - 1):
+            self.fat[cluster] = cluster + 1
+        self.fat[first + count - 1] = self.eoc
+        self.next_cluster += count
+        return first
+
+    def _write_cluster_data(self, cluster, data):
+        offset = self.data_offset + (cluster - 2) * self.cluster_size
+        self.image[offset:offset + len(data)] = data
+
+    def _name_children(self, node):
+        taken = set()
+        for child in node.children.values():
+            child.short_name, child.long_name = _make_short_name(child.name,
+                                                                 taken)
+            taken.add(child.short_name)
+
+    def _entries(self, node):
+        entries = []
+        for child in node.children.values():
+            if child.long_name:
+                entries.extend(_long_name_entries(child.name,
+                                                  child.short_name))
+            if child.is_dir:
+                entries.append(_dir_entry(child.short_name, ATTR_DIRECTORY,
+                                          child.cluster, 0, self.stamp))
+            else:
+                entries.append(_dir_entry(child.short_name, ATTR_ARCHIVE,
+                                          child.cluster, len(child.data),
+                                          self.stamp))
+        return entries
+
+    def _entries_size(self, node):
+        count = 0
+        for child in node.children.values():
+            count += 1
+            if child.long_name:
+                count += -(-(len(child.name) + 1) //
+                           LONG_NAME_CHARS_PER_ENTRY)
+        return count * DIR_ENTRY_SIZE
+
+    def _write_dir(self, node, parent_cluster):
+        """Allocates and writes the children of a directory."""
+        for child in node.children.values():
+            if child.is_dir:
+                self._name_children(child)
+                # . and .. entries
+                child.cluster = self._allocate(self._entries_size(child) +
+                                               2 * DIR_ENTRY_SIZE)
+            else:
+                child.cluster = self._allocate(len(child.data))
+                if child.cluster:
+                    self._write_cluster_data(child.cluster, child.data)
+
+        for child in node.children.values():
+            if child.is_dir:
+                self._write_dir(child, node.cluster)
+
+        entries = self._entries(node)
+        if node.cluster:
+            entries[:0] = [
+                _dir_entry(b'.          ', ATTR_DIRECTORY, node.cluster, 0,
+                           self.stamp),
+                _dir_entry(b'..         ', ATTR_DIRECTORY, parent_cluster,
+                           0, self.stamp)]
+            self._write_cluster_data(node.cluster, b''.join(entries))
+        else:
+            if self.label:
+                entries.insert(0, _dir_entry(self.label, ATTR_VOLUME_ID, 0,
+                                             0, self.stamp))
+            if len(entries) > ROOT_ENTRIES:
+                raise _error(_("Too many files in the root directory"))
+            data = b''.join(entries)
+            self.image[self.root_offset:self.root_offset + len(data)] = data
+
+    def _write_boot_sector(self):
+        total16, total32 = self.total_sectors, 0
+        if self.total_sectors > 0xFFFF:
+            total16, total32 = 0, self.total_sectors
+        serial = int(time.time()) & 0xFFFFFFFF
+        fs_type = ('FAT%d' % self.fat_bits).ljust(8).encode('ascii')
+        boot_sector = struct.pack(
+            '<3s8sHBHBHHBHHHIIBBBI11s8s',
+            b'\xeb\x3c\x90', b'MSWIN4.1', SECTOR_SIZE, self.cluster_sectors,
+            RESERVED_SECTORS, NUM_FATS, ROOT_ENTRIES, total16,
+            MEDIA_DESCRIPTOR, self.fat_sectors, 32, 64, 0, total32,
+            0x80, 0, 0x29, serial, self.label or b'NO NAME    ', fs_type)
+        # The boot code only halts, the image is not bootable
+        boot_sector += b'\xf4\xeb\xfd'
+        self.image[:len(boot_sector)] = boot_sector
+        self.image[510:512] = b'\x55\xaa'
+
+    def _write_fats(self):
+        if self.fat_bits == 12:
+            table = bytearray((len(self.fat) * 3 + 1) // 2)
+            for cluster, value in enumerate(self.fat):
+                offset = cluster * 3 // 2
+                if cluster % 2:
+                    table[offset] |= (value << 4) & 0xF0
+                    table[offset + 1] = (value >> 4) & 0xFF
+                else:
+                    table[offset] = value & 0xFF
+                    table[offset + 1] |= (value >> 8) & 0x0F
+        else:
+            table = struct.pack('<%dH' % len(self.fat), *self.fat)
+        for index in range(NUM_FATS):
+            offset = (RESERVED_SECTORS + index * self.fat_sectors) * (
+                SECTOR_SIZE)
+            self.image[offset:offset + len(table)] = table
+
+    def build(self, root):
+        self._name_children(root)
+        self._write_dir(root, 0)
+        self._write_fats()
+        self._write_boot_sector()
+        return self.image
+
+
+def create_image(output_file, files, size, label=None):
+    """Creates a FAT file system image.
+
+    :param output_file: the path of the image file to create.
+    :param files: a dict of the relative path of the files within the
+        file system -> content of the file (bytes).
+    :param size: the size of the file system, in bytes.
+    :param label: the label of the file system, up to 11 characters.
+    :raises: ImageCreationFailed, if the files do not fit in the file
+        system or if writing the image failed.
+    """
+    if label is not None:
+        if len(label) > 11:
+            raise _error(_("Label %s is longer than 11 characters") % label)
+        label = label.ljust(11).encode('ascii')
+
+    root = _Node('')
+    for path, data in files.items():
+        parts = [part for part in path.replace('\\', '/').split('/')
+                 if part]
+        if not parts:
+            raise _error(_("Invalid file path %s") % path)
+        node = root
+        for part in parts[:-1]:
+            node = node.get_dir(part)
+        node.add_file(parts[-1], bytes(data))
+
+    image = _ImageBuilder(size, label).build(root)
+    try:
+        with open(output_file, 'wb') as f:
+            f.write(image)
+    except (IOError, OSError) as e:
+        raise _error(e)
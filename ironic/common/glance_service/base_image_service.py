@@ -15,10 +15,12 @@
 #    under the License.
 
 
+import collections
 import functools
 import logging
 import os
 import sys
+import threading
 import time
 
 from glanceclient import client
@@ -33,8 +35,27 @@ from ironic.common.glance_service import service_utils
 from ironic.common.i18n import _LE
 
 
+glance_cache_opts = [
+    cfg.IntOpt('metadata_cache_ttl',
+               default=60,
+               help='Time (in seconds) the metadata of an active image '
+                    'fetched from Glance is reused for, instead of being '
+                    'fetched again. Set to 0 to disable the cache.'),
+    cfg.IntOpt('metadata_cache_size',
+               default=256,
+               help='Maximum number of images whose metadata is cached, '
+                    'the least recently used ones are dropped first.'),
+]
+
 LOG = logging.getLogger(__name__)
 CONF = cfg.CONF
+CONF.register_opts(glance_cache_opts, group='glance')
+
+# (fetch time, glance image) by (API version, image id, tenant), the
+# least recently used first. Only active images are cached, the metadata
+# of an active image does not change until it is updated.
+_IMAGES = collections.OrderedDict()
+_IMAGES_LOCK = threading.Lock()
 
 
 def _translate_image_exception(image_id, exc_value):
@@ -59,6 +80,50 @@ def _translate_plain_exception(exc_value):
     return exc_value
 
 
+def _get_cached_image(key):
+    if not CONF.glance.metadata_cache_ttl:
+        return
+    now = time.time()
+    with _IMAGES_LOCK:
+        entry = _IMAGES.pop(key, None)
+        if (entry is not None and
+                now - entry[0] <= CONF.glance.metadata_cache_ttl):
+            _IMAGES[key] = entry
+            return entry[1]
+
+
+def _cache_image(key, image):
+    if (not CONF.glance.metadata_cache_ttl or
+            getattr(image, 'status', None) != 'active'):
+        return
+    with _IMAGES_LOCK:
+        _IMAGES[key] = (time.time(), image)
+        while len(_IMAGES) > CONF.glance.metadata_cache_size:
+            _IMAGES.popitem(last=False)
+
+
+def _forget_image(image_id, updated_at=None):
+    """Drop the cached metadata of an image.
+
+    :param image_id: the image id.
+    :param updated_at: if set, only the metadata older than this update
+        time of the image is dropped.
+    """
+    with _IMAGES_LOCK:
+        for key, (fetched, image) in list(_IMAGES.items()):
+            if key[1] != image_id:
+                continue
+            if (updated_at is None or
+                    getattr(image, 'updated_at', None) != updated_at):
+                del _IMAGES[key]
+
+
+def clear_cache():
+    """Drop all the cached image metadata."""
+    with _IMAGES_LOCK:
+        _IMAGES.clear()
+
+
 def check_image_service(func):
     """Creates a glance client if doesn't exists and calls the function."""
     @functools.wraps(func)
@@ -162,26 +227,39 @@ class BaseImageService(object):
 
         _images = []
         for image in images:
+            _forget_image(image.id, getattr(image, 'updated_at', None))
             if service_utils.is_image_available(self.context, image):
                 _images.append(service_utils.translate_from_glance(image))
 
         return _images
 
     @check_image_service
+    def _get(self, image_id, method='get'):
+        return self.call(method, image_id)
+
     def _show(self, image_href, method='get'):
         """Returns a dict with image data for the given opaque image id.
 
+        The metadata of the active images is cached for
+        CONF.glance.metadata_cache_ttl seconds.
+
         :param image_id: The opaque image identifier.
         :returns: A dict containing image metadata.
 
         :raises: ImageNotFound
         """
-        LOG.debug("Getting image metadata from glance. Image: %s"
-                  % image_href)
         (image_id, self.glance_host,
          self.glance_port, use_ssl) = service_utils.parse_image_ref(image_href)
 
-        image = self.call(method, image_id)
+        # NOTE: Glance checks whether the tenant of the request may see the
+        # image, the cached images are not shared between tenants.
+        key = (self.version, image_id, getattr(self.context, 'tenant', None))
+        image = _get_cached_image(key)
+        if image is None:
+            LOG.debug("Getting image metadata from glance. Image: %s"
+                      % image_href)
+            image = self._get(image_id, method=method)
+            _cache_image(key, image)
 
         if not service_utils.is_image_available(self.context, image):
             raise exception.ImageNotFound(image_id=image_id)
@@ -264,6 +342,7 @@ class BaseImageService(object):
         image_meta.pop('id', None)
 
         image_meta = self.call(method, image_id, **image_meta)
+        _forget_image(image_id)
 
         if self.version == 2 and data:
             self.call('upload', image_id, data)
@@ -286,3 +365,4 @@ class BaseImageService(object):
          glance_port, use_ssl) = service_utils.parse_image_ref(image_id)
 
         self.call(method, image_id)
+        _forget_image(image_id)
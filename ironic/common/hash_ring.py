@@ -16,12 +16,17 @@
 import bisect
 import hashlib
 import threading
+import time
 
+import eventlet
 from oslo_config import cfg
+from oslo_log import log as logging
 import six
 
 from ironic.common import exception
 from ironic.common.i18n import _
+from ironic.common.i18n import _LW
+from ironic.common import metrics
 from ironic.db import api as dbapi
 
 hash_opts = [
@@ -47,11 +52,20 @@ hash_opts = [
                     'conductor services to prepare deployment environments '
                     'and potentially allow the Ironic cluster to recover '
                     'more quickly if a conductor instance is terminated.'),
+    cfg.IntOpt('hash_ring_reset_interval',
+               default=180,
+               help='Interval (in seconds) after which the hash ring is '
+                    'reloaded from the database in the background, to '
+                    'notice the conductors which joined or left the '
+                    'cluster. The hash ring keeps being used while it is '
+                    'reloaded. 0 disables the periodic reload.'),
 ]
 
 CONF = cfg.CONF
 CONF.register_opts(hash_opts)
 
+LOG = logging.getLogger(__name__)
+
 
 class HashRing(object):
     """A stable hash ring.
@@ -162,6 +176,8 @@ class HashRing(object):
 
 class HashRingManager(object):
     _hash_rings = None
+    _updated_at = None
+    _refreshing = False
     _lock = threading.Lock()
 
     def __init__(self):
@@ -170,21 +186,48 @@ class HashRingManager(object):
     @property
     def ring(self):
         # Hot path, no lock
-        if self._hash_rings is not None:
-            return self._hash_rings
+        rings = self._hash_rings
+        if rings is not None:
+            interval = CONF.hash_ring_reset_interval
+            if interval and time.time() - self._updated_at > interval:
+                self._refresh_in_background()
+            return rings
 
         with self._lock:
             if self._hash_rings is None:
-                rings = self._load_hash_rings()
-                self.__class__._hash_rings = rings
+                self._set_rings(self._load_hash_rings())
             return self._hash_rings
 
+    def _set_rings(self, rings):
+        self.__class__._hash_rings = rings
+        self.__class__._updated_at = time.time()
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self.__class__._refreshing = True
+        eventlet.spawn_n(self._refresh)
+
+    def _refresh(self):
+        try:
+            rings = self._load_hash_rings()
+        except Exception as e:
+            LOG.warn(_LW('Failed to reload the hash ring, the current one '
+                         'is kept. Error: %s'), e)
+            rings = None
+        with self._lock:
+            if rings is not None:
+                self._set_rings(rings)
+            self.__class__._refreshing = False
+
     def _load_hash_rings(self):
         rings = {}
         d2c = self.dbapi.get_active_driver_dict()
 
         for driver_name, hosts in d2c.items():
             rings[driver_name] = HashRing(hosts)
+        metrics.get_metrics().incr('hash_ring.reload')
         return rings
 
     @classmethod
@@ -0,0 +1,268 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Copy of raw disk images to block devices, skipping their holes.
+
+Only the data extents of the image, as reported by SEEK_DATA and
+SEEK_HOLE, are read and written. The holes are zeroed on the device with
+the BLKZEROOUT ioctl, which lets the device (eg, an iSCSI target with
+WRITE SAME support) zero them without the zeros being transferred. The
+data is written with O_DIRECT from a single page-aligned buffer reused
+for the whole copy, like "dd oflag=direct" does.
+"""
+
+import errno
+import fcntl
+import io
+import mmap
+import os
+import stat
+import struct
+import time
+
+import eventlet
+from eventlet import tpool
+from oslo_log import log as logging
+import six
+
+from ironic.common.i18n import _LI
+
+LOG = logging.getLogger(__name__)
+
+# Not defined by the os module of Python 2
+SEEK_DATA = getattr(os, 'SEEK_DATA', 3)
+SEEK_HOLE = getattr(os, 'SEEK_HOLE', 4)
+O_DIRECT = getattr(os, 'O_DIRECT', 0)
+# _IO(0x12, 127) from linux/fs.h, zeroes a byte range of a block device
+BLKZEROOUT = 0x127f
+
+# O_DIRECT requires the offsets and sizes of the writes to be multiples of
+# the logical block size of the device, this is the largest common one.
+ALIGNMENT = 4096
+# Seconds between the progress messages
+PROGRESS_INTERVAL = 10
+MIB = 1024 * 1024
+
+
+if six.PY2:
+    _view = buffer  # noqa
+else:
+    def _view(data, offset, size):
+        return memoryview(data)[offset:offset + size]
+
+
+def get_extents(fd, size):
+    """Yield the (offset, length) data extents of a file.
+
+    :param fd: the file descriptor of the file.
+    :param size: the size of the file.
+    """
+    offset = 0
+    while offset < size:
+        try:
+            start = os.lseek(fd, offset, SEEK_DATA)
+        except OSError as e:
+            if e.errno == errno.ENXIO:
+                # No data after offset
+                return
+            if e.errno == errno.EINVAL and offset == 0:
+                # SEEK_DATA is not supported, all the file is data
+                yield 0, size
+                return
+            raise
+        end = min(os.lseek(fd, start, SEEK_HOLE), size)
+        yield start, end - start
+        offset = end
+
+
+def _align_extents(extents, size):
+    """Align the extents on ALIGNMENT, merging the overlapping ones."""
+    current = None
+    for offset, length in extents:
+        start = offset - offset % ALIGNMENT
+        end = min(-(-(offset + length) // ALIGNMENT) * ALIGNMENT, size)
+        if current is not None and start <= current[1]:
+            current[1] = max(current[1], end)
+            continue
+        if current is not None:
+            yield tuple(current)
+        current = [start, end]
+    if current is not None:
+        yield tuple(current)
+
+
+class _Progress(object):
+    """Counts the progress of a copy, and logs it.
+
+    The counters are updated by the native thread doing the copy, the
+    messages are only logged from green threads: the logging locks are
+    green locks once eventlet patched the threading module.
+    """
+
+    def __init__(self, src, dst):
+        self.src = src
+        self.dst = dst
+        self.size = 0
+        self.data = 0
+        self.holes = 0
+        self.started = time.time()
+
+    def update(self, data=0, holes=0):
+        self.data += data
+        self.holes += holes
+
+    def rate(self, now=None):
+        elapsed = (now or time.time()) - self.started
+        return self.data / float(MIB) / max(elapsed, 0.001)
+
+    def report(self):
+        while True:
+            eventlet.sleep(PROGRESS_INTERVAL)
+            LOG.debug('Wrote %(done)d of %(size)d MiB of image %(src)s to '
+                      '%(dst)s, %(rate).1f MiB/s of data.',
+                      {'done': (self.data + self.holes) // MIB,
+                       'size': self.size // MIB, 'src': self.src,
+                       'dst': self.dst, 'rate': self.rate()})
+
+    def finish(self):
+        LOG.info(_LI('Wrote image %(src)s to %(dst)s in %(time).1f seconds: '
+                     '%(data)d MiB of data at %(rate).1f MiB/s, %(holes)d '
+                     'MiB of holes zeroed.'),
+                 {'src': self.src, 'dst': self.dst,
+                  'time': time.time() - self.started,
+                  'data': self.data // MIB, 'rate': self.rate(),
+                  'holes': self.holes // MIB})
+
+
+class _Writer(object):
+
+    def __init__(self, src, dst, block_size):
+        self.block_size = max(ALIGNMENT, block_size - block_size % ALIGNMENT)
+        self.buffer = mmap.mmap(-1, self.block_size)
+        self.zeros = None
+        self.src = io.FileIO(src, 'r')
+        try:
+            try:
+                fd = os.open(dst, os.O_WRONLY | O_DIRECT)
+            except OSError as e:
+                # Some file systems (eg, tmpfs) do not support O_DIRECT
+                if e.errno != errno.EINVAL:
+                    raise
+                fd = os.open(dst, os.O_WRONLY)
+            self.dst = io.FileIO(fd, 'w')
+        except Exception:
+            self.src.close()
+            raise
+        self.is_block_device = stat.S_ISBLK(os.fstat(fd).st_mode)
+        # Why BLKZEROOUT failed, it is not tried again after a failure
+        self.zero_error = None
+
+    def close(self):
+        self.src.close()
+        self.dst.close()
+        self.buffer.close()
+        if self.zeros is not None:
+            self.zeros.close()
+
+    def _write(self, data, size):
+        if size % ALIGNMENT:
+            # NOTE: like dd, O_DIRECT is turned off for the last partial
+            # block of the image.
+            fd = self.dst.fileno()
+            flags = fcntl.fcntl(fd, fcntl.F_GETFL)
+            if flags & O_DIRECT:
+                fcntl.fcntl(fd, fcntl.F_SETFL, flags & ~O_DIRECT)
+        written = 0
+        while written < size:
+            written += self.dst.write(_view(data, written, size - written))
+
+    def copy(self, offset, length):
+        self.dst.seek(offset)
+        while length:
+            size = min(length, self.block_size)
+            # NOTE: reading more than size is harmless, the source is a
+            # regular file and the position is set before each read.
+            self.src.seek(offset)
+            if self.src.readinto(self.buffer) < size:
+                raise IOError(errno.EIO, 'Unexpected end of file',
+                              self.src.name)
+            self._write(self.buffer, size)
+            offset += size
+            length -= size
+
+    def zero(self, offset, length):
+        if self.is_block_device and self.zero_error is None:
+            try:
+                fcntl.ioctl(self.dst.fileno(), BLKZEROOUT,
+                            struct.pack('=QQ', offset, length))
+                return
+            except (IOError, OSError) as e:
+                self.zero_error = e
+        if self.zeros is None:
+            self.zeros = mmap.mmap(-1, self.block_size)
+        self.dst.seek(offset)
+        while length:
+            size = min(length, self.block_size)
+            self._write(self.zeros, size)
+            length -= size
+
+    def sync(self):
+        os.fsync(self.dst.fileno())
+
+
+def _write_image(writer, progress):
+    fd = writer.src.fileno()
+    size = progress.size = os.fstat(fd).st_size
+    position = 0
+    for offset, end in _align_extents(get_extents(fd, size), size):
+        if offset > position:
+            writer.zero(position, offset - position)
+            progress.update(holes=offset - position)
+        writer.copy(offset, end - offset)
+        progress.update(data=end - offset)
+        position = end
+    if position < size:
+        writer.zero(position, size - position)
+        progress.update(holes=size - position)
+    writer.sync()
+
+
+def write_image(src, dst, block_size=MIB):
+    """Write a raw image to a device, skipping the holes of the image.
+
+    The copy runs in a native thread, so that the other green threads
+    keep running, and several images can be written at the same time
+    (eg, to the partitions of a disk). Its progress is logged by a green
+    thread.
+
+    :param src: the path of the raw image.
+    :param dst: the path of the device, or of a file.
+    :param block_size: the size of the buffer, rounded down to a multiple
+                       of 4 KiB.
+    :raises: IOError or OSError if the copy failed.
+    """
+    writer = _Writer(src, dst, block_size)
+    try:
+        progress = _Progress(src, dst)
+        reporter = eventlet.spawn(progress.report)
+        try:
+            tpool.execute(_write_image, writer, progress)
+        finally:
+            reporter.kill()
+        if writer.zero_error is not None:
+            LOG.debug('Failed to zero the holes of image %(src)s on %(dst)s '
+                      'with BLKZEROOUT, zeros were written instead: '
+                      '%(error)s',
+                      {'src': src, 'dst': dst, 'error': writer.zero_error})
+        progress.finish()
+    finally:
+        writer.close()
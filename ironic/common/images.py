@@ -28,10 +28,12 @@ from oslo_config import cfg
 from oslo_log import log as logging
 
 from ironic.common import exception
+from ironic.common import fat
 from ironic.common.glance_service import service_utils as glance_utils
 from ironic.common.i18n import _
 from ironic.common.i18n import _LE
 from ironic.common import image_service as service
+from ironic.common import isofs
 from ironic.common import paths
 from ironic.common import utils
 from ironic.openstack.common import fileutils
@@ -86,22 +88,14 @@ def _create_root_fs(root_directory, files_info):
         shutil.copyfile(src_file, target_file)
 
 
-def _umount_without_raise(mount_dir):
-    """Helper method to umount without raise."""
-    try:
-        utils.umount(mount_dir)
-    except processutils.ProcessExecutionError:
-        pass
-
-
 def create_vfat_image(output_file, files_info=None, parameters=None,
                       parameters_file='parameters.txt', fs_size_kib=100):
     """Creates the fat fs image on the desired file.
 
-    This method copies the given files to a root directory (optional),
+    This method copies the given files to the root of the image (optional),
     writes the parameters specified to the parameters file within the
     root directory (optional), and then creates a vfat image of the root
-    directory.
+    directory. The image is built in memory, without mounting it.
 
     :param output_file: The path to the file where the fat fs image needs
         to be created.
@@ -114,46 +108,28 @@ def create_vfat_image(output_file, files_info=None, parameters=None,
     :param parameters: A dict containing key-value pairs of parameters.
     :param parameters_file: The filename for the parameters file.
     :param fs_size_kib: size of the vfat filesystem in KiB.
-    :raises: ImageCreationFailed, if image creation failed while doing any
-        of filesystem manipulation activities like creating dirs, mounting,
-        creating filesystem, copying files, etc.
+    :raises: ImageCreationFailed, if image creation failed while reading
+        the files, creating the filesystem or writing it.
     """
+    files = {}
     try:
-        utils.dd('/dev/zero', output_file, 'count=1', "bs=%dKiB" % fs_size_kib)
-    except processutils.ProcessExecutionError as e:
+        for src_file, path in (files_info or {}).items():
+            with open(src_file, 'rb') as f:
+                files[path] = f.read()
+    except (OSError, IOError) as e:
+        LOG.exception(_LE("vfat image creation failed. Error: %s"), e)
         raise exception.ImageCreationFailed(image_type='vfat', error=e)
 
-    with utils.tempdir() as tmpdir:
-
-        try:
-            # The label helps ramdisks to find the partition containing
-            # the parameters (by using /dev/disk/by-label/ir-vfd-dev).
-            # NOTE: FAT filesystem label can be up to 11 characters long.
-            utils.mkfs('vfat', output_file, label="ir-vfd-dev")
-            utils.mount(output_file, tmpdir, '-o', 'umask=0')
-        except processutils.ProcessExecutionError as e:
-            raise exception.ImageCreationFailed(image_type='vfat', error=e)
-
-        try:
-            if files_info:
-                _create_root_fs(tmpdir, files_info)
-
-            if parameters:
-                parameters_file = os.path.join(tmpdir, parameters_file)
-                params_list = ['%(key)s=%(val)s' % {'key': k, 'val': v}
-                           for k, v in parameters.items()]
-                file_contents = '\n'.join(params_list)
-                utils.write_to_file(parameters_file, file_contents)
+    if parameters:
+        params_list = ['%(key)s=%(val)s' % {'key': k, 'val': v}
+                       for k, v in parameters.items()]
+        files[parameters_file] = '\n'.join(params_list).encode('utf-8')
 
-        except Exception as e:
-            LOG.exception(_LE("vfat image creation failed. Error: %s"), e)
-            raise exception.ImageCreationFailed(image_type='vfat', error=e)
-
-        finally:
-            try:
-                utils.umount(tmpdir)
-            except processutils.ProcessExecutionError as e:
-                raise exception.ImageCreationFailed(image_type='vfat', error=e)
+    # The label helps ramdisks to find the partition containing
+    # the parameters (by using /dev/disk/by-label/ir-vfd-dev).
+    # NOTE: FAT filesystem label can be up to 11 characters long.
+    fat.create_image(output_file, files, fs_size_kib * 1024,
+                     label="ir-vfd-dev")
 
 
 def _generate_cfg(kernel_params, template, options):
@@ -269,12 +245,11 @@ def create_isolinux_image_for_uefi(output_file, deploy_iso, kernel, ramdisk,
                       CONF.isolinux_bin: ISOLINUX_BIN,
                      }
 
-        # Open the deploy iso used to initiate deploy and copy the
-        # efiboot.img i.e. boot loader to the current temporary
-        # directory.
-        with utils.tempdir() as mountdir:
+        # Extract the efiboot.img i.e. boot loader and the grub.cfg of the
+        # deploy iso used to initiate deploy to a temporary directory.
+        with utils.tempdir() as extractdir:
             uefi_path_info, e_img_rel_path, grub_rel_path = (
-                _mount_deploy_iso(deploy_iso, mountdir))
+                _extract_deploy_iso(deploy_iso, extractdir))
 
             # if either of these variables are not initialized then the
             # uefi efiboot.img cannot be created.
@@ -284,8 +259,6 @@ def create_isolinux_image_for_uefi(output_file, deploy_iso, kernel, ramdisk,
             except (OSError, IOError) as e:
                 LOG.exception(_LE("Creating the filesystem root failed."))
                 raise exception.ImageCreationFailed(image_type='iso', error=e)
-            finally:
-                _umount_without_raise(mountdir)
 
         cfg = _generate_cfg(kernel_params,
                             CONF.isolinux_config_template, isolinux_options)
@@ -517,12 +490,15 @@ def is_whole_disk_image(ctx, instance_info):
     return is_whole_disk_image
 
 
-def _mount_deploy_iso(deploy_iso, mountdir):
-    """This function opens up the deploy iso used for deploy.
+def _extract_deploy_iso(deploy_iso, extract_dir):
+    """Extracts the files needed for uefi boot from the deploy iso.
+
+    The iso is read directly, without mounting it.
 
-    :param: deploy_iso: path to the deploy iso where its
-                        contents are fetched to.
-    :raises: ImageCreationFailed if mount fails.
+    :param: deploy_iso: path to the deploy iso.
+    :param: extract_dir: the directory where the files are extracted to.
+    :raises: ImageCreationFailed if the iso can not be read or if it
+        does not contain efiboot.img and grub.cfg.
     :returns: a tuple consisting of - 1. a dictionary containing
                                          the values as required
                                          by create_isolinux_image,
@@ -531,37 +507,28 @@ def _mount_deploy_iso(deploy_iso, mountdir):
 
     """
     e_img_rel_path = None
-    e_img_path = None
     grub_rel_path = None
-    grub_path = None
 
-    try:
-        utils.mount(deploy_iso, mountdir, '-o', 'loop')
-    except processutils.ProcessExecutionError as e:
-        LOG.exception(_LE("mounting the deploy iso failed."))
-        raise exception.ImageCreationFailed(image_type='iso', error=e)
+    with isofs.IsoImage(deploy_iso) as iso:
+        for path in iso.list_files():
+            name = path.rsplit('/', 1)[-1]
+            if name == 'efiboot.img':
+                e_img_rel_path = path
+            elif name == 'grub.cfg':
+                grub_rel_path = path
 
-    try:
-        for (dir, subdir, files) in os.walk(mountdir):
-            if 'efiboot.img' in files:
-                e_img_path = os.path.join(dir, 'efiboot.img')
-                e_img_rel_path = os.path.relpath(e_img_path,
-                                                 mountdir)
-            if 'grub.cfg' in files:
-                grub_path = os.path.join(dir, 'grub.cfg')
-                grub_rel_path = os.path.relpath(grub_path,
-                                                mountdir)
-    except (OSError, IOError) as e:
-        LOG.exception(_LE("examining the deploy iso failed."))
-        _umount_without_raise(mountdir)
-        raise exception.ImageCreationFailed(image_type='iso', error=e)
-
-    # check if the variables are assigned some values or not during
-    # walk of the mountdir.
-    if not (e_img_path and e_img_rel_path and grub_path and grub_rel_path):
-        error = (_("Deploy iso didn't contain efiboot.img or grub.cfg"))
-        _umount_without_raise(mountdir)
-        raise exception.ImageCreationFailed(image_type='iso', error=error)
+        if not (e_img_rel_path and grub_rel_path):
+            error = (_("Deploy iso didn't contain efiboot.img or grub.cfg"))
+            raise exception.ImageCreationFailed(image_type='iso', error=error)
+
+        e_img_path = os.path.join(extract_dir, 'efiboot.img')
+        grub_path = os.path.join(extract_dir, 'grub.cfg')
+        try:
+            iso.extract(e_img_rel_path, e_img_path)
+            iso.extract(grub_rel_path, grub_path)
+        except exception.ImageCreationFailed:
+            LOG.exception(_LE("examining the deploy iso failed."))
+            raise
 
     uefi_path_info = {e_img_path: e_img_rel_path,
                       grub_path: grub_rel_path}
@@ -0,0 +1,253 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Read-only access to the files of an ISO 9660 image.
+
+The image is read directly, so neither root privileges nor a loop device
+are needed. The file names are the ones the Linux kernel would show once
+the image is mounted: the Rock Ridge names if the image has them, else the
+Joliet names, else the ISO 9660 names in lower case without their version.
+"""
+
+import struct
+
+from ironic.common import exception
+from ironic.common.i18n import _
+
+BLOCK_SIZE = 2048
+# The volume descriptors start at the 17th block
+FIRST_DESCRIPTOR_BLOCK = 16
+DESCRIPTOR_PRIMARY = 1
+DESCRIPTOR_SUPPLEMENTARY = 2
+DESCRIPTOR_TERMINATOR = 255
+STANDARD_IDENTIFIER = b'CD001'
+JOLIET_ESCAPES = (b'%/@', b'%/C', b'%/E')
+
+FLAG_DIRECTORY = 0x02
+# Rock Ridge alternate name flags
+NM_CONTINUE = 0x01
+NM_CURRENT = 0x02
+NM_PARENT = 0x04
+# Limit of the directory tree depth, against loops in corrupted images
+MAX_DEPTH = 64
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def _error(error):
+    return exception.ImageCreationFailed(image_type='iso', error=error)
+
+
+class _Record(object):
+    """A directory record."""
+
+    def __init__(self, data):
+        self.extent, = struct.unpack_from('<I', data, 2)
+        self.size, = struct.unpack_from('<I', data, 10)
+        self.flags = bytearray(data[25:26])[0]
+        name_len = bytearray(data[32:33])[0]
+        self.raw_name = data[33:33 + name_len]
+        # The system use area follows the name, padded to an even offset
+        system_use = 33 + name_len + (1 - name_len % 2)
+        self.system_use = data[system_use:]
+
+    @property
+    def is_dir(self):
+        return bool(self.flags & FLAG_DIRECTORY)
+
+    @property
+    def is_special(self):
+        """Whether the record is the . or .. entry of a directory."""
+        return self.raw_name in (b'\x00', b'\x01')
+
+
+class IsoImage(object):
+    """An ISO 9660 image file, eg::
+
+        with isofs.IsoImage('/path/to/image.iso') as iso:
+            for path in iso.list_files():
+                ...
+            iso.extract('EFI/BOOT/grub.cfg', '/tmp/grub.cfg')
+    """
+
+    def __init__(self, path):
+        try:
+            self._file = open(path, 'rb')
+        except (IOError, OSError) as e:
+            raise _error(e)
+        self._files = None
+        try:
+            self._read_descriptors()
+        except Exception:
+            self._file.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self._file.close()
+
+    def _read(self, offset, size):
+        try:
+            self._file.seek(offset)
+            data = self._file.read(size)
+        except (IOError, OSError) as e:
+            raise _error(e)
+        if len(data) != size:
+            raise _error(_("Truncated ISO image"))
+        return data
+
+    def _read_descriptors(self):
+        primary = joliet = None
+        block = FIRST_DESCRIPTOR_BLOCK
+        while True:
+            data = self._read(block * BLOCK_SIZE, BLOCK_SIZE)
+            if data[1:6] != STANDARD_IDENTIFIER:
+                raise _error(_("Not an ISO 9660 image"))
+            kind = bytearray(data[0:1])[0]
+            if kind == DESCRIPTOR_TERMINATOR:
+                break
+            if kind == DESCRIPTOR_PRIMARY and primary is None:
+                primary = data
+            elif (kind == DESCRIPTOR_SUPPLEMENTARY and joliet is None and
+                    data[88:91] in JOLIET_ESCAPES):
+                joliet = data
+            block += 1
+
+        if primary is None:
+            raise _error(_("No primary volume descriptor in the ISO image"))
+        self._block_size, = struct.unpack_from('<H', primary, 128)
+        self._root = _Record(primary[156:190])
+
+        self._rock_ridge = self._has_rock_ridge(self._root)
+        self._joliet = False
+        if not self._rock_ridge and joliet is not None:
+            self._root = _Record(joliet[156:190])
+            self._joliet = True
+
+    def _has_rock_ridge(self, root):
+        # NOTE: the SUSP "SP" entry of the first record of the root
+        # directory announces the System Use Sharing Protocol, Rock Ridge
+        # images also have "RR" or "NM" entries but checking SP is enough.
+        for record in self._iter_dir(root):
+            return record.system_use[:2] == b'SP'
+        return False
+
+    def _iter_dir(self, directory):
+        """Yields the records of a directory."""
+        offset = directory.extent * self._block_size
+        data = self._read(offset, directory.size)
+        position = 0
+        while position < len(data):
+            length = bytearray(data[position:position + 1])[0]
+            if not length:
+                # Records do not span blocks, skip to the next one
+                position = (position // self._block_size + 1) * (
+                    self._block_size)
+                continue
+            yield _Record(data[position:position + length])
+            position += length
+
+    def _susp_entries(self, record):
+        """Yields the (signature, data) System Use entries of a record."""
+        area = record.system_use
+        while area:
+            position = 0
+            continuation = None
+            while position + 4 <= len(area):
+                signature = area[position:position + 2]
+                length = bytearray(area[position + 2:position + 3])[0]
+                if length < 4:
+                    break
+                data = area[position + 4:position + length]
+                if signature == b'CE':
+                    block, offset, size = struct.unpack_from('<I4xI4xI',
+                                                             data, 0)
+                    continuation = (block * self._block_size + offset, size)
+                elif signature == b'ST':
+                    break
+                else:
+                    yield signature, data
+                position += length
+            area = self._read(*continuation) if continuation else None
+
+    def _name(self, record):
+        if self._rock_ridge:
+            parts = []
+            for signature, data in self._susp_entries(record):
+                if signature != b'NM':
+                    continue
+                flags = bytearray(data[0:1])[0]
+                if flags & (NM_CURRENT | NM_PARENT):
+                    continue
+                parts.append(data[1:])
+                if not flags & NM_CONTINUE:
+                    break
+            if parts:
+                return b''.join(parts).decode('utf-8', 'replace')
+
+        if self._joliet:
+            name = record.raw_name.decode('utf-16-be', 'replace')
+        else:
+            name = record.raw_name.decode('ascii', 'replace').lower()
+        name = name.split(';', 1)[0]
+        if not record.is_dir and name.endswith('.'):
+            name = name[:-1]
+        return name
+
+    def _walk(self, directory, prefix, depth):
+        if depth > MAX_DEPTH:
+            raise _error(_("Too deep directory tree in the ISO image"))
+        for record in self._iter_dir(directory):
+            if record.is_special:
+                continue
+            path = prefix + self._name(record)
+            if record.is_dir:
+                for item in self._walk(record, path + '/', depth + 1):
+                    yield item
+            else:
+                yield path, record
+
+    def list_files(self):
+        """Returns the relative paths of the files of the image."""
+        if self._files is None:
+            self._files = dict(self._walk(self._root, '', 0))
+        return sorted(self._files)
+
+    def extract(self, path, target_file):
+        """Copies a file of the image.
+
+        :param path: the relative path of the file within the image.
+        :param target_file: the path of the file to write.
+        :raises: ImageCreationFailed, if the file is not in the image or if
+            the copy failed.
+        """
+        self.list_files()
+        record = self._files.get(path)
+        if record is None:
+            raise _error(_("%s not found in the ISO image") % path)
+
+        offset = record.extent * self._block_size
+        remaining = record.size
+        try:
+            with open(target_file, 'wb') as target:
+                while remaining:
+                    chunk = self._read(offset, min(remaining,
+                                                   COPY_CHUNK_SIZE))
+                    target.write(chunk)
+                    offset += len(chunk)
+                    remaining -= len(chunk)
+        except (IOError, OSError) as e:
+            raise _error(e)
@@ -12,14 +12,19 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import threading
+
+import eventlet
 from keystoneclient import exceptions as ksexception
 # NOTE(deva): import auth_token so oslo_config pulls in keystone_authtoken
 from keystonemiddleware import auth_token  # noqa
 from oslo_config import cfg
+from oslo_log import log as logging
 from six.moves.urllib import parse
 
 from ironic.common import exception
 from ironic.common.i18n import _
+from ironic.common.i18n import _LW
 
 CONF = cfg.CONF
 
@@ -27,10 +32,23 @@ keystone_opts = [
     cfg.StrOpt('region_name',
                help='The region used for getting endpoints of OpenStack'
                     'services.'),
+    cfg.IntOpt('admin_token_refresh_time',
+               default=300,
+               help='The admin token is cached and shared by all the '
+                    'requests of the service. It is renewed in the '
+                    'background when it expires in less than this number '
+                    'of seconds. Set to 0 to authenticate for every '
+                    'request.'),
 ]
 
 CONF.register_opts(keystone_opts, group='keystone')
 
+LOG = logging.getLogger(__name__)
+
+# A cached token is not used when it expires in less than this number of
+# seconds, the caller may need it for a while.
+_MIN_TOKEN_VALIDITY = 30
+
 
 def _is_apiv3(auth_url, auth_version):
     """Checks if V3 version of API is being used or not.
@@ -122,10 +140,68 @@ def get_service_url(service_type='baremetal', endpoint_type='internal'):
     return endpoint
 
 
+class _AdminTokenCache(object):
+    _auth_ref = None
+    _refreshing = False
+    _lock = threading.Lock()
+
+    def get(self):
+        # Hot path, no lock
+        auth_ref = self._auth_ref
+        if auth_ref is not None and not auth_ref.will_expire_soon(
+                stale_duration=_MIN_TOKEN_VALIDITY):
+            if auth_ref.will_expire_soon(
+                    stale_duration=CONF.keystone.admin_token_refresh_time):
+                self._refresh_in_background()
+            return auth_ref.auth_token
+
+        # NOTE: the greenthreads needing a token while it is fetched wait
+        # for it rather than all authenticating at the same time.
+        with self._lock:
+            auth_ref = self._auth_ref
+            if auth_ref is None or auth_ref.will_expire_soon(
+                    stale_duration=_MIN_TOKEN_VALIDITY):
+                auth_ref = self._authenticate()
+                self.__class__._auth_ref = auth_ref
+            return auth_ref.auth_token
+
+    def _authenticate(self):
+        return _get_ksclient().auth_ref
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self.__class__._refreshing = True
+        eventlet.spawn_n(self._refresh)
+
+    def _refresh(self):
+        try:
+            auth_ref = self._authenticate()
+        except Exception as e:
+            LOG.warn(_LW('Failed to renew the admin token, the current one '
+                         'is kept until it expires. Error: %s'), e)
+            auth_ref = None
+        with self._lock:
+            if auth_ref is not None:
+                self.__class__._auth_ref = auth_ref
+            self.__class__._refreshing = False
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._auth_ref = None
+
+
 def get_admin_auth_token():
-    """Get an admin auth_token from the Keystone."""
-    ksclient = _get_ksclient()
-    return ksclient.auth_token
+    """Get an admin auth_token from the Keystone.
+
+    The token is cached, and renewed in the background before it expires.
+    """
+    if not CONF.keystone.admin_token_refresh_time:
+        ksclient = _get_ksclient()
+        return ksclient.auth_token
+    return _AdminTokenCache().get()
 
 
 def token_expires_soon(token, duration=None):
@@ -0,0 +1,245 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""In-process metrics collection.
+
+Timings and counters are aggregated in memory (fixed bucket latency
+histograms, so the cost of a measurement is a few dictionary operations)
+and can be exported to a local sink: a statsd compatible daemon over UDP
+or a JSON summary file. No outside service is required.
+"""
+
+import bisect
+import collections
+import contextlib
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+
+from oslo_config import cfg
+from oslo_log import log as logging
+
+from ironic.common.i18n import _LW
+
+LOG = logging.getLogger(__name__)
+
+metrics_opts = [
+    cfg.StrOpt('backend',
+               default='none',
+               choices=['none', 'statsd', 'file'],
+               help='Where to export the collected metrics. "none" keeps '
+                    'them in memory only, "statsd" sends every measurement '
+                    'to a statsd compatible daemon over UDP and "file" '
+                    'periodically writes a JSON summary to the file set by '
+                    'the file_path option.'),
+    cfg.StrOpt('prefix',
+               default='ironic',
+               help='Prefix prepended to the name of the exported '
+                    'metrics.'),
+    cfg.StrOpt('statsd_host',
+               default='localhost',
+               help='Host of the statsd daemon.'),
+    cfg.IntOpt('statsd_port',
+               default=8125,
+               help='UDP port of the statsd daemon.'),
+    cfg.StrOpt('file_path',
+               help='File the metrics summary is written to when the '
+                    'backend is "file".'),
+    cfg.IntOpt('file_interval',
+               default=60,
+               help='Minimum number of seconds between two writes of the '
+                    'metrics summary file.'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(metrics_opts, group='metrics')
+
+_METRICS = None
+
+
+class Histogram(object):
+    """Latency histogram with fixed buckets, in milliseconds."""
+
+    # Upper bounds of the buckets, the last bucket holds everything above
+    BUCKETS = (1, 5, 10, 50, 100, 500, 1000, 5000, 10000, 30000, 60000)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value, error=False):
+        self.counts[bisect.bisect_left(self.BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+        if error:
+            self.errors += 1
+
+    def as_dict(self):
+        buckets = ['%d' % b for b in self.BUCKETS] + ['inf']
+        return {'count': self.count,
+                'errors': self.errors,
+                'total_ms': round(self.total, 3),
+                'max_ms': round(self.max, 3),
+                'buckets': dict(zip(buckets, self.counts))}
+
+
+class NoopSink(object):
+    """Keep the metrics in memory only."""
+
+    def timing(self, name, value, error=False):
+        pass
+
+    def counter(self, name, value):
+        pass
+
+    def flush(self, metrics):
+        pass
+
+
+class StatsdSink(NoopSink):
+    """Send every measurement to a statsd compatible daemon."""
+
+    def __init__(self, host, port, prefix):
+        self._target = (host, port)
+        self._prefix = prefix
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def _send(self, data):
+        try:
+            self._socket.sendto(data.encode('utf-8'), self._target)
+        except (socket.error, socket.gaierror) as e:
+            # NOTE: metrics must never break the caller
+            LOG.debug('Failed to send metrics to statsd: %s', e)
+
+    def timing(self, name, value, error=False):
+        self._send('%s.%s:%.3f|ms' % (self._prefix, name, value))
+        if error:
+            self.counter('%s.errors' % name, 1)
+
+    def counter(self, name, value):
+        self._send('%s.%s:%d|c' % (self._prefix, name, value))
+
+
+class FileSink(NoopSink):
+    """Periodically write a JSON summary of the metrics to a file."""
+
+    def __init__(self, path, interval, prefix):
+        self._path = path
+        self._interval = interval
+        self._prefix = prefix
+        self._last_write = 0
+
+    def flush(self, metrics):
+        now = time.time()
+        if now - self._last_write < self._interval:
+            return
+        self._last_write = now
+        summary = {'prefix': self._prefix, 'timestamp': now,
+                   'pid': os.getpid()}
+        summary.update(metrics.snapshot())
+        directory = os.path.dirname(os.path.abspath(self._path))
+        try:
+            with tempfile.NamedTemporaryFile(mode='w', dir=directory,
+                                             delete=False) as f:
+                json.dump(summary, f, indent=2, sort_keys=True)
+            os.rename(f.name, self._path)
+        except (IOError, OSError) as e:
+            LOG.warn(_LW('Failed to write the metrics to %(path)s: '
+                         '%(error)s'), {'path': self._path, 'error': e})
+
+
+class Metrics(object):
+    """Registry of the timings and counters of a process."""
+
+    def __init__(self, sink=None):
+        self._sink = sink or NoopSink()
+        self._lock = threading.Lock()
+        self._timers = collections.defaultdict(Histogram)
+        self._counters = collections.defaultdict(int)
+
+    def timing(self, name, value, error=False):
+        """Record a duration.
+
+        :param name: name of the metric.
+        :param value: the duration, in milliseconds.
+        :param error: whether the measured operation failed.
+        """
+        with self._lock:
+            self._timers[name].add(value, error=error)
+        self._sink.timing(name, value, error=error)
+        self._sink.flush(self)
+
+    def incr(self, name, value=1):
+        """Increment a counter."""
+        with self._lock:
+            self._counters[name] += value
+        self._sink.counter(name, value)
+        self._sink.flush(self)
+
+    @contextlib.contextmanager
+    def timer(self, name):
+        """Context manager measuring the duration of its block.
+
+        An exception raised by the block is counted as an error.
+        """
+        start = time.time()
+        error = False
+        try:
+            yield
+        except Exception:
+            error = True
+            raise
+        finally:
+            self.timing(name, (time.time() - start) * 1000, error=error)
+
+    def get_timer(self, name):
+        """Return the histogram of a timing, or None if it was not used."""
+        return self._timers.get(name)
+
+    def get_counter(self, name):
+        return self._counters.get(name, 0)
+
+    def snapshot(self):
+        with self._lock:
+            return {'timers': dict((name, hist.as_dict())
+                                   for name, hist in self._timers.items()),
+                    'counters': dict(self._counters)}
+
+
+def _get_sink():
+    backend = CONF.metrics.backend
+    if backend == 'statsd':
+        return StatsdSink(CONF.metrics.statsd_host, CONF.metrics.statsd_port,
+                          CONF.metrics.prefix)
+    if backend == 'file' and CONF.metrics.file_path:
+        return FileSink(CONF.metrics.file_path, CONF.metrics.file_interval,
+                        CONF.metrics.prefix)
+    if backend == 'file':
+        LOG.warn(_LW('The "file" metrics backend requires the [metrics] '
+                     'file_path option, the metrics are kept in memory.'))
+    return NoopSink()
+
+
+def get_metrics():
+    """Return the process-wide metrics registry."""
+    global _METRICS
+    if _METRICS is None:
+        _METRICS = Metrics(_get_sink())
+    return _METRICS
@@ -22,6 +22,14 @@ from oslo_policy import policy
 _ENFORCER = None
 CONF = cfg.CONF
 
+# Memo of the decisions of check_creds(), see _get_decisions()
+_DECISIONS = {}
+_DECISIONS_STATE = None
+_MAX_DECISIONS = 1024
+
+# Per-request credentials, which policy rules do not depend on
+_VOLATILE_CREDS = ('auth_token', 'request_id')
+
 
 @lockutils.synchronized('policy_enforcer', 'ironic-')
 def init_enforcer(policy_file=None, rules=None,
@@ -66,3 +74,62 @@ def enforce(rule, target, creds, do_raise=False, exc=None, *args, **kwargs):
     enforcer = get_enforcer()
     return enforcer.enforce(rule, target, creds, do_raise=do_raise,
                             exc=exc, *args, **kwargs)
+
+
+def _get_decisions(enforcer):
+    """Return the memo of the decisions made with the current rules.
+
+    The memo is emptied when the policy rules are reloaded (eg, when the
+    policy file is modified) or when it grows too large.
+    """
+    global _DECISIONS, _DECISIONS_STATE
+
+    # NOTE: the files are only read again if they were modified
+    enforcer.load_rules()
+    # NOTE: the rules of the policy_dirs files are merged into the
+    # current Rules object, so also look at the number of loaded files
+    state = (enforcer.rules, len(getattr(enforcer, '_loaded_files', ())))
+    if (_DECISIONS_STATE is None or state[0] is not _DECISIONS_STATE[0] or
+            state[1] != _DECISIONS_STATE[1] or
+            len(_DECISIONS) >= _MAX_DECISIONS):
+        _DECISIONS = {}
+        _DECISIONS_STATE = state
+    return _DECISIONS
+
+
+def _creds_key(creds):
+    return tuple(sorted((key, tuple(value) if isinstance(value, list)
+                         else value)
+                        for key, value in creds.items()
+                        if key not in _VOLATILE_CREDS))
+
+
+def check_creds(rule, creds, do_raise=False, exc=None):
+    """Check a rule against credentials, which are also the target.
+
+    The decisions are memoized per process and credentials (the
+    per-request values like the token excepted), so a rule is evaluated
+    once per distinct set of credentials until the policy is reloaded.
+
+    :param rule: the name of the rule.
+    :param creds: the credentials dictionary.
+    :param do_raise: whether to raise an exception if the check fails.
+    :param exc: the exception to raise, PolicyNotAuthorized by default.
+    :returns: whether the rule is satisfied.
+    """
+    enforcer = get_enforcer()
+    decisions = _get_decisions(enforcer)
+    key = (rule, _creds_key(creds))
+    try:
+        result = decisions[key]
+    except KeyError:
+        result = decisions[key] = enforcer.enforce(rule, creds, creds)
+    except TypeError:
+        # Unhashable credentials, they can not be memoized
+        result = enforcer.enforce(rule, creds, creds)
+
+    if do_raise and not result:
+        if exc:
+            raise exc()
+        raise policy.PolicyNotAuthorized(rule, creds, creds)
+    return result
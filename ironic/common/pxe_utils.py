@@ -19,6 +19,7 @@ import os
 import jinja2
 from oslo_config import cfg
 from oslo_log import log as logging
+from oslo_utils import excutils
 
 from ironic.common import dhcp_factory
 from ironic.common import exception
@@ -34,6 +35,12 @@ LOG = logging.getLogger(__name__)
 
 PXE_CFG_DIR_NAME = 'pxelinux.cfg'
 
+# Compiled templates, by template path. The templates are compiled again
+# when their file is modified.
+_TEMPLATE_CACHE = {}
+# Jinja environments, by template directory
+_ENVIRONMENTS = {}
+
 
 def get_root_dir():
     """Returns the directory where the config files and images will live."""
@@ -54,6 +61,36 @@ def _ensure_config_dirs_exist(node_uuid):
     fileutils.ensure_tree(os.path.join(root_dir, PXE_CFG_DIR_NAME))
 
 
+def _get_template(template):
+    """Returns the compiled version of a template file.
+
+    The template is only read and compiled again when its file changes.
+
+    :param template: The path of the template file.
+    :returns: A jinja2.Template.
+    """
+    cache_info = _TEMPLATE_CACHE.setdefault(template, {})
+
+    def compile_template(source):
+        tmpl_path = os.path.dirname(template)
+        env = _ENVIRONMENTS.get(tmpl_path)
+        if env is None:
+            env = _ENVIRONMENTS[tmpl_path] = jinja2.Environment(
+                loader=jinja2.FileSystemLoader(tmpl_path))
+        cache_info['template'] = env.from_string(source)
+
+    try:
+        utils.read_cached_file(template, cache_info,
+                               reload_func=compile_template)
+    except Exception:
+        # NOTE: the modification time is already stored, the entry is
+        # dropped so that the template is compiled again on the next call
+        # instead of a missing or stale template being returned.
+        with excutils.save_and_reraise_exception():
+            _TEMPLATE_CACHE.pop(template, None)
+    return cache_info['template']
+
+
 def _build_pxe_config(pxe_options, template):
     """Build the PXE boot configuration file.
 
@@ -65,9 +102,7 @@ def _build_pxe_config(pxe_options, template):
     :returns: A formatted string with the file content.
 
     """
-    tmpl_path, tmpl_file = os.path.split(template)
-    env = jinja2.Environment(loader=jinja2.FileSystemLoader(tmpl_path))
-    template = env.get_template(tmpl_file)
+    template = _get_template(template)
     return template.render({'pxe_options': pxe_options,
                             'ROOT': '{{ ROOT }}',
                             'DISK_IDENTIFIER': '{{ DISK_IDENTIFIER }}',
@@ -81,18 +116,16 @@ def _link_mac_pxe_configs(task):
 
     """
 
-    def create_link(mac_path):
-        utils.unlink_without_raise(mac_path)
-        utils.create_link_without_raise(pxe_config_file_path, mac_path)
-
     pxe_config_file_path = get_pxe_config_file_path(task.node.uuid)
+    link_paths = []
     for mac in driver_utils.get_node_mac_addresses(task):
-        create_link(_get_pxe_mac_path(mac))
+        link_paths.append(_get_pxe_mac_path(mac))
         # TODO(lucasagomes): Backward compatibility with :hexraw,
         # to be removed in M.
         # see: https://bugs.launchpad.net/ironic/+bug/1441710
         if CONF.pxe.ipxe_enabled:
-            create_link(_get_pxe_mac_path(mac, delimiter=''))
+            link_paths.append(_get_pxe_mac_path(mac, delimiter=''))
+    _link_pxe_configs(pxe_config_file_path, link_paths)
 
 
 def _link_ip_address_pxe_configs(task):
@@ -111,11 +144,30 @@ def _link_ip_address_pxe_configs(task):
         raise exception.FailedToGetIPAddressOnPort(_(
             "Failed to get IP address for any port on node %s.") %
             task.node.uuid)
-    for port_ip_address in ip_addrs:
-        ip_address_path = _get_pxe_ip_address_path(port_ip_address)
-        utils.unlink_without_raise(ip_address_path)
-        utils.create_link_without_raise(pxe_config_file_path,
-                                         ip_address_path)
+    _link_pxe_configs(pxe_config_file_path,
+                      [_get_pxe_ip_address_path(port_ip_address)
+                       for port_ip_address in ip_addrs])
+
+
+def _link_pxe_configs(pxe_config_file_path, link_paths):
+    """Point the given symlinks to the PXE configuration file.
+
+    The symlinks which already point to the file are left untouched, so
+    that taking over a node whose configuration is in place only costs a
+    readlink() per symlink.
+
+    :param pxe_config_file_path: The path to the PXE configuration file.
+    :param link_paths: The paths of the symlinks.
+
+    """
+    for link_path in link_paths:
+        try:
+            if os.readlink(link_path) == pxe_config_file_path:
+                continue
+        except OSError:
+            pass
+        utils.unlink_without_raise(link_path)
+        utils.create_link_without_raise(pxe_config_file_path, link_path)
 
 
 def _get_pxe_mac_path(mac, delimiter=None):
@@ -14,6 +14,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import contextlib
+import threading
+
 from oslo_config import cfg
 from oslo_log import log as logging
 from six.moves.urllib import parse
@@ -51,9 +54,86 @@ CONF.import_opt('insecure', 'keystonemiddleware.auth_token',
 
 LOG = logging.getLogger(__name__)
 
+# Connection pools, by connection parameters
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+
+class _ConnectionPool(object):
+    """Pool of Swift connections with the same credentials.
+
+    A swiftclient Connection can not be used by several threads at once,
+    so the connections are borrowed for one operation. The connections of
+    a pool share the authentication token: it is reused until Swift
+    rejects it, in which case the connection which got the rejection
+    authenticates again, and its new token is used by the following
+    connections. The pool also remembers the containers known to exist.
+    """
+
+    def __init__(self, params):
+        self._params = params
+        self._lock = threading.Lock()
+        self._free = []
+        # (storage URL, token) of the last successful authentication
+        self._auth = None
+        self.containers = set()
+
+    @contextlib.contextmanager
+    def connection(self):
+        with self._lock:
+            conn = self._free.pop() if self._free else None
+            auth = self._auth
+        if conn is None:
+            params = dict(self._params)
+            if auth:
+                params['preauthurl'], params['preauthtoken'] = auth
+            conn = swift_client.Connection(**params)
+
+        try:
+            yield conn
+        except (swift_exceptions.ClientException,
+                exception.SwiftOperationError):
+            # The connection is still usable after an error reported by
+            # Swift
+            self._release(conn)
+            raise
+        except Exception:
+            # NOTE: eg, a socket error, do not reuse the connection
+            self._close(conn)
+            raise
+        else:
+            self._release(conn)
+
+    def _release(self, conn):
+        token = getattr(conn, 'token', None)
+        with self._lock:
+            if token:
+                self._auth = (conn.url, token)
+            self._free.append(conn)
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+def _get_pool(params):
+    key = tuple(sorted(params.items()))
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None:
+            pool = _POOLS[key] = _ConnectionPool(params)
+        return pool
+
 
 class SwiftAPI(object):
-    """API for communicating with Swift."""
+    """API for communicating with Swift.
+
+    The objects are cheap to create: the connections to Swift, their
+    authentication token and the containers known to exist are shared by
+    all the objects with the same credentials.
+    """
 
     def __init__(self,
                  user=CONF.keystone_authtoken.admin_user,
@@ -78,7 +158,7 @@ class SwiftAPI(object):
                   'authurl': auth_url,
                   'auth_version': auth_version}
 
-        self.connection = swift_client.Connection(**params)
+        self._pool = _get_pool(params)
 
     def create_object(self, container, object, filename,
                       object_headers=None):
@@ -91,25 +171,42 @@ class SwiftAPI(object):
         :returns: The Swift UUID of the object
         :raises: SwiftOperationError, if any operation with Swift fails.
         """
+        known_container = container in self._pool.containers
+        with self._pool.connection() as conn:
+            if not known_container:
+                self._put_container(conn, container)
+
+            with open(filename, "r") as fileobj:
+                try:
+                    obj_uuid = conn.put_object(container, object, fileobj,
+                                               headers=object_headers)
+                except swift_exceptions.ClientException as e:
+                    if not (known_container and e.http_status == 404):
+                        operation = _("put object")
+                        raise exception.SwiftOperationError(
+                            operation=operation, error=e)
+                    # The container was deleted since it was last used
+                    self._pool.containers.discard(container)
+                    self._put_container(conn, container)
+                    fileobj.seek(0)
+                    try:
+                        obj_uuid = conn.put_object(container, object,
+                                                   fileobj,
+                                                   headers=object_headers)
+                    except swift_exceptions.ClientException as e:
+                        operation = _("put object")
+                        raise exception.SwiftOperationError(
+                            operation=operation, error=e)
+
+        return obj_uuid
+
+    def _put_container(self, conn, container):
         try:
-            self.connection.put_container(container)
+            conn.put_container(container)
         except swift_exceptions.ClientException as e:
             operation = _("put container")
             raise exception.SwiftOperationError(operation=operation, error=e)
-
-        with open(filename, "r") as fileobj:
-
-            try:
-                obj_uuid = self.connection.put_object(container,
-                                                      object,
-                                                      fileobj,
-                                                      headers=object_headers)
-            except swift_exceptions.ClientException as e:
-                operation = _("put object")
-                raise exception.SwiftOperationError(operation=operation,
-                                                    error=e)
-
-        return obj_uuid
+        self._pool.containers.add(container)
 
     def get_temp_url(self, container, object, timeout):
         """Returns the temp url for the given Swift object.
@@ -122,14 +219,18 @@ class SwiftAPI(object):
         :returns: The temp url for the object.
         :raises: SwiftOperationError, if any operation with Swift fails.
         """
-        try:
-            account_info = self.connection.head_account()
-        except swift_exceptions.ClientException as e:
-            operation = _("head account")
-            raise exception.SwiftOperationError(operation=operation,
-                                                error=e)
+        with self._pool.connection() as conn:
+            try:
+                account_info = conn.head_account()
+            except swift_exceptions.ClientException as e:
+                operation = _("head account")
+                raise exception.SwiftOperationError(operation=operation,
+                                                    error=e)
+            # NOTE: get_auth() authenticates again, the connection already
+            # knows the storage URL
+            storage_url = (getattr(conn, 'url', None) or
+                           conn.get_auth()[0])
 
-        storage_url, token = self.connection.get_auth()
         parse_result = parse.urlparse(storage_url)
         swift_object_path = '/'.join((parse_result.path, container, object))
         temp_url_key = account_info['x-account-meta-temp-url-key']
@@ -148,12 +249,17 @@ class SwiftAPI(object):
         :param container: The name of the container in which Swift object
             is placed.
         :param object: The name of the object in Swift to be deleted.
+        :raises: SwiftObjectNotFoundError, if the object does not exist.
         :raises: SwiftOperationError, if operation with Swift fails.
         """
         try:
-            self.connection.delete_object(container, object)
+            with self._pool.connection() as conn:
+                conn.delete_object(container, object)
         except swift_exceptions.ClientException as e:
             operation = _("delete object")
+            if e.http_status == 404:
+                raise exception.SwiftObjectNotFoundError(
+                    obj=object, container=container, operation=operation)
             raise exception.SwiftOperationError(operation=operation, error=e)
 
     def head_object(self, container, object):
@@ -164,12 +270,17 @@ class SwiftAPI(object):
         :param object: The name of the object in Swift
         :returns: The information about the object as returned by
             Swift client's head_object call.
+        :raises: SwiftObjectNotFoundError, if the object does not exist.
         :raises: SwiftOperationError, if operation with Swift fails.
         """
         try:
-            return self.connection.head_object(container, object)
+            with self._pool.connection() as conn:
+                return conn.head_object(container, object)
         except swift_exceptions.ClientException as e:
             operation = _("head object")
+            if e.http_status == 404:
+                raise exception.SwiftObjectNotFoundError(
+                    obj=object, container=container, operation=operation)
             raise exception.SwiftOperationError(operation=operation, error=e)
 
     def update_object_meta(self, container, object, object_headers):
@@ -179,10 +290,33 @@ class SwiftAPI(object):
             is placed.
         :param object: The name of the object in Swift
         :param object_headers: the headers for the object to pass to Swift
+        :raises: SwiftObjectNotFoundError, if the object does not exist.
         :raises: SwiftOperationError, if operation with Swift fails.
         """
         try:
-            self.connection.post_object(container, object, object_headers)
+            with self._pool.connection() as conn:
+                conn.post_object(container, object, object_headers)
         except swift_exceptions.ClientException as e:
             operation = _("post object")
+            if e.http_status == 404:
+                raise exception.SwiftObjectNotFoundError(
+                    obj=object, container=container, operation=operation)
+            raise exception.SwiftOperationError(operation=operation, error=e)
+
+    def list_objects(self, container, prefix=None):
+        """Returns the names of the objects of a container.
+
+        :param container: The name of the container.
+        :param prefix: Only return the objects whose name starts with this
+            prefix.
+        :returns: A list of object names.
+        :raises: SwiftOperationError, if operation with Swift fails.
+        """
+        try:
+            with self._pool.connection() as conn:
+                objects = conn.get_container(container, prefix=prefix,
+                                             full_listing=True)[1]
+        except swift_exceptions.ClientException as e:
+            operation = _("get container")
             raise exception.SwiftOperationError(operation=operation, error=e)
+        return [obj['name'] for obj in objects]
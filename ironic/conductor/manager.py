@@ -43,9 +43,13 @@ a change, etc.
 
 import collections
 import datetime
+import glob
+import hashlib
 import inspect
+import os
 import tempfile
 import threading
+import time
 
 import eventlet
 from eventlet import greenpool
@@ -57,6 +61,7 @@ from oslo_log import log
 import oslo_messaging as messaging
 from oslo_utils import excutils
 from oslo_utils import uuidutils
+import six
 
 from ironic.common import dhcp_factory
 from ironic.common import driver_factory
@@ -73,9 +78,11 @@ from ironic.common import keystone
 from ironic.common import rpc
 from ironic.common import states
 from ironic.common import swift
+from ironic.common import utils as common_utils
 from ironic.conductor import task_manager
 from ironic.conductor import utils
 from ironic.db import api as dbapi
+from ironic.db import query_stats
 from ironic import objects
 from ironic.openstack.common import periodic_task
 
@@ -165,6 +172,20 @@ conductor_opts = [
                    default='ironic_configdrive_container',
                    help='Name of the Swift container to store config drive '
                         'data. Used when configdrive_use_swift is True.'),
+        cfg.StrOpt('configdrive_store_dir',
+                   help='Directory where the conductor stores the config '
+                        'drives, rather than in the instance_info of the '
+                        'nodes, when configdrive_use_swift is False. It '
+                        'must be served over HTTP at configdrive_store_url. '
+                        'Like the Swift temporary URLs, the config drives '
+                        'expire after deploy_callback_timeout seconds, they '
+                        'are deleted then, or when a deploy fails or the '
+                        'node is torn down.'),
+        cfg.StrOpt('configdrive_store_url',
+                   help='URL under which the configdrive_store_dir '
+                        'directory is served, eg "http://1.2.3.4:8080/cd". '
+                        'The config drives are only stored in '
+                        'configdrive_store_dir if this is set too.'),
         cfg.IntOpt('inspect_timeout',
                    default=1800,
                    help='Timeout (seconds) for waiting for node inspection. '
@@ -205,7 +226,7 @@ class ConductorManager(periodic_task.PeriodicTasks):
     """Ironic Conductor manager main class."""
 
     # NOTE(rloo): This must be in sync with rpcapi.ConductorAPI's.
-    RPC_API_VERSION = '1.27'
+    RPC_API_VERSION = '1.28'
 
     target = messaging.Target(version=RPC_API_VERSION)
 
@@ -270,6 +291,14 @@ class ConductorManager(periodic_task.PeriodicTasks):
                 if iface:
                     self._collect_periodic_tasks(iface)
 
+        # NOTE: account the database queries of each periodic task to it.
+        # The wrapped list is set on the instance, it shadows the one of
+        # the class.
+        self._periodic_tasks = [
+            (name, _account_queries('%s.%s' % (self.__class__.__name__, name),
+                                    task))
+            for name, task in self.__class__._periodic_tasks]
+
         # clear all locks held by this conductor before registering
         self.dbapi.clear_node_reservations_for_conductor(self.host)
         try:
@@ -813,6 +842,7 @@ class ConductorManager(periodic_task.PeriodicTasks):
             # because it is a reference to the most recent conductor which
             # deployed a node, and does not limit any future actions.
             # But we do need to clear the instance_info
+            _remove_stored_configdrives(node)
             node.instance_info = {}
             node.save()
 
@@ -1021,6 +1051,75 @@ class ConductorManager(periodic_task.PeriodicTasks):
                         action=action, node=task.node.uuid,
                         state=task.node.provision_state)
 
+    @messaging.expected_exceptions(exception.InvalidParameterValue)
+    def change_nodes_state(self, context, node_ids, action, target):
+        """RPC method to change the power or provision state of nodes.
+
+        Each node is handled as by change_node_power_state() or by the
+        RPC method of the provisioning action: the node is locked and
+        validated synchronously and the state change is spawned on the
+        worker pool. A node which can not be handled does not prevent the
+        other nodes from being handled.
+
+        :param context: an admin context.
+        :param node_ids: a list of ids or uuids of nodes.
+        :param action: 'power' or 'provision'.
+        :param target: the desired power state, or the desired provision
+                       state or one of ironic.common.states.VERBS.
+        :raises: InvalidParameterValue if the action or the target is not
+                 valid.
+        :returns: a dict mapping each node id or uuid to None if its state
+                  change was started, or to the error message telling why
+                  it was not.
+
+        """
+        LOG.debug("RPC change_nodes_state called for %(count)d nodes. The "
+                  "desired %(action)s state is %(target)s.",
+                  {'count': len(node_ids), 'action': action,
+                   'target': target})
+
+        if action == 'power' and target in (states.POWER_ON, states.POWER_OFF,
+                                            states.REBOOT):
+            def change(node_id):
+                self.change_node_power_state(context, node_id, target)
+        elif action == 'provision' and target in (states.ACTIVE,
+                                                  states.REBUILD):
+            def change(node_id):
+                self.do_node_deploy(context, node_id,
+                                    rebuild=target == states.REBUILD)
+        elif action == 'provision' and target == states.DELETED:
+            def change(node_id):
+                self.do_node_tear_down(context, node_id)
+        elif action == 'provision' and target == states.VERBS['inspect']:
+            def change(node_id):
+                self.inspect_hardware(context, node_id)
+        elif action == 'provision' and target in (states.VERBS['manage'],
+                                                  states.VERBS['provide']):
+            def change(node_id):
+                self.do_provisioning_action(context, node_id, target)
+        else:
+            raise exception.InvalidParameterValue(
+                _('The requested %(action)s action "%(target)s" could not '
+                  'be understood.') % {'action': action, 'target': target})
+
+        results = {}
+        for node_id in node_ids:
+            try:
+                change(node_id)
+            except messaging.ExpectedException as e:
+                results[node_id] = six.text_type(e.exc_info[1])
+            except exception.IronicException as e:
+                results[node_id] = six.text_type(e)
+            except Exception as e:
+                LOG.exception(_LE('Failed to change the %(action)s state '
+                                  'of node %(node)s to %(target)s.'),
+                              {'action': action, 'node': node_id,
+                               'target': target})
+                results[node_id] = six.text_type(e)
+            else:
+                results[node_id] = None
+        return results
+
     @periodic_task.periodic_task(
             spacing=CONF.conductor.sync_power_state_interval)
     def _sync_power_states(self, context):
@@ -1131,6 +1230,15 @@ class ConductorManager(periodic_task.PeriodicTasks):
         task.node.conductor_affinity = self.conductor.id
         task.node.save()
 
+    @periodic_task.periodic_task(
+            spacing=CONF.conductor.check_provision_state_interval)
+    def _check_configdrive_expiry(self, context):
+        """Periodically removes the stored config drives which expired.
+
+        :param context: request context.
+        """
+        _remove_expired_configdrives()
+
     @periodic_task.periodic_task(
             spacing=CONF.conductor.sync_local_state_interval)
     def _sync_local_state(self, context):
@@ -1772,6 +1880,15 @@ class ConductorManager(periodic_task.PeriodicTasks):
                 break
 
 
+def _account_queries(name, task):
+    """Wrap a periodic task to account its database queries to it."""
+    @six.wraps(task)
+    def wrapper(*args, **kwargs):
+        with query_stats.account(name):
+            return task(*args, **kwargs)
+    return wrapper
+
+
 def get_vendor_passthru_metadata(route_dict):
     d = {}
     for method, metadata in route_dict.items():
@@ -1869,11 +1986,90 @@ def _store_configdrive(node, configdrive):
             configdrive = swift_api.get_temp_url(container, object_name,
                                                  timeout)
 
+    elif (CONF.conductor.configdrive_store_dir and
+          CONF.conductor.configdrive_store_url):
+        configdrive = _store_configdrive_locally(node, configdrive)
+
     i_info = node.instance_info
     i_info['configdrive'] = configdrive
     node.instance_info = i_info
 
 
+def _store_configdrive_locally(node, configdrive):
+    """Store the config drive in the local config drive directory.
+
+    The files are named after the node and the digest of their content,
+    so that the same config drive is only written once.
+
+    :param node: an Ironic node object.
+    :param configdrive: A gzipped and base64 encoded configdrive.
+    :raises: EnvironmentError if the config drive could not be written.
+    :returns: the URL of the config drive.
+    """
+    if isinstance(configdrive, six.text_type):
+        configdrive = configdrive.encode('utf-8')
+    store_dir = CONF.conductor.configdrive_store_dir
+    name = '%s-%s' % (_get_configdrive_obj_name(node),
+                      hashlib.sha256(configdrive).hexdigest())
+    path = os.path.join(store_dir, name)
+    if os.path.exists(path):
+        # NOTE: the expiry of the config drive starts again
+        os.utime(path, None)
+    else:
+        if not os.path.isdir(store_dir):
+            os.makedirs(store_dir)
+        # NOTE: the file is renamed once complete, the ramdisk must not
+        # download a partial config drive.
+        with tempfile.NamedTemporaryFile(dir=store_dir, prefix=name,
+                                         delete=False) as fileobj:
+            try:
+                fileobj.write(configdrive)
+                fileobj.close()
+                os.chmod(fileobj.name, 0o644)
+                os.rename(fileobj.name, path)
+            except EnvironmentError:
+                with excutils.save_and_reraise_exception():
+                    common_utils.unlink_without_raise(fileobj.name)
+    _remove_stored_configdrives(node, keep=path)
+    return '/'.join([CONF.conductor.configdrive_store_url.rstrip('/'),
+                     name])
+
+
+def _remove_stored_configdrives(node, keep=None):
+    """Remove the config drives of a node from the local directory."""
+    store_dir = CONF.conductor.configdrive_store_dir
+    if not store_dir:
+        return
+    pattern = os.path.join(store_dir,
+                           '%s-*' % _get_configdrive_obj_name(node))
+    for path in glob.glob(pattern):
+        if path != keep:
+            common_utils.unlink_without_raise(path)
+
+
+def _remove_expired_configdrives():
+    """Remove the config drives stored for longer than the deploy timeout.
+
+    The config drives which are not deleted when their node is torn down,
+    eg those of the nodes taken over by another conductor, are removed
+    too.
+    """
+    store_dir = CONF.conductor.configdrive_store_dir
+    expiry = CONF.conductor.deploy_callback_timeout
+    if not (store_dir and expiry):
+        return
+    pattern = os.path.join(store_dir, 'configdrive-*')
+    expired = time.time() - expiry
+    for path in glob.glob(pattern):
+        try:
+            if os.path.getmtime(path) >= expired:
+                continue
+        except OSError:
+            continue
+        LOG.debug('Removing the expired config drive %s.', path)
+        common_utils.unlink_without_raise(path)
+
+
 def do_node_deploy(task, conductor_id, configdrive=None):
     """Prepare the environment and deploy a node."""
     node = task.node
@@ -1884,6 +2080,7 @@ def do_node_deploy(task, conductor_id, configdrive=None):
         args = {'node': task.node.uuid, 'err': e}
         LOG.warning(logmsg, args)
         node.last_error = errmsg % e
+        _remove_stored_configdrives(node)
 
     try:
         try:
@@ -1896,6 +2093,12 @@ def do_node_deploy(task, conductor_id, configdrive=None):
                         '%(node)s to Swift'),
                     _('Failed to upload the configdrive to Swift. '
                       'Error: %s'))
+        except EnvironmentError as e:
+            with excutils.save_and_reraise_exception():
+                handle_failure(e, task,
+                    _LW('Error while storing the configdrive for '
+                        '%(node)s: %(err)s'),
+                    _('Failed to store the configdrive. Error: %s'))
 
         try:
             task.driver.deploy.prepare(task)
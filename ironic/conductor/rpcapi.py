@@ -18,6 +18,7 @@
 Client side of the conductor RPC API.
 """
 
+import collections
 import random
 
 import oslo_messaging as messaging
@@ -70,11 +71,12 @@ class ConductorAPI(object):
     |    1.25 - Added destroy_port
     |    1.26 - Added continue_node_clean
     |    1.27 - Convert continue_node_clean to cast
+    |    1.28 - Added change_nodes_state
 
     """
 
     # NOTE(rloo): This must be in sync with manager.ConductorManager's.
-    RPC_API_VERSION = '1.27'
+    RPC_API_VERSION = '1.28'
 
     def __init__(self, topic=None):
         super(ConductorAPI, self).__init__()
@@ -88,9 +90,24 @@ class ConductorAPI(object):
         self.client = rpc.get_client(target,
                                      version_cap=self.RPC_API_VERSION,
                                      serializer=serializer)
-        # NOTE(deva): this is going to be buggy
         self.ring_manager = hash_ring.HashRingManager()
 
+    def _get_ring(self, driver_name):
+        """Get the hash ring of a driver.
+
+        The hash rings are shared by the process and reloaded periodically
+        (see the hash_ring_reset_interval option); they are reloaded at
+        once when the driver is not found, eg, because the conductor
+        supporting it just registered.
+
+        :raises: DriverNotFound
+        """
+        try:
+            return self.ring_manager[driver_name]
+        except exception.DriverNotFound:
+            self.ring_manager.reset()
+            return self.ring_manager[driver_name]
+
     def get_topic_for(self, node):
         """Get the RPC topic for the conductor service the node is mapped to.
 
@@ -99,10 +116,8 @@ class ConductorAPI(object):
         :raises: NoValidHost
 
         """
-        self.ring_manager.reset()
-
         try:
-            ring = self.ring_manager[node.driver]
+            ring = self._get_ring(node.driver)
             dest = ring.get_hosts(node.uuid)
             return self.topic + "." + dest[0]
         except exception.DriverNotFound:
@@ -122,9 +137,7 @@ class ConductorAPI(object):
         :raises: DriverNotFound
 
         """
-        self.ring_manager.reset()
-
-        hash_ring = self.ring_manager[driver_name]
+        hash_ring = self._get_ring(driver_name)
         host = random.choice(list(hash_ring.hosts))
         return self.topic + "." + host
 
@@ -308,6 +321,61 @@ class ConductorAPI(object):
         cctxt = self.client.prepare(topic=topic or self.topic, version='1.6')
         return cctxt.call(context, 'do_node_tear_down', node_id=node_id)
 
+    def get_topics_for(self, nodes):
+        """Group nodes by the RPC topic of their conductor service.
+
+        :param nodes: a list of node objects.
+        :returns: a tuple (topics, errors): an ordered dict mapping each
+                  RPC topic to the list of its nodes, and a dict mapping
+                  the UUIDs of the nodes which could not be mapped to the
+                  NoValidHost exception.
+
+        """
+        topics = collections.OrderedDict()
+        errors = {}
+        rings = {}
+        for node in nodes:
+            # NOTE: the hash ring of each driver is only looked up once
+            if node.driver not in rings:
+                try:
+                    rings[node.driver] = self._get_ring(node.driver)
+                except exception.DriverNotFound:
+                    reason = (_('No conductor service registered which '
+                                'supports driver %s.') % node.driver)
+                    rings[node.driver] = exception.NoValidHost(reason=reason)
+            ring = rings[node.driver]
+            if isinstance(ring, exception.NoValidHost):
+                errors[node.uuid] = ring
+                continue
+            topic = self.topic + "." + ring.get_hosts(node.uuid)[0]
+            topics.setdefault(topic, []).append(node)
+        return topics, errors
+
+    def change_nodes_state(self, context, node_ids, action, target,
+                           topic=None):
+        """Change the power or provision state of several nodes.
+
+        Synchronously, acquire the lock of each node and start the
+        conductor background task changing its state. All the nodes must
+        be mapped to the conductor of the topic.
+
+        :param context: request context.
+        :param node_ids: a list of node ids or uuids.
+        :param action: 'power' or 'provision'.
+        :param target: the desired power or provision state, or one of
+                       ironic.common.states.VERBS.
+        :param topic: RPC topic. Defaults to self.topic.
+        :raises: InvalidParameterValue if the action or the target is not
+                 valid.
+        :returns: a dict mapping each node id or uuid to None if its state
+                  change was started, or to the error message telling why
+                  it was not.
+
+        """
+        cctxt = self.client.prepare(topic=topic or self.topic, version='1.28')
+        return cctxt.call(context, 'change_nodes_state', node_ids=node_ids,
+                          action=action, target=target)
+
     def do_provisioning_action(self, context, node_id, action, topic=None):
         """Signal to conductor service to perform the given action on a node.
 
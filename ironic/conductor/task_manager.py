@@ -94,12 +94,11 @@ raised in the background thread.):
 
 """
 
-import functools
-
 from oslo_config import cfg
 from oslo_log import log as logging
 from oslo_utils import excutils
 import retrying
+import six
 
 from ironic.common import driver_factory
 from ironic.common import exception
@@ -120,7 +119,7 @@ def require_exclusive_lock(f):
     as the first parameter after "self".
 
     """
-    @functools.wraps(f)
+    @six.wraps(f)
     def wrapper(*args, **kwargs):
         task = args[0] if isinstance(args[0], TaskManager) else args[1]
         if task.shared:
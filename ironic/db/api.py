@@ -44,7 +44,8 @@ class Connection(object):
 
     @abc.abstractmethod
     def get_nodeinfo_list(self, columns=None, filters=None, limit=None,
-                          marker=None, sort_key=None, sort_dir=None):
+                          marker=None, sort_key=None, sort_dir=None,
+                          use_slave=False):
         """Get specific columns for matching nodes.
 
         Return a list of the specified columns for all nodes that match the
@@ -69,12 +70,14 @@ class Connection(object):
         :param sort_key: Attribute by which results should be sorted.
         :param sort_dir: direction in which results should be sorted.
                          (asc, desc)
+        :param use_slave: if True, read from the replica database, if one is
+                          configured. The result may be slightly stale.
         :returns: A list of tuples of the specified columns.
         """
 
     @abc.abstractmethod
     def get_node_list(self, filters=None, limit=None, marker=None,
-                      sort_key=None, sort_dir=None):
+                      sort_key=None, sort_dir=None, use_slave=False):
         """Return a list of nodes.
 
         :param filters: Filters to apply. Defaults to None.
@@ -94,6 +97,8 @@ class Connection(object):
         :param sort_key: Attribute by which results should be sorted.
         :param sort_dir: direction in which results should be sorted.
                          (asc, desc)
+        :param use_slave: if True, read from the replica database, if one is
+                          configured. The result may be slightly stale.
         """
 
     @abc.abstractmethod
@@ -146,34 +151,62 @@ class Connection(object):
         """
 
     @abc.abstractmethod
-    def get_node_by_id(self, node_id):
+    def create_nodes(self, nodes):
+        """Create several nodes and their ports in one transaction.
+
+        Each node is created with all its ports or not at all. A node
+        conflicting with an existing node or port, or with an earlier node
+        of the list, is skipped and does not prevent the others from
+        being created.
+
+        :param nodes: A list of (node values, list of port values) tuples,
+                      the values being as for create_node() and
+                      create_port(). The node_id of the ports is set once
+                      the node is created. A UUID is generated and added
+                      to the values of the nodes and ports without one.
+        :returns: A list with, for each node of the list, None if it was
+                  created or else the exception telling why it was not:
+                  NodeAlreadyExists, DuplicateName, InstanceAssociated,
+                  PortAlreadyExists or MACAlreadyExists.
+        """
+
+    @abc.abstractmethod
+    def get_node_by_id(self, node_id, use_slave=False):
         """Return a node.
 
         :param node_id: The id of a node.
+        :param use_slave: if True, read from the replica database, if one is
+                          configured. The result may be slightly stale.
         :returns: A node.
         """
 
     @abc.abstractmethod
-    def get_node_by_uuid(self, node_uuid):
+    def get_node_by_uuid(self, node_uuid, use_slave=False):
         """Return a node.
 
         :param node_uuid: The uuid of a node.
+        :param use_slave: if True, read from the replica database, if one is
+                          configured. The result may be slightly stale.
         :returns: A node.
         """
 
     @abc.abstractmethod
-    def get_node_by_name(self, node_name):
+    def get_node_by_name(self, node_name, use_slave=False):
         """Return a node.
 
         :param node_name: The logical name of a node.
+        :param use_slave: if True, read from the replica database, if one is
+                          configured. The result may be slightly stale.
         :returns: A node.
         """
 
     @abc.abstractmethod
-    def get_node_by_instance(self, instance):
+    def get_node_by_instance(self, instance, use_slave=False):
         """Return a node.
 
         :param instance: The instance name or uuid to search for.
+        :param use_slave: if True, read from the replica database, if one is
+                          configured. The result may be slightly stale.
         :returns: A node.
         """
 
@@ -208,32 +241,38 @@ class Connection(object):
         """
 
     @abc.abstractmethod
-    def get_port_by_id(self, port_id):
+    def get_port_by_id(self, port_id, use_slave=False):
         """Return a network port representation.
 
         :param port_id: The id of a port.
+        :param use_slave: if True, read from the replica database, if one is
+                          configured. The result may be slightly stale.
         :returns: A port.
         """
 
     @abc.abstractmethod
-    def get_port_by_uuid(self, port_uuid):
+    def get_port_by_uuid(self, port_uuid, use_slave=False):
         """Return a network port representation.
 
         :param port_uuid: The uuid of a port.
+        :param use_slave: if True, read from the replica database, if one is
+                          configured. The result may be slightly stale.
         :returns: A port.
         """
 
     @abc.abstractmethod
-    def get_port_by_address(self, address):
+    def get_port_by_address(self, address, use_slave=False):
         """Return a network port representation.
 
         :param address: The MAC address of a port.
+        :param use_slave: if True, read from the replica database, if one is
+                          configured. The result may be slightly stale.
         :returns: A port.
         """
 
     @abc.abstractmethod
     def get_port_list(self, limit=None, marker=None,
-                      sort_key=None, sort_dir=None):
+                      sort_key=None, sort_dir=None, use_slave=False):
         """Return a list of ports.
 
         :param limit: Maximum number of ports to return.
@@ -242,11 +281,13 @@ class Connection(object):
         :param sort_key: Attribute by which results should be sorted.
         :param sort_dir: direction in which results should be sorted.
                          (asc, desc)
+        :param use_slave: if True, read from the replica database, if one is
+                          configured. The result may be slightly stale.
         """
 
     @abc.abstractmethod
     def get_ports_by_node_id(self, node_id, limit=None, marker=None,
-                             sort_key=None, sort_dir=None):
+                             sort_key=None, sort_dir=None, use_slave=False):
         """List all the ports for a given node.
 
         :param node_id: The integer node ID.
@@ -256,6 +297,8 @@ class Connection(object):
         :param sort_key: Attribute by which results should be sorted
         :param sort_dir: direction in which results should be sorted
                          (asc, desc)
+        :param use_slave: if True, read from the replica database, if one is
+                          configured. The result may be slightly stale.
         :returns: A list of ports.
         """
 
@@ -290,24 +333,28 @@ class Connection(object):
         """
 
     @abc.abstractmethod
-    def get_chassis_by_id(self, chassis_id):
+    def get_chassis_by_id(self, chassis_id, use_slave=False):
         """Return a chassis representation.
 
         :param chassis_id: The id of a chassis.
+        :param use_slave: if True, read from the replica database, if one is
+                          configured. The result may be slightly stale.
         :returns: A chassis.
         """
 
     @abc.abstractmethod
-    def get_chassis_by_uuid(self, chassis_uuid):
+    def get_chassis_by_uuid(self, chassis_uuid, use_slave=False):
         """Return a chassis representation.
 
         :param chassis_uuid: The uuid of a chassis.
+        :param use_slave: if True, read from the replica database, if one is
+                          configured. The result may be slightly stale.
         :returns: A chassis.
         """
 
     @abc.abstractmethod
     def get_chassis_list(self, limit=None, marker=None,
-                         sort_key=None, sort_dir=None):
+                         sort_key=None, sort_dir=None, use_slave=False):
         """Return a list of chassis.
 
         :param limit: Maximum number of chassis to return.
@@ -316,6 +363,8 @@ class Connection(object):
         :param sort_key: Attribute by which results should be sorted.
         :param sort_dir: direction in which results should be sorted.
                          (asc, desc)
+        :param use_slave: if True, read from the replica database, if one is
+                          configured. The result may be slightly stale.
         """
 
     @abc.abstractmethod
@@ -380,6 +429,19 @@ class Connection(object):
         :raises: ConductorNotFound
         """
 
+    @abc.abstractmethod
+    def get_active_conductors_version(self, interval):
+        """Retrieve a value which changes with the active conductors.
+
+        It is much cheaper to get than the result of
+        get_active_driver_dict(), and changes whenever that result may
+        have changed: when a conductor registers, checks in, stops or is
+        no longer active.
+
+        :param interval: Seconds since last check-in of a conductor.
+        :returns: An opaque value, only meant to be compared for equality.
+        """
+
     @abc.abstractmethod
     def get_active_driver_dict(self, interval):
         """Retrieve drivers for the registered and active conductors.
@@ -0,0 +1,125 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Attribution of the database queries to API requests and periodic tasks.
+
+The database backend reports every statement it executes with
+:func:`record`; the statement is accounted to the innermost active
+:func:`account` scope of the current (green)thread, if any. When a scope
+ends, its totals are added to the enclosing scope and a warning is logged
+if they exceed the configured thresholds, eg::
+
+    with query_stats.account('ConductorManager._sync_power_states'):
+        ...
+"""
+
+import contextlib
+import threading
+
+from oslo_config import cfg
+from oslo_log import log as logging
+
+from ironic.common.i18n import _LW
+
+LOG = logging.getLogger(__name__)
+
+query_stats_opts = [
+    cfg.IntOpt('query_count_warning_threshold',
+               default=0,
+               help='Log a warning when an API request or a periodic task '
+                    'issues more than this number of database queries. '
+                    '0 disables the warning.'),
+    cfg.FloatOpt('query_time_warning_threshold',
+                 default=0.0,
+                 help='Log a warning when the database queries of an API '
+                      'request or a periodic task take more than this '
+                      'number of seconds in total. 0 disables the warning.'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(query_stats_opts, 'database')
+
+_local = threading.local()
+
+
+class QueryStats(object):
+    """Totals of the queries issued within a scope."""
+
+    def __init__(self, name):
+        self.name = name
+        self.queries = 0
+        self.elapsed = 0.0
+        # NOTE: only counted when the DB driver reports the number of rows
+        # of a SELECT (eg, MySQL and PostgreSQL, not SQLite)
+        self.rows = 0
+
+    def add(self, queries, elapsed, rows):
+        self.queries += queries
+        self.elapsed += elapsed
+        self.rows += rows
+
+
+def current():
+    """Return the stats of the active scope, or None."""
+    return getattr(_local, 'stats', None)
+
+
+def record(elapsed, rows=0):
+    """Account a query to the active scope.
+
+    :param elapsed: execution time of the query, in seconds.
+    :param rows: number of rows returned or affected by the query.
+    """
+    stats = getattr(_local, 'stats', None)
+    if stats is not None:
+        stats.add(1, elapsed, max(rows, 0))
+
+
+def start(name):
+    """Start accounting the queries to a new scope.
+
+    :returns: a tuple (stats, enclosing stats) to pass to :func:`stop`.
+    """
+    stats = QueryStats(name)
+    outer = current()
+    _local.stats = stats
+    return stats, outer
+
+
+def stop(stats, outer):
+    """End a scope started by :func:`start` and check the thresholds."""
+    _local.stats = outer
+    if outer is not None:
+        outer.add(stats.queries, stats.elapsed, stats.rows)
+
+    count_threshold = CONF.database.query_count_warning_threshold
+    time_threshold = CONF.database.query_time_warning_threshold
+    if ((count_threshold and stats.queries > count_threshold) or
+            (time_threshold and stats.elapsed > time_threshold)):
+        LOG.warn(_LW('%(name)s issued %(queries)d database queries '
+                     'returning %(rows)d rows in %(elapsed).3f seconds.'),
+                 {'name': stats.name, 'queries': stats.queries,
+                  'rows': stats.rows, 'elapsed': stats.elapsed})
+
+
+@contextlib.contextmanager
+def account(name):
+    """Context manager accounting the queries of its block to a scope.
+
+    :param name: name of the scope, used in the warnings.
+    :returns: the :class:`QueryStats` of the scope.
+    """
+    stats, outer = start(name)
+    try:
+        yield stats
+    finally:
+        stop(stats, outer)
@@ -18,6 +18,7 @@
 
 import collections
 import datetime
+import time
 
 from oslo_config import cfg
 from oslo_db import exception as db_exc
@@ -27,6 +28,7 @@ from oslo_log import log
 from oslo_utils import strutils
 from oslo_utils import timeutils
 from oslo_utils import uuidutils
+import sqlalchemy
 from sqlalchemy.orm.exc import NoResultFound
 
 from ironic.common import exception
@@ -35,6 +37,7 @@ from ironic.common.i18n import _LW
 from ironic.common import states
 from ironic.common import utils
 from ironic.db import api
+from ironic.db import query_stats
 from ironic.db.sqlalchemy import models
 
 CONF = cfg.CONF
@@ -47,22 +50,49 @@ LOG = log.getLogger(__name__)
 
 _FACADE = None
 
+# Maximum number of values of an "IN" clause
+_IN_CHUNK_SIZE = 500
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    context._query_start = time.time()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    query_stats.record(time.time() - context._query_start,
+                       rows=cursor.rowcount)
+
+
+def _add_query_accounting(engine):
+    """Report the queries executed on an engine to query_stats."""
+    if not sqlalchemy.event.contains(engine, 'after_cursor_execute',
+                                     _after_cursor_execute):
+        sqlalchemy.event.listen(engine, 'before_cursor_execute',
+                                _before_cursor_execute)
+        sqlalchemy.event.listen(engine, 'after_cursor_execute',
+                                _after_cursor_execute)
+
 
 def _create_facade_lazily():
     global _FACADE
     if _FACADE is None:
-        _FACADE = db_session.EngineFacade.from_config(CONF)
+        facade = db_session.EngineFacade.from_config(CONF)
+        for use_slave in (False, True):
+            _add_query_accounting(facade.get_engine(use_slave=use_slave))
+        _FACADE = facade
     return _FACADE
 
 
-def get_engine():
+def get_engine(use_slave=False):
     facade = _create_facade_lazily()
-    return facade.get_engine()
+    return facade.get_engine(use_slave=use_slave)
 
 
-def get_session(**kwargs):
+def get_session(use_slave=False, **kwargs):
     facade = _create_facade_lazily()
-    return facade.get_session(**kwargs)
+    return facade.get_session(use_slave=use_slave, **kwargs)
 
 
 def get_backend():
@@ -74,9 +104,15 @@ def model_query(model, *args, **kwargs):
     """Query helper for simpler session usage.
 
     :param session: if present, the session to use
+    :param use_slave: if True and no session is given, query the read-only
+                      database set by [database]slave_connection, if any.
+                      Only use it for reads which may be slightly stale;
+                      reads that are part of a reservation or an update
+                      must stay on the primary database.
     """
 
-    session = kwargs.get('session') or get_session()
+    session = (kwargs.get('session') or
+               get_session(use_slave=kwargs.get('use_slave', False)))
     query = session.query(model, *args)
     return query
 
@@ -150,6 +186,59 @@ def _paginate_query(model, limit=None, marker=None, sort_key=None,
     return query.all()
 
 
+def _set_node_defaults(values):
+    """Add the default values of a new node."""
+    if 'uuid' not in values:
+        values['uuid'] = uuidutils.generate_uuid()
+    if 'power_state' not in values:
+        values['power_state'] = states.NOSTATE
+    if 'provision_state' not in values:
+        # TODO(deva): change this to ENROLL
+        values['provision_state'] = states.AVAILABLE
+
+
+def _get_existing(session, column, values):
+    """Return the values already present in a column.
+
+    The values are looked up in chunks, to keep the number of bound
+    parameters of a query below the limits of the databases.
+    """
+    values = list(set(values))
+    existing = set()
+    for start in range(0, len(values), _IN_CHUNK_SIZE):
+        query = model_query(column, session=session).filter(
+            column.in_(values[start:start + _IN_CHUNK_SIZE]))
+        existing.update(row[0] for row in query)
+    return existing
+
+
+def _insert_rows(session, model, rows):
+    """Insert rows in a table with a single executemany() INSERT.
+
+    Unlike saving a model per row, no object is built and the DB-API
+    driver can send the rows together (eg, MySQLdb turns it into a
+    multi-row INSERT). All the rows are given the same keys, the ones
+    missing from a row are set to the default of their column.
+    """
+    if not rows:
+        return
+    table = model.__table__
+    keys = set()
+    for row in rows:
+        keys.update(row)
+    defaults = {'created_at': timeutils.utcnow()}
+    for key in keys:
+        default = table.c[key].default
+        defaults.setdefault(key, default.arg if default is not None and
+                            default.is_scalar else None)
+    params = []
+    for row in rows:
+        row_params = defaults.copy()
+        row_params.update(row)
+        params.append(row_params)
+    session.execute(table.insert(), params)
+
+
 class Connection(api.Connection):
     """SqlAlchemy connection."""
 
@@ -194,7 +283,8 @@ class Connection(api.Connection):
         return query
 
     def get_nodeinfo_list(self, columns=None, filters=None, limit=None,
-                          marker=None, sort_key=None, sort_dir=None):
+                          marker=None, sort_key=None, sort_dir=None,
+                          use_slave=False):
         # list-ify columns default values because it is bad form
         # to include a mutable list in function definitions.
         if columns is None:
@@ -202,14 +292,15 @@ class Connection(api.Connection):
         else:
             columns = [getattr(models.Node, c) for c in columns]
 
-        query = model_query(*columns, base_model=models.Node)
+        query = model_query(*columns, base_model=models.Node,
+                            use_slave=use_slave)
         query = self._add_nodes_filters(query, filters)
         return _paginate_query(models.Node, limit, marker,
                                sort_key, sort_dir, query)
 
     def get_node_list(self, filters=None, limit=None, marker=None,
-                      sort_key=None, sort_dir=None):
-        query = model_query(models.Node)
+                      sort_key=None, sort_dir=None, use_slave=False):
+        query = model_query(models.Node, use_slave=use_slave)
         query = self._add_nodes_filters(query, filters)
         return _paginate_query(models.Node, limit, marker,
                                sort_key, sort_dir, query)
@@ -254,13 +345,7 @@ class Connection(api.Connection):
 
     def create_node(self, values):
         # ensure defaults are present for new nodes
-        if 'uuid' not in values:
-            values['uuid'] = uuidutils.generate_uuid()
-        if 'power_state' not in values:
-            values['power_state'] = states.NOSTATE
-        if 'provision_state' not in values:
-            # TODO(deva): change this to ENROLL
-            values['provision_state'] = states.AVAILABLE
+        _set_node_defaults(values)
 
         node = models.Node()
         node.update(values)
@@ -276,32 +361,150 @@ class Connection(api.Connection):
             raise exception.NodeAlreadyExists(uuid=values['uuid'])
         return node
 
-    def get_node_by_id(self, node_id):
-        query = model_query(models.Node).filter_by(id=node_id)
+    def _check_new_nodes(self, session, nodes):
+        """Return the conflict of each node to create, or None."""
+        node_uuids = set()
+        names = set()
+        instance_uuids = set()
+        port_uuids = set()
+        addresses = set()
+        for node_values, ports_values in nodes:
+            node_uuids.add(node_values['uuid'])
+            names.add(node_values.get('name'))
+            instance_uuids.add(node_values.get('instance_uuid'))
+            for port_values in ports_values:
+                port_uuids.add(port_values['uuid'])
+                addresses.add(port_values.get('address'))
+        names.discard(None)
+        instance_uuids.discard(None)
+        addresses.discard(None)
+
+        # NOTE: a few queries check the whole list against the existing
+        # nodes and ports, the sets are then extended with the nodes to
+        # create to find the duplicates within the list.
+        node_uuids = _get_existing(session, models.Node.uuid, node_uuids)
+        names = _get_existing(session, models.Node.name, names)
+        instance_uuids = _get_existing(session, models.Node.instance_uuid,
+                                       instance_uuids)
+        port_uuids = _get_existing(session, models.Port.uuid, port_uuids)
+        addresses = _get_existing(session, models.Port.address, addresses)
+
+        errors = []
+        for node_values, ports_values in nodes:
+            uuid = node_values['uuid']
+            name = node_values.get('name')
+            instance_uuid = node_values.get('instance_uuid')
+            error = None
+            if uuid in node_uuids:
+                error = exception.NodeAlreadyExists(uuid=uuid)
+            elif name and name in names:
+                error = exception.DuplicateName(name=name)
+            elif instance_uuid and instance_uuid in instance_uuids:
+                error = exception.InstanceAssociated(
+                    instance_uuid=instance_uuid, node=uuid)
+            node_port_uuids = set()
+            node_addresses = set()
+            for port_values in ports_values:
+                if error is not None:
+                    break
+                address = port_values.get('address')
+                if address and (address in addresses or
+                                address in node_addresses):
+                    error = exception.MACAlreadyExists(mac=address)
+                elif (port_values['uuid'] in port_uuids or
+                        port_values['uuid'] in node_port_uuids):
+                    error = exception.PortAlreadyExists(
+                        uuid=port_values['uuid'])
+                node_port_uuids.add(port_values['uuid'])
+                node_addresses.add(address)
+
+            if error is None:
+                node_uuids.add(uuid)
+                names.add(name)
+                instance_uuids.add(instance_uuid)
+                port_uuids.update(node_port_uuids)
+                addresses.update(node_addresses)
+            errors.append(error)
+        return errors
+
+    def _insert_nodes(self, session, nodes):
+        _insert_rows(session, models.Node,
+                     [node_values for node_values, ports_values in nodes])
+        node_ids = {}
+        node_uuids = [node_values['uuid'] for node_values, ports in nodes]
+        for start in range(0, len(node_uuids), _IN_CHUNK_SIZE):
+            query = model_query(models.Node.uuid, models.Node.id,
+                                session=session).filter(
+                models.Node.uuid.in_(node_uuids[start:
+                                                start + _IN_CHUNK_SIZE]))
+            node_ids.update(query)
+
+        ports = []
+        for node_values, ports_values in nodes:
+            for port_values in ports_values:
+                port_values['node_id'] = node_ids[node_values['uuid']]
+                ports.append(port_values)
+        _insert_rows(session, models.Port, ports)
+
+    def create_nodes(self, nodes):
+        for node_values, ports_values in nodes:
+            _set_node_defaults(node_values)
+            for port_values in ports_values:
+                if not port_values.get('uuid'):
+                    port_values['uuid'] = uuidutils.generate_uuid()
+
+        session = get_session()
+        errors = self._check_new_nodes(session, nodes)
+        valid = [(index, nodes[index]) for index, error in enumerate(errors)
+                 if error is None]
+        try:
+            with session.begin():
+                self._insert_nodes(session, [item for index, item in valid])
+        except db_exc.DBDuplicateEntry:
+            # NOTE: a conflicting node or port was created concurrently
+            # since the check. Create the nodes one at a time to find
+            # which ones conflict, the others are still created.
+            LOG.debug('Conflict while creating %d nodes at once, creating '
+                      'them one by one', len(valid))
+            for index, item in valid:
+                try:
+                    with session.begin():
+                        self._insert_nodes(session, [item])
+                except db_exc.DBDuplicateEntry:
+                    errors[index] = (
+                        self._check_new_nodes(session, [item])[0] or
+                        exception.NodeAlreadyExists(uuid=item[0]['uuid']))
+        return errors
+
+    def get_node_by_id(self, node_id, use_slave=False):
+        query = model_query(models.Node, use_slave=use_slave).filter_by(
+            id=node_id)
         try:
             return query.one()
         except NoResultFound:
             raise exception.NodeNotFound(node=node_id)
 
-    def get_node_by_uuid(self, node_uuid):
-        query = model_query(models.Node).filter_by(uuid=node_uuid)
+    def get_node_by_uuid(self, node_uuid, use_slave=False):
+        query = model_query(models.Node, use_slave=use_slave).filter_by(
+            uuid=node_uuid)
         try:
             return query.one()
         except NoResultFound:
             raise exception.NodeNotFound(node=node_uuid)
 
-    def get_node_by_name(self, node_name):
-        query = model_query(models.Node).filter_by(name=node_name)
+    def get_node_by_name(self, node_name, use_slave=False):
+        query = model_query(models.Node, use_slave=use_slave).filter_by(
+            name=node_name)
         try:
             return query.one()
         except NoResultFound:
             raise exception.NodeNotFound(node=node_name)
 
-    def get_node_by_instance(self, instance):
+    def get_node_by_instance(self, instance, use_slave=False):
         if not uuidutils.is_uuid_like(instance):
             raise exception.InvalidUUID(uuid=instance)
 
-        query = (model_query(models.Node)
+        query = (model_query(models.Node, use_slave=use_slave)
                  .filter_by(instance_uuid=instance))
 
         try:
@@ -384,35 +587,39 @@ class Connection(api.Connection):
             ref.update(values)
         return ref
 
-    def get_port_by_id(self, port_id):
-        query = model_query(models.Port).filter_by(id=port_id)
+    def get_port_by_id(self, port_id, use_slave=False):
+        query = model_query(models.Port, use_slave=use_slave).filter_by(
+            id=port_id)
         try:
             return query.one()
         except NoResultFound:
             raise exception.PortNotFound(port=port_id)
 
-    def get_port_by_uuid(self, port_uuid):
-        query = model_query(models.Port).filter_by(uuid=port_uuid)
+    def get_port_by_uuid(self, port_uuid, use_slave=False):
+        query = model_query(models.Port, use_slave=use_slave).filter_by(
+            uuid=port_uuid)
         try:
             return query.one()
         except NoResultFound:
             raise exception.PortNotFound(port=port_uuid)
 
-    def get_port_by_address(self, address):
-        query = model_query(models.Port).filter_by(address=address)
+    def get_port_by_address(self, address, use_slave=False):
+        query = model_query(models.Port, use_slave=use_slave).filter_by(
+            address=address)
         try:
             return query.one()
         except NoResultFound:
             raise exception.PortNotFound(port=address)
 
     def get_port_list(self, limit=None, marker=None,
-                      sort_key=None, sort_dir=None):
+                      sort_key=None, sort_dir=None, use_slave=False):
+        query = model_query(models.Port, use_slave=use_slave)
         return _paginate_query(models.Port, limit, marker,
-                               sort_key, sort_dir)
+                               sort_key, sort_dir, query)
 
     def get_ports_by_node_id(self, node_id, limit=None, marker=None,
-                             sort_key=None, sort_dir=None):
-        query = model_query(models.Port)
+                             sort_key=None, sort_dir=None, use_slave=False):
+        query = model_query(models.Port, use_slave=use_slave)
         query = query.filter_by(node_id=node_id)
         return _paginate_query(models.Port, limit, marker,
                                sort_key, sort_dir, query)
@@ -458,24 +665,27 @@ class Connection(api.Connection):
             if count == 0:
                 raise exception.PortNotFound(port=port_id)
 
-    def get_chassis_by_id(self, chassis_id):
-        query = model_query(models.Chassis).filter_by(id=chassis_id)
+    def get_chassis_by_id(self, chassis_id, use_slave=False):
+        query = model_query(models.Chassis, use_slave=use_slave).filter_by(
+            id=chassis_id)
         try:
             return query.one()
         except NoResultFound:
             raise exception.ChassisNotFound(chassis=chassis_id)
 
-    def get_chassis_by_uuid(self, chassis_uuid):
-        query = model_query(models.Chassis).filter_by(uuid=chassis_uuid)
+    def get_chassis_by_uuid(self, chassis_uuid, use_slave=False):
+        query = model_query(models.Chassis, use_slave=use_slave).filter_by(
+            uuid=chassis_uuid)
         try:
             return query.one()
         except NoResultFound:
             raise exception.ChassisNotFound(chassis=chassis_uuid)
 
     def get_chassis_list(self, limit=None, marker=None,
-                         sort_key=None, sort_dir=None):
+                         sort_key=None, sort_dir=None, use_slave=False):
+        query = model_query(models.Chassis, use_slave=use_slave)
         return _paginate_query(models.Chassis, limit, marker,
-                               sort_key, sort_dir)
+                               sort_key, sort_dir, query)
 
     def create_chassis(self, values):
         if not values.get('uuid'):
@@ -589,6 +799,17 @@ class Connection(api.Connection):
             LOG.warn(_LW('Cleared reservations held by %(hostname)s: '
                          '%(nodes)s'), {'hostname': hostname, 'nodes': nodes})
 
+    def get_active_conductors_version(self, interval=None):
+        if interval is None:
+            interval = CONF.conductor.heartbeat_timeout
+
+        limit = timeutils.utcnow() - datetime.timedelta(seconds=interval)
+        query = (model_query(sqlalchemy.func.count(models.Conductor.id),
+                             sqlalchemy.func.max(models.Conductor.updated_at))
+                 .filter_by(online=True)
+                 .filter(models.Conductor.updated_at >= limit))
+        return tuple(query.one())
+
     def get_active_driver_dict(self, interval=None):
         if interval is None:
             interval = CONF.conductor.heartbeat_timeout
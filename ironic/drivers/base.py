@@ -22,6 +22,8 @@ import collections
 import copy
 import functools
 import inspect
+import threading
+import time
 
 import eventlet
 from oslo_log import log as logging
@@ -30,10 +32,15 @@ import six
 
 from ironic.common import exception
 from ironic.common.i18n import _LE
+from ironic.common import metrics
 from ironic.openstack.common import periodic_task
 
 LOG = logging.getLogger(__name__)
 
+# Driver calls being measured by the current (green)thread, see
+# _measure_driver_call()
+_measured_calls = threading.local()
+
 
 @six.add_metaclass(abc.ABCMeta)
 class BaseDriver(object):
@@ -123,6 +130,81 @@ class BaseDriver(object):
         return properties
 
 
+def _is_task_method(name, value):
+    """Whether an interface attribute is a public method acting on a task."""
+    if (name.startswith('_') or not inspect.isfunction(value) or
+            getattr(value, '__isabstractmethod__', False)):
+        return False
+    if getattr(value, '_vendor_metadata', None) is not None:
+        # passthru methods are wrapped, their signature is lost
+        return True
+    # NOTE: look through the decorators keeping the wrapped function (eg,
+    # task_manager.require_exclusive_lock), their wrappers only take
+    # *args and **kwargs.
+    while getattr(value, '__wrapped__', None) is not None:
+        value = value.__wrapped__
+    args = inspect.getargspec(value).args
+    return len(args) > 1 and args[1] == 'task'
+
+
+def _measure_driver_call(func):
+    """Record the latency and the failures of a driver interface method.
+
+    The measurement is named driver.<driver>.<interface>.<method>. A call
+    made from the same method of a parent class (eg, through super()) is
+    not measured twice.
+    """
+    method = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        interface = getattr(self, 'interface_type', 'base')
+        active = getattr(_measured_calls, 'active', None)
+        if active is None:
+            active = _measured_calls.active = set()
+        key = (interface, method)
+        if key in active:
+            return func(self, *args, **kwargs)
+
+        task = args[0] if args else kwargs.get('task')
+        driver = getattr(getattr(task, 'node', None), 'driver', None)
+        if not isinstance(driver, six.string_types):
+            driver = 'unknown'
+
+        active.add(key)
+        start = time.time()
+        error = False
+        try:
+            return func(self, *args, **kwargs)
+        except Exception:
+            error = True
+            raise
+        finally:
+            active.discard(key)
+            metrics.get_metrics().timing(
+                'driver.%s.%s.%s' % (driver, interface, method),
+                (time.time() - start) * 1000, error=error)
+    return wrapper
+
+
+class InterfaceMetaclass(abc.ABCMeta):
+    """Metaclass of the driver interfaces.
+
+    The public methods of an interface which act on a task (ie, which take
+    a task as their first argument, and the vendor passthru methods) are
+    wrapped so that their latency and failures are recorded per driver,
+    interface and method in :mod:`ironic.common.metrics`.
+    """
+
+    def __new__(mcs, name, bases, dict_):
+        for attr, value in list(dict_.items()):
+            if _is_task_method(attr, value):
+                dict_[attr] = _measure_driver_call(value)
+        return super(InterfaceMetaclass, mcs).__new__(mcs, name, bases,
+                                                      dict_)
+
+
+@six.add_metaclass(InterfaceMetaclass)
 class BaseInterface(object):
     """A base interface implementing common functions for Driver Interfaces."""
     interface_type = 'base'
@@ -380,9 +462,10 @@ class PowerInterface(BaseInterface):
         """
 
 
-@six.add_metaclass(abc.ABCMeta)
+@six.add_metaclass(InterfaceMetaclass)
 class ConsoleInterface(object):
     """Interface for console-related actions."""
+    interface_type = 'console'
 
     @abc.abstractmethod
     def get_properties(self):
@@ -431,9 +514,10 @@ class ConsoleInterface(object):
         """
 
 
-@six.add_metaclass(abc.ABCMeta)
+@six.add_metaclass(InterfaceMetaclass)
 class RescueInterface(object):
     """Interface for rescue-related actions."""
+    interface_type = 'rescue'
 
     @abc.abstractmethod
     def get_properties(self):
@@ -540,7 +624,7 @@ def driver_passthru(http_methods, method=None, async=True, description=None):
                      description=description)
 
 
-@six.add_metaclass(abc.ABCMeta)
+@six.add_metaclass(InterfaceMetaclass)
 class VendorInterface(object):
     """Interface for all vendor passthru functionality.
 
@@ -551,6 +635,7 @@ class VendorInterface(object):
     Methods decorated with @driver_passthru should be short-lived because
     it is a blocking call.
     """
+    interface_type = 'vendor'
 
     def __new__(cls, *args, **kwargs):
         super_new = super(VendorInterface, cls).__new__
@@ -12,19 +12,53 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
+import contextlib
+import threading
+
+from eventlet import semaphore
 from oslo_config import cfg
 from oslo_log import log
 from oslo_serialization import jsonutils
 import requests
+from requests import adapters
 
 from ironic.common import exception
 from ironic.common.i18n import _
+from ironic.common.i18n import _LE
+from ironic.common import metrics
 
 agent_opts = [
     cfg.StrOpt('agent_api_version',
                default='v1',
                help='API version to use for communicating with the ramdisk '
-                    'agent.')
+                    'agent.'),
+    cfg.IntOpt('connect_timeout',
+               default=10,
+               help='Time (in seconds) to wait for a connection to the '
+                    'ramdisk agent to be established.'),
+    cfg.IntOpt('read_timeout',
+               default=60,
+               help='Time (in seconds) to wait for the ramdisk agent to '
+                    'answer a status request or an asynchronous command.'),
+    cfg.IntOpt('command_timeout',
+               default=600,
+               help='Time (in seconds) to wait for the ramdisk agent to '
+                    'answer a synchronous command (eg, installing the '
+                    'boot loader), which only returns once the command '
+                    'is done.'),
+    cfg.IntOpt('max_connections_per_agent',
+               default=2,
+               help='Maximum number of concurrent requests, and of '
+                    'connections kept open, to a ramdisk agent. The '
+                    'requests to an agent exceeding it wait for a '
+                    'connection to be free.'),
+    cfg.IntOpt('connection_wait_timeout',
+               default=30,
+               help='Time (in seconds) a request to a ramdisk agent waits '
+                    'for a connection to be free, when '
+                    'max_connections_per_agent requests to the agent are '
+                    'running, before failing.'),
 ]
 
 CONF = cfg.CONF
@@ -32,14 +66,59 @@ CONF.register_opts(agent_opts, group='agent')
 
 LOG = log.getLogger(__name__)
 
+# Number of agents whose connection pools are kept by the shared session,
+# the least recently used pools are closed first.
+MAX_POOLED_AGENTS = 512
+
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+# Semaphores bounding the concurrent requests to each agent, by agent URL,
+# the least recently used first.
+_SLOTS = collections.OrderedDict()
+
+
+def _get_session():
+    """Return the HTTP session shared by all the agent clients.
+
+    The session is thread safe, its connections to each agent are pooled
+    and reused by the following requests, instead of a new connection
+    being opened for every client. The pools do not block, the requests
+    waiting for a connection are bounded by _get_slots().
+    """
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            session = requests.Session()
+            session.headers.update({'Content-Type': 'application/json'})
+            adapter = adapters.HTTPAdapter(
+                pool_connections=MAX_POOLED_AGENTS,
+                pool_maxsize=CONF.agent.max_connections_per_agent)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _SESSION = session
+    return _SESSION
+
+
+def _get_slots(agent_url):
+    """Return the semaphore bounding the concurrent requests to an agent."""
+    with _SESSION_LOCK:
+        slots = _SLOTS.pop(agent_url, None)
+        if slots is None:
+            slots = semaphore.Semaphore(CONF.agent.max_connections_per_agent)
+        _SLOTS[agent_url] = slots
+        # NOTE: the semaphore of an agent may be dropped while requests
+        # hold it, the next requests to the agent then get a new one.
+        while len(_SLOTS) > MAX_POOLED_AGENTS:
+            _SLOTS.popitem(last=False)
+        return slots
+
 
 class AgentClient(object):
     """Client for interacting with nodes via a REST API."""
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({'Content-Type': 'application/json'})
+        self.session = _get_session()
 
-    def _get_command_url(self, node):
+    def _get_agent_url(self, node):
         agent_url = node.driver_internal_info.get('agent_url')
         if not agent_url:
             # (lintan) Keep backwards compatible with booted nodes before this
@@ -49,10 +128,33 @@ class AgentClient(object):
             raise exception.IronicException(_('Agent driver requires '
                                               'agent_url in '
                                               'driver_internal_info'))
+        return agent_url
+
+    def _get_command_url(self, node):
         return ('%(agent_url)s/%(api_version)s/commands' %
-                {'agent_url': agent_url,
+                {'agent_url': self._get_agent_url(node),
                  'api_version': CONF.agent.agent_api_version})
 
+    @contextlib.contextmanager
+    def _connection_slot(self, node):
+        """Wait for a connection to the agent of a node to be free.
+
+        :param node: the node the agent is running on.
+        :raises: AgentConnectionFailed if no connection was free after
+                 [agent]connection_wait_timeout seconds.
+        """
+        slots = _get_slots(self._get_agent_url(node))
+        timeout = CONF.agent.connection_wait_timeout
+        if not slots.acquire(timeout=timeout):
+            raise exception.AgentConnectionFailed(
+                node=node.uuid,
+                reason=_('no connection was free after %s seconds') %
+                timeout)
+        try:
+            yield
+        finally:
+            slots.release()
+
     def _get_command_body(self, method, params):
         return jsonutils.dumps({
             'name': method,
@@ -65,9 +167,20 @@ class AgentClient(object):
         request_params = {
             'wait': str(wait).lower()
         }
-        response = self.session.post(url,
-                                     params=request_params,
-                                     data=body)
+        read_timeout = (CONF.agent.command_timeout if wait
+                        else CONF.agent.read_timeout)
+        try:
+            with self._connection_slot(node):
+                with metrics.get_metrics().timer('agent.command.%s' %
+                                                 method):
+                    response = self.session.post(
+                        url, params=request_params, data=body,
+                        timeout=(CONF.agent.connect_timeout, read_timeout))
+        except requests.RequestException as e:
+            LOG.error(_LE('Failed to invoke command %(method)s on the agent '
+                          'of node %(node)s: %(error)s'),
+                      {'method': method, 'node': node.uuid, 'error': e})
+            raise exception.AgentConnectionFailed(node=node.uuid, reason=e)
 
         # TODO(russellhaering): real error handling
         try:
@@ -83,7 +196,15 @@ class AgentClient(object):
 
     def get_commands_status(self, node):
         url = self._get_command_url(node)
-        res = self.session.get(url)
+        try:
+            with self._connection_slot(node):
+                with metrics.get_metrics().timer(
+                        'agent.get_commands_status'):
+                    res = self.session.get(
+                        url, timeout=(CONF.agent.connect_timeout,
+                                      CONF.agent.read_timeout))
+        except requests.RequestException as e:
+            raise exception.AgentConnectionFailed(node=node.uuid, reason=e)
         return res.json()['commands']
 
     def prepare_image(self, node, image_info, wait=False):
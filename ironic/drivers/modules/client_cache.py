@@ -0,0 +1,101 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+"""
+Registry of the clients of the vendor management controllers.
+
+Creating a client of a management controller (eg, iLO or iRMC) often
+means a TLS handshake or an authentication, so the clients are kept
+and reused by the following calls to the same controller with the same
+parameters.
+"""
+
+import collections
+import hashlib
+import threading
+import time
+
+from oslo_config import cfg
+from oslo_serialization import jsonutils
+
+
+client_cache_opts = [
+    cfg.IntOpt('vendor_client_cache_size',
+               default=256,
+               help='Maximum number of clients of the vendor management '
+                    'controllers (eg, iLO, iRMC, SeaMicro or DRAC) kept '
+                    'for reuse, the least recently used ones are dropped '
+                    'first. Set to 0 to create a client for every call.'),
+    cfg.IntOpt('vendor_client_idle_timeout',
+               default=600,
+               help='Time (in seconds) after which an unused client of a '
+                    'vendor management controller is dropped.'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(client_cache_opts)
+
+# (last use time, client) by (driver, address, parameters digest), the
+# least recently used first
+_CLIENTS = collections.OrderedDict()
+_LOCK = threading.Lock()
+
+
+def _digest(params):
+    data = jsonutils.dumps(params, sort_keys=True)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def _expire(now):
+    timeout = CONF.vendor_client_idle_timeout
+    size = CONF.vendor_client_cache_size
+    while _CLIENTS:
+        key, (last_used, client) = next(iter(_CLIENTS.items()))
+        if len(_CLIENTS) <= size and now - last_used <= timeout:
+            break
+        del _CLIENTS[key]
+
+
+def get_client(driver, address, params, factory):
+    """Return a client of a management controller.
+
+    :param driver: the kind of client, eg 'ilo'.
+    :param address: the address of the management controller.
+    :param params: a JSON serializable dict of all the parameters of the
+        client, including the credentials. A client is only reused with
+        the same parameters.
+    :param factory: a callable creating the client, when none can be
+        reused.
+    :returns: the client.
+    """
+    if not CONF.vendor_client_cache_size:
+        return factory()
+
+    key = (driver, address, _digest(params))
+    now = time.time()
+    with _LOCK:
+        entry = _CLIENTS.pop(key, None)
+        if (entry is not None and
+                now - entry[0] <= CONF.vendor_client_idle_timeout):
+            _CLIENTS[key] = (now, entry[1])
+            return entry[1]
+
+    client = factory()
+    with _LOCK:
+        _CLIENTS[key] = (now, client)
+        _expire(now)
+    return client
+
+
+def clear():
+    """Drop all the clients."""
+    with _LOCK:
+        _CLIENTS.clear()
@@ -15,17 +15,18 @@
 
 
 import base64
+import binascii
 import contextlib
-import gzip
 import math
 import os
 import re
-import shutil
 import socket
 import stat
 import tempfile
 import time
+import zlib
 
+import eventlet
 from oslo_concurrency import processutils
 from oslo_config import cfg
 from oslo_log import log as logging
@@ -40,7 +41,9 @@ from ironic.common import disk_partitioner
 from ironic.common import exception
 from ironic.common.i18n import _
 from ironic.common.i18n import _LE
+from ironic.common.i18n import _LI
 from ironic.common.i18n import _LW
+from ironic.common import image_writer
 from ironic.common import images
 from ironic.common import states
 from ironic.common import utils
@@ -67,9 +70,16 @@ deploy_opts = [
 
 CONF = cfg.CONF
 CONF.register_opts(deploy_opts, group='deploy')
+CONF.import_opt('configdrive_store_dir', 'ironic.conductor.manager',
+                group='conductor')
+CONF.import_opt('configdrive_store_url', 'ironic.conductor.manager',
+                group='conductor')
 
 LOG = logging.getLogger(__name__)
 
+_BLOCK_SIZE_UNITS = {'': 1, 'K': units.Ki, 'M': units.Mi, 'G': units.Gi}
+_CONFIGDRIVE_CHUNK_SIZE = 64 * units.Ki
+
 VALID_ROOT_DEVICE_HINTS = set(('size', 'model', 'wwn', 'serial', 'vendor'))
 
 
@@ -311,12 +321,44 @@ def dd(src, dst):
     utils.dd(src, dst, 'bs=%s' % CONF.deploy.dd_block_size, 'oflag=direct')
 
 
+def _get_dd_block_size():
+    """Return [deploy]dd_block_size in bytes, or None if dd only knows it."""
+    match = re.match(r'^(\d+)([KMG]?)$', CONF.deploy.dd_block_size)
+    if not match:
+        return None
+    return int(match.group(1)) * _BLOCK_SIZE_UNITS[match.group(2)]
+
+
 def populate_image(src, dst):
     data = images.qemu_img_info(src)
-    if data.file_format == 'raw':
-        dd(src, dst)
-    else:
+    if data.file_format != 'raw':
         images.convert_image(src, dst, 'raw', True)
+        return
+
+    block_size = _get_dd_block_size()
+    # NOTE: the image is written by the conductor itself, skipping its
+    # holes, when it can open the device. Otherwise dd is run as root.
+    if not block_size:
+        LOG.info(_LI('Writing image %(src)s to %(dst)s with dd, its holes '
+                     'are not skipped: the [deploy]dd_block_size %(size)s '
+                     'is not a number of bytes, KiB, MiB or GiB.'),
+                 {'src': src, 'dst': dst,
+                  'size': CONF.deploy.dd_block_size})
+        dd(src, dst)
+        return
+    if not os.access(dst, os.W_OK):
+        LOG.info(_LI('Writing image %(src)s to %(dst)s with dd, its holes '
+                     'are not skipped: the conductor can not write to the '
+                     'device.'), {'src': src, 'dst': dst})
+        dd(src, dst)
+        return
+
+    try:
+        image_writer.write_image(src, dst, block_size)
+    except (IOError, OSError) as e:
+        msg = (_('Failed to write image %(src)s to %(dst)s: %(error)s') %
+               {'src': src, 'dst': dst, 'error': e})
+        raise exception.InstanceDeployFailure(msg)
 
 
 # TODO(rameshg87): Remove this one-line method and use utils.mkfs
@@ -479,9 +521,60 @@ def destroy_disk_metadata(dev, node_uuid):
                            'error': err.stderr})
 
 
+def _get_local_configdrive(url):
+    """Return the path of a config drive stored by this conductor, if any.
+
+    :param url: the URL of the config drive.
+    """
+    store_dir = CONF.conductor.configdrive_store_dir
+    store_url = CONF.conductor.configdrive_store_url
+    if not store_dir or not store_url:
+        return None
+    prefix = store_url.rstrip('/') + '/'
+    if not url.startswith(prefix):
+        return None
+    name = url[len(prefix):]
+    if not name or '/' in name or name.startswith('.'):
+        return None
+    path = os.path.join(store_dir, name)
+    return path if os.path.isfile(path) else None
+
+
+def _read_chunks(fileobj):
+    return iter(lambda: fileobj.read(_CONFIGDRIVE_CHUNK_SIZE), b'')
+
+
+def _decode_configdrive(chunks, output):
+    """Base64 decode and gunzip a config drive, one chunk at a time.
+
+    :param chunks: an iterable of the chunks of the encoded config drive.
+    :param output: the file object the config drive is written to.
+    :raises: TypeError or binascii.Error if it is not base64 encoded,
+        zlib.error if it is not gzipped.
+    """
+    # NOTE: 16 + MAX_WBITS tells zlib to expect a gzip header
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    pending = b''
+    for chunk in chunks:
+        if isinstance(chunk, six.text_type):
+            chunk = chunk.encode('utf-8')
+        # Base64 is decoded by groups of 4 characters, whitespace aside
+        data = pending + b''.join(chunk.split())
+        usable = len(data) - len(data) % 4
+        pending = data[usable:]
+        output.write(decompressor.decompress(base64.b64decode(
+            data[:usable])))
+    if pending:
+        raise TypeError('Incorrect padding')
+    output.write(decompressor.flush())
+
+
 def _get_configdrive(configdrive, node_uuid):
     """Get the information about size and location of the configdrive.
 
+    The config drive is decoded and uncompressed while it is downloaded,
+    it is never held in memory as a whole.
+
     :param configdrive: Base64 encoded Gzipped configdrive content or
         configdrive HTTP URL.
     :param node_uuid: Node's uuid. Used for logging.
@@ -493,48 +586,58 @@ def _get_configdrive(configdrive, node_uuid):
     """
     # Check if the configdrive option is a HTTP URL or the content directly
     is_url = utils.is_http_url(configdrive)
+    local_file = None
     if is_url:
+        local_path = _get_local_configdrive(configdrive)
         try:
-            data = requests.get(configdrive).content
-        except requests.exceptions.RequestException as e:
+            if local_path:
+                local_file = open(local_path, 'rb')
+                chunks = _read_chunks(local_file)
+            else:
+                response = requests.get(configdrive, stream=True)
+                response.raise_for_status()
+                chunks = response.iter_content(_CONFIGDRIVE_CHUNK_SIZE)
+        except (requests.exceptions.RequestException, EnvironmentError) as e:
             raise exception.InstanceDeployFailure(
                 _("Can't download the configdrive content for node %(node)s "
                   "from '%(url)s'. Reason: %(reason)s") %
                 {'node': node_uuid, 'url': configdrive, 'reason': e})
     else:
-        data = configdrive
+        chunks = [configdrive]
 
+    configdrive_file = tempfile.NamedTemporaryFile(delete=False,
+                                                   prefix='configdrive')
     try:
-        data = six.BytesIO(base64.b64decode(data))
-    except TypeError:
+        _decode_configdrive(chunks, configdrive_file)
+        # Get the file size and convert to MiB
+        bytes_ = configdrive_file.tell()
+        configdrive_mb = int(math.ceil(float(bytes_) / units.Mi))
+    except (TypeError, binascii.Error):
+        utils.unlink_without_raise(configdrive_file.name)
         error_msg = (_('Config drive for node %s is not base64 encoded '
                        'or the content is malformed.') % node_uuid)
         if is_url:
             error_msg += _(' Downloaded from "%s".') % configdrive
         raise exception.InstanceDeployFailure(error_msg)
+    except requests.exceptions.RequestException as e:
+        utils.unlink_without_raise(configdrive_file.name)
+        raise exception.InstanceDeployFailure(
+            _("Can't download the configdrive content for node %(node)s "
+              "from '%(url)s'. Reason: %(reason)s") %
+            {'node': node_uuid, 'url': configdrive, 'reason': e})
+    except (zlib.error, EnvironmentError) as e:
+        # Delete the created file
+        utils.unlink_without_raise(configdrive_file.name)
+        raise exception.InstanceDeployFailure(
+            _('Encountered error while decompressing and writing '
+              'config drive for node %(node)s. Error: %(exc)s') %
+            {'node': node_uuid, 'exc': e})
+    finally:
+        configdrive_file.close()
+        if local_file is not None:
+            local_file.close()
 
-    configdrive_file = tempfile.NamedTemporaryFile(delete=False,
-                                                   prefix='configdrive')
-    configdrive_mb = 0
-    with gzip.GzipFile('configdrive', 'rb', fileobj=data) as gunzipped:
-        try:
-            shutil.copyfileobj(gunzipped, configdrive_file)
-        except EnvironmentError as e:
-            # Delete the created file
-            utils.unlink_without_raise(configdrive_file.name)
-            raise exception.InstanceDeployFailure(
-                _('Encountered error while decompressing and writing '
-                  'config drive for node %(node)s. Error: %(exc)s') %
-                {'node': node_uuid, 'exc': e})
-        else:
-            # Get the file size and convert to MiB
-            configdrive_file.seek(0, os.SEEK_END)
-            bytes_ = configdrive_file.tell()
-            configdrive_mb = int(math.ceil(float(bytes_) / units.Mi))
-        finally:
-            configdrive_file.close()
-
-        return (configdrive_mb, configdrive_file.name)
+    return (configdrive_mb, configdrive_file.name)
 
 
 def work_on_disk(dev, root_mb, swap_mb, ephemeral_mb, ephemeral_format,
@@ -613,9 +716,18 @@ def work_on_disk(dev, root_mb, swap_mb, ephemeral_mb, ephemeral_format,
             efi_system_part = part_dict.get('efi system partition')
             mkfs(dev=efi_system_part, fs='vfat', label='efi-part')
 
+        configdrive_writer = None
         if configdrive_part:
-            # Copy the configdrive content to the configdrive partition
-            dd(configdrive_file, configdrive_part)
+            # Copy the configdrive content to the configdrive partition,
+            # while the image is written to the root partition
+            configdrive_writer = eventlet.spawn(dd, configdrive_file,
+                                                configdrive_part)
+
+        try:
+            populate_image(image_path, root_part)
+        finally:
+            if configdrive_writer is not None:
+                configdrive_writer.wait()
 
     finally:
         # If the configdrive was requested make sure we delete the file
@@ -623,8 +735,6 @@ def work_on_disk(dev, root_mb, swap_mb, ephemeral_mb, ephemeral_format,
         if configdrive_file:
             utils.unlink_without_raise(configdrive_file)
 
-    populate_image(image_path, root_part)
-
     if swap_part:
         mkfs(dev=swap_part, fs='swap', label='swap1')
 
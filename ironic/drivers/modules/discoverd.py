@@ -15,11 +15,16 @@ Modules required to work with ironic_discoverd:
     https://pypi.python.org/pypi/ironic-discoverd
 """
 
+import itertools
+
 import eventlet
+from eventlet import greenpool
 from oslo_config import cfg
 from oslo_log import log as logging
 from oslo_utils import importutils
+import six
 
+from ironic.common import driver_factory
 from ironic.common import exception
 from ironic.common.i18n import _
 from ironic.common.i18n import _LE
@@ -42,7 +47,11 @@ discoverd_opts = [
                'will be used.'),
     cfg.IntOpt('status_check_period', default=60,
                help='period (in seconds) to check status of nodes '
-               'on inspection')
+               'on inspection'),
+    cfg.IntOpt('status_check_workers', default=10,
+               help='maximum number of concurrent requests to '
+               'ironic-discoverd when checking the status of the nodes '
+               'on inspection'),
 ]
 
 CONF = cfg.CONF
@@ -131,18 +140,39 @@ class DiscoverdInspect(base.InspectInterface):
     def _periodic_check_result(self, manager, context):
         """Periodic task checking results of inspection."""
         filters = {'provision_state': states.INSPECTING}
-        node_iter = manager.iter_nodes(filters=filters)
-
-        for node_uuid, driver in node_iter:
+        node_uuids = [node_uuid for node_uuid, driver
+                      in manager.iter_nodes(filters=filters)
+                      if _uses_discoverd(driver)]
+        if not node_uuids:
+            return
+
+        # NOTE(dtantsur): periodic tasks do not have proper tokens in context
+        context.auth_token = keystone.get_admin_auth_token()
+        # NOTE: the statuses are fetched without locking the nodes, only
+        # the nodes whose inspection is over are locked to be updated.
+        pool = greenpool.GreenPool(CONF.discoverd.status_check_workers)
+        statuses = pool.imap(_get_status, node_uuids,
+                             itertools.repeat(context))
+        for node_uuid, status in six.moves.zip(node_uuids, statuses):
+            if not status or not (status.get('error') or
+                                  status.get('finished')):
+                continue
             try:
-                # TODO(dtantsur): we need an exclusive lock only once
-                # inspection is finished.
                 with task_manager.acquire(context, node_uuid) as task:
-                    _check_status(task)
+                    _check_status(task, status)
             except (exception.NodeLocked, exception.NodeNotFound):
                 continue
 
 
+def _uses_discoverd(driver_name):
+    """Whether the nodes of a driver are inspected by discoverd."""
+    try:
+        driver = driver_factory.get_driver(driver_name)
+    except exception.DriverNotFound:
+        return False
+    return isinstance(driver.inspect, DiscoverdInspect)
+
+
 def _call_discoverd(func, uuid, context):
     """Wrapper around calls to discoverd."""
     # NOTE(dtantsur): due to bug #1428652 None is not accepted for base_url.
@@ -170,28 +200,42 @@ def _start_inspection(node_uuid, context):
                  node_uuid)
 
 
-def _check_status(task):
-    """Check inspection status for node given by a task."""
-    node = task.node
-    if node.provision_state != states.INSPECTING:
-        return
-    if not isinstance(task.driver.inspect, DiscoverdInspect):
-        return
-
-    LOG.debug('Calling to discoverd to check status of node %s',
-              task.node.uuid)
+def _get_status(node_uuid, context):
+    """Get the inspection status of a node from discoverd.
 
-    # NOTE(dtantsur): periodic tasks do not have proper tokens in context
-    task.context.auth_token = keystone.get_admin_auth_token()
+    :returns: the status, or None if it could not be fetched.
+    """
+    LOG.debug('Calling to discoverd to check status of node %s', node_uuid)
     try:
-        status = _call_discoverd(client.get_status, node.uuid, task.context)
+        return _call_discoverd(client.get_status, node_uuid, context)
     except Exception:
         # NOTE(dtantsur): get_status should not normally raise
         # let's assume it's a transient failure and retry later
         LOG.exception(_LE('Unexpected exception while getting '
                           'inspection status for node %s, will retry later'),
-                      node.uuid)
+                      node_uuid)
+
+
+def _check_status(task, status=None):
+    """Check inspection status for node given by a task.
+
+    :param task: a TaskManager instance.
+    :param status: the status of the node as returned by discoverd, it is
+        fetched if not given.
+    """
+    node = task.node
+    if node.provision_state != states.INSPECTING:
         return
+    if not isinstance(task.driver.inspect, DiscoverdInspect):
+        return
+
+    if status is None:
+        # NOTE(dtantsur): periodic tasks do not have proper tokens in
+        # context
+        task.context.auth_token = keystone.get_admin_auth_token()
+        status = _get_status(node.uuid, task.context)
+        if status is None:
+            return
 
     if status.get('error'):
         LOG.error(_LE('Inspection failed for node %(uuid)s '
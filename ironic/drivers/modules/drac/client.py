@@ -15,14 +15,17 @@
 Wrapper for pywsman.Client
 """
 
+import io
 import time
 from xml.etree import ElementTree
 
 from oslo_log import log as logging
 from oslo_utils import importutils
+import six
 
 from ironic.common import exception
 from ironic.common.i18n import _LW
+from ironic.drivers.modules import client_cache
 from ironic.drivers.modules.drac import common as drac_common
 
 pywsman = importutils.try_import('pywsman')
@@ -57,8 +60,9 @@ def get_wsman_client(node):
              is missing on the node or on invalid inputs.
     """
     driver_info = drac_common.parse_driver_info(node)
-    client = Client(**driver_info)
-    return client
+    return client_cache.get_client('drac', driver_info['drac_host'],
+                                   driver_info,
+                                   lambda: Client(**driver_info))
 
 
 def retry_on_empty_response(client, action, *args, **kwargs):
@@ -84,6 +88,28 @@ def retry_on_empty_response(client, action, *args, **kwargs):
             time.sleep(RETRY_DELAY)
 
 
+def _iter_items(xml_string, item_tag):
+    """Yield the elements with the given tag of a XML document.
+
+    The document is parsed incrementally, and each element is detached
+    from the document once parsed, so that only the elements kept by the
+    caller stay in memory.
+    """
+    if isinstance(xml_string, six.text_type):
+        xml_string = xml_string.encode('utf-8')
+    parents = []
+    for event, elem in ElementTree.iterparse(io.BytesIO(xml_string),
+                                             events=('start', 'end')):
+        if event == 'start':
+            parents.append(elem)
+            continue
+        parents.pop()
+        if elem.tag == item_tag:
+            if parents:
+                parents[-1].remove(elem)
+            yield elem
+
+
 class Client(object):
 
     def __init__(self, drac_host, drac_port, drac_path, drac_protocol,
@@ -110,23 +136,8 @@ class Client(object):
                  was specified.
         :returns: an ElementTree object of the response received.
         """
-        options = pywsman.ClientOptions()
-
-        filter_ = None
-        if filter_query is not None:
-            try:
-                filter_dialect = _FILTER_DIALECT_MAP[filter_dialect]
-            except KeyError:
-                valid_opts = ', '.join(_FILTER_DIALECT_MAP)
-                raise exception.DracInvalidFilterDialect(
-                    invalid_filter=filter_dialect, supported=valid_opts)
-
-            filter_ = pywsman.Filter()
-            filter_.simple(filter_dialect, filter_query)
-
-        options.set_flags(pywsman.FLAG_ENUMERATION_OPTIMIZATION)
-        options.set_max_elements(100)
-
+        options, filter_ = self._get_enumerate_options(filter_query,
+                                                       filter_dialect)
         doc = retry_on_empty_response(self.client, 'enumerate',
                                       options, filter_, resource_uri)
         root = self._get_root(doc)
@@ -144,6 +155,46 @@ class Client(object):
 
         return final_xml
 
+    def wsman_enumerate_items(self, resource_uri, filter_query=None,
+                              filter_dialect='cql'):
+        """Enumerates the instances of a remote WS-Man class.
+
+        Unlike wsman_enumerate(), the instances are yielded as the pages
+        of the enumeration are pulled and parsed, rather than merged in a
+        single document: the next page is only pulled once the instances
+        of the previous one are consumed.
+
+        :param resource_uri: URI of the resource.
+        :param filter_query: the query string.
+        :param filter_dialect: the filter dialect. Valid options are:
+                               'cql' and 'wql'. Defaults to 'cql'.
+        :raises: DracClientError on an error from pywsman library, when
+                 enumerating or while iterating over the instances.
+        :raises: DracInvalidFilterDialect if an invalid filter dialect
+                 was specified.
+        :returns: an iterator over the ElementTree elements of the
+                  instances of the class.
+        """
+        options, filter_ = self._get_enumerate_options(filter_query,
+                                                       filter_dialect)
+        doc = retry_on_empty_response(self.client, 'enumerate',
+                                      options, filter_, resource_uri)
+        xml_string = self._get_string(doc)
+        item_tag = '{%s}%s' % (resource_uri, resource_uri.rsplit('/', 1)[-1])
+        return self._iter_pages(doc, xml_string, item_tag, options,
+                                resource_uri)
+
+    def _iter_pages(self, doc, xml_string, item_tag, options, resource_uri):
+        while True:
+            for item in _iter_items(xml_string, item_tag):
+                yield item
+            context = doc.context()
+            if context is None:
+                return
+            doc = retry_on_empty_response(self.client, 'pull', options, None,
+                                          resource_uri, str(context))
+            xml_string = self._get_string(doc)
+
     def wsman_invoke(self, resource_uri, method, selectors=None,
                      properties=None, expected_return_value=RET_SUCCESS):
         """Invokes a remote WS-Man method.
@@ -211,11 +262,32 @@ class Client(object):
 
         return root
 
-    def _get_root(self, doc):
+    def _get_enumerate_options(self, filter_query, filter_dialect):
+        options = pywsman.ClientOptions()
+
+        filter_ = None
+        if filter_query is not None:
+            try:
+                filter_dialect = _FILTER_DIALECT_MAP[filter_dialect]
+            except KeyError:
+                valid_opts = ', '.join(_FILTER_DIALECT_MAP)
+                raise exception.DracInvalidFilterDialect(
+                    invalid_filter=filter_dialect, supported=valid_opts)
+
+            filter_ = pywsman.Filter()
+            filter_.simple(filter_dialect, filter_query)
+
+        options.set_flags(pywsman.FLAG_ENUMERATION_OPTIMIZATION)
+        options.set_max_elements(100)
+        return options, filter_
+
+    def _get_string(self, doc):
         if doc is None or doc.root() is None:
             raise exception.DracClientError(
                     last_error=self.client.last_error(),
                     fault_string=self.client.fault_string(),
                     response_code=self.client.response_code())
-        root = doc.root()
-        return ElementTree.fromstring(root.string())
+        return doc.root().string()
+
+    def _get_root(self, doc):
+        return ElementTree.fromstring(self._get_string(doc))
@@ -25,6 +25,7 @@ from oslo_utils import importutils
 
 from ironic.common import boot_devices
 from ironic.common import exception
+from ironic.common.i18n import _
 from ironic.common.i18n import _LE
 from ironic.conductor import task_manager
 from ironic.drivers import base
@@ -55,6 +56,12 @@ NOT_NEXT = '2'
 ONE_TIME_BOOT = '3'
 """ Is the next boot config the system will use, one time boot only. """
 
+# (InstanceID, BootSourceType) of the boot sources by node UUID. The jobs
+# setting the boot device only change the boot order, not the boot sources,
+# which are enumerated again when a device is not found among them or when
+# setting the boot device fails.
+_BOOT_SOURCES = {}
+
 
 def _get_next_boot_mode(node):
     """Get the next boot mode.
@@ -74,35 +81,65 @@ def _get_next_boot_mode(node):
     client = drac_client.get_wsman_client(node)
     filter_query = ('select * from DCIM_BootConfigSetting where IsNext=%s '
                     'or IsNext=%s' % (PERSISTENT, ONE_TIME_BOOT))
+    # This enumeration will have 2 items maximum, one for the persistent
+    # element and another one for the OneTime if set
+    boot_mode = None
     try:
-        doc = client.wsman_enumerate(resource_uris.DCIM_BootConfigSetting,
-                                     filter_query=filter_query)
+        for i in client.wsman_enumerate_items(
+                resource_uris.DCIM_BootConfigSetting,
+                filter_query=filter_query):
+            instance_id = drac_common.find_xml(i, 'InstanceID',
+                                     resource_uris.DCIM_BootConfigSetting).text
+            is_next = drac_common.find_xml(i, 'IsNext',
+                                     resource_uris.DCIM_BootConfigSetting).text
+
+            boot_mode = {'instance_id': instance_id, 'is_next': is_next}
+            # If OneTime is set we should return it, because that's
+            # where the next boot device is
+            if is_next == ONE_TIME_BOOT:
+                break
     except exception.DracClientError as exc:
         with excutils.save_and_reraise_exception():
             LOG.error(_LE('DRAC driver failed to get next boot mode for '
                           'node %(node_uuid)s. Reason: %(error)s.'),
                       {'node_uuid': node.uuid, 'error': exc})
 
-    items = drac_common.find_xml(doc, 'DCIM_BootConfigSetting',
-                                 resource_uris.DCIM_BootConfigSetting,
-                                 find_all=True)
+    return boot_mode
 
-    # This list will have 2 items maximum, one for the persistent element
-    # and another one for the OneTime if set
-    boot_mode = None
-    for i in items:
-        instance_id = drac_common.find_xml(i, 'InstanceID',
-                                     resource_uris.DCIM_BootConfigSetting).text
-        is_next = drac_common.find_xml(i, 'IsNext',
-                                     resource_uris.DCIM_BootConfigSetting).text
 
-        boot_mode = {'instance_id': instance_id, 'is_next': is_next}
-        # If OneTime is set we should return it, because that's
-        # where the next boot device is
-        if is_next == ONE_TIME_BOOT:
-            break
+def _get_boot_sources(node, refresh=False):
+    """Get the boot sources of a node.
 
-    return boot_mode
+    The boot sources are enumerated once and remembered.
+
+    :param node: an ironic node object.
+    :param refresh: whether to enumerate the boot sources again.
+    :raises: DracClientError on an error from pywsman library.
+    :returns: a list of (InstanceID, BootSourceType) tuples, in the
+              order of the enumeration.
+    """
+    sources = _BOOT_SOURCES.get(node.uuid)
+    if sources is not None and not refresh:
+        return sources
+
+    client = drac_client.get_wsman_client(node)
+    try:
+        sources = [(drac_common.find_xml(
+                        i, 'InstanceID',
+                        resource_uris.DCIM_BootSourceSetting).text,
+                    drac_common.find_xml(
+                        i, 'BootSourceType',
+                        resource_uris.DCIM_BootSourceSetting).text)
+                   for i in client.wsman_enumerate_items(
+                       resource_uris.DCIM_BootSourceSetting)]
+    except exception.DracClientError as exc:
+        with excutils.save_and_reraise_exception():
+            LOG.error(_LE('DRAC driver failed to list the boot sources of '
+                          'node %(node_uuid)s. Reason: %(error)s.'),
+                      {'node_uuid': node.uuid, 'error': exc})
+
+    _BOOT_SOURCES[node.uuid] = sources
+    return sources
 
 
 def _create_config_job(node):
@@ -147,16 +184,14 @@ def _check_for_config_job(node):
     """
     client = drac_client.get_wsman_client(node)
     try:
-        doc = client.wsman_enumerate(resource_uris.DCIM_LifecycleJob)
+        items = list(client.wsman_enumerate_items(
+            resource_uris.DCIM_LifecycleJob))
     except exception.DracClientError as exc:
         with excutils.save_and_reraise_exception():
             LOG.error(_LE('DRAC driver failed to list the configuration jobs '
                           'for node %(node_uuid)s. Reason: %(error)s.'),
                       {'node_uuid': node.uuid, 'error': exc})
 
-    items = drac_common.find_xml(doc, 'DCIM_LifecycleJob',
-                                 resource_uris.DCIM_LifecycleJob,
-                                 find_all=True)
     for i in items:
         name = drac_common.find_xml(i, 'Name', resource_uris.DCIM_LifecycleJob)
         if TARGET_DEVICE not in name.text:
@@ -227,13 +262,17 @@ class DracManagement(base.ManagementInterface):
         # Check for an existing configuration job
         _check_for_config_job(task.node)
 
-        client = drac_client.get_wsman_client(task.node)
-        filter_query = ("select * from DCIM_BootSourceSetting where "
-                        "InstanceID like '%%#%s%%'" %
-                        _BOOT_DEVICES_MAP[device])
+        pattern = '#%s' % _BOOT_DEVICES_MAP[device]
+        cached = task.node.uuid in _BOOT_SOURCES
         try:
-            doc = client.wsman_enumerate(resource_uris.DCIM_BootSourceSetting,
-                                         filter_query=filter_query)
+            sources = _get_boot_sources(task.node)
+            matching = [source for source in sources if pattern in source[0]]
+            if not matching and cached:
+                # NOTE: the boot sources may have changed since they were
+                # enumerated, eg a device was added.
+                sources = _get_boot_sources(task.node, refresh=True)
+                matching = [source for source in sources
+                            if pattern in source[0]]
         except exception.DracClientError as exc:
             with excutils.save_and_reraise_exception():
                 LOG.error(_LE('DRAC driver failed to set the boot device '
@@ -242,25 +281,29 @@ class DracManagement(base.ManagementInterface):
                           {'node_uuid': task.node.uuid, 'error': exc,
                            'device': device})
 
-        instance_id = drac_common.find_xml(doc, 'InstanceID',
-                                     resource_uris.DCIM_BootSourceSetting).text
+        if not matching:
+            raise exception.DracOperationFailed(
+                message=_('no boot source found for the %s device') % device)
+        instance_id, source_type = matching[0]
 
         source = 'OneTime'
         if persistent:
-            source = drac_common.find_xml(doc, 'BootSourceType',
-                                     resource_uris.DCIM_BootSourceSetting).text
+            source = source_type
 
         # NOTE(lucasagomes): Don't ask me why 'BootSourceType' is set
         # for 'InstanceID' and 'InstanceID' is set for 'source'! You
         # know enterprisey...
         selectors = {'InstanceID': source}
         properties = {'source': instance_id}
+        client = drac_client.get_wsman_client(task.node)
         try:
             client.wsman_invoke(resource_uris.DCIM_BootConfigSetting,
                                 'ChangeBootOrderByInstanceID', selectors,
                                 properties)
         except exception.DracRequestFailed as exc:
             with excutils.save_and_reraise_exception():
+                # The boot sources may have changed, eg the boot mode
+                _BOOT_SOURCES.pop(task.node.uuid, None)
                 LOG.error(_LE('DRAC driver failed to set the boot device for '
                               'node %(node_uuid)s to %(target_boot_device)s. '
                               'Reason: %(error)s.'),
@@ -296,8 +339,9 @@ class DracManagement(base.ManagementInterface):
                         'PendingAssignedSequence=0 and '
                         'BootSourceType="%s"' % instance_id)
         try:
-            doc = client.wsman_enumerate(resource_uris.DCIM_BootSourceSetting,
-                                         filter_query=filter_query)
+            item = next(client.wsman_enumerate_items(
+                resource_uris.DCIM_BootSourceSetting,
+                filter_query=filter_query), None)
         except exception.DracClientError as exc:
             with excutils.save_and_reraise_exception():
                 LOG.error(_LE('DRAC driver failed to get the current boot '
@@ -305,10 +349,13 @@ class DracManagement(base.ManagementInterface):
                               'Reason: %(error)s.'),
                           {'node_uuid': task.node.uuid, 'error': exc})
 
-        instance_id = drac_common.find_xml(doc, 'InstanceID',
+        boot_device = None
+        if item is not None:
+            instance_id = drac_common.find_xml(item, 'InstanceID',
                                      resource_uris.DCIM_BootSourceSetting).text
-        boot_device = next((key for (key, value) in _BOOT_DEVICES_MAP.items()
-                            if value in instance_id), None)
+            boot_device = next((key for (key, value)
+                                in _BOOT_DEVICES_MAP.items()
+                                if value in instance_id), None)
         return {'boot_device': boot_device, 'persistent': persistent}
 
     def get_sensors_data(self, task):
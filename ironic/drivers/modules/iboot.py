@@ -19,6 +19,10 @@
 Ironic iBoot PDU power manager.
 """
 
+import threading
+import time
+
+from oslo_config import cfg
 from oslo_log import log as logging
 from oslo_utils import importutils
 
@@ -28,9 +32,28 @@ from ironic.common.i18n import _LW
 from ironic.common import states
 from ironic.conductor import task_manager
 from ironic.drivers import base
+from ironic.drivers.modules import client_cache
 
 iboot = importutils.try_import('iboot')
 
+opts = [
+    cfg.IntOpt('relay_state_cache_ttl',
+               default=10,
+               help='Time (in seconds) for which the states of all the '
+                    'relays of an iBoot device, read in a single request, '
+                    'are used to get the power state of its nodes. Set to '
+                    '0 to query the device for each node.'),
+    cfg.IntOpt('relays_per_device',
+               default=0,
+               help='Number of relays of the iBoot devices, whose states '
+                    'are read in a single request. It must not exceed the '
+                    'number of relays of any device. If 0, the states are '
+                    'read up to the largest relay id of the nodes of the '
+                    'device whose power state was read so far.'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(opts, group='iboot')
 
 LOG = logging.getLogger(__name__)
 
@@ -46,6 +69,15 @@ OPTIONAL_PROPERTIES = {
 COMMON_PROPERTIES = REQUIRED_PROPERTIES.copy()
 COMMON_PROPERTIES.update(OPTIONAL_PROPERTIES)
 
+# Locks serializing the requests to each iBoot device, by (address, port)
+_DEVICE_LOCKS = {}
+_DEVICE_LOCKS_LOCK = threading.Lock()
+
+# (time, relay states) of the iBoot devices, by device key
+_RELAYS = {}
+# Largest relay id of the nodes of each iBoot device, by (address, port)
+_MAX_RELAY_IDS = {}
+
 
 def _parse_driver_info(node):
     info = node.driver_info or {}
@@ -83,26 +115,92 @@ def _parse_driver_info(node):
            }
 
 
-def _get_connection(driver_info):
+def _get_device_key(driver_info):
+    return (driver_info['address'], driver_info['port'],
+            driver_info['username'], driver_info['password'])
+
+
+def _get_device_lock(driver_info):
+    key = (driver_info['address'], driver_info['port'])
+    with _DEVICE_LOCKS_LOCK:
+        return _DEVICE_LOCKS.setdefault(key, threading.Lock())
+
+
+def _get_num_relays(driver_info):
+    """Return the number of relays whose states are read from a device."""
+    key = (driver_info['address'], driver_info['port'])
+    with _DEVICE_LOCKS_LOCK:
+        max_relay_id = max(_MAX_RELAY_IDS.get(key, 0),
+                           driver_info['relay_id'])
+        _MAX_RELAY_IDS[key] = max_relay_id
+    return max(max_relay_id, CONF.iboot.relays_per_device)
+
+
+def _get_connection(driver_info, num_relays=None):
+    # NOTE: the connections are reused by the nodes of the same device
+    # (and with the same number of relays read by get_relays(), the relay
+    # id of the node by default).
+    if num_relays is None:
+        num_relays = driver_info['relay_id']
+    params = {'address': driver_info['address'],
+              'port': driver_info['port'],
+              'username': driver_info['username'],
+              'password': driver_info['password'],
+              'num_relays': num_relays}
     # NOTE: python-iboot wants username and password as strings (not unicode)
-    return iboot.iBootInterface(driver_info['address'],
-                                str(driver_info['username']),
-                                str(driver_info['password']),
-                                port=driver_info['port'],
-                                num_relays=driver_info['relay_id'])
+    return client_cache.get_client(
+        'iboot', driver_info['address'], params,
+        lambda: iboot.iBootInterface(driver_info['address'],
+                                     str(driver_info['username']),
+                                     str(driver_info['password']),
+                                     port=driver_info['port'],
+                                     num_relays=num_relays))
 
 
 def _switch(driver_info, enabled):
     conn = _get_connection(driver_info)
     relay_id = driver_info['relay_id']
-    return conn.switch(relay_id, enabled)
+    _RELAYS.pop(_get_device_key(driver_info), None)
+    with _get_device_lock(driver_info):
+        return conn.switch(relay_id, enabled)
 
 
-def _power_status(driver_info):
-    conn = _get_connection(driver_info)
+def _get_relays(driver_info, cached):
+    """Return the states of the relays of an iBoot device.
+
+    The states are read with a connection covering all the relays of the
+    nodes of the device seen so far (see [iboot]relays_per_device), so
+    that they are shared by these nodes.
+
+    :param driver_info: the parsed driver_info of a node of the device.
+    :param cached: whether the states read for another node of the same
+        device less than [iboot]relay_state_cache_ttl seconds ago may be
+        returned.
+    :returns: the list of the relay states returned by get_relays().
+    """
+    ttl = CONF.iboot.relay_state_cache_ttl
+    key = _get_device_key(driver_info)
+    if cached and ttl:
+        entry = _RELAYS.get(key)
+        # NOTE: a node with a larger relay id than the nodes seen before
+        # needs the states of more relays.
+        if (entry is not None and time.time() - entry[0] <= ttl and
+                len(entry[1]) >= driver_info['relay_id']):
+            return entry[1]
+
+    conn = _get_connection(driver_info, _get_num_relays(driver_info))
+    now = time.time()
+    with _get_device_lock(driver_info):
+        relays = conn.get_relays()
+    if ttl and relays is not None:
+        _RELAYS[key] = (now, relays)
+    return relays
+
+
+def _power_status(driver_info, cached=False):
     relay_id = driver_info['relay_id']
     try:
-        response = conn.get_relays()
+        response = _get_relays(driver_info, cached)
         status = response[relay_id - 1]
     except TypeError:
         msg = (_("Cannot get power status for node '%(node)s'. iBoot "
@@ -159,7 +257,7 @@ class IBootPower(base.PowerInterface):
 
         """
         driver_info = _parse_driver_info(task.node)
-        return _power_status(driver_info)
+        return _power_status(driver_info, cached=True)
 
     @task_manager.require_exclusive_lock
     def set_power_state(self, task, pstate):
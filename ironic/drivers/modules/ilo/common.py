@@ -17,6 +17,7 @@ Common functionalities shared between different iLO modules.
 """
 
 import tempfile
+import time
 
 from oslo_config import cfg
 from oslo_log import log as logging
@@ -31,6 +32,7 @@ from ironic.common.i18n import _LI
 from ironic.common import images
 from ironic.common import swift
 from ironic.common import utils
+from ironic.drivers.modules import client_cache
 from ironic.drivers.modules import deploy_utils
 
 ilo_client = importutils.try_import('proliantutils.ilo.client')
@@ -54,6 +56,11 @@ opts = [
                default=900,
                help='Amount of time in seconds for Swift objects to '
                     'auto-expire.'),
+    cfg.IntOpt('license_cache_ttl',
+               default=3600,
+               help='Amount of time in seconds for which the license '
+                    'installed on the iLO of a node is remembered, rather '
+                    'than queried again. Set to 0 to query it every time.'),
 ]
 
 CONF = cfg.CONF
@@ -61,6 +68,9 @@ CONF.register_opts(opts, group='ilo')
 
 LOG = logging.getLogger(__name__)
 
+# (time, license) by node UUID
+_LICENSES = {}
+
 REQUIRED_PROPERTIES = {
     'ilo_address': _("IP address or hostname of the iLO. Required."),
     'ilo_username': _("username for the iLO with administrator privileges. "
@@ -153,19 +163,21 @@ def get_ilo_object(node):
         is missing on the node
     """
     driver_info = parse_driver_info(node)
-    ilo_object = ilo_client.IloClient(driver_info['ilo_address'],
-                                      driver_info['ilo_username'],
-                                      driver_info['ilo_password'],
-                                      driver_info['client_timeout'],
-                                      driver_info['client_port'])
-    return ilo_object
+    return client_cache.get_client(
+        'ilo', driver_info['ilo_address'], driver_info,
+        lambda: ilo_client.IloClient(driver_info['ilo_address'],
+                                     driver_info['ilo_username'],
+                                     driver_info['ilo_password'],
+                                     driver_info['client_timeout'],
+                                     driver_info['client_port']))
 
 
 def get_ilo_license(node):
     """Gives the current installed license on the node.
 
     Given an ironic node object, this method queries the iLO
-    for currently installed license and returns it back.
+    for currently installed license and returns it back. The license
+    is remembered for [ilo]license_cache_ttl seconds.
 
     :param node: an ironic node object.
     :returns: a constant defined in this module which
@@ -176,6 +188,19 @@ def get_ilo_license(node):
     :raises: IloOperationError if it failed to retrieve the
         installed licenses from the iLO.
     """
+    ttl = CONF.ilo.license_cache_ttl
+    entry = _LICENSES.get(node.uuid)
+    if ttl and entry is not None and time.time() - entry[0] <= ttl:
+        return entry[1]
+
+    license = _query_ilo_license(node)
+    if ttl:
+        _LICENSES[node.uuid] = (time.time(), license)
+    return license
+
+
+def _query_ilo_license(node):
+    """Queries the current installed license from the iLO of a node."""
     # Get the ilo client object, and then the license from the iLO
     ilo_object = get_ilo_object(node)
     try:
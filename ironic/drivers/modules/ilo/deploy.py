@@ -15,8 +15,10 @@
 iLO Deploy Driver(s) and supporting methods.
 """
 
+import hashlib
 import tempfile
 
+from oslo_concurrency import lockutils
 from oslo_config import cfg
 from oslo_log import log as logging
 from oslo_utils import excutils
@@ -57,6 +59,25 @@ clean_opts = [
                     'disabled and will not run during cleaning.')
               ]
 
+boot_iso_opts = [
+    cfg.IntOpt('shared_boot_iso_expiry',
+               default=3600,
+               help='Number of seconds a boot ISO built by ironic is kept '
+                    'in Swift once no node uses it anymore. The boot ISOs '
+                    'are shared between the nodes deployed with the same '
+                    'kernel, ramdisk, deploy ISO and boot parameters, so '
+                    'keeping an unused one for a while avoids building it '
+                    'again when such a node is deployed soon after.'),
+    cfg.IntOpt('shared_boot_iso_check_interval',
+               default=300,
+               help='Interval (in seconds) between the checks that the '
+                    'boot ISOs set to expire are still unused. The Swift '
+                    'listings of the references may lag, a boot ISO taken '
+                    'again meanwhile is kept if the check runs before it '
+                    'expires, so this must be well below '
+                    'shared_boot_iso_expiry.'),
+]
+
 REQUIRED_PROPERTIES = {
     'ilo_deploy_iso': _("UUID (from Glance) of the deployment ISO. "
                     "Required.")
@@ -68,16 +89,166 @@ CONF.import_opt('pxe_append_params', 'ironic.drivers.modules.iscsi_deploy',
 CONF.import_opt('swift_ilo_container', 'ironic.drivers.modules.ilo.common',
                 group='ilo')
 CONF.register_opts(clean_opts, group='ilo')
+CONF.register_opts(boot_iso_opts, group='ilo')
+
+# Prefix of the name of the boot ISOs shared between nodes, the boot ISOs
+# of the previous releases are named after the node
+SHARED_BOOT_ISO_PREFIX = 'boot-iso-'
 
 
 def _get_boot_iso_object_name(node):
     """Returns the boot iso object name for a given node.
 
+    Only used by the boot ISOs created by the previous releases.
+
     :param node: the node for which object name is to be provided.
     """
     return "boot-%s" % node.uuid
 
 
+def _get_shared_boot_iso_object_name(kernel_href, ramdisk_href,
+                                     deploy_iso_href, root_uuid,
+                                     kernel_params, boot_mode):
+    """Returns the name of the boot ISO built from the given parameters.
+
+    The name is derived from everything which ends up in the boot ISO, so
+    that the nodes deployed the same way share their boot ISO.
+    """
+    key = '\n'.join('%s' % param for param in (
+        kernel_href, ramdisk_href, deploy_iso_href, root_uuid,
+        kernel_params, boot_mode))
+    return SHARED_BOOT_ISO_PREFIX + hashlib.sha256(
+        key.encode('utf-8')).hexdigest()
+
+
+def _get_boot_iso_ref_prefix(object_name):
+    """Returns the prefix of the reference objects of a shared boot ISO."""
+    return '%s.refs/' % object_name
+
+
+def _acquire_shared_boot_iso(container, object_name, node, build):
+    """Takes a reference on a shared boot ISO, building it if needed.
+
+    Every node using a shared boot ISO owns an empty reference object in
+    Swift. The boot ISO is deleted by Swift (its X-Delete-At is set) some
+    time after its last reference is released, see
+    :func:`_release_shared_boot_iso`.
+
+    :param container: the Swift container of the boot ISO.
+    :param object_name: the name of the boot ISO object.
+    :param node: the node using the boot ISO.
+    :param build: a callable building the boot ISO into the file whose
+        name it is given.
+    :raises: SwiftOperationError, if operation with Swift fails.
+    :raises: ImageCreationFailed, if creation of boot ISO failed.
+    """
+    swift_api = swift.SwiftAPI()
+    # NOTE: the lock only spares the concurrent deployments handled by this
+    # conductor to build the same boot ISO, two conductors may build it at
+    # the same time and both upload the same content.
+    with lockutils.lock(object_name, 'ironic-'):
+        # NOTE: the reference is taken before the boot ISO is looked up, so
+        # that a concurrent release either sees it or has set the
+        # expiration before it is cleared below.
+        with tempfile.NamedTemporaryFile() as fileobj:
+            swift_api.create_object(
+                container, _get_boot_iso_ref_prefix(object_name) + node.uuid,
+                fileobj.name)
+        try:
+            headers = swift_api.head_object(container, object_name)
+            # NOTE: a POST without X-Delete-At clears the expiration set
+            # when the boot ISO was last released. It is only sent when
+            # needed, the clusters with post-as-copy copy the whole ISO.
+            if 'x-delete-at' in headers:
+                swift_api.update_object_meta(container, object_name, {})
+            LOG.debug("Reusing boot_iso %(iso)s in Swift for node %(node)s",
+                      {'iso': object_name, 'node': node.uuid})
+            return
+        except exception.SwiftObjectNotFoundError:
+            pass
+
+        try:
+            with tempfile.NamedTemporaryFile() as fileobj:
+                build(fileobj.name)
+                swift_api.create_object(container, object_name,
+                                        fileobj.name)
+        except Exception:
+            with excutils.save_and_reraise_exception():
+                try:
+                    swift_api.delete_object(
+                        container,
+                        _get_boot_iso_ref_prefix(object_name) + node.uuid)
+                except exception.SwiftOperationError:
+                    pass
+
+    LOG.debug("Created boot_iso %s in Swift", object_name)
+
+
+def _release_shared_boot_iso(container, object_name, node):
+    """Releases the reference of a node on a shared boot ISO.
+
+    When the last reference is released, the boot ISO is set to expire
+    after CONF.ilo.shared_boot_iso_expiry seconds.
+
+    :param container: the Swift container of the boot ISO.
+    :param object_name: the name of the boot ISO object.
+    :param node: the node which used the boot ISO.
+    :raises: SwiftOperationError, if operation with Swift fails.
+    """
+    swift_api = swift.SwiftAPI()
+    ref_prefix = _get_boot_iso_ref_prefix(object_name)
+    try:
+        swift_api.delete_object(container, ref_prefix + node.uuid)
+    except exception.SwiftObjectNotFoundError:
+        pass
+    if swift_api.list_objects(container, prefix=ref_prefix):
+        return
+
+    expiry = {'X-Delete-After': str(CONF.ilo.shared_boot_iso_expiry)}
+    try:
+        swift_api.update_object_meta(container, object_name, expiry)
+    except exception.SwiftObjectNotFoundError:
+        return
+    # NOTE: a node may have taken a reference between the listing and the
+    # expiration; it clears the expiration itself unless it did it before
+    # the expiration was set, so check again.
+    if swift_api.list_objects(container, prefix=ref_prefix):
+        swift_api.update_object_meta(container, object_name, {})
+    else:
+        LOG.debug("Boot_iso %(iso)s is not used anymore, it will be "
+                  "deleted from Swift in %(expiry)s seconds",
+                  {'iso': object_name,
+                   'expiry': CONF.ilo.shared_boot_iso_expiry})
+
+
+def _keep_used_shared_boot_isos(container):
+    """Cancels the expiration of the shared boot ISOs which are used.
+
+    The container listings of Swift are eventually consistent, so the
+    release of a reference may not see a reference just taken by another
+    node and set the boot ISO to expire. Checking the references again,
+    well before the expiration, keeps such a boot ISO.
+
+    :param container: the Swift container of the boot ISOs.
+    :raises: SwiftOperationError, if operation with Swift fails.
+    """
+    swift_api = swift.SwiftAPI()
+    names = swift_api.list_objects(container, prefix=SHARED_BOOT_ISO_PREFIX)
+    isos = set(name for name in names if '.refs/' not in name)
+    used = set(name.split('.refs/', 1)[0] for name in names
+               if '.refs/' in name)
+    for object_name in isos & used:
+        try:
+            headers = swift_api.head_object(container, object_name)
+            if 'x-delete-at' not in headers:
+                continue
+            swift_api.update_object_meta(container, object_name, {})
+        except exception.SwiftObjectNotFoundError:
+            continue
+        LOG.info(_LI("Boot_iso %s was set to expire while still used, its "
+                     "expiration is cancelled."), object_name)
+
+
 def _get_boot_iso(task, root_uuid):
     """This method returns a boot ISO to boot the node.
 
@@ -151,31 +322,28 @@ def _get_boot_iso(task, root_uuid):
                   {'image': image_href, 'node': task.node.uuid})
         return
 
-    # NOTE(rameshg87): Functionality to share the boot ISOs created for
-    # similar instances (instances with same deployed image) is
-    # not implemented as of now. Creation/Deletion of such a shared boot ISO
-    # will require synchronisation across conductor nodes for the shared boot
-    # ISO.  Such a synchronisation mechanism doesn't exist in ironic as of now.
-
     # Option 3 - Create boot_iso from kernel/ramdisk, upload to Swift
-    # and provide its name.
+    # and provide its name. The boot ISO is shared with the other nodes
+    # deployed with the same kernel, ramdisk, deploy ISO and parameters.
     deploy_iso_uuid = deploy_info['ilo_deploy_iso']
     boot_mode = deploy_utils.get_boot_mode_for_deploy(task.node)
-    boot_iso_object_name = _get_boot_iso_object_name(task.node)
     kernel_params = CONF.pxe.pxe_append_params
     container = CONF.ilo.swift_ilo_container
-
-    with tempfile.NamedTemporaryFile() as fileobj:
-        boot_iso_tmp_file = fileobj.name
+    # NOTE: the root UUID is part of the kernel command line of the boot
+    # ISO. It is the UUID of the file system of the deployed partition
+    # image, so it is the same for all the nodes deployed with an image.
+    boot_iso_object_name = _get_shared_boot_iso_object_name(
+        kernel_href, ramdisk_href, deploy_iso_uuid, root_uuid,
+        kernel_params, boot_mode)
+
+    def build(boot_iso_tmp_file):
         images.create_boot_iso(task.context, boot_iso_tmp_file,
                                kernel_href, ramdisk_href,
                                deploy_iso_uuid, root_uuid,
                                kernel_params, boot_mode)
-        swift_api = swift.SwiftAPI()
-        swift_api.create_object(container, boot_iso_object_name,
-                                boot_iso_tmp_file)
 
-    LOG.debug("Created boot_iso %s in Swift", boot_iso_object_name)
+    _acquire_shared_boot_iso(container, boot_iso_object_name, task.node,
+                             build)
 
     return 'swift:%s' % boot_iso_object_name
 
@@ -188,11 +356,13 @@ def _clean_up_boot_iso_for_instance(node):
     ilo_boot_iso = node.instance_info.get('ilo_boot_iso')
     if not (ilo_boot_iso and ilo_boot_iso.startswith('swift')):
         return
-    swift_api = swift.SwiftAPI()
     container = CONF.ilo.swift_ilo_container
-    boot_iso_object_name = _get_boot_iso_object_name(node)
+    boot_iso_object_name = ilo_boot_iso[len('swift:'):]
     try:
-        swift_api.delete_object(container, boot_iso_object_name)
+        if boot_iso_object_name.startswith(SHARED_BOOT_ISO_PREFIX):
+            _release_shared_boot_iso(container, boot_iso_object_name, node)
+        else:
+            swift.SwiftAPI().delete_object(container, boot_iso_object_name)
     except exception.SwiftOperationError as e:
         LOG.exception(_LE("Failed to clean up boot ISO for %(node)s."
                           "Error: %(error)s."),
@@ -753,6 +923,15 @@ class VendorPassthru(agent_base_vendor.BaseAgentVendor):
             i_info['ilo_boot_iso'] = boot_iso
             node.instance_info = i_info
 
+    @base.driver_periodic_task(
+        spacing=CONF.ilo.shared_boot_iso_check_interval)
+    def _periodic_keep_used_boot_isos(self, manager, context):
+        """Periodic task keeping the shared boot ISOs which are used."""
+        try:
+            _keep_used_shared_boot_isos(CONF.ilo.swift_ilo_container)
+        except exception.SwiftOperationError as e:
+            LOG.debug("Unable to check the shared boot ISOs in Swift: %s", e)
+
     @base.passthru(['POST'])
     @task_manager.require_exclusive_lock
     def pass_bootloader_install_info(self, task, **kwargs):
@@ -21,6 +21,7 @@ from oslo_utils import importutils
 
 from ironic.common import exception
 from ironic.common.i18n import _
+from ironic.drivers.modules import client_cache
 
 scci = importutils.try_import('scciclient.irmc.scci')
 
@@ -132,14 +133,15 @@ def get_irmc_client(node):
     """
     driver_info = parse_driver_info(node)
 
-    scci_client = scci.get_client(
-        driver_info['irmc_address'],
-        driver_info['irmc_username'],
-        driver_info['irmc_password'],
-        port=driver_info['irmc_port'],
-        auth_method=driver_info['irmc_auth_method'],
-        client_timeout=driver_info['irmc_client_timeout'])
-    return scci_client
+    return client_cache.get_client(
+        'irmc', driver_info['irmc_address'], driver_info,
+        lambda: scci.get_client(
+            driver_info['irmc_address'],
+            driver_info['irmc_username'],
+            driver_info['irmc_password'],
+            port=driver_info['irmc_port'],
+            auth_method=driver_info['irmc_auth_method'],
+            client_timeout=driver_info['irmc_client_timeout']))
 
 
 def update_ipmi_properties(task):
@@ -19,6 +19,7 @@ https://github.com/MSOpenTech/ChassisManager
 """
 
 import posixpath
+import threading
 from xml.etree import ElementTree
 
 from oslo_log import log
@@ -54,19 +55,42 @@ BOOT_TYPE_MAP = {
 POWER_STATUS_ON = "ON"
 POWER_STATUS_OFF = "OFF"
 
+# HTTP sessions, by (base URL, username, password) of chassis manager
+_SESSIONS = {}
+_SESSIONS_LOCK = threading.Lock()
+
+
+def _get_session(base_url, username, password):
+    """Returns the HTTP session to a chassis manager.
+
+    The sessions keep their connections open, so that the blades of a
+    chassis are not each managed through a new connection.
+    """
+    key = (base_url, username, password)
+    with _SESSIONS_LOCK:
+        session = _SESSIONS.get(key)
+        if session is None:
+            # The credentials of the chassis manager changed
+            for old_key in [k for k in _SESSIONS if k[0] == base_url]:
+                _SESSIONS.pop(old_key).close()
+            session = requests.Session()
+            session.auth = auth.HTTPBasicAuth(username, password)
+            _SESSIONS[key] = session
+        return session
+
 
 class MSFTOCSClientApi(object):
     def __init__(self, base_url, username, password):
         self._base_url = base_url
         self._username = username
         self._password = password
+        self._session = _get_session(base_url, username, password)
 
     def _exec_cmd(self, rel_url):
         """Executes a command by calling the chassis manager API."""
         url = posixpath.join(self._base_url, rel_url)
         try:
-            response = requests.get(
-                url, auth=auth.HTTPBasicAuth(self._username, self._password))
+            response = self._session.get(url)
             response.raise_for_status()
         except requests_exceptions.RequestException as ex:
             LOG.exception(_LE("HTTP call failed: %s"), ex)
@@ -104,6 +128,31 @@ class MSFTOCSClientApi(object):
             self._exec_cmd("GetBladeState?bladeId=%d" % blade_id))
         return et.find('./n:bladeState', namespaces={'n': WCSNS}).text
 
+    def get_all_blades_state(self):
+        """Returns whether the chipset of each blade is receiving power.
+
+        :returns: a dict of the blade ids to one of:
+            POWER_STATUS_ON,
+            POWER_STATUS_OFF
+            The blades whose state could not be read are not included.
+        :raises: MSFTOCSClientApiException
+        """
+        et = self._check_completion_code(
+            self._exec_cmd("GetAllBladesState"))
+        ns = {'n': WCSNS}
+        blade_states = {}
+        for item in et.findall(
+                './n:bladeStateResponseCollection/n:BladeStateResponse', ns):
+            completion_code = item.find('./n:completionCode', ns)
+            blade_number = item.find('./n:bladeNumber', ns)
+            blade_state = item.find('./n:bladeState', ns)
+            if (completion_code is None or
+                    completion_code.text != COMPLETION_CODE_SUCCESS or
+                    blade_number is None or blade_state is None):
+                continue
+            blade_states[int(blade_number.text)] = blade_state.text
+        return blade_states
+
     def set_blade_on(self, blade_id):
         """Supplies power to a blade chipset (soft-power state).
 
@@ -16,6 +16,9 @@
 """
 MSFT OCS Power Driver
 """
+import time
+
+from oslo_config import cfg
 from oslo_log import log
 
 from ironic.common import exception
@@ -27,6 +30,19 @@ from ironic.drivers import base
 from ironic.drivers.modules.msftocs import common as msftocs_common
 from ironic.drivers.modules.msftocs import msftocsclient
 
+opts = [
+    cfg.IntOpt('chassis_state_cache_ttl',
+               default=10,
+               help='The power states of all the blades of a chassis are '
+                    'read with a single request to its chassis manager, '
+                    'and used for this number of seconds to answer the '
+                    'power state queries of the blades, eg during a power '
+                    'state sync. Set to 0 to query each blade separately.'),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(opts, group='msftocs')
+
 LOG = log.getLogger(__name__)
 
 POWER_STATES_MAP = {
@@ -34,6 +50,46 @@ POWER_STATES_MAP = {
     msftocsclient.POWER_STATUS_OFF: states.POWER_OFF,
 }
 
+# (time, {blade id: blade state}), by base URL of chassis manager
+_CHASSIS_STATES = {}
+
+
+def _get_blade_state(client, base_url, blade_id):
+    """Returns the state of a blade, from the states of its chassis.
+
+    :param client: the REST API client of the chassis manager.
+    :param base_url: the base URL of the chassis manager.
+    :param blade_id: the blade id.
+    :raises: MSFTOCSClientApiException
+    """
+    ttl = CONF.msftocs.chassis_state_cache_ttl
+    if not ttl:
+        return client.get_blade_state(blade_id)
+
+    entry = _CHASSIS_STATES.get(base_url)
+    now = time.time()
+    if entry is None or now - entry[0] > ttl:
+        try:
+            entry = (now, client.get_all_blades_state())
+        except exception.MSFTOCSClientApiException as ex:
+            LOG.debug("Failed to get the state of the blades of chassis "
+                      "%(url)s, querying each blade. Error: %(err_msg)s",
+                      {"url": base_url, "err_msg": ex})
+            entry = (now, {})
+        _CHASSIS_STATES[base_url] = entry
+
+    state = entry[1].get(int(blade_id))
+    if state is None:
+        state = client.get_blade_state(blade_id)
+    return state
+
+
+def _forget_blade_state(base_url, blade_id):
+    """Drops the cached state of a blade whose power was changed."""
+    entry = _CHASSIS_STATES.get(base_url)
+    if entry is not None:
+        entry[1].pop(int(blade_id), None)
+
 
 class MSFTOCSPower(base.PowerInterface):
     def get_properties(self):
@@ -57,9 +113,10 @@ class MSFTOCSPower(base.PowerInterface):
         :param task: a TaskManager instance containing the target node.
         :raises: MSFTOCSClientApiException.
         """
-        client, blade_id = msftocs_common.get_client_info(
-            task.node.driver_info)
-        return POWER_STATES_MAP[client.get_blade_state(blade_id)]
+        driver_info = task.node.driver_info
+        client, blade_id = msftocs_common.get_client_info(driver_info)
+        return POWER_STATES_MAP[_get_blade_state(
+            client, driver_info['msftocs_base_url'], blade_id)]
 
     @task_manager.require_exclusive_lock
     def set_power_state(self, task, pstate):
@@ -72,8 +129,9 @@ class MSFTOCSPower(base.PowerInterface):
         :raises: PowerStateFailure if the power cannot set to pstate.
         :raises: InvalidParameterValue
         """
-        client, blade_id = msftocs_common.get_client_info(
-            task.node.driver_info)
+        driver_info = task.node.driver_info
+        client, blade_id = msftocs_common.get_client_info(driver_info)
+        _forget_blade_state(driver_info['msftocs_base_url'], blade_id)
 
         try:
             if pstate == states.POWER_ON:
@@ -96,8 +154,9 @@ class MSFTOCSPower(base.PowerInterface):
         :param task: a TaskManager instance contains the target node.
         :raises: PowerStateFailure if failed to reboot.
         """
-        client, blade_id = msftocs_common.get_client_info(
-            task.node.driver_info)
+        driver_info = task.node.driver_info
+        client, blade_id = msftocs_common.get_client_info(driver_info)
+        _forget_blade_state(driver_info['msftocs_base_url'], blade_id)
         try:
             client.set_blade_power_cycle(blade_id)
         except exception.MSFTOCSClientApiException as ex:
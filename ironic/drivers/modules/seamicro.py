@@ -34,6 +34,7 @@ from ironic.common.i18n import _LW
 from ironic.common import states
 from ironic.conductor import task_manager
 from ironic.drivers import base
+from ironic.drivers.modules import client_cache
 from ironic.drivers.modules import console_utils
 from ironic.openstack.common import loopingcall
 
@@ -96,7 +97,11 @@ def _get_client(*args, **kwargs):
                  'password': kwargs['password'],
                  'auth_url': kwargs['api_endpoint']}
     try:
-        return seamicro_client.Client(kwargs['api_version'], **cl_kwargs)
+        return client_cache.get_client(
+            'seamicro', kwargs['api_endpoint'],
+            dict(cl_kwargs, api_version=kwargs['api_version']),
+            lambda: seamicro_client.Client(kwargs['api_version'],
+                                           **cl_kwargs))
     except seamicro_client_exception.UnsupportedVersion as e:
         raise exception.InvalidParameterValue(_(
             "Invalid 'seamicro_api_version' parameter. Reason: %s.") % e)
@@ -28,6 +28,8 @@ models.
 """
 
 import abc
+import threading
+import time
 
 from oslo_config import cfg
 from oslo_log import log as logging
@@ -40,6 +42,7 @@ from ironic.common.i18n import _LW
 from ironic.common import states
 from ironic.conductor import task_manager
 from ironic.drivers import base
+from ironic.drivers.modules import client_cache
 from ironic.openstack.common import loopingcall
 
 pysnmp = importutils.try_import('pysnmp')
@@ -55,7 +58,13 @@ else:
 opts = [
     cfg.IntOpt('power_timeout',
                default=10,
-               help='Seconds to wait for power action to be completed')
+               help='Seconds to wait for power action to be completed'),
+    cfg.IntOpt('outlet_state_cache_ttl',
+               default=10,
+               help='Time (in seconds) for which the states of all the '
+                    'outlets of a PDU, read in a single table walk, are '
+                    'used to get the power state of its nodes. Set to 0 to '
+                    'query the outlet of each node separately.'),
     ]
 
 LOG = logging.getLogger(__name__)
@@ -91,6 +100,14 @@ OPTIONAL_PROPERTIES = {
 COMMON_PROPERTIES = REQUIRED_PROPERTIES.copy()
 COMMON_PROPERTIES.update(OPTIONAL_PROPERTIES)
 
+# Number of variables requested by each GETBULK of a table walk, enough
+# for the outlets of most PDUs to be read in a single exchange.
+BULK_MAX_REPETITIONS = 64
+
+# (time, {OID: value}) of the outlet state tables of the PDUs, by
+# (agent key, table OID)
+_OUTLET_STATES = {}
+
 
 class SNMPClient(object):
     """SNMP client object.
@@ -108,6 +125,12 @@ class SNMPClient(object):
         else:
             self.community = community
         self.cmd_gen = cmdgen.CommandGenerator()
+        self._auth = None
+        self._transport = None
+        # NOTE: the client, and so its SNMP engine, is shared by all the
+        # nodes of the same PDU, but the engine does not support concurrent
+        # requests.
+        self._lock = threading.Lock()
 
     def _get_auth(self):
         """Return the authorization data for an SNMP request.
@@ -116,13 +139,17 @@ class SNMPClient(object):
             :class:`pysnmp.entity.rfc3413.oneliner.cmdgen.CommunityData`
             object.
         """
-        if self.version == SNMP_V3:
-            # Handling auth/encryption credentials is not (yet) supported.
-            # This version supports a security name analogous to community.
-            return cmdgen.UsmUserData(self.security)
-        else:
-            mp_model = 1 if self.version == SNMP_V2C else 0
-            return cmdgen.CommunityData(self.community, mpModel=mp_model)
+        if self._auth is None:
+            if self.version == SNMP_V3:
+                # Handling auth/encryption credentials is not (yet)
+                # supported. This version supports a security name
+                # analogous to community.
+                self._auth = cmdgen.UsmUserData(self.security)
+            else:
+                mp_model = 1 if self.version == SNMP_V2C else 0
+                self._auth = cmdgen.CommunityData(self.community,
+                                                  mpModel=mp_model)
+        return self._auth
 
     def _get_transport(self):
         """Return the transport target for an SNMP request.
@@ -131,10 +158,14 @@ class SNMPClient(object):
             `pysnmp.entity.rfc3413.oneliner.cmdgen.UdpTransportTarget` object.
         :raises: snmp_error.PySnmpError if the transport address is bad.
         """
-        # The transport target accepts timeout and retries parameters, which
-        # default to 1 (second) and 5 respectively. These are deemed sensible
-        # enough to allow for an unreliable network or slow device.
-        return cmdgen.UdpTransportTarget((self.address, self.port))
+        if self._transport is None:
+            # The transport target accepts timeout and retries parameters,
+            # which default to 1 (second) and 5 respectively. These are
+            # deemed sensible enough to allow for an unreliable network or
+            # slow device.
+            self._transport = cmdgen.UdpTransportTarget((self.address,
+                                                         self.port))
+        return self._transport
 
     def get(self, oid):
         """Use PySNMP to perform an SNMP GET operation on a single object.
@@ -144,9 +175,10 @@ class SNMPClient(object):
         :returns: The value of the requested object.
         """
         try:
-            results = self.cmd_gen.getCmd(self._get_auth(),
-                                          self._get_transport(),
-                                          oid)
+            with self._lock:
+                results = self.cmd_gen.getCmd(self._get_auth(),
+                                              self._get_transport(),
+                                              oid)
         except snmp_error.PySnmpError as e:
             raise exception.SNMPFailure(operation="GET", error=e)
 
@@ -166,6 +198,47 @@ class SNMPClient(object):
         name, val = var_binds[0]
         return val
 
+    def get_table(self, oid):
+        """Use PySNMP to walk an SNMP table column.
+
+        The column is read with GETBULK operations, or GETNEXT operations
+        with SNMPv1 which does not support GETBULK.
+
+        :param oid: The OID of the table column.
+        :raises: SNMPFailure if an SNMP request fails.
+        :returns: A dict of the values of the objects of the column, by
+            their OID as a tuple of integers.
+        """
+        try:
+            with self._lock:
+                if self.version == SNMP_V1:
+                    results = self.cmd_gen.nextCmd(self._get_auth(),
+                                                   self._get_transport(),
+                                                   oid)
+                else:
+                    results = self.cmd_gen.bulkCmd(self._get_auth(),
+                                                   self._get_transport(),
+                                                   0, BULK_MAX_REPETITIONS,
+                                                   oid)
+        except snmp_error.PySnmpError as e:
+            raise exception.SNMPFailure(operation="GETBULK", error=e)
+
+        error_indication, error_status, error_index, var_bind_table = results
+
+        if error_indication:
+            # SNMP engine-level error.
+            raise exception.SNMPFailure(operation="GETBULK",
+                    error=error_indication)
+
+        if error_status:
+            # SNMP PDU error.
+            raise exception.SNMPFailure(operation="GETBULK",
+                    error=error_status.prettyPrint())
+
+        return dict((tuple(name), val)
+                    for var_binds in var_bind_table
+                    for name, val in var_binds)
+
     def set(self, oid, value):
         """Use PySNMP to perform an SNMP SET operation on a single object.
 
@@ -174,9 +247,10 @@ class SNMPClient(object):
         :raises: SNMPFailure if an SNMP request fails.
         """
         try:
-            results = self.cmd_gen.setCmd(self._get_auth(),
-                                          self._get_transport(),
-                                          (oid, value))
+            with self._lock:
+                results = self.cmd_gen.setCmd(self._get_auth(),
+                                              self._get_transport(),
+                                              (oid, value))
         except snmp_error.PySnmpError as e:
             raise exception.SNMPFailure(operation="SET", error=e)
 
@@ -193,17 +267,67 @@ class SNMPClient(object):
                     error=error_status.prettyPrint())
 
 
+def _get_agent_key(snmp_info):
+    """Return the parameters identifying the SNMP agent of a PDU.
+
+    :param snmp_info: SNMP driver info.
+    :returns: A tuple of the address, port, version, community and
+        security of the agent.
+    """
+    return (snmp_info["address"],
+            snmp_info["port"],
+            snmp_info["version"],
+            snmp_info.get("community"),
+            snmp_info.get("security"))
+
+
 def _get_client(snmp_info):
-    """Create and return an SNMP client object.
+    """Return an SNMP client object.
+
+    The client is shared by all the nodes of the same PDU.
 
     :param snmp_info: SNMP driver info.
     :returns: A :class:`SNMPClient` object.
     """
-    return SNMPClient(snmp_info["address"],
-                      snmp_info["port"],
-                      snmp_info["version"],
-                      snmp_info.get("community"),
-                      snmp_info.get("security"))
+    key = _get_agent_key(snmp_info)
+    return client_cache.get_client('snmp', snmp_info["address"], key,
+                                   lambda: SNMPClient(*key))
+
+
+def _get_outlet_state(client, snmp_info, table_oid, oid):
+    """Return the state of an outlet, from the states of all the outlets.
+
+    :param client: The SNMP client of the PDU.
+    :param snmp_info: SNMP driver info.
+    :param table_oid: The OID of the outlet state table column.
+    :param oid: The OID of the state of the outlet.
+    :raises: SNMPFailure if an SNMP request fails.
+    :returns: The value of the state of the outlet.
+    """
+    key = (_get_agent_key(snmp_info), table_oid)
+    entry = _OUTLET_STATES.get(key)
+    now = time.time()
+    if entry is None or now - entry[0] > CONF.snmp.outlet_state_cache_ttl:
+        try:
+            entry = (now, client.get_table(table_oid))
+        except exception.SNMPFailure as e:
+            LOG.debug("Failed to walk the outlet states of SNMP PDU "
+                      "%(addr)s, querying each outlet. Error: %(error)s",
+                      {'addr': snmp_info['address'], 'error': e})
+            entry = (now, {})
+        _OUTLET_STATES[key] = entry
+
+    state = entry[1].get(tuple(oid))
+    if state is None:
+        state = client.get(oid)
+    return state
+
+
+def _forget_outlet_state(snmp_info, table_oid, oid):
+    """Drop the cached state of an outlet whose power was changed."""
+    entry = _OUTLET_STATES.get((_get_agent_key(snmp_info), table_oid))
+    if entry is not None:
+        entry[1].pop(tuple(oid), None)
 
 
 @six.add_metaclass(abc.ABCMeta)
@@ -243,6 +367,26 @@ class SNMPDriverBase(object):
         :raises: SNMPFailure if an SNMP request fails.
         """
 
+    @abc.abstractmethod
+    def _snmp_translate_state(self, state):
+        """Translate the value of an outlet state to a power state.
+
+        :param state: The value of the outlet state object.
+        :returns: power state. One of :class:`ironic.common.states`.
+        """
+
+    def _snmp_state_oids(self):
+        """Return the OIDs of the outlet state table and of the outlet state.
+
+        Drivers whose outlet states can be read in a single table walk
+        implement this method.
+
+        :returns: A tuple of the OID of the outlet state table column and
+            of the OID of the state of the outlet, or None if the outlet
+            states can not be walked.
+        """
+        return None
+
     def _snmp_wait_for_state(self, goal_state):
         """Wait for the power state of the PDU outlet to change.
 
@@ -275,20 +419,35 @@ class SNMPDriverBase(object):
         LOG.debug("power state '%s'", state["state"])
         return state["state"]
 
-    def power_state(self):
+    def power_state(self, cached=False):
         """Returns a node's current power state.
 
+        :param cached: Whether the power state may be read from the states
+            of all the outlets of the PDU, walked at most once every
+            [snmp]outlet_state_cache_ttl seconds, rather than queried.
         :raises: SNMPFailure if an SNMP request fails.
         :returns: power state. One of :class:`ironic.common.states`.
         """
+        oids = self._snmp_state_oids()
+        if cached and oids is not None and CONF.snmp.outlet_state_cache_ttl:
+            table_oid, oid = oids
+            state = _get_outlet_state(self.client, self.snmp_info,
+                                      table_oid, oid)
+            return self._snmp_translate_state(state)
         return self._snmp_power_state()
 
+    def _forget_power_state(self):
+        oids = self._snmp_state_oids()
+        if oids is not None:
+            _forget_outlet_state(self.snmp_info, *oids)
+
     def power_on(self):
         """Set the power state to this node to ON.
 
         :raises: SNMPFailure if an SNMP request fails.
         :returns: power state. One of :class:`ironic.common.states`.
         """
+        self._forget_power_state()
         self._snmp_power_on()
         return self._snmp_wait_for_state(states.POWER_ON)
 
@@ -298,6 +457,7 @@ class SNMPDriverBase(object):
         :raises: SNMPFailure if an SNMP request fails.
         :returns: power state. One of :class:`ironic.common.states`.
         """
+        self._forget_power_state()
         self._snmp_power_off()
         return self._snmp_wait_for_state(states.POWER_OFF)
 
@@ -352,8 +512,12 @@ class SNMPDriverSimple(SNMPDriverBase):
         return self.oid_enterprise + self.oid_device + (outlet,)
 
     def _snmp_power_state(self):
-        state = self.client.get(self.oid)
+        return self._snmp_translate_state(self.client.get(self.oid))
+
+    def _snmp_state_oids(self):
+        return self.oid_enterprise + self.oid_device, self.oid
 
+    def _snmp_translate_state(self, state):
         # Translate the state to an Ironic power state.
         if state == self.value_power_on:
             power_state = states.POWER_ON
@@ -492,8 +656,12 @@ class SNMPDriverEatonPower(SNMPDriverBase):
 
     def _snmp_power_state(self):
         oid = self._snmp_oid(self.oid_status)
-        state = self.client.get(oid)
+        return self._snmp_translate_state(self.client.get(oid))
+
+    def _snmp_state_oids(self):
+        return self.oid_base + self.oid_status, self._snmp_oid(self.oid_status)
 
+    def _snmp_translate_state(self, state):
         # Translate the state to an Ironic power state.
         if state in (self.status_on, self.status_pending_off):
             power_state = states.POWER_ON
@@ -643,7 +811,7 @@ class SNMPPower(base.PowerInterface):
         :returns: power state. One of :class:`ironic.common.states`.
         """
         driver = _get_driver(task.node)
-        power_state = driver.power_state()
+        power_state = driver.power_state(cached=True)
         return power_state
 
     @task_manager.require_exclusive_lock
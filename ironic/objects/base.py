@@ -73,6 +73,32 @@ def make_class_properties(cls):
                 raise
 
         setattr(cls, name, property(getter, setter))
+    make_class_codecs(cls)
+
+
+def make_class_codecs(cls):
+    """Precompute the per-field (de)serialization table of a class.
+
+    Resolving the storage attribute name and the optional
+    _attr_<name>_{to,from}_primitive handlers of every field is done once
+    here, instead of for every field of every object that goes through
+    obj_to_primitive() or obj_from_primitive().
+    """
+    codecs = []
+    for name in sorted(cls.fields):
+        codecs.append((name, get_attrname(name), cls.fields[name],
+                       getattr(cls, '_attr_%s_to_primitive' % name, None),
+                       getattr(cls, '_attr_%s_from_primitive' % name, None)))
+    cls._obj_codecs = tuple(codecs)
+
+
+def _get_slots(bases):
+    """Return all the __slots__ already provided by the given bases."""
+    slots = set()
+    for base in bases:
+        for klass in base.__mro__:
+            slots.update(klass.__dict__.get('__slots__', ()))
+    return slots
 
 
 class IronicObjectMetaclass(type):
@@ -82,6 +108,29 @@ class IronicObjectMetaclass(type):
     # remoted. If this is not None, use it to remote things over RPC.
     indirection_api = None
 
+    def __new__(mcs, name, bases, dict_):
+        # NOTE: Store the field values in slots rather than in the
+        # instance __dict__. This keeps large listings of objects (eg,
+        # thousands of nodes) compact and makes attribute access cheaper.
+        # A class explicitly declaring __slots__ is left alone, and the
+        # __dict__ is kept in the base class so that ad-hoc attributes
+        # still work.
+        if '__slots__' not in dict_:
+            existing = _get_slots(bases)
+            fields = set(dict_.get('fields', {}))
+            for base in bases:
+                fields.update(getattr(base, 'fields', {}))
+            slots = [get_attrname(field) for field in sorted(fields)]
+            slots.extend(['_context', '_changed_fields'])
+            slots = [slot for slot in slots if slot not in existing]
+            if not any(base.__dictoffset__ for base in bases):
+                slots.append('__dict__')
+            if not any(base.__weakrefoffset__ for base in bases):
+                slots.append('__weakref__')
+            dict_['__slots__'] = tuple(slots)
+        return super(IronicObjectMetaclass, mcs).__new__(mcs, name, bases,
+                                                         dict_)
+
     def __init__(cls, names, bases, dict_):
         if not hasattr(cls, '_obj_classes'):
             # This will be set in the 'IronicObject' class.
@@ -198,6 +247,9 @@ class IronicObject(object):
         }
     obj_extra_fields = []
 
+    # Per-class field codecs, see make_class_codecs()
+    _obj_codecs = ()
+
     _attr_created_at_from_primitive = obj_utils.dt_deserializer
     _attr_updated_at_from_primitive = obj_utils.dt_deserializer
     _attr_created_at_to_primitive = obj_utils.dt_serializer('created_at')
@@ -262,13 +314,16 @@ class IronicObject(object):
     @classmethod
     def _obj_from_primitive(cls, context, objver, primitive):
         self = cls(context)
-        self.VERSION = objver
+        if objver != cls.VERSION:
+            self.VERSION = objver
         objdata = primitive['ironic_object.data']
         changes = primitive.get('ironic_object.changes', [])
-        for name in self.fields:
+        for name, attrname, typefn, _to, from_primitive in cls._obj_codecs:
             if name in objdata:
-                setattr(self, name,
-                        self._attr_from_primitive(name, objdata[name]))
+                value = objdata[name]
+                if from_primitive is not None:
+                    value = from_primitive(self, value)
+                setattr(self, attrname, typefn(value))
         self._changed_fields = set([x for x in changes if x in self.fields])
         return self
 
@@ -299,10 +354,10 @@ class IronicObject(object):
         # of issues by copying only our field data.
 
         nobj = self.__class__(self._context)
-        for name in self.fields:
-            if self.obj_attr_is_set(name):
-                nval = copy.deepcopy(getattr(self, name), memo)
-                setattr(nobj, name, nval)
+        for name, attrname, typefn, _to, _from in self._obj_codecs:
+            value = getattr(self, attrname, NotSpecifiedSentinel)
+            if value is not NotSpecifiedSentinel:
+                setattr(nobj, attrname, typefn(copy.deepcopy(value, memo)))
         nobj._changed_fields = set(self._changed_fields)
         return nobj
 
@@ -329,15 +384,20 @@ class IronicObject(object):
         This calls self._attr_to_primitive() for each item in fields.
         """
         primitive = dict()
-        for name in self.fields:
-            if hasattr(self, get_attrname(name)):
-                primitive[name] = self._attr_to_primitive(name)
+        for name, attrname, _type, to_primitive, _from in self._obj_codecs:
+            value = getattr(self, attrname, NotSpecifiedSentinel)
+            if value is NotSpecifiedSentinel:
+                continue
+            if to_primitive is not None:
+                value = to_primitive(self)
+            primitive[name] = value
         obj = {'ironic_object.name': self.obj_name(),
                'ironic_object.namespace': 'ironic',
                'ironic_object.version': self.VERSION,
                'ironic_object.data': primitive}
-        if self.obj_what_changed():
-            obj['ironic_object.changes'] = list(self.obj_what_changed())
+        changes = self.obj_what_changed()
+        if changes:
+            obj['ironic_object.changes'] = list(changes)
         return obj
 
     def obj_load_attr(self, attrname):
@@ -453,9 +513,13 @@ class IronicObject(object):
             self[key] = value
 
     def as_dict(self):
-        return dict((k, getattr(self, k))
-                for k in self.fields
-                if hasattr(self, k))
+        """Return a dict of the fields which have a value set."""
+        result = {}
+        for name, attrname, _type, _to, _from in self._obj_codecs:
+            value = getattr(self, attrname, NotSpecifiedSentinel)
+            if value is not NotSpecifiedSentinel:
+                result[name] = value
+        return result
 
 
 class ObjectListBase(object):
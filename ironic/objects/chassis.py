@@ -68,31 +68,38 @@ class Chassis(base.IronicObject):
             raise exception.InvalidIdentity(identity=chassis_id)
 
     @base.remotable_classmethod
-    def get_by_id(cls, context, chassis_id):
+    def get_by_id(cls, context, chassis_id, use_slave=False):
         """Find a chassis based on its integer id and return a Chassis object.
 
         :param chassis_id: the id of a chassis.
+        :param use_slave: if True, read from the replica database, if one is
+                          configured. Only for the API reads, the result
+                          may be slightly stale.
         :returns: a :class:`Chassis` object.
         """
-        db_chassis = cls.dbapi.get_chassis_by_id(chassis_id)
+        db_chassis = cls.dbapi.get_chassis_by_id(chassis_id,
+                                                  use_slave=use_slave)
         chassis = Chassis._from_db_object(cls(context), db_chassis)
         return chassis
 
     @base.remotable_classmethod
-    def get_by_uuid(cls, context, uuid):
+    def get_by_uuid(cls, context, uuid, use_slave=False):
         """Find a chassis based on uuid and return a :class:`Chassis` object.
 
         :param uuid: the uuid of a chassis.
         :param context: Security context
+        :param use_slave: if True, read from the replica database, if one is
+                          configured. Only for the API reads, the result
+                          may be slightly stale.
         :returns: a :class:`Chassis` object.
         """
-        db_chassis = cls.dbapi.get_chassis_by_uuid(uuid)
+        db_chassis = cls.dbapi.get_chassis_by_uuid(uuid, use_slave=use_slave)
         chassis = Chassis._from_db_object(cls(context), db_chassis)
         return chassis
 
     @base.remotable_classmethod
     def list(cls, context, limit=None, marker=None,
-             sort_key=None, sort_dir=None):
+             sort_key=None, sort_dir=None, use_slave=False):
         """Return a list of Chassis objects.
 
         :param context: Security context.
@@ -100,13 +107,17 @@ class Chassis(base.IronicObject):
         :param marker: pagination marker for large data sets.
         :param sort_key: column to sort results by.
         :param sort_dir: direction to sort. "asc" or "desc".
+        :param use_slave: if True, read from the replica database, if one is
+                          configured. Only for the API reads, the result
+                          may be slightly stale.
         :returns: a list of :class:`Chassis` object.
 
         """
         db_chassis = cls.dbapi.get_chassis_list(limit=limit,
                                                 marker=marker,
                                                 sort_key=sort_key,
-                                                sort_dir=sort_dir)
+                                                sort_dir=sort_dir,
+                                                use_slave=use_slave)
         return [Chassis._from_db_object(cls(context), obj)
                 for obj in db_chassis]
 
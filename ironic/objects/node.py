@@ -114,52 +114,66 @@ class Node(base.IronicObject):
             raise exception.InvalidIdentity(identity=node_id)
 
     @base.remotable_classmethod
-    def get_by_id(cls, context, node_id):
+    def get_by_id(cls, context, node_id, use_slave=False):
         """Find a node based on its integer id and return a Node object.
 
         :param node_id: the id of a node.
+        :param use_slave: if True, read from the replica database, if one is
+                          configured. Only for the API reads, the result
+                          may be slightly stale.
         :returns: a :class:`Node` object.
         """
-        db_node = cls.dbapi.get_node_by_id(node_id)
+        db_node = cls.dbapi.get_node_by_id(node_id, use_slave=use_slave)
         node = Node._from_db_object(cls(context), db_node)
         return node
 
     @base.remotable_classmethod
-    def get_by_uuid(cls, context, uuid):
+    def get_by_uuid(cls, context, uuid, use_slave=False):
         """Find a node based on uuid and return a Node object.
 
         :param uuid: the uuid of a node.
+        :param use_slave: if True, read from the replica database, if one is
+                          configured. Only for the API reads, the result
+                          may be slightly stale.
         :returns: a :class:`Node` object.
         """
-        db_node = cls.dbapi.get_node_by_uuid(uuid)
+        db_node = cls.dbapi.get_node_by_uuid(uuid, use_slave=use_slave)
         node = Node._from_db_object(cls(context), db_node)
         return node
 
     @base.remotable_classmethod
-    def get_by_name(cls, context, name):
+    def get_by_name(cls, context, name, use_slave=False):
         """Find a node based on name and return a Node object.
 
         :param name: the logical name of a node.
+        :param use_slave: if True, read from the replica database, if one is
+                          configured. Only for the API reads, the result
+                          may be slightly stale.
         :returns: a :class:`Node` object.
         """
-        db_node = cls.dbapi.get_node_by_name(name)
+        db_node = cls.dbapi.get_node_by_name(name, use_slave=use_slave)
         node = Node._from_db_object(cls(context), db_node)
         return node
 
     @base.remotable_classmethod
-    def get_by_instance_uuid(cls, context, instance_uuid):
+    def get_by_instance_uuid(cls, context, instance_uuid,
+                             use_slave=False):
         """Find a node based on the instance uuid and return a Node object.
 
         :param uuid: the uuid of the instance.
+        :param use_slave: if True, read from the replica database, if one is
+                          configured. Only for the API reads, the result
+                          may be slightly stale.
         :returns: a :class:`Node` object.
         """
-        db_node = cls.dbapi.get_node_by_instance(instance_uuid)
+        db_node = cls.dbapi.get_node_by_instance(instance_uuid,
+                                                 use_slave=use_slave)
         node = Node._from_db_object(cls(context), db_node)
         return node
 
     @base.remotable_classmethod
     def list(cls, context, limit=None, marker=None, sort_key=None,
-             sort_dir=None, filters=None):
+             sort_dir=None, filters=None, use_slave=False):
         """Return a list of Node objects.
 
         :param context: Security context.
@@ -168,12 +182,16 @@ class Node(base.IronicObject):
         :param sort_key: column to sort results by.
         :param sort_dir: direction to sort. "asc" or "desc".
         :param filters: Filters to apply.
+        :param use_slave: if True, read from the replica database, if one is
+                          configured. Only for the API reads, the result
+                          may be slightly stale.
         :returns: a list of :class:`Node` object.
 
         """
         db_nodes = cls.dbapi.get_node_list(filters=filters, limit=limit,
                                            marker=marker, sort_key=sort_key,
-                                           sort_dir=sort_dir)
+                                           sort_dir=sort_dir,
+                                           use_slave=use_slave)
         return [Node._from_db_object(cls(context), obj) for obj in db_nodes]
 
     @base.remotable_classmethod
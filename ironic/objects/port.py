@@ -73,43 +73,53 @@ class Port(base.IronicObject):
             raise exception.InvalidIdentity(identity=port_id)
 
     @base.remotable_classmethod
-    def get_by_id(cls, context, port_id):
+    def get_by_id(cls, context, port_id, use_slave=False):
         """Find a port based on its integer id and return a Port object.
 
         :param port_id: the id of a port.
+        :param use_slave: if True, read from the replica database, if one is
+                          configured. Only for the API reads, the result
+                          may be slightly stale.
         :returns: a :class:`Port` object.
         """
-        db_port = cls.dbapi.get_port_by_id(port_id)
+        db_port = cls.dbapi.get_port_by_id(port_id, use_slave=use_slave)
         port = Port._from_db_object(cls(context), db_port)
         return port
 
     @base.remotable_classmethod
-    def get_by_uuid(cls, context, uuid):
+    def get_by_uuid(cls, context, uuid, use_slave=False):
         """Find a port based on uuid and return a :class:`Port` object.
 
         :param uuid: the uuid of a port.
         :param context: Security context
+        :param use_slave: if True, read from the replica database, if one is
+                          configured. Only for the API reads, the result
+                          may be slightly stale.
         :returns: a :class:`Port` object.
         """
-        db_port = cls.dbapi.get_port_by_uuid(uuid)
+        db_port = cls.dbapi.get_port_by_uuid(uuid, use_slave=use_slave)
         port = Port._from_db_object(cls(context), db_port)
         return port
 
     @base.remotable_classmethod
-    def get_by_address(cls, context, address):
+    def get_by_address(cls, context, address, use_slave=False):
         """Find a port based on address and return a :class:`Port` object.
 
         :param address: the address of a port.
         :param context: Security context
+        :param use_slave: if True, read from the replica database, if one is
+                          configured. Only for the API reads, the result
+                          may be slightly stale.
         :returns: a :class:`Port` object.
         """
-        db_port = cls.dbapi.get_port_by_address(address)
+        db_port = cls.dbapi.get_port_by_address(address,
+                                               use_slave=use_slave)
         port = Port._from_db_object(cls(context), db_port)
         return port
 
     @base.remotable_classmethod
     def list(cls, context, limit=None, marker=None,
-             sort_key=None, sort_dir=None):
+             sort_key=None, sort_dir=None, use_slave=False):
         """Return a list of Port objects.
 
         :param context: Security context.
@@ -117,18 +127,22 @@ class Port(base.IronicObject):
         :param marker: pagination marker for large data sets.
         :param sort_key: column to sort results by.
         :param sort_dir: direction to sort. "asc" or "desc".
+        :param use_slave: if True, read from the replica database, if one is
+                          configured. Only for the API reads, the result
+                          may be slightly stale.
         :returns: a list of :class:`Port` object.
 
         """
         db_ports = cls.dbapi.get_port_list(limit=limit,
                                            marker=marker,
                                            sort_key=sort_key,
-                                           sort_dir=sort_dir)
+                                           sort_dir=sort_dir,
+                                           use_slave=use_slave)
         return Port._from_db_object_list(db_ports, cls, context)
 
     @base.remotable_classmethod
     def list_by_node_id(cls, context, node_id, limit=None, marker=None,
-                        sort_key=None, sort_dir=None):
+                        sort_key=None, sort_dir=None, use_slave=False):
         """Return a list of Port objects associated with a given node ID.
 
         :param context: Security context.
@@ -137,13 +151,17 @@ class Port(base.IronicObject):
         :param marker: pagination marker for large data sets.
         :param sort_key: column to sort results by.
         :param sort_dir: direction to sort. "asc" or "desc".
+        :param use_slave: if True, read from the replica database, if one is
+                          configured. Only for the API reads, the result
+                          may be slightly stale.
         :returns: a list of :class:`Port` object.
 
         """
         db_ports = cls.dbapi.get_ports_by_node_id(node_id, limit=limit,
                                                   marker=marker,
                                                   sort_key=sort_key,
-                                                  sort_dir=sort_dir)
+                                                  sort_dir=sort_dir,
+                                                  use_slave=use_slave)
         return Port._from_db_object_list(db_ports, cls, context)
 
     @base.remotable
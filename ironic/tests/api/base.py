@@ -28,6 +28,7 @@ import pecan
 import pecan.testing
 from six.moves.urllib import parse as urlparse
 
+from ironic.api.controllers.v1 import driver
 from ironic.tests.db import base
 
 PATH_PREFIX = '/v1'
@@ -55,6 +56,7 @@ class FunctionalTest(base.DbTestCase):
             pecan.set_config({}, overwrite=True)
 
         self.addCleanup(reset_pecan)
+        self.addCleanup(driver.get_registry().clear)
 
         p = mock.patch('ironic.api.controllers.v1.Controller._check_version')
         self._check_version = p.start()
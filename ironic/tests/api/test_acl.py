@@ -61,7 +61,8 @@ class TestACL(base.FunctionalTest):
                                  headers={'X-Auth-Token': utils.ADMIN_TOKEN})
 
             self.assertEqual(self.fake_db_node['uuid'], response['uuid'])
-            mock_get_node.assert_called_once_with(self.fake_db_node['uuid'])
+            mock_get_node.assert_called_once_with(self.fake_db_node['uuid'],
+                                                  use_slave=True)
 
     def test_non_admin(self):
         response = self.get_json(self.node_path,
@@ -25,6 +25,8 @@ from webob import exc as webob_exc
 from ironic.api.controllers import root
 from ironic.api import hooks
 from ironic.common import context
+from ironic.common import policy
+from ironic.db import query_stats
 from ironic.tests.api import base
 from ironic.tests import policy_fixture
 
@@ -175,6 +177,46 @@ class TestNoExceptionTracebackHook(base.FunctionalTest):
         self.assertEqual(self.MSG_WITH_TRACE, actual_msg)
 
 
+class TestQueryStatsHook(base.FunctionalTest):
+
+    @mock.patch.object(query_stats, 'LOG', autospec=True)
+    def test_queries_accounted_to_request(self, mock_log):
+        cfg.CONF.set_override('query_time_warning_threshold', 1e-9,
+                              group='database')
+        self.get_json('/nodes')
+        self.assertEqual(1, mock_log.warn.call_count)
+        stats = mock_log.warn.call_args[0][1]
+        self.assertEqual('GET /v1/nodes', stats['name'])
+        self.assertIsNone(query_stats.current())
+
+    @mock.patch.object(query_stats, 'LOG', autospec=True)
+    def test_below_threshold(self, mock_log):
+        cfg.CONF.set_override('query_count_warning_threshold', 10,
+                              group='database')
+        self.get_json('/nodes')
+        self.assertFalse(mock_log.warn.called)
+
+    def test_after_without_before(self):
+        state = FakeRequestState()
+        hooks.QueryStatsHook().after(state)
+        self.assertIsNone(query_stats.current())
+
+
+class TestRPCHook(base.FunctionalTest):
+
+    def test_rpcapi_shared(self):
+        hook = hooks.RPCHook()
+        state1 = FakeRequestState()
+        state2 = FakeRequestState()
+        with mock.patch.object(hooks.rpcapi, 'ConductorAPI',
+                               autospec=True) as mock_api:
+            hook.before(state1)
+            hook.before(state2)
+        mock_api.assert_called_once_with()
+        self.assertIs(mock_api.return_value, state1.request.rpcapi)
+        self.assertIs(mock_api.return_value, state2.request.rpcapi)
+
+
 class TestContextHook(base.FunctionalTest):
     @mock.patch.object(context, 'RequestContext')
     def test_context_hook_not_admin(self, mock_ctx):
@@ -296,6 +338,18 @@ class TestTrustedCallHook(base.FunctionalTest):
         trusted_call_hook = hooks.TrustedCallHook()
         trusted_call_hook.before(reqstate)
 
+    def test_trusted_call_hook_after_context_hook(self):
+        headers = fake_headers(admin=True)
+        reqstate = FakeRequestState(headers=headers)
+        hooks.ContextHook(None).before(reqstate)
+        trusted_call_hook = hooks.TrustedCallHook()
+        trusted_call_hook.before(reqstate)
+        # The decision is memoized for these credentials
+        with mock.patch.object(policy.get_enforcer(), 'enforce',
+                               autospec=True) as mock_enforce:
+            trusted_call_hook.before(reqstate)
+            self.assertFalse(mock_enforce.called)
+
 
 class TestTrustedCallHookCompatJuno(TestTrustedCallHook):
     def setUp(self):
@@ -176,7 +176,7 @@ class TestDriverProperties(base.FunctionalTest):
 
     def test_driver_properties_fake(self, mock_topic, mock_properties):
         # Can get driver properties for fake driver.
-        driver._DRIVER_PROPERTIES = {}
+        driver.get_registry().clear()
         driver_name = 'fake'
         mock_topic.return_value = 'fake_topic'
         mock_properties.return_value = {'prop1': 'Property 1. Required.'}
@@ -186,12 +186,13 @@ class TestDriverProperties(base.FunctionalTest):
         mock_properties.assert_called_once_with(mock.ANY, driver_name,
                                                 topic=mock_topic.return_value)
         self.assertEqual(mock_properties.return_value,
-                         driver._DRIVER_PROPERTIES[driver_name])
+                         driver.get_registry()._info[(driver_name,
+                                                      'properties')])
 
     def test_driver_properties_cached(self, mock_topic, mock_properties):
         # only one RPC-conductor call will be made and the info cached
         # for subsequent requests
-        driver._DRIVER_PROPERTIES = {}
+        driver.get_registry().clear()
         driver_name = 'fake'
         mock_topic.return_value = 'fake_topic'
         mock_properties.return_value = {'prop1': 'Property 1. Required.'}
@@ -203,13 +204,14 @@ class TestDriverProperties(base.FunctionalTest):
         mock_properties.assert_called_once_with(mock.ANY, driver_name,
                                                 topic=mock_topic.return_value)
         self.assertEqual(mock_properties.return_value,
-                         driver._DRIVER_PROPERTIES[driver_name])
+                         driver.get_registry()._info[(driver_name,
+                                                      'properties')])
 
     def test_driver_properties_invalid_driver_name(self, mock_topic,
                                                    mock_properties):
         # Cannot get driver properties for an invalid driver; no RPC topic
         # exists for it.
-        driver._DRIVER_PROPERTIES = {}
+        driver.get_registry().clear()
         driver_name = 'bad_driver'
         mock_topic.side_effect = exception.DriverNotFound(
                 driver_name=driver_name)
@@ -223,7 +225,7 @@ class TestDriverProperties(base.FunctionalTest):
     def test_driver_properties_cannot_load(self, mock_topic, mock_properties):
         # Cannot get driver properties for the driver. Although an RPC topic
         # exists for it, the conductor wasn't able to load it.
-        driver._DRIVER_PROPERTIES = {}
+        driver.get_registry().clear()
         driver_name = 'driver'
         mock_topic.return_value = 'driver_topic'
         mock_properties.side_effect = exception.DriverNotFound(
@@ -234,3 +236,69 @@ class TestDriverProperties(base.FunctionalTest):
         mock_topic.assert_called_once_with(driver_name)
         mock_properties.assert_called_once_with(mock.ANY, driver_name,
                                                 topic=mock_topic.return_value)
+
+
+class TestDriverRegistry(base.FunctionalTest):
+
+    def setUp(self):
+        super(TestDriverRegistry, self).setUp()
+        self.registry = driver.DriverRegistry()
+
+    def _register(self, hostname, drivers):
+        return self.dbapi.register_conductor({'hostname': hostname,
+                                              'drivers': drivers})
+
+    def test_get_drivers_cached(self):
+        self._register('host1', ['driver1'])
+        with mock.patch.object(self.dbapi, 'get_active_driver_dict',
+                               wraps=self.dbapi.get_active_driver_dict
+                               ) as mock_get:
+            self.assertEqual({'driver1': set(['host1'])},
+                             self.registry.get_drivers(self.dbapi))
+            self.assertEqual({'driver1': set(['host1'])},
+                             self.registry.get_drivers(self.dbapi))
+            self.assertEqual(1, mock_get.call_count)
+
+    def test_get_drivers_conductors_changed(self):
+        self._register('host1', ['driver1'])
+        self.registry.get_drivers(self.dbapi)
+        self._register('host2', ['driver2'])
+        self.assertEqual({'driver1': set(['host1']),
+                          'driver2': set(['host2'])},
+                         self.registry.get_drivers(self.dbapi))
+
+    def test_get_info(self):
+        self._register('host1', ['driver1'])
+        loader = mock.Mock(return_value={'foo': 'bar'})
+        for i in range(2):
+            self.assertEqual({'foo': 'bar'},
+                             self.registry.get_info(self.dbapi, 'driver1',
+                                                    'properties', loader))
+        loader.assert_called_once_with()
+
+    def test_get_info_error_not_cached(self):
+        loader = mock.Mock(side_effect=exception.DriverNotFound(
+            driver_name='driver1'))
+        for i in range(2):
+            self.assertRaises(exception.DriverNotFound,
+                              self.registry.get_info, self.dbapi, 'driver1',
+                              'properties', loader)
+        self.assertEqual(2, loader.call_count)
+
+    def test_get_info_invalidated(self):
+        self._register('host1', ['driver1', 'driver2'])
+        loader = mock.Mock(return_value={'foo': 'bar'})
+        self.registry.get_info(self.dbapi, 'driver1', 'properties', loader)
+        self.registry.get_info(self.dbapi, 'driver2', 'properties', loader)
+        self.assertEqual(2, loader.call_count)
+
+        # The hosts of driver1 change, not the ones of driver2
+        self._register('host2', ['driver1'])
+        self.registry.get_info(self.dbapi, 'driver1', 'properties', loader)
+        self.registry.get_info(self.dbapi, 'driver2', 'properties', loader)
+        self.assertEqual(3, loader.call_count)
+
+    def test_get_one_not_found(self):
+        self._register('host1', ['driver1'])
+        ret = self.get_json('/drivers/driver2', expect_errors=True)
+        self.assertEqual(404, ret.status_int)
@@ -20,6 +20,7 @@ import json
 
 import mock
 from oslo_config import cfg
+import oslo_messaging as messaging
 from oslo_utils import timeutils
 from oslo_utils import uuidutils
 import six
@@ -35,6 +36,7 @@ from ironic.common import boot_devices
 from ironic.common import exception
 from ironic.common import states
 from ironic.conductor import rpcapi
+from ironic.db.sqlalchemy import api as sqlalchemy_api
 from ironic import objects
 from ironic.tests.api import base as test_api_base
 from ironic.tests.api import utils as test_api_utils
@@ -1384,6 +1386,274 @@ class TestPost(test_api_base.FunctionalTest):
         self.assertFalse(get_methods_mock.called)
 
 
+class TestBulkEnroll(test_api_base.FunctionalTest):
+
+    def setUp(self):
+        super(TestBulkEnroll, self).setUp()
+        self.chassis = obj_utils.create_test_chassis(self.context)
+        p = mock.patch.object(rpcapi.ConductorAPI, 'get_topic_for')
+        self.mock_gtf = p.start()
+        self.mock_gtf.return_value = 'test-topic'
+        self.addCleanup(p.stop)
+        self.headers = {api_base.Version.string: str(api_v1.MAX_VER)}
+
+    def _enroll(self, nodes, **kwargs):
+        kwargs.setdefault('headers', self.headers)
+        return self.post_json('/nodes/bulk', {'nodes': nodes}, **kwargs)
+
+    def test_enroll(self):
+        node1 = {'driver': 'fake', 'name': 'node-1',
+                 'driver_info': {'foo': 'bar'},
+                 'ports': [{'address': '52:54:00:cf:2d:31'},
+                           {'address': '52:54:00:cf:2d:32',
+                            'extra': {'foo': 'bar'}}]}
+        node2 = {'driver': 'fake', 'uuid': uuidutils.generate_uuid(),
+                 'chassis_uuid': self.chassis.uuid, 'maintenance': True}
+
+        response = self._enroll([node1, node2])
+
+        self.assertEqual(200, response.status_int)
+        result1, result2 = response.json['nodes']
+        self.assertIsNone(result1['error'])
+        self.assertEqual('node-1', result1['name'])
+        self.assertTrue(uuidutils.is_uuid_like(result1['uuid']))
+        self.assertEqual(2, len(result1['ports']))
+        self.assertIn(result1['uuid'], result1['links'][0]['href'])
+        self.assertIsNone(result2['error'])
+        self.assertEqual(node2['uuid'], result2['uuid'])
+        self.assertEqual([], result2['ports'])
+
+        node = self.get_json('/nodes/%s' % result1['uuid'],
+                             headers=self.headers)
+        self.assertEqual({'foo': 'bar'}, node['driver_info'])
+        self.assertFalse(node['maintenance'])
+        self.assertEqual(states.AVAILABLE, node['provision_state'])
+        ports = self.get_json('/nodes/%s/ports/detail' % result1['uuid'])
+        self.assertEqual(
+            sorted(result1['ports']),
+            sorted(port['uuid'] for port in ports['ports']))
+        self.assertEqual(
+            ['52:54:00:cf:2d:31', '52:54:00:cf:2d:32'],
+            sorted(port['address'] for port in ports['ports']))
+        node = self.get_json('/nodes/%s' % node2['uuid'],
+                             headers=self.headers)
+        self.assertEqual(self.chassis.uuid, node['chassis_uuid'])
+        self.assertTrue(node['maintenance'])
+
+    def test_enroll_errors(self):
+        existing = obj_utils.create_test_node(self.context)
+
+        def get_topic_for(node):
+            if node.driver == 'unknown':
+                raise exception.NoValidHost(reason='unknown driver')
+            return 'test-topic'
+
+        self.mock_gtf.side_effect = get_topic_for
+        nodes = [{'driver': 'fake', 'uuid': existing.uuid},
+                 {'driver': 'unknown'},
+                 {'driver': 'unknown'},
+                 {'driver': 'fake', 'name': 'invalid name'},
+                 {'driver': 'fake',
+                  'chassis_uuid': '1a1a1a1a-2b2b-3c3c-4d4d-5e5e5e5e5e5e'},
+                 {'driver': 'fake', 'ports': [{'address': 'invalid'}]},
+                 {'driver': 'fake', 'name': 'good'}]
+
+        response = self._enroll(nodes[:-2] + nodes[-1:])
+
+        self.assertEqual(200, response.status_int)
+        results = response.json['nodes']
+        self.assertEqual(6, len(results))
+        self.assertIn('already exists', results[0]['error'])
+        self.assertNotIn('links', results[0])
+        self.assertIn('unknown driver', results[1]['error'])
+        self.assertIn('unknown driver', results[2]['error'])
+        self.assertIn('invalid name', results[3]['error'])
+        self.assertIn('could not be found', results[4]['error'])
+        self.assertIsNone(results[5]['error'])
+        self.assertEqual('good', results[5]['name'])
+        # the driver is only checked once
+        self.assertEqual(2, self.mock_gtf.call_count)
+        self.get_json('/nodes/%s' % results[5]['uuid'])
+        for result in results[1:5]:
+            response = self.get_json('/nodes/%s' % result['uuid'],
+                                     expect_errors=True)
+            self.assertEqual(404, response.status_int)
+
+        # an invalid attribute fails the whole request
+        response = self._enroll(nodes[-2:], expect_errors=True)
+        self.assertEqual(400, response.status_int)
+
+    def test_enroll_batches(self):
+        cfg.CONF.set_override('enrollment_batch_size', 2, 'api')
+        create_nodes = sqlalchemy_api.Connection.create_nodes
+        nodes = [{'driver': 'fake'} for i in range(5)]
+
+        with mock.patch.object(sqlalchemy_api.Connection, 'create_nodes',
+                               autospec=True,
+                               side_effect=create_nodes) as mock_create:
+            response = self._enroll(nodes)
+
+        self.assertEqual(3, mock_create.call_count)
+        self.assertEqual([2, 2, 1], [len(call[0][1])
+                                     for call in mock_create.call_args_list])
+        results = response.json['nodes']
+        self.assertEqual(5, len(results))
+        self.assertEqual(5, len(set(result['uuid'] for result in results)))
+        self.assertEqual(
+            5, len(self.get_json('/nodes', headers=self.headers)['nodes']))
+
+    def test_enroll_old_version(self):
+        response = self._enroll([{'driver': 'fake'}], expect_errors=True,
+                                headers={api_base.Version.string: '1.6'})
+        self.assertEqual(406, response.status_int)
+
+
+class TestBulkStates(test_api_base.FunctionalTest):
+
+    def setUp(self):
+        super(TestBulkStates, self).setUp()
+        self.nodes = [obj_utils.create_test_node(
+                          self.context, id=i, uuid=uuidutils.generate_uuid(),
+                          name='node-%d' % i, power_state=states.POWER_OFF,
+                          provision_state=states.AVAILABLE)
+                      for i in range(4)]
+        for host in ('host1', 'host2'):
+            self.dbapi.register_conductor({'hostname': host,
+                                           'drivers': ['fake']})
+        p = mock.patch.object(rpcapi.ConductorAPI, 'change_nodes_state')
+        self.mock_cns = p.start()
+        self.mock_cns.side_effect = (
+            lambda context, node_ids, action, target, topic:
+            dict((node_id, None) for node_id in node_ids))
+        self.addCleanup(p.stop)
+        self.headers = {api_base.Version.string: str(api_v1.MAX_VER)}
+
+    def _put(self, action, nodes, target, **kwargs):
+        kwargs.setdefault('headers', self.headers)
+        return self.put_json('/nodes/bulk_states/%s' % action,
+                             {'nodes': nodes, 'target': target}, **kwargs)
+
+    def test_power(self):
+        self.nodes[1].provision_state = states.CLEANING
+        self.nodes[1].save()
+        idents = [self.nodes[0].uuid, self.nodes[1].uuid, 'missing',
+                  self.nodes[2].name, self.nodes[3].uuid]
+
+        response = self._put('power', idents, states.POWER_ON)
+
+        self.assertEqual(202, response.status_int)
+        results = response.json['nodes']
+        self.assertEqual(idents, [result['node'] for result in results])
+        self.assertEqual([True, False, False, True, True],
+                         [result['accepted'] for result in results])
+        self.assertIn(states.CLEANING, results[1]['error'])
+        self.assertIsNone(results[2]['uuid'])
+        self.assertIn('missing', results[2]['error'])
+        self.assertEqual(self.nodes[2].uuid, results[3]['uuid'])
+
+        # one RPC call per conductor, with all its nodes in a batch
+        self.assertTrue(1 <= self.mock_cns.call_count <= 2)
+        called = []
+        for call in self.mock_cns.call_args_list:
+            context, node_ids, action, target, topic = call[0]
+            self.assertEqual(('power', states.POWER_ON), (action, target))
+            self.assertIn(topic, ('ironic.conductor_manager.host1',
+                                  'ironic.conductor_manager.host2'))
+            called.extend(node_ids)
+        self.assertEqual(
+            sorted(node.uuid for node in (self.nodes[0], self.nodes[2],
+                                          self.nodes[3])),
+            sorted(called))
+
+    def test_provision(self):
+        self.nodes[1].reservation = 'fake-host'
+        self.nodes[1].save()
+        self.nodes[2].maintenance = True
+        self.nodes[2].save()
+        self.mock_cns.side_effect = (
+            lambda context, node_ids, action, target, topic:
+            dict((node_id, 'conductor error'
+                  if node_id == self.nodes[3].uuid else None)
+                 for node_id in node_ids))
+
+        response = self._put('provision',
+                             [node.uuid for node in self.nodes],
+                             states.ACTIVE)
+
+        self.assertEqual(202, response.status_int)
+        results = response.json['nodes']
+        self.assertTrue(results[0]['accepted'])
+        self.assertIsNone(results[0]['error'])
+        self.assertIn('fake-host', results[1]['error'])
+        self.assertIn('maintenance', results[2]['error'])
+        self.assertEqual('conductor error', results[3]['error'])
+        self.assertFalse(results[3]['accepted'])
+        for call in self.mock_cns.call_args_list:
+            self.assertEqual(('provision', states.ACTIVE), call[0][2:4])
+
+    def test_batches(self):
+        cfg.CONF.set_override('state_change_batch_size', 1, 'api')
+
+        response = self._put('power', [node.uuid for node in self.nodes],
+                             states.POWER_ON)
+
+        results = response.json['nodes']
+        self.assertTrue(all(result['accepted'] for result in results))
+        self.assertEqual(4, self.mock_cns.call_count)
+        self.assertEqual(
+            sorted(node.uuid for node in self.nodes),
+            sorted(call[0][1][0] for call in self.mock_cns.call_args_list))
+
+    def test_rpc_fails(self):
+        cfg.CONF.set_override('state_change_batch_size', 1, 'api')
+        failed = self.nodes[1].uuid
+
+        def change_nodes_state(context, node_ids, action, target, topic):
+            if failed in node_ids:
+                raise messaging.MessagingTimeout('timed out')
+            return dict((node_id, None) for node_id in node_ids)
+
+        self.mock_cns.side_effect = change_nodes_state
+
+        response = self._put('power', [node.uuid for node in self.nodes],
+                             states.POWER_ON)
+
+        self.assertEqual(202, response.status_int)
+        results = response.json['nodes']
+        self.assertEqual([True, False, True, True],
+                         [result['accepted'] for result in results])
+        self.assertIn('timed out', results[1]['error'])
+
+    def test_unknown_driver(self):
+        self.nodes[0].driver = 'unknown'
+        self.nodes[0].save()
+
+        response = self._put('power', [self.nodes[0].uuid, self.nodes[1].uuid],
+                             states.POWER_OFF)
+
+        results = response.json['nodes']
+        self.assertIn('unknown', results[0]['error'])
+        self.assertTrue(results[1]['accepted'])
+        self.assertEqual(1, self.mock_cns.call_count)
+
+    def test_invalid_requests(self):
+        uuids = [self.nodes[0].uuid]
+        for action, target, headers, status in (
+                ('provision', 'not-supported', self.headers, 400),
+                ('foo', states.POWER_ON, self.headers, 404),
+                ('power', states.POWER_ON,
+                 {api_base.Version.string: '1.7'}, 406),
+                ('provision', 'manage',
+                 {api_base.Version.string: '1.8'}, 200)):
+            response = self._put(action, uuids, target, headers=headers,
+                                 expect_errors=True)
+            if status == 200:
+                self.assertEqual(202, response.status_int)
+            else:
+                self.assertEqual(status, response.status_int)
+        self.assertEqual(1, self.mock_cns.call_count)
+
+
 class TestDelete(test_api_base.FunctionalTest):
 
     def setUp(self):
@@ -1422,7 +1692,8 @@ class TestDelete(test_api_base.FunctionalTest):
         self.assertEqual(404, response.status_int)
         self.assertEqual('application/json', response.content_type)
         self.assertTrue(response.json['error_message'])
-        mock_gbu.assert_called_once_with(mock.ANY, node.uuid)
+        mock_gbu.assert_called_once_with(mock.ANY, node.uuid,
+                                         use_slave=False)
 
     @mock.patch.object(objects.Node, 'get_by_name')
     def test_delete_node_not_found_by_name_unsupported(self, mock_gbn):
@@ -1445,7 +1716,8 @@ class TestDelete(test_api_base.FunctionalTest):
         self.assertEqual(404, response.status_int)
         self.assertEqual('application/json', response.content_type)
         self.assertTrue(response.json['error_message'])
-        mock_gbn.assert_called_once_with(mock.ANY, node.name)
+        mock_gbn.assert_called_once_with(mock.ANY, node.name,
+                                         use_slave=False)
 
     def test_delete_ports_subresource(self):
         node = obj_utils.create_test_node(self.context)
@@ -1476,7 +1748,8 @@ class TestDelete(test_api_base.FunctionalTest):
         self.assertEqual(b'', response.body)
         self.assertEqual(False, node.maintenance)
         self.assertEqual(None, node.maintenance_reason)
-        mock_get.assert_called_once_with(mock.ANY, node.uuid)
+        mock_get.assert_called_once_with(mock.ANY, node.uuid,
+                                         use_slave=False)
         mock_update.assert_called_once_with(mock.ANY, mock.ANY,
                                             topic='test-topic')
 
@@ -1494,7 +1767,8 @@ class TestDelete(test_api_base.FunctionalTest):
         self.assertEqual(b'', response.body)
         self.assertEqual(False, node.maintenance)
         self.assertEqual(None, node.maintenance_reason)
-        mock_get.assert_called_once_with(mock.ANY, node.name)
+        mock_get.assert_called_once_with(mock.ANY, node.name,
+                                         use_slave=False)
         mock_update.assert_called_once_with(mock.ANY, mock.ANY,
                                             topic='test-topic')
 
@@ -1918,7 +2192,8 @@ class TestPut(test_api_base.FunctionalTest):
         self.assertEqual(b'', ret.body)
         self.assertEqual(True, self.node.maintenance)
         self.assertEqual(reason, self.node.maintenance_reason)
-        mock_get.assert_called_once_with(mock.ANY, node_ident)
+        mock_get.assert_called_once_with(mock.ANY, node_ident,
+                                         use_slave=False)
         mock_update.assert_called_once_with(mock.ANY, mock.ANY,
                                             topic='test-topic')
 
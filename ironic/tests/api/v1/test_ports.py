@@ -227,7 +227,8 @@ class TestListPorts(api_base.FunctionalTest):
         obj_utils.create_test_port(self.context, node_id=self.node.id)
         self.get_json('/ports/detail?node_uuid=%s&node=%s' %
             (self.node.uuid, 'node-name'))
-        mock_get_rpc_node.assert_called_once_with(self.node.uuid)
+        mock_get_rpc_node.assert_called_once_with(self.node.uuid,
+                                                  use_slave=True)
 
     @mock.patch.object(api_utils, 'get_rpc_node')
     def test_get_all_by_node_name_not_supported(self, mock_get_rpc_node):
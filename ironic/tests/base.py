@@ -33,7 +33,10 @@ from oslo_context import context as ironic_context
 from oslo_log import log as logging
 import testtools
 
+from ironic.common.glance_service import base_image_service
 from ironic.common import hash_ring
+from ironic.common import keystone
+from ironic.drivers.modules import client_cache
 from ironic.objects import base as objects_base
 from ironic.tests import conf_fixture
 from ironic.tests import policy_fixture
@@ -107,6 +110,9 @@ class TestCase(testtools.TestCase):
 
         self.addCleanup(self._clear_attrs)
         self.addCleanup(hash_ring.HashRingManager().reset)
+        self.addCleanup(keystone._AdminTokenCache.reset)
+        self.addCleanup(client_cache.clear)
+        self.addCleanup(base_image_service.clear_cache)
         self.useFixture(fixtures.EnvironmentVariable('http_proxy'))
         self.policy = self.useFixture(policy_fixture.PolicyFixture())
         CONF.set_override('fatal_exception_format_errors', True)
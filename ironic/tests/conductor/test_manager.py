@@ -19,8 +19,12 @@
 """Test class for Ironic ManagerService."""
 
 import datetime
+import hashlib
+import os
+import time
 
 import eventlet
+import fixtures
 import mock
 from oslo_config import cfg
 from oslo_context import context
@@ -40,6 +44,7 @@ from ironic.conductor import manager
 from ironic.conductor import task_manager
 from ironic.conductor import utils as conductor_utils
 from ironic.db import api as dbapi
+from ironic.db import query_stats
 from ironic.drivers import base as drivers_base
 from ironic import objects
 from ironic.tests import base as tests_base
@@ -264,8 +269,9 @@ class StartStopTestCase(_ServiceSetUpMixin, tests_db_base.DbTestCase):
             mock_names.return_value = init_names
             self._start_service()
         tasks = dict(self.service._periodic_tasks)
-        self.assertEqual(obj.task, tasks[expected_task_name])
-        self.assertEqual(obj.iface.iface, tasks[expected_task_name2])
+        self.assertEqual(obj.task, tasks[expected_task_name].__wrapped__)
+        self.assertEqual(obj.iface.iface,
+                         tasks[expected_task_name2].__wrapped__)
         self.assertEqual(42,
                          self.service._periodic_spacing[expected_task_name])
         self.assertEqual(100500,
@@ -273,6 +279,17 @@ class StartStopTestCase(_ServiceSetUpMixin, tests_db_base.DbTestCase):
         self.assertIn(expected_task_name, self.service._periodic_last_run)
         self.assertIn(expected_task_name2, self.service._periodic_last_run)
 
+    @mock.patch.object(query_stats, 'account', autospec=True)
+    def test_start_accounts_periodic_task_queries(self, mock_account):
+        self._start_service()
+        tasks = dict(self.service._periodic_tasks)
+        with mock.patch.object(self.service.dbapi, 'get_nodeinfo_list',
+                               autospec=True) as mock_list:
+            mock_list.return_value = []
+            tasks['_sync_power_states'](self.service, self.context)
+        mock_account.assert_called_once_with(
+            'ConductorManager._sync_power_states')
+
     @mock.patch.object(driver_factory.DriverFactory, '__init__')
     def test_start_fails_on_missing_driver(self, mock_df):
         mock_df.side_effect = exception.DriverNotFound('test')
@@ -475,6 +492,99 @@ class ChangeNodePowerStateTestCase(_ServiceSetUpMixin,
             self.assertIsNone(node.last_error)
 
 
+@_mock_record_keepalive
+class ChangeNodesStateTestCase(_ServiceSetUpMixin, tests_db_base.DbTestCase):
+
+    def test_change_nodes_state_power(self):
+        nodes = [obj_utils.create_test_node(self.context, driver='fake',
+                                            uuid=uuidutils.generate_uuid(),
+                                            power_state=states.POWER_OFF)
+                 for i in range(3)]
+        nodes[1].reservation = 'fake-reserv'
+        nodes[1].save()
+        self._start_service()
+
+        with mock.patch.object(self.driver.power,
+                               'get_power_state') as get_power_mock:
+            get_power_mock.return_value = states.POWER_OFF
+            results = self.service.change_nodes_state(
+                self.context, [node.uuid for node in nodes], 'power',
+                states.POWER_ON)
+            self.service._worker_pool.waitall()
+
+        self.assertIsNone(results[nodes[0].uuid])
+        self.assertIn('fake-reserv', results[nodes[1].uuid])
+        self.assertIsNone(results[nodes[2].uuid])
+        for node, power_state in zip(nodes, (states.POWER_ON,
+                                             states.POWER_OFF,
+                                             states.POWER_ON)):
+            node.refresh()
+            self.assertEqual(power_state, node.power_state)
+
+    @mock.patch.object(manager.ConductorManager, 'do_provisioning_action',
+                       autospec=True)
+    @mock.patch.object(manager.ConductorManager, 'inspect_hardware',
+                       autospec=True)
+    @mock.patch.object(manager.ConductorManager, 'do_node_tear_down',
+                       autospec=True)
+    @mock.patch.object(manager.ConductorManager, 'do_node_deploy',
+                       autospec=True)
+    def test_change_nodes_state_provision(self, mock_deploy, mock_tear_down,
+                                          mock_inspect, mock_action):
+        node_ids = ['node1', 'node2']
+        for target, mock_method, args in (
+                (states.ACTIVE, mock_deploy, {'rebuild': False}),
+                (states.REBUILD, mock_deploy, {'rebuild': True}),
+                (states.DELETED, mock_tear_down, {}),
+                ('inspect', mock_inspect, {}),
+                ('manage', mock_action, {})):
+            mock_method.reset_mock()
+            results = self.service.change_nodes_state(
+                self.context, node_ids, 'provision', target)
+            self.assertEqual({'node1': None, 'node2': None}, results)
+            expected = [((self.service, self.context, node_id), args)
+                        for node_id in node_ids]
+            if mock_method is mock_action:
+                expected = [((self.service, self.context, node_id, target),
+                             args) for node_id in node_ids]
+            self.assertEqual(expected, mock_method.call_args_list)
+
+    @mock.patch.object(manager.ConductorManager, 'do_node_deploy',
+                       autospec=True)
+    def test_change_nodes_state_errors(self, mock_deploy):
+        def deploy(manager, context, node_id, rebuild=False):
+            if node_id == 'unexpected':
+                raise ValueError('boom')
+            elif node_id == 'locked':
+                raise exception.NodeLocked(node=node_id, host='fake-host')
+            elif node_id == 'expected':
+                try:
+                    raise exception.NoFreeConductorWorker()
+                except exception.NoFreeConductorWorker:
+                    raise messaging.rpc.ExpectedException()
+
+        mock_deploy.side_effect = deploy
+
+        results = self.service.change_nodes_state(
+            self.context, ['unexpected', 'locked', 'expected', 'ok'],
+            'provision', states.ACTIVE)
+
+        self.assertEqual(4, mock_deploy.call_count)
+        self.assertEqual('boom', results['unexpected'])
+        self.assertIn('fake-host', results['locked'])
+        self.assertIn('worker', results['expected'])
+        self.assertIsNone(results['ok'])
+
+    def test_change_nodes_state_invalid_target(self):
+        for action, target in (('power', 'active'), ('provision', 'foo'),
+                               ('foo', states.POWER_ON)):
+            exc = self.assertRaises(messaging.rpc.ExpectedException,
+                                    self.service.change_nodes_state,
+                                    self.context, ['node'], action, target)
+            self.assertEqual(exception.InvalidParameterValue,
+                             exc.exc_info[0])
+
+
 @_mock_record_keepalive
 class UpdateNodeTestCase(_ServiceSetUpMixin, tests_db_base.DbTestCase):
     def test_update_node(self):
@@ -1318,6 +1428,50 @@ class DoNodeDeployTearDownTestCase(_ServiceSetUpMixin,
         self.assertIsNotNone(node.last_error)
         self.assertFalse(mock_deploy.called)
 
+    @mock.patch.object(manager, '_store_configdrive_locally')
+    @mock.patch('ironic.drivers.modules.fake.FakeDeploy.deploy')
+    def test__do_node_deploy_configdrive_store_error(self, mock_deploy,
+                                                     mock_store):
+        CONF.set_override('configdrive_store_dir', '/cd', group='conductor')
+        CONF.set_override('configdrive_store_url', 'http://1.2.3.4/cd',
+                          group='conductor')
+        self._start_service()
+        node = obj_utils.create_test_node(self.context, driver='fake',
+                                          provision_state=states.DEPLOYING,
+                                          target_provision_state=states.ACTIVE)
+        task = task_manager.TaskManager(self.context, node.uuid)
+
+        mock_store.side_effect = IOError('No space left on device')
+        self.assertRaises(IOError, manager.do_node_deploy, task,
+                          self.service.conductor.id,
+                          configdrive=b'fake config drive')
+        node.refresh()
+        self.assertEqual(states.DEPLOYFAIL, node.provision_state)
+        self.assertIsNotNone(node.last_error)
+        self.assertFalse(mock_deploy.called)
+
+    @mock.patch('ironic.drivers.modules.fake.FakeDeploy.deploy')
+    def test__do_node_deploy_fails_removes_configdrive(self, mock_deploy):
+        store_dir = self.useFixture(fixtures.TempDir()).path
+        CONF.set_override('configdrive_store_dir', store_dir,
+                          group='conductor')
+        CONF.set_override('configdrive_store_url', 'http://1.2.3.4/cd',
+                          group='conductor')
+        self._start_service()
+        node = obj_utils.create_test_node(self.context, driver='fake',
+                                          provision_state=states.DEPLOYING,
+                                          target_provision_state=states.ACTIVE)
+        task = task_manager.TaskManager(self.context, node.uuid)
+
+        mock_deploy.side_effect = exception.InstanceDeployFailure('test')
+        self.assertRaises(exception.InstanceDeployFailure,
+                          manager.do_node_deploy, task,
+                          self.service.conductor.id,
+                          configdrive=b'fake config drive')
+        node.refresh()
+        self.assertEqual(states.DEPLOYFAIL, node.provision_state)
+        self.assertEqual([], os.listdir(store_dir))
+
     @mock.patch('ironic.drivers.modules.fake.FakeDeploy.deploy')
     def test__do_node_deploy_ok_2(self, mock_deploy):
         # NOTE(rloo): a different way of testing for the same thing as in
@@ -3583,6 +3737,89 @@ class StoreConfigDriveTestCase(tests_base.TestCase):
             container_name, expected_obj_name, timeout)
         self.assertEqual(expected_instance_info, self.node.instance_info)
 
+    def _config_store(self):
+        store_dir = self.useFixture(fixtures.TempDir()).path
+        CONF.set_override('configdrive_store_dir', store_dir,
+                          group='conductor')
+        CONF.set_override('configdrive_store_url', 'http://1.2.3.4/cd/',
+                          group='conductor')
+        return store_dir
+
+    def test_store_configdrive_locally(self, mock_swift):
+        store_dir = self._config_store()
+        name = 'configdrive-%s-%s' % (self.node.uuid,
+                                      hashlib.sha256(b'foo').hexdigest())
+
+        manager._store_configdrive(self.node, u'foo')
+
+        self.assertEqual({'configdrive': 'http://1.2.3.4/cd/%s' % name},
+                         self.node.instance_info)
+        self.assertEqual([name], os.listdir(store_dir))
+        with open(os.path.join(store_dir, name), 'rb') as f:
+            self.assertEqual(b'foo', f.read())
+        self.assertFalse(mock_swift.called)
+
+    def test_store_configdrive_locally_replaces(self, mock_swift):
+        store_dir = self._config_store()
+        manager._store_configdrive(self.node, b'foo')
+        manager._store_configdrive(self.node, b'foo')
+        self.assertEqual(1, len(os.listdir(store_dir)))
+        manager._store_configdrive(self.node, b'bar')
+        name = 'configdrive-%s-%s' % (self.node.uuid,
+                                      hashlib.sha256(b'bar').hexdigest())
+        self.assertEqual([name], os.listdir(store_dir))
+
+    def test_remove_stored_configdrives(self, mock_swift):
+        store_dir = self._config_store()
+        other_node = obj_utils.get_test_node(
+            self.context, driver='fake', uuid=uuidutils.generate_uuid())
+        manager._store_configdrive(self.node, b'foo')
+        manager._store_configdrive(other_node, b'foo')
+        manager._remove_stored_configdrives(self.node)
+        self.assertEqual(1, len(os.listdir(store_dir)))
+        self.assertIn(other_node.uuid, os.listdir(store_dir)[0])
+
+    def test_store_configdrive_locally_restarts_expiry(self, mock_swift):
+        store_dir = self._config_store()
+        manager._store_configdrive(self.node, b'foo')
+        path = os.path.join(store_dir, os.listdir(store_dir)[0])
+        os.utime(path, (1000, 1000))
+        manager._store_configdrive(self.node, b'foo')
+        self.assertGreater(os.path.getmtime(path), 1000)
+
+    def test_remove_expired_configdrives(self, mock_swift):
+        store_dir = self._config_store()
+        CONF.set_override('deploy_callback_timeout', 60, group='conductor')
+        other_node = obj_utils.get_test_node(
+            self.context, driver='fake', uuid=uuidutils.generate_uuid())
+        manager._store_configdrive(self.node, b'foo')
+        manager._store_configdrive(other_node, b'foo')
+        expired = os.path.join(store_dir, os.listdir(store_dir)[0])
+        os.utime(expired, (time.time() - 61, time.time() - 61))
+        with open(os.path.join(store_dir, 'other-file'), 'w') as f:
+            f.write('x')
+        os.utime(os.path.join(store_dir, 'other-file'), (1000, 1000))
+
+        manager._remove_expired_configdrives()
+
+        self.assertEqual(2, len(os.listdir(store_dir)))
+        self.assertFalse(os.path.exists(expired))
+
+    def test_remove_expired_configdrives_no_timeout(self, mock_swift):
+        store_dir = self._config_store()
+        CONF.set_override('deploy_callback_timeout', 0, group='conductor')
+        manager._store_configdrive(self.node, b'foo')
+        path = os.path.join(store_dir, os.listdir(store_dir)[0])
+        os.utime(path, (1000, 1000))
+        manager._remove_expired_configdrives()
+        self.assertTrue(os.path.exists(path))
+
+    def test_store_configdrive_no_url(self, mock_swift):
+        CONF.set_override('configdrive_store_dir', '/nonexistent',
+                          group='conductor')
+        manager._store_configdrive(self.node, 'foo')
+        self.assertEqual({'configdrive': 'foo'}, self.node.instance_info)
+
 
 @_mock_record_keepalive
 class NodeInspectHardware(_ServiceSetUpMixin,
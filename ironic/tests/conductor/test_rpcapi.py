@@ -22,6 +22,7 @@ import copy
 
 import mock
 from oslo_config import cfg
+from oslo_utils import uuidutils
 
 from ironic.common import boot_devices
 from ironic.common import exception
@@ -92,6 +93,20 @@ class RPCAPITestCase(base.DbTestCase):
         self.assertEqual(expected_topic,
                          rpcapi.get_topic_for(self.fake_node_obj))
 
+    def test_get_topic_for_uses_shared_ring(self):
+        CONF.set_override('host', 'fake-host')
+        self.dbapi.register_conductor({'hostname': 'fake-host',
+                                       'drivers': ['fake-driver']})
+
+        rpcapi = conductor_rpcapi.ConductorAPI(topic='fake-topic')
+        with mock.patch.object(self.dbapi, 'get_active_driver_dict',
+                               wraps=self.dbapi.get_active_driver_dict
+                               ) as mock_get:
+            rpcapi.get_topic_for(self.fake_node_obj)
+            conductor_rpcapi.ConductorAPI(topic='fake-topic').get_topic_for(
+                self.fake_node_obj)
+            self.assertEqual(1, mock_get.call_count)
+
     def test_get_topic_for_driver_known_driver(self):
         CONF.set_override('host', 'fake-host')
         self.dbapi.register_conductor({
@@ -128,6 +143,35 @@ class RPCAPITestCase(base.DbTestCase):
         self.assertEqual('fake-topic.fake-host',
                          rpcapi.get_topic_for_driver('fake-driver'))
 
+    def test_get_topics_for(self):
+        for host, drivers in (('host1', ['fake-driver']),
+                              ('host2', ['fake-driver', 'other-driver'])):
+            self.dbapi.register_conductor({'hostname': host,
+                                           'drivers': drivers})
+        nodes = []
+        for driver in ('fake-driver', 'other-driver', 'unknown-driver',
+                       'fake-driver', 'fake-driver', 'fake-driver'):
+            nodes.append(objects.Node(self.context, driver=driver,
+                                      uuid=uuidutils.generate_uuid()))
+        rpcapi = conductor_rpcapi.ConductorAPI(topic='fake-topic')
+
+        with mock.patch.object(rpcapi, '_get_ring',
+                               wraps=rpcapi._get_ring) as mock_get_ring:
+            topics, errors = rpcapi.get_topics_for(nodes)
+
+        self.assertEqual(3, mock_get_ring.call_count)
+        self.assertEqual([nodes[2].uuid], list(errors))
+        self.assertIsInstance(errors[nodes[2].uuid], exception.NoValidHost)
+        grouped = [node.uuid for topic_nodes in topics.values()
+                   for node in topic_nodes]
+        self.assertEqual(sorted(node.uuid for node in nodes[:2] + nodes[3:]),
+                         sorted(grouped))
+        self.assertTrue(set(topics) <= set(['fake-topic.host1',
+                                            'fake-topic.host2']))
+        for topic, topic_nodes in topics.items():
+            for node in topic_nodes:
+                self.assertEqual(topic, rpcapi.get_topic_for(node))
+
     def _test_rpcapi(self, method, rpc_method, **kwargs):
         rpcapi = conductor_rpcapi.ConductorAPI(topic='fake-topic')
 
@@ -289,6 +333,14 @@ class RPCAPITestCase(base.DbTestCase):
                           version='1.24',
                           node_id=self.fake_node['uuid'])
 
+    def test_change_nodes_state(self):
+        self._test_rpcapi('change_nodes_state',
+                          'call',
+                          version='1.28',
+                          node_ids=[self.fake_node['uuid']],
+                          action='power',
+                          target=states.POWER_ON)
+
     def test_continue_node_clean(self):
         self._test_rpcapi('continue_node_clean',
                           'cast',
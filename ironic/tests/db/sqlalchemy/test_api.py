@@ -0,0 +1,116 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Tests for the read-only (slave) database routing of the SQLAlchemy API."""
+
+import os
+
+import fixtures
+
+from ironic.common import exception
+from ironic.db.sqlalchemy import api as sa_api
+from ironic.db.sqlalchemy import models
+from ironic.tests import base
+from ironic.tests.db import utils
+
+
+class SlaveConnectionTestCase(base.TestCase):
+
+    def setUp(self):
+        super(SlaveConnectionTestCase, self).setUp()
+        tempdir = self.useFixture(fixtures.TempDir()).path
+        self.config(connection='sqlite:///%s' % os.path.join(tempdir,
+                                                             'primary.db'),
+                    slave_connection='sqlite:///%s' % os.path.join(
+                        tempdir, 'slave.db'),
+                    group='database')
+        self.useFixture(fixtures.MonkeyPatch(
+            'ironic.db.sqlalchemy.api._FACADE', None))
+        for use_slave in (False, True):
+            engine = sa_api.get_engine(use_slave=use_slave)
+            models.Base.metadata.create_all(engine)
+            self.addCleanup(engine.dispose)
+        self.dbapi = sa_api.get_backend()
+
+    def _create_slave_node(self, **kw):
+        node = models.Node()
+        node.update(utils.get_test_node(**kw))
+        node.save(session=sa_api.get_session(use_slave=True))
+        return node
+
+    def test_engines_differ(self):
+        self.assertIsNot(sa_api.get_engine(),
+                         sa_api.get_engine(use_slave=True))
+
+    def test_reads_use_primary_by_default(self):
+        node = self.dbapi.create_node(utils.get_test_node())
+        self._create_slave_node(uuid=node.uuid, extra={'stale': True})
+        self.assertEqual({}, self.dbapi.get_node_by_uuid(node.uuid).extra)
+        self.assertEqual({}, self.dbapi.get_node_by_id(node.id).extra)
+        self.assertEqual([{}], [n.extra for n in self.dbapi.get_node_list()])
+
+    def test_reads_use_slave(self):
+        node = self._create_slave_node()
+        self.assertEqual(node.uuid,
+                         self.dbapi.get_node_by_uuid(node.uuid,
+                                                     use_slave=True).uuid)
+        self.assertEqual([node.uuid],
+                         [n.uuid for n in
+                          self.dbapi.get_node_list(use_slave=True)])
+        self.assertEqual([(node.id,)],
+                         self.dbapi.get_nodeinfo_list(use_slave=True))
+        self.assertRaises(exception.NodeNotFound,
+                          self.dbapi.get_node_by_uuid, node.uuid)
+
+    def test_reservation_uses_primary(self):
+        node = self.dbapi.create_node(utils.get_test_node())
+        self._create_slave_node(uuid=node.uuid)
+        reserved = self.dbapi.reserve_node('fake-host', node.uuid)
+        self.assertEqual('fake-host', reserved.reservation)
+        self.assertEqual('fake-host',
+                         self.dbapi.get_node_by_uuid(node.uuid).reservation)
+        # The replica does not see the reservation until it is replicated
+        self.assertIsNone(self.dbapi.get_node_by_uuid(
+            node.uuid, use_slave=True).reservation)
+        self.dbapi.release_node('fake-host', node.uuid)
+
+    def test_update_uses_primary(self):
+        node = self.dbapi.create_node(utils.get_test_node())
+        updated = self.dbapi.update_node(node.uuid, {'extra': {'foo': 'bar'}})
+        self.assertEqual({'foo': 'bar'}, updated.extra)
+        self.assertEqual({'foo': 'bar'},
+                         self.dbapi.get_node_by_id(node.id).extra)
+        self.assertRaises(exception.NodeNotFound,
+                          self.dbapi.get_node_by_id, node.id, use_slave=True)
+
+
+class NoSlaveConnectionTestCase(base.TestCase):
+
+    def setUp(self):
+        super(NoSlaveConnectionTestCase, self).setUp()
+        tempdir = self.useFixture(fixtures.TempDir()).path
+        self.config(connection='sqlite:///%s' % os.path.join(tempdir,
+                                                             'primary.db'),
+                    group='database')
+        self.useFixture(fixtures.MonkeyPatch(
+            'ironic.db.sqlalchemy.api._FACADE', None))
+        engine = sa_api.get_engine()
+        models.Base.metadata.create_all(engine)
+        self.addCleanup(engine.dispose)
+        self.dbapi = sa_api.get_backend()
+
+    def test_reads_fall_back_to_primary(self):
+        self.assertIs(sa_api.get_engine(), sa_api.get_engine(use_slave=True))
+        node = self.dbapi.create_node(utils.get_test_node())
+        self.assertEqual(node.uuid,
+                         self.dbapi.get_node_by_uuid(node.uuid,
+                                                     use_slave=True).uuid)
@@ -200,3 +200,32 @@ class DbConductorTestCase(base.DbTestCase):
         expected = {d: set([h1, h2]), d1: set([h1]), d2: set([h2])}
         result = self.dbapi.get_active_driver_dict(interval=two_minute)
         self.assertEqual(expected, result)
+
+    @mock.patch.object(timeutils, 'utcnow', autospec=True)
+    def test_get_active_conductors_version(self, mock_utcnow):
+        past = datetime.datetime(2000, 1, 1, 0, 0)
+        mock_utcnow.return_value = past
+        empty = self.dbapi.get_active_conductors_version()
+        c = self._create_test_cdr()
+        registered = self.dbapi.get_active_conductors_version()
+        self.assertNotEqual(empty, registered)
+        self.assertEqual(registered,
+                         self.dbapi.get_active_conductors_version())
+
+        # A check-in changes the version
+        mock_utcnow.return_value = past + datetime.timedelta(seconds=10)
+        self.dbapi.touch_conductor(c.hostname)
+        touched = self.dbapi.get_active_conductors_version()
+        self.assertNotEqual(registered, touched)
+
+        # and so does a conductor which is no longer active
+        mock_utcnow.return_value = past + datetime.timedelta(minutes=10)
+        self.assertNotEqual(touched,
+                            self.dbapi.get_active_conductors_version())
+
+    def test_get_active_conductors_version_unregistered(self):
+        c = self._create_test_cdr()
+        registered = self.dbapi.get_active_conductors_version()
+        self.dbapi.unregister_conductor(c.hostname)
+        self.assertNotEqual(registered,
+                            self.dbapi.get_active_conductors_version())
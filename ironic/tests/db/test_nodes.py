@@ -24,6 +24,7 @@ import six
 
 from ironic.common import exception
 from ironic.common import states
+from ironic.db.sqlalchemy import api as sqlalchemy_api
 from ironic.tests.db import base
 from ironic.tests.db import utils
 
@@ -53,6 +54,107 @@ class DbNodeTestCase(base.DbTestCase):
                           utils.create_test_node,
                           name=node.name)
 
+    def _get_new_node(self, **kw):
+        node = utils.get_test_node(uuid=uuidutils.generate_uuid(), **kw)
+        for key in ('id', 'created_at', 'updated_at'):
+            del node[key]
+        return node
+
+    def _get_new_port(self, address, **kw):
+        port = utils.get_test_port(uuid=uuidutils.generate_uuid(),
+                                   address=address, **kw)
+        for key in ('id', 'node_id', 'created_at', 'updated_at'):
+            del port[key]
+        return port
+
+    def test_create_nodes(self):
+        node1 = self._get_new_node(name='node1')
+        del node1['uuid']
+        node2 = self._get_new_node(name='node2', maintenance=True)
+        port1 = self._get_new_port('52:54:00:cf:2d:31')
+        del port1['uuid']
+        port2 = self._get_new_port('52:54:00:cf:2d:32')
+
+        errors = self.dbapi.create_nodes([(node1, [port1, port2]),
+                                          (node2, [])])
+        self.assertEqual([None, None], errors)
+
+        res = self.dbapi.get_node_by_uuid(node1['uuid'])
+        self.assertEqual('node1', res.name)
+        self.assertFalse(res.maintenance)
+        self.assertEqual(node1['driver_info'], res.driver_info)
+        self.assertIsNotNone(res.created_at)
+        ports = self.dbapi.get_ports_by_node_id(res.id)
+        self.assertEqual(sorted([port1['uuid'], port2['uuid']]),
+                         sorted(port.uuid for port in ports))
+        res = self.dbapi.get_node_by_uuid(node2['uuid'])
+        self.assertTrue(res.maintenance)
+        self.assertEqual([], self.dbapi.get_ports_by_node_id(res.id))
+
+    def test_create_nodes_conflicts(self):
+        node = utils.create_test_node(name='spam',
+                                      instance_uuid=uuidutils.generate_uuid())
+        utils.create_test_port(node_id=node.id)
+        ok = self._get_new_node()
+        new_nodes = [
+            (self._get_new_node(), []),
+            (dict(self._get_new_node(), uuid=node.uuid), []),
+            (self._get_new_node(name='spam'), []),
+            (self._get_new_node(instance_uuid=node.instance_uuid), []),
+            (self._get_new_node(),
+             [self._get_new_port('52:54:00:cf:2d:31')]),
+            (self._get_new_node(),
+             [self._get_new_port('52:54:00:cf:2d:40'),
+              self._get_new_port('52:54:00:cf:2d:40')]),
+            (self._get_new_node(),
+             [dict(self._get_new_port('52:54:00:cf:2d:41'),
+                   uuid='1be26c0b-03f2-4d2e-ae87-c02d7f33c781')]),
+            (ok, [self._get_new_port('52:54:00:cf:2d:42')]),
+            # conflicts with the previous node of the list
+            (dict(self._get_new_node(), uuid=ok['uuid']), []),
+            (self._get_new_node(),
+             [self._get_new_port('52:54:00:cf:2d:42')]),
+        ]
+
+        errors = self.dbapi.create_nodes(new_nodes)
+
+        self.assertIsNone(errors[0])
+        self.assertIsNone(errors[7])
+        expected = [exception.NodeAlreadyExists, exception.DuplicateName,
+                    exception.InstanceAssociated, exception.MACAlreadyExists,
+                    exception.MACAlreadyExists, exception.PortAlreadyExists]
+        self.assertEqual(expected, [type(e) for e in errors[1:7]])
+        self.assertEqual([exception.NodeAlreadyExists,
+                          exception.MACAlreadyExists],
+                         [type(e) for e in errors[8:]])
+        for (node_values, ports_values), error in zip(new_nodes, errors):
+            if error is None:
+                self.dbapi.get_node_by_uuid(node_values['uuid'])
+            elif node_values['uuid'] not in (node.uuid, ok['uuid']):
+                self.assertRaises(exception.NodeNotFound,
+                                  self.dbapi.get_node_by_uuid,
+                                  node_values['uuid'])
+
+    def test_create_nodes_concurrent_conflict(self):
+        node1 = self._get_new_node()
+        node2 = self._get_new_node()
+        check = sqlalchemy_api.Connection._check_new_nodes
+
+        def create_concurrently(connection, session, nodes):
+            errors = check(connection, session, nodes)
+            if len(nodes) > 1:
+                utils.create_test_node(uuid=node1['uuid'])
+            return errors
+
+        with mock.patch.object(sqlalchemy_api.Connection, '_check_new_nodes',
+                               autospec=True,
+                               side_effect=create_concurrently):
+            errors = self.dbapi.create_nodes([(node1, []), (node2, [])])
+
+        self.assertIsInstance(errors[0], exception.NodeAlreadyExists)
+        self.assertIsNone(errors[1])
+        self.dbapi.get_node_by_uuid(node2['uuid'])
+
     def test_get_node_by_id(self):
         node = utils.create_test_node()
         res = self.dbapi.get_node_by_id(node.id)
@@ -0,0 +1,81 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Tests for the accounting of the database queries."""
+
+import mock
+
+from ironic.db import query_stats
+from ironic.tests import base
+from ironic.tests.db import base as db_base
+from ironic.tests.db import utils
+
+
+class QueryStatsTestCase(base.TestCase):
+
+    def test_record_without_scope(self):
+        query_stats.record(0.1, rows=2)
+        self.assertIsNone(query_stats.current())
+
+    def test_account(self):
+        with query_stats.account('foo') as stats:
+            self.assertIs(stats, query_stats.current())
+            query_stats.record(0.1, rows=2)
+            query_stats.record(0.2, rows=-1)
+        self.assertIsNone(query_stats.current())
+        self.assertEqual(2, stats.queries)
+        self.assertEqual(2, stats.rows)
+        self.assertAlmostEqual(0.3, stats.elapsed)
+
+    def test_nested(self):
+        with query_stats.account('outer') as outer:
+            query_stats.record(0.1)
+            with query_stats.account('inner') as inner:
+                query_stats.record(0.1, rows=1)
+            self.assertIs(outer, query_stats.current())
+        self.assertEqual(1, inner.queries)
+        self.assertEqual(2, outer.queries)
+        self.assertEqual(1, outer.rows)
+
+    @mock.patch.object(query_stats, 'LOG', autospec=True)
+    def test_count_threshold(self, mock_log):
+        self.config(query_count_warning_threshold=1, group='database')
+        with query_stats.account('foo'):
+            query_stats.record(0.1)
+        self.assertFalse(mock_log.warn.called)
+        with query_stats.account('foo'):
+            query_stats.record(0.1)
+            query_stats.record(0.1)
+        self.assertEqual(1, mock_log.warn.call_count)
+
+    @mock.patch.object(query_stats, 'LOG', autospec=True)
+    def test_time_threshold(self, mock_log):
+        self.config(query_time_warning_threshold=0.5, group='database')
+        with query_stats.account('foo'):
+            query_stats.record(0.4)
+        self.assertFalse(mock_log.warn.called)
+        with query_stats.account('foo'):
+            query_stats.record(0.6)
+        self.assertEqual(1, mock_log.warn.call_count)
+
+
+class DbQueryStatsTestCase(db_base.DbTestCase):
+
+    def test_queries_recorded(self):
+        node = utils.create_test_node()
+        with query_stats.account('foo') as one:
+            self.dbapi.get_node_by_uuid(node.uuid)
+        with query_stats.account('foo') as two:
+            self.dbapi.get_node_by_uuid(node.uuid)
+            self.dbapi.get_node_by_uuid(node.uuid)
+        self.assertNotEqual(0, one.queries)
+        self.assertEqual(2 * one.queries, two.queries)
@@ -124,6 +124,89 @@ class DracClientTestCase(base.TestCase):
                           filter_query='foo',
                           filter_dialect='invalid')
 
+    def _items_xml(self, *values):
+        return test_utils.build_soap_xml(
+            [{'wsman': {'Name': value}} for value in values],
+            self.resource_uri)
+
+    def test_wsman_enumerate_items(self, mock_client_pywsman):
+        mock_xml = test_utils.mock_wsman_root(self._items_xml('a', 'b'))
+        mock_pywsman_client = mock_client_pywsman.Client.return_value
+        mock_pywsman_client.enumerate.return_value = mock_xml
+
+        client = drac_client.Client(**INFO_DICT)
+        items = list(client.wsman_enumerate_items(self.resource_uri))
+
+        self.assertEqual(['a', 'b'], [
+            item.find('{%s}Name' % self.resource_uri).text
+            for item in items])
+        mock_options = mock_client_pywsman.ClientOptions.return_value
+        mock_options.set_max_elements.assert_called_once_with(100)
+        mock_pywsman_client.enumerate.assert_called_once_with(mock_options,
+            None, self.resource_uri)
+        self.assertFalse(mock_pywsman_client.pull.called)
+
+    def test_wsman_enumerate_items_with_additional_pull(self,
+                                                        mock_client_pywsman):
+        first = test_utils.mock_wsman_root(self._items_xml('a'))
+        first.context.return_value = 42
+        second = test_utils.mock_wsman_root(self._items_xml('b', 'c'))
+        mock_pywsman_client = mock_client_pywsman.Client.return_value
+        mock_pywsman_client.enumerate.return_value = first
+        mock_pywsman_client.pull.return_value = second
+
+        client = drac_client.Client(**INFO_DICT)
+        items = client.wsman_enumerate_items(self.resource_uri)
+
+        # The next page is only pulled once the first one is consumed
+        self.assertEqual('a', next(items).find(
+            '{%s}Name' % self.resource_uri).text)
+        self.assertFalse(mock_pywsman_client.pull.called)
+        self.assertEqual(['b', 'c'], [
+            item.find('{%s}Name' % self.resource_uri).text
+            for item in items])
+        mock_options = mock_client_pywsman.ClientOptions.return_value
+        mock_pywsman_client.pull.assert_called_once_with(mock_options,
+            None, self.resource_uri, '42')
+
+    def test_wsman_enumerate_items_filter_query(self, mock_client_pywsman):
+        mock_xml = test_utils.mock_wsman_root(self._items_xml())
+        mock_pywsman_client = mock_client_pywsman.Client.return_value
+        mock_pywsman_client.enumerate.return_value = mock_xml
+
+        client = drac_client.Client(**INFO_DICT)
+        filter_query = 'SELECT * FROM foo'
+        self.assertEqual([], list(client.wsman_enumerate_items(
+            self.resource_uri, filter_query=filter_query)))
+
+        mock_options = mock_client_pywsman.ClientOptions.return_value
+        mock_filter = mock_client_pywsman.Filter.return_value
+        mock_filter.simple.assert_called_once_with(mock.ANY, filter_query)
+        mock_pywsman_client.enumerate.assert_called_once_with(mock_options,
+            mock_filter, self.resource_uri)
+
+    def test_wsman_enumerate_items_invalid_filter_dialect(
+            self, mock_client_pywsman):
+        client = drac_client.Client(**INFO_DICT)
+        self.assertRaises(exception.DracInvalidFilterDialect,
+                          client.wsman_enumerate_items, self.resource_uri,
+                          filter_query='foo',
+                          filter_dialect='invalid')
+
+    @mock.patch.object(time, 'sleep', lambda seconds: None)
+    def test_wsman_enumerate_items_pull_fails(self, mock_client_pywsman):
+        first = test_utils.mock_wsman_root(self._items_xml('a'))
+        first.context.return_value = 42
+        mock_pywsman_client = mock_client_pywsman.Client.return_value
+        mock_pywsman_client.enumerate.return_value = first
+        mock_pywsman_client.pull.return_value = None
+
+        client = drac_client.Client(**INFO_DICT)
+        items = client.wsman_enumerate_items(self.resource_uri)
+
+        next(items)
+        self.assertRaises(exception.DracClientError, next, items)
+
     def test_wsman_invoke(self, mock_client_pywsman):
         result_xml = test_utils.build_soap_xml(
             [{'ReturnValue': drac_client.RET_SUCCESS}], self.resource_uri)
@@ -37,6 +37,17 @@ from ironic.tests.objects import utils as obj_utils
 
 INFO_DICT = db_utils.get_test_drac_info()
 
+_NIC_SOURCE = 'IPL:BIOS.Setup.1-1#BootSeq#NIC.Embedded.1-1-1#abcdef'
+_DISK_SOURCE = 'IPL:BIOS.Setup.1-1#BootSeq#HardDisk.List.1-1#abcdef'
+
+
+def _boot_sources_xml(*instance_ids):
+    return test_utils.build_soap_xml(
+        [{'DCIM_BootSourceSetting': {'InstanceID': instance_id,
+                                     'BootSourceType': 'IPL'}}
+         for instance_id in instance_ids],
+        resource_uris.DCIM_BootSourceSetting)
+
 
 @mock.patch.object(drac_client, 'pywsman', spec_set=mock_specs.PYWSMAN_SPEC)
 class DracManagementInternalMethodsTestCase(db_base.DbTestCase):
@@ -47,6 +58,7 @@ class DracManagementInternalMethodsTestCase(db_base.DbTestCase):
         self.node = obj_utils.create_test_node(self.context,
                                                driver='fake_drac',
                                                driver_info=INFO_DICT)
+        self.addCleanup(drac_mgmt._BOOT_SOURCES.clear)
 
     def test__get_next_boot_mode(self, mock_client_pywsman):
         result_xml = test_utils.build_soap_xml([{'DCIM_BootConfigSetting':
@@ -135,6 +147,44 @@ class DracManagementInternalMethodsTestCase(db_base.DbTestCase):
         mock_pywsman.invoke.assert_called_once_with(mock.ANY,
             resource_uris.DCIM_BIOSService, 'CreateTargetedConfigJob', None)
 
+    def test__create_config_job_keeps_boot_sources(self,
+                                                   mock_client_pywsman):
+        drac_mgmt._BOOT_SOURCES[self.node.uuid] = [(_NIC_SOURCE, 'IPL')]
+        result_xml = test_utils.build_soap_xml(
+            [{'ReturnValue': drac_client.RET_CREATED}],
+            resource_uris.DCIM_BIOSService)
+        mock_pywsman = mock_client_pywsman.Client.return_value
+        mock_pywsman.invoke.return_value = test_utils.mock_wsman_root(
+            result_xml)
+
+        drac_mgmt._create_config_job(self.node)
+
+        self.assertEqual([(_NIC_SOURCE, 'IPL')],
+                         drac_mgmt._BOOT_SOURCES[self.node.uuid])
+
+    def test__get_boot_sources(self, mock_client_pywsman):
+        mock_pywsman = mock_client_pywsman.Client.return_value
+        mock_pywsman.enumerate.return_value = test_utils.mock_wsman_root(
+            _boot_sources_xml(_DISK_SOURCE, _NIC_SOURCE))
+
+        expected = [(_DISK_SOURCE, 'IPL'), (_NIC_SOURCE, 'IPL')]
+        self.assertEqual(expected, drac_mgmt._get_boot_sources(self.node))
+        # The boot sources are only enumerated once
+        self.assertEqual(expected, drac_mgmt._get_boot_sources(self.node))
+        mock_pywsman.enumerate.assert_called_once_with(mock.ANY, None,
+            resource_uris.DCIM_BootSourceSetting)
+
+    def test__get_boot_sources_refresh(self, mock_client_pywsman):
+        drac_mgmt._BOOT_SOURCES[self.node.uuid] = [(_DISK_SOURCE, 'IPL')]
+        mock_pywsman = mock_client_pywsman.Client.return_value
+        mock_pywsman.enumerate.return_value = test_utils.mock_wsman_root(
+            _boot_sources_xml(_NIC_SOURCE))
+
+        self.assertEqual([(_NIC_SOURCE, 'IPL')],
+                         drac_mgmt._get_boot_sources(self.node, refresh=True))
+        self.assertEqual([(_NIC_SOURCE, 'IPL')],
+                         drac_mgmt._BOOT_SOURCES[self.node.uuid])
+
     def test__create_config_job_error(self, mock_client_pywsman):
         result_xml = test_utils.build_soap_xml(
             [{'ReturnValue': drac_client.RET_ERROR,
@@ -160,6 +210,7 @@ class DracManagementTestCase(db_base.DbTestCase):
         self.node = obj_utils.create_test_node(self.context,
                                                driver='fake_drac',
                                                driver_info=INFO_DICT)
+        self.addCleanup(drac_mgmt._BOOT_SOURCES.clear)
         self.driver = drac_mgmt.DracManagement()
         self.task = mock.Mock(spec=['node'])
         self.task.node = self.node
@@ -179,8 +230,7 @@ class DracManagementTestCase(db_base.DbTestCase):
         mock_gnbm.return_value = {'instance_id': 'OneTime',
                                   'is_next': drac_mgmt.ONE_TIME_BOOT}
 
-        result_xml = test_utils.build_soap_xml([{'InstanceID': 'HardDisk'}],
-                                      resource_uris.DCIM_BootSourceSetting)
+        result_xml = _boot_sources_xml(_DISK_SOURCE)
 
         mock_xml = test_utils.mock_wsman_root(result_xml)
         mock_pywsman = mock_client_pywsman.Client.return_value
@@ -199,8 +249,7 @@ class DracManagementTestCase(db_base.DbTestCase):
         mock_gnbm.return_value = {'instance_id': 'IPL',
                                   'is_next': drac_mgmt.PERSISTENT}
 
-        result_xml = test_utils.build_soap_xml([{'InstanceID': 'NIC'}],
-                                      resource_uris.DCIM_BootSourceSetting)
+        result_xml = _boot_sources_xml(_NIC_SOURCE)
 
         mock_xml = test_utils.mock_wsman_root(result_xml)
         mock_pywsman = mock_client_pywsman.Client.return_value
@@ -213,8 +262,21 @@ class DracManagementTestCase(db_base.DbTestCase):
         mock_pywsman.enumerate.assert_called_once_with(mock.ANY, mock.ANY,
             resource_uris.DCIM_BootSourceSetting)
 
-    @mock.patch.object(drac_client.Client, 'wsman_enumerate', spec_set=True,
+    @mock.patch.object(drac_mgmt, '_get_next_boot_mode', spec_set=True,
                        autospec=True)
+    def test_get_boot_device_unknown(self, mock_gnbm, mock_client_pywsman):
+        mock_gnbm.return_value = {'instance_id': 'IPL',
+                                  'is_next': drac_mgmt.PERSISTENT}
+        mock_pywsman = mock_client_pywsman.Client.return_value
+        mock_pywsman.enumerate.return_value = test_utils.mock_wsman_root(
+            _boot_sources_xml())
+
+        result = self.driver.get_boot_device(self.task)
+
+        self.assertEqual({'boot_device': None, 'persistent': True}, result)
+
+    @mock.patch.object(drac_client.Client, 'wsman_enumerate_items',
+                       spec_set=True, autospec=True)
     @mock.patch.object(drac_mgmt, '_get_next_boot_mode', spec_set=True,
                        autospec=True)
     def test_get_boot_device_client_error(self, mock_gnbm, mock_we,
@@ -234,8 +296,7 @@ class DracManagementTestCase(db_base.DbTestCase):
     @mock.patch.object(drac_mgmt, '_create_config_job', spec_set=True,
                        autospec=True)
     def test_set_boot_device(self, mock_ccj, mock_cfcj, mock_client_pywsman):
-        result_xml_enum = test_utils.build_soap_xml([{'InstanceID': 'NIC'}],
-                                      resource_uris.DCIM_BootSourceSetting)
+        result_xml_enum = _boot_sources_xml(_DISK_SOURCE, _NIC_SOURCE)
         result_xml_invk = test_utils.build_soap_xml(
             [{'ReturnValue': drac_client.RET_SUCCESS}],
             resource_uris.DCIM_BootConfigSetting)
@@ -258,17 +319,132 @@ class DracManagementTestCase(db_base.DbTestCase):
             resource_uris.DCIM_BootConfigSetting,
             'ChangeBootOrderByInstanceID',
             None)
+        mock_options = mock_client_pywsman.ClientOptions.return_value
+        mock_options.add_selector.assert_called_once_with('InstanceID',
+                                                          'OneTime')
+        mock_options.add_property.assert_called_once_with('source',
+                                                          _NIC_SOURCE)
         mock_cfcj.assert_called_once_with(self.node)
         mock_ccj.assert_called_once_with(self.node)
 
+    @mock.patch.object(drac_mgmt, '_check_for_config_job', spec_set=True,
+                       autospec=True)
+    @mock.patch.object(drac_mgmt, '_create_config_job', spec_set=True,
+                       autospec=True)
+    def test_set_boot_device_persistent_cached(self, mock_ccj, mock_cfcj,
+                                               mock_client_pywsman):
+        drac_mgmt._BOOT_SOURCES[self.node.uuid] = [(_DISK_SOURCE, 'IPL')]
+        result_xml_invk = test_utils.build_soap_xml(
+            [{'ReturnValue': drac_client.RET_SUCCESS}],
+            resource_uris.DCIM_BootConfigSetting)
+        mock_pywsman = mock_client_pywsman.Client.return_value
+        mock_pywsman.invoke.return_value = test_utils.mock_wsman_root(
+            result_xml_invk)
+
+        with task_manager.acquire(self.context, self.node.uuid,
+                                  shared=False) as task:
+            task.node = self.node
+            self.driver.set_boot_device(task, boot_devices.DISK,
+                                        persistent=True)
+
+        self.assertFalse(mock_pywsman.enumerate.called)
+        mock_options = mock_client_pywsman.ClientOptions.return_value
+        mock_options.add_selector.assert_called_once_with('InstanceID', 'IPL')
+        mock_options.add_property.assert_called_once_with('source',
+                                                          _DISK_SOURCE)
+        mock_ccj.assert_called_once_with(self.node)
+
+    @mock.patch.object(drac_mgmt, '_check_for_config_job', spec_set=True,
+                       autospec=True)
+    @mock.patch.object(drac_mgmt, '_create_config_job', spec_set=True,
+                       autospec=True)
+    def test_set_boot_device_no_source(self, mock_ccj, mock_cfcj,
+                                       mock_client_pywsman):
+        drac_mgmt._BOOT_SOURCES[self.node.uuid] = [(_DISK_SOURCE, 'IPL')]
+        mock_pywsman = mock_client_pywsman.Client.return_value
+        mock_pywsman.enumerate.return_value = test_utils.mock_wsman_root(
+            _boot_sources_xml(_DISK_SOURCE))
+
+        with task_manager.acquire(self.context, self.node.uuid,
+                                  shared=False) as task:
+            task.node = self.node
+            self.assertRaises(exception.DracOperationFailed,
+                              self.driver.set_boot_device, task,
+                              boot_devices.CDROM)
+
+        # The cached boot sources are enumerated again before failing
+        mock_pywsman.enumerate.assert_called_once_with(mock.ANY, mock.ANY,
+            resource_uris.DCIM_BootSourceSetting)
+        self.assertFalse(mock_pywsman.invoke.called)
+        self.assertFalse(mock_ccj.called)
+
+    @mock.patch.object(drac_mgmt, '_check_for_config_job', spec_set=True,
+                       autospec=True)
+    @mock.patch.object(drac_mgmt, '_create_config_job', spec_set=True,
+                       autospec=True)
+    def test_set_boot_device_new_source(self, mock_ccj, mock_cfcj,
+                                        mock_client_pywsman):
+        drac_mgmt._BOOT_SOURCES[self.node.uuid] = [(_DISK_SOURCE, 'IPL')]
+        result_xml_invk = test_utils.build_soap_xml(
+            [{'ReturnValue': drac_client.RET_SUCCESS}],
+            resource_uris.DCIM_BootConfigSetting)
+        mock_pywsman = mock_client_pywsman.Client.return_value
+        mock_pywsman.enumerate.return_value = test_utils.mock_wsman_root(
+            _boot_sources_xml(_DISK_SOURCE, _NIC_SOURCE))
+        mock_pywsman.invoke.return_value = test_utils.mock_wsman_root(
+            result_xml_invk)
+
+        with task_manager.acquire(self.context, self.node.uuid,
+                                  shared=False) as task:
+            task.node = self.node
+            self.driver.set_boot_device(task, boot_devices.PXE)
+
+        mock_options = mock_client_pywsman.ClientOptions.return_value
+        mock_options.add_property.assert_called_once_with('source',
+                                                          _NIC_SOURCE)
+        mock_ccj.assert_called_once_with(self.node)
+
+    def test_set_boot_device_twice(self, mock_client_pywsman):
+        jobs_xml = test_utils.build_soap_xml(
+            [{'DCIM_LifecycleJob': {'Name': 'BIOS.Setup.1-1',
+                                    'JobStatus': 'Completed',
+                                    'InstanceID': 'JID_1'}}],
+            resource_uris.DCIM_LifecycleJob)
+        enumerations = {
+            resource_uris.DCIM_LifecycleJob: jobs_xml,
+            resource_uris.DCIM_BootSourceSetting: _boot_sources_xml(
+                _DISK_SOURCE, _NIC_SOURCE)}
+        invocations = {
+            resource_uris.DCIM_BootConfigSetting: drac_client.RET_SUCCESS,
+            resource_uris.DCIM_BIOSService: drac_client.RET_CREATED}
+        mock_pywsman = mock_client_pywsman.Client.return_value
+        mock_pywsman.enumerate.side_effect = (
+            lambda options, filter_, resource: test_utils.mock_wsman_root(
+                enumerations[resource]))
+        mock_pywsman.invoke.side_effect = (
+            lambda options, resource, method, xml: test_utils.mock_wsman_root(
+                test_utils.build_soap_xml(
+                    [{'ReturnValue': invocations[resource]}], resource)))
+
+        with task_manager.acquire(self.context, self.node.uuid,
+                                  shared=False) as task:
+            task.node = self.node
+            self.driver.set_boot_device(task, boot_devices.PXE)
+            self.driver.set_boot_device(task, boot_devices.DISK)
+
+        sources_enumerations = [
+            c for c in mock_pywsman.enumerate.call_args_list
+            if c[0][2] == resource_uris.DCIM_BootSourceSetting]
+        self.assertEqual(1, len(sources_enumerations))
+        self.assertEqual(4, mock_pywsman.invoke.call_count)
+
     @mock.patch.object(drac_mgmt, '_check_for_config_job', spec_set=True,
                        autospec=True)
     @mock.patch.object(drac_mgmt, '_create_config_job', spec_set=True,
                        autospec=True)
     def test_set_boot_device_fail(self, mock_ccj, mock_cfcj,
                                   mock_client_pywsman):
-        result_xml_enum = test_utils.build_soap_xml([{'InstanceID': 'NIC'}],
-                                      resource_uris.DCIM_BootSourceSetting)
+        result_xml_enum = _boot_sources_xml(_DISK_SOURCE, _NIC_SOURCE)
         result_xml_invk = test_utils.build_soap_xml(
             [{'ReturnValue': drac_client.RET_ERROR, 'Message': 'E_FAKE'}],
             resource_uris.DCIM_BootConfigSetting)
@@ -293,9 +469,10 @@ class DracManagementTestCase(db_base.DbTestCase):
             None)
         mock_cfcj.assert_called_once_with(self.node)
         self.assertFalse(mock_ccj.called)
+        self.assertNotIn(self.node.uuid, drac_mgmt._BOOT_SOURCES)
 
-    @mock.patch.object(drac_client.Client, 'wsman_enumerate', spec_set=True,
-                       autospec=True)
+    @mock.patch.object(drac_client.Client, 'wsman_enumerate_items',
+                       spec_set=True, autospec=True)
     @mock.patch.object(drac_mgmt, '_check_for_config_job', spec_set=True,
                        autospec=True)
     def test_set_boot_device_client_error(self, mock_cfcj, mock_we,
@@ -308,8 +485,8 @@ class DracManagementTestCase(db_base.DbTestCase):
                               self.driver.set_boot_device, task,
                               boot_devices.PXE)
         mock_we.assert_called_once_with(
-            mock.ANY, resource_uris.DCIM_BootSourceSetting,
-            filter_query=mock.ANY)
+            mock.ANY, resource_uris.DCIM_BootSourceSetting)
+        self.assertNotIn(self.node.uuid, drac_mgmt._BOOT_SOURCES)
 
     def test_get_sensors_data(self, mock_client_pywsman):
         self.assertRaises(NotImplementedError,
@@ -114,6 +114,7 @@ class IloCommonMethodsTestCase(db_base.DbTestCase):
         self.info = db_utils.get_test_ilo_info()
         self.node = obj_utils.create_test_node(self.context,
                 driver='fake_ilo', driver_info=self.info)
+        self.addCleanup(ilo_common._LICENSES.clear)
 
     @mock.patch.object(ilo_client, 'IloClient', autospec=True)
     def test_get_ilo_object(self, ilo_client_mock):
@@ -129,8 +130,20 @@ class IloCommonMethodsTestCase(db_base.DbTestCase):
             self.info['client_port'])
         self.assertEqual('ilo_object', returned_ilo_object)
 
+    @mock.patch.object(ilo_client, 'IloClient', autospec=True)
+    def test_get_ilo_object_reused(self, ilo_client_mock):
+        first = ilo_common.get_ilo_object(self.node)
+        second = ilo_common.get_ilo_object(self.node)
+        self.assertEqual(1, ilo_client_mock.call_count)
+        self.assertIs(first, second)
+
+        self.node.driver_info = dict(self.info, ilo_password='changed')
+        ilo_common.get_ilo_object(self.node)
+        self.assertEqual(2, ilo_client_mock.call_count)
+
     @mock.patch.object(ilo_common, 'get_ilo_object', autospec=True)
     def test_get_ilo_license(self, get_ilo_object_mock):
+        self.config(license_cache_ttl=0, group='ilo')
         ilo_advanced_license = {'LICENSE_TYPE': 'iLO 3 Advanced'}
         ilo_standard_license = {'LICENSE_TYPE': 'iLO 3'}
 
@@ -144,6 +157,29 @@ class IloCommonMethodsTestCase(db_base.DbTestCase):
         license = ilo_common.get_ilo_license(self.node)
         self.assertEqual(ilo_common.STANDARD_LICENSE, license)
 
+    @mock.patch.object(ilo_common.time, 'time', autospec=True)
+    @mock.patch.object(ilo_common, 'get_ilo_object', autospec=True)
+    def test_get_ilo_license_cached(self, get_ilo_object_mock, time_mock):
+        self.config(license_cache_ttl=60, group='ilo')
+        time_mock.return_value = 1000
+        ilo_mock_object = get_ilo_object_mock.return_value
+        ilo_mock_object.get_all_licenses.return_value = {
+            'LICENSE_TYPE': 'iLO 3 Advanced'}
+        self.assertEqual(ilo_common.ADVANCED_LICENSE,
+                         ilo_common.get_ilo_license(self.node))
+
+        ilo_mock_object.get_all_licenses.return_value = {
+            'LICENSE_TYPE': 'iLO 3'}
+        time_mock.return_value = 1060
+        self.assertEqual(ilo_common.ADVANCED_LICENSE,
+                         ilo_common.get_ilo_license(self.node))
+        self.assertEqual(1, ilo_mock_object.get_all_licenses.call_count)
+
+        time_mock.return_value = 1061
+        self.assertEqual(ilo_common.STANDARD_LICENSE,
+                         ilo_common.get_ilo_license(self.node))
+        self.assertEqual(2, ilo_mock_object.get_all_licenses.call_count)
+
     @mock.patch.object(ilo_common, 'get_ilo_object', autospec=True)
     def test_get_ilo_license_fail(self, get_ilo_object_mock):
         ilo_mock_object = get_ilo_object_mock.return_value
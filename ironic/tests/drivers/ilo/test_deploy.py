@@ -157,36 +157,26 @@ class IloDeployPrivateMethodsTestCase(db_base.DbTestCase):
             self.assertFalse(boot_mode_mock.called)
             self.assertIsNone(boot_iso_result)
 
-    @mock.patch.object(tempfile, 'NamedTemporaryFile', autospec=True)
     @mock.patch.object(images, 'create_boot_iso', autospec=True)
-    @mock.patch.object(swift, 'SwiftAPI', autospec=True)
-    @mock.patch.object(ilo_deploy, '_get_boot_iso_object_name', autospec=True)
+    @mock.patch.object(ilo_deploy, '_acquire_shared_boot_iso', autospec=True)
     @mock.patch.object(driver_utils, 'get_node_capability', autospec=True)
     @mock.patch.object(images, 'get_image_properties', autospec=True)
     @mock.patch.object(ilo_deploy, '_parse_deploy_info', autospec=True)
     def test__get_boot_iso_create(self, deploy_info_mock, image_props_mock,
-                                  capability_mock, boot_object_name_mock,
-                                  swift_api_mock,
-                                  create_boot_iso_mock, tempfile_mock):
-        CONF.keystone_authtoken.auth_uri = 'http://authurl'
+                                  capability_mock, acquire_mock,
+                                  create_boot_iso_mock):
         CONF.ilo.swift_ilo_container = 'ilo-cont'
         CONF.pxe.pxe_append_params = 'kernel-params'
 
-        swift_obj_mock = swift_api_mock.return_value
-        fileobj_mock = mock.MagicMock(spec=file)
-        fileobj_mock.name = 'tmpfile'
-        mock_file_handle = mock.MagicMock(spec=file)
-        mock_file_handle.__enter__.return_value = fileobj_mock
-        tempfile_mock.return_value = mock_file_handle
-
         deploy_info_mock.return_value = {'image_source': 'image-uuid',
                                          'ilo_deploy_iso': 'deploy_iso_uuid'}
         image_props_mock.return_value = {'boot_iso': None,
                                          'kernel_id': 'kernel_uuid',
                                          'ramdisk_id': 'ramdisk_uuid'}
-        boot_object_name_mock.return_value = 'abcdef'
-        create_boot_iso_mock.return_value = '/path/to/boot-iso'
         capability_mock.return_value = 'uefi'
+        object_name = ilo_deploy._get_shared_boot_iso_object_name(
+            'kernel_uuid', 'ramdisk_uuid', 'deploy_iso_uuid', 'root-uuid',
+            'kernel-params', 'uefi')
 
         with task_manager.acquire(self.context, self.node.uuid,
                                   shared=False) as task:
@@ -194,7 +184,10 @@ class IloDeployPrivateMethodsTestCase(db_base.DbTestCase):
             deploy_info_mock.assert_called_once_with(task.node)
             image_props_mock.assert_called_once_with(task.context,
                 'image-uuid', ['boot_iso', 'kernel_id', 'ramdisk_id'])
-            boot_object_name_mock.assert_called_once_with(task.node)
+            acquire_mock.assert_called_once_with('ilo-cont', object_name,
+                                                 task.node, mock.ANY)
+            build = acquire_mock.call_args[0][3]
+            build('tmpfile')
             create_boot_iso_mock.assert_called_once_with(task.context,
                                                          'tmpfile',
                                                          'kernel_uuid',
@@ -203,32 +196,192 @@ class IloDeployPrivateMethodsTestCase(db_base.DbTestCase):
                                                          'root-uuid',
                                                          'kernel-params',
                                                          'uefi')
-            swift_obj_mock.create_object.assert_called_once_with('ilo-cont',
-                                                                 'abcdef',
-                                                                 'tmpfile')
-            boot_iso_expected = 'swift:abcdef'
+            boot_iso_expected = 'swift:%s' % object_name
             self.assertEqual(boot_iso_expected, boot_iso_actual)
 
-    @mock.patch.object(ilo_deploy, '_get_boot_iso_object_name', autospec=True)
+    def test__get_shared_boot_iso_object_name(self):
+        params = ['kernel', 'ramdisk', 'deploy-iso', 'root-uuid',
+                  'kernel-params', 'bios']
+        name = ilo_deploy._get_shared_boot_iso_object_name(*params)
+        self.assertTrue(name.startswith('boot-iso-'))
+        self.assertEqual(
+            name, ilo_deploy._get_shared_boot_iso_object_name(*params))
+        params[-1] = 'uefi'
+        self.assertNotEqual(
+            name, ilo_deploy._get_shared_boot_iso_object_name(*params))
+
+    @mock.patch.object(tempfile, 'NamedTemporaryFile', autospec=True)
+    @mock.patch.object(swift, 'SwiftAPI', autospec=True)
+    def test__acquire_shared_boot_iso_build(self, swift_mock, tempfile_mock):
+        swift_obj_mock = swift_mock.return_value
+        swift_obj_mock.head_object.side_effect = (
+            exception.SwiftObjectNotFoundError(obj='iso', container='cont',
+                                               operation='head'))
+        tempfile_mock.return_value.__enter__.return_value.name = 'tmpfile'
+        build_mock = mock.Mock()
+
+        ilo_deploy._acquire_shared_boot_iso('cont', 'boot-iso-a', self.node,
+                                            build_mock)
+
+        build_mock.assert_called_once_with('tmpfile')
+        swift_obj_mock.create_object.assert_has_calls([
+            mock.call('cont', 'boot-iso-a.refs/%s' % self.node.uuid,
+                      'tmpfile'),
+            mock.call('cont', 'boot-iso-a', 'tmpfile')])
+        self.assertFalse(swift_obj_mock.update_object_meta.called)
+
+    @mock.patch.object(tempfile, 'NamedTemporaryFile', autospec=True)
+    @mock.patch.object(swift, 'SwiftAPI', autospec=True)
+    def test__acquire_shared_boot_iso_reuse(self, swift_mock, tempfile_mock):
+        swift_obj_mock = swift_mock.return_value
+        swift_obj_mock.head_object.return_value = {}
+        tempfile_mock.return_value.__enter__.return_value.name = 'tmpfile'
+        build_mock = mock.Mock()
+
+        ilo_deploy._acquire_shared_boot_iso('cont', 'boot-iso-a', self.node,
+                                            build_mock)
+
+        self.assertFalse(build_mock.called)
+        swift_obj_mock.create_object.assert_called_once_with(
+            'cont', 'boot-iso-a.refs/%s' % self.node.uuid, 'tmpfile')
+        swift_obj_mock.head_object.assert_called_once_with(
+            'cont', 'boot-iso-a')
+        self.assertFalse(swift_obj_mock.update_object_meta.called)
+
+    @mock.patch.object(tempfile, 'NamedTemporaryFile', autospec=True)
+    @mock.patch.object(swift, 'SwiftAPI', autospec=True)
+    def test__acquire_shared_boot_iso_reuse_expiring(self, swift_mock,
+                                                     tempfile_mock):
+        swift_obj_mock = swift_mock.return_value
+        swift_obj_mock.head_object.return_value = {'x-delete-at': '123'}
+        tempfile_mock.return_value.__enter__.return_value.name = 'tmpfile'
+        build_mock = mock.Mock()
+
+        ilo_deploy._acquire_shared_boot_iso('cont', 'boot-iso-a', self.node,
+                                            build_mock)
+
+        self.assertFalse(build_mock.called)
+        swift_obj_mock.update_object_meta.assert_called_once_with(
+            'cont', 'boot-iso-a', {})
+
+    @mock.patch.object(tempfile, 'NamedTemporaryFile', autospec=True)
+    @mock.patch.object(swift, 'SwiftAPI', autospec=True)
+    def test__acquire_shared_boot_iso_build_fails(self, swift_mock,
+                                                  tempfile_mock):
+        swift_obj_mock = swift_mock.return_value
+        swift_obj_mock.head_object.side_effect = (
+            exception.SwiftObjectNotFoundError(obj='iso', container='cont',
+                                               operation='head'))
+        build_mock = mock.Mock(side_effect=exception.ImageCreationFailed(
+            image_type='iso', error='boom'))
+
+        self.assertRaises(exception.ImageCreationFailed,
+                          ilo_deploy._acquire_shared_boot_iso, 'cont',
+                          'boot-iso-a', self.node, build_mock)
+        swift_obj_mock.delete_object.assert_called_once_with(
+            'cont', 'boot-iso-a.refs/%s' % self.node.uuid)
+
+    @mock.patch.object(swift, 'SwiftAPI', autospec=True)
+    def test__release_shared_boot_iso_still_used(self, swift_mock):
+        swift_obj_mock = swift_mock.return_value
+        swift_obj_mock.list_objects.return_value = ['boot-iso-a.refs/other']
+
+        ilo_deploy._release_shared_boot_iso('cont', 'boot-iso-a', self.node)
+
+        swift_obj_mock.delete_object.assert_called_once_with(
+            'cont', 'boot-iso-a.refs/%s' % self.node.uuid)
+        swift_obj_mock.list_objects.assert_called_once_with(
+            'cont', prefix='boot-iso-a.refs/')
+        self.assertFalse(swift_obj_mock.update_object_meta.called)
+
+    @mock.patch.object(swift, 'SwiftAPI', autospec=True)
+    def test__release_shared_boot_iso_last(self, swift_mock):
+        self.config(shared_boot_iso_expiry=60, group='ilo')
+        swift_obj_mock = swift_mock.return_value
+        swift_obj_mock.list_objects.return_value = []
+
+        ilo_deploy._release_shared_boot_iso('cont', 'boot-iso-a', self.node)
+
+        swift_obj_mock.update_object_meta.assert_called_once_with(
+            'cont', 'boot-iso-a', {'X-Delete-After': '60'})
+        self.assertEqual(2, swift_obj_mock.list_objects.call_count)
+
+    @mock.patch.object(swift, 'SwiftAPI', autospec=True)
+    def test__release_shared_boot_iso_acquired_concurrently(self,
+                                                            swift_mock):
+        self.config(shared_boot_iso_expiry=60, group='ilo')
+        swift_obj_mock = swift_mock.return_value
+        swift_obj_mock.delete_object.side_effect = (
+            exception.SwiftObjectNotFoundError(obj='ref', container='cont',
+                                               operation='delete'))
+        swift_obj_mock.list_objects.side_effect = [
+            [], ['boot-iso-a.refs/other']]
+
+        ilo_deploy._release_shared_boot_iso('cont', 'boot-iso-a', self.node)
+
+        swift_obj_mock.update_object_meta.assert_has_calls([
+            mock.call('cont', 'boot-iso-a', {'X-Delete-After': '60'}),
+            mock.call('cont', 'boot-iso-a', {})])
+
+    @mock.patch.object(swift, 'SwiftAPI', autospec=True)
+    def test__keep_used_shared_boot_isos(self, swift_mock):
+        swift_obj_mock = swift_mock.return_value
+        swift_obj_mock.list_objects.return_value = [
+            'boot-iso-a', 'boot-iso-a.refs/node1', 'boot-iso-b',
+            'boot-iso-c', 'boot-iso-c.refs/node2']
+        swift_obj_mock.head_object.side_effect = iter([
+            {'x-delete-at': '123'}, {}])
+
+        ilo_deploy._keep_used_shared_boot_isos('cont')
+
+        swift_obj_mock.list_objects.assert_called_once_with(
+            'cont', prefix='boot-iso-')
+        swift_obj_mock.head_object.assert_has_calls(
+            [mock.call('cont', 'boot-iso-a'), mock.call('cont', 'boot-iso-c')],
+            any_order=True)
+        self.assertEqual(1, swift_obj_mock.update_object_meta.call_count)
+
+    @mock.patch.object(swift, 'SwiftAPI', autospec=True)
+    def test__keep_used_shared_boot_isos_unused(self, swift_mock):
+        swift_obj_mock = swift_mock.return_value
+        swift_obj_mock.list_objects.return_value = ['boot-iso-a']
+
+        ilo_deploy._keep_used_shared_boot_isos('cont')
+
+        self.assertFalse(swift_obj_mock.head_object.called)
+        self.assertFalse(swift_obj_mock.update_object_meta.called)
+
+    @mock.patch.object(ilo_deploy, '_release_shared_boot_iso', autospec=True)
     @mock.patch.object(swift, 'SwiftAPI', autospec=True)
     def test__clean_up_boot_iso_for_instance(self, swift_mock,
-                                             boot_object_name_mock):
+                                             release_mock):
+        CONF.ilo.swift_ilo_container = 'ilo-cont'
+        i_info = self.node.instance_info
+        i_info['ilo_boot_iso'] = 'swift:boot-iso-abcdef'
+        self.node.instance_info = i_info
+        self.node.save()
+        ilo_deploy._clean_up_boot_iso_for_instance(self.node)
+        release_mock.assert_called_once_with('ilo-cont', 'boot-iso-abcdef',
+                                             self.node)
+        self.assertFalse(swift_mock.return_value.delete_object.called)
+
+    @mock.patch.object(swift, 'SwiftAPI', autospec=True)
+    def test__clean_up_boot_iso_for_instance_per_node(self, swift_mock):
         swift_obj_mock = swift_mock.return_value
         CONF.ilo.swift_ilo_container = 'ilo-cont'
-        boot_object_name_mock.return_value = 'boot-object'
+        boot_object_name = ilo_deploy._get_boot_iso_object_name(self.node)
         i_info = self.node.instance_info
-        i_info['ilo_boot_iso'] = 'swift:bootiso'
+        i_info['ilo_boot_iso'] = 'swift:%s' % boot_object_name
         self.node.instance_info = i_info
         self.node.save()
         ilo_deploy._clean_up_boot_iso_for_instance(self.node)
-        swift_obj_mock.delete_object.assert_called_once_with('ilo-cont',
-                                                             'boot-object')
+        swift_obj_mock.delete_object.assert_called_once_with(
+            'ilo-cont', boot_object_name)
 
-    @mock.patch.object(ilo_deploy, '_get_boot_iso_object_name', autospec=True)
-    def test__clean_up_boot_iso_for_instance_no_boot_iso(
-            self, boot_object_name_mock):
+    @mock.patch.object(swift, 'SwiftAPI', autospec=True)
+    def test__clean_up_boot_iso_for_instance_no_boot_iso(self, swift_mock):
         ilo_deploy._clean_up_boot_iso_for_instance(self.node)
-        self.assertFalse(boot_object_name_mock.called)
+        self.assertFalse(swift_mock.called)
 
     @mock.patch.object(deploy_utils, 'check_for_missing_params', autospec=True)
     def test__parse_driver_info(self, check_params_mock):
@@ -68,6 +68,30 @@ FAKE_BLADE_STATE_RESPONSE = (
     '</BladeStateResponse>') % msftocsclient.WCSNS
 
 
+def _blade_state(blade_number, state, completion_code='Success'):
+    return ('<BladeStateResponse>'
+            '<completionCode>%(code)s</completionCode>'
+            '<apiVersion>1</apiVersion>'
+            '<statusDescription/>'
+            '<bladeNumber>%(number)d</bladeNumber>'
+            '<bladeState>%(state)s</bladeState>'
+            '</BladeStateResponse>' % {'code': completion_code,
+                                       'number': blade_number,
+                                       'state': state})
+
+FAKE_ALL_BLADES_STATE_RESPONSE = (
+    '<GetAllBladesStateResponse xmlns="%s" '
+    'xmlns:i="http://www.w3.org/2001/XMLSchema-instance">'
+    '<completionCode>Success</completionCode>'
+    '<apiVersion>1</apiVersion>'
+    '<statusDescription/>'
+    '<bladeStateResponseCollection>%s</bladeStateResponseCollection>'
+    '</GetAllBladesStateResponse>') % (
+        msftocsclient.WCSNS,
+        _blade_state(1, 'ON') + _blade_state(2, 'OFF') +
+        _blade_state(3, 'OFF', completion_code='Timeout'))
+
+
 class MSFTOCSClientApiTestCase(base.TestCase):
     def setUp(self):
         super(MSFTOCSClientApiTestCase, self).setUp()
@@ -75,10 +99,12 @@ class MSFTOCSClientApiTestCase(base.TestCase):
         self._fake_username = "admin"
         self._fake_password = 'fake'
         self._fake_blade_id = 1
+        msftocsclient._SESSIONS.clear()
+        self.addCleanup(msftocsclient._SESSIONS.clear)
         self._client = msftocsclient.MSFTOCSClientApi(
             self._fake_base_url, self._fake_username, self._fake_password)
 
-    @mock.patch.object(requests, 'get', autospec=True)
+    @mock.patch.object(requests.Session, 'get', autospec=True)
     def test__exec_cmd(self, mock_get):
         fake_response_text = 'fake_response_text'
         fake_rel_url = 'fake_rel_url'
@@ -87,9 +113,9 @@ class MSFTOCSClientApiTestCase(base.TestCase):
         self.assertEqual(fake_response_text,
                          self._client._exec_cmd(fake_rel_url))
         mock_get.assert_called_once_with(
-            self._fake_base_url + "/" + fake_rel_url, auth=mock.ANY)
+            self._client._session, self._fake_base_url + "/" + fake_rel_url)
 
-    @mock.patch.object(requests, 'get', autospec=True)
+    @mock.patch.object(requests.Session, 'get', autospec=True)
     def test__exec_cmd_http_get_fail(self, mock_get):
         fake_rel_url = 'fake_rel_url'
         mock_get.side_effect = requests_exceptions.ConnectionError('x')
@@ -98,7 +124,24 @@ class MSFTOCSClientApiTestCase(base.TestCase):
                           self._client._exec_cmd,
                           fake_rel_url)
         mock_get.assert_called_once_with(
-            self._fake_base_url + "/" + fake_rel_url, auth=mock.ANY)
+            self._client._session, self._fake_base_url + "/" + fake_rel_url)
+
+    def test_session_shared(self):
+        client = msftocsclient.MSFTOCSClientApi(
+            self._fake_base_url, self._fake_username, self._fake_password)
+        self.assertIs(self._client._session, client._session)
+        self.assertEqual((self._fake_username, self._fake_password),
+                         (client._session.auth.username,
+                          client._session.auth.password))
+
+    def test_session_credentials_changed(self):
+        old_session = self._client._session
+        client = msftocsclient.MSFTOCSClientApi(
+            self._fake_base_url, self._fake_username, 'new password')
+        self.assertIsNot(old_session, client._session)
+        self.assertEqual([(self._fake_base_url, self._fake_username,
+                           'new password')],
+                         list(msftocsclient._SESSIONS))
 
     def test__check_completion_code(self):
         et = self._client._check_completion_code(FAKE_BOOT_RESPONSE)
@@ -121,6 +164,16 @@ class MSFTOCSClientApiTestCase(base.TestCase):
                           self._client._check_completion_code,
                           'bad_xml')
 
+    @mock.patch.object(
+        msftocsclient.MSFTOCSClientApi, '_exec_cmd', autospec=True)
+    def test_get_all_blades_state(self, mock_exec_cmd):
+        mock_exec_cmd.return_value = FAKE_ALL_BLADES_STATE_RESPONSE
+        self.assertEqual({1: msftocsclient.POWER_STATUS_ON,
+                          2: msftocsclient.POWER_STATUS_OFF},
+                         self._client.get_all_blades_state())
+        mock_exec_cmd.assert_called_once_with(
+            self._client, "GetAllBladesState")
+
     @mock.patch.object(
         msftocsclient.MSFTOCSClientApi, '_exec_cmd', autospec=True)
     def test_get_blade_state(self, mock_exec_cmd):
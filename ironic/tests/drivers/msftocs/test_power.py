@@ -18,12 +18,14 @@ Test class for MSFT OCS PowerInterface
 """
 
 import mock
+from oslo_utils import uuidutils
 
 from ironic.common import exception
 from ironic.common import states
 from ironic.conductor import task_manager
 from ironic.drivers.modules.msftocs import common as msftocs_common
 from ironic.drivers.modules.msftocs import msftocsclient
+from ironic.drivers.modules.msftocs import power as msftocs_power
 from ironic.tests.conductor import utils as mgr_utils
 from ironic.tests.db import base as db_base
 from ironic.tests.db import utils as db_utils
@@ -40,6 +42,8 @@ class MSFTOCSPowerTestCase(db_base.DbTestCase):
         self.node = obj_utils.create_test_node(self.context,
                                                driver='fake_msftocs',
                                                driver_info=self.info)
+        msftocs_power._CHASSIS_STATES.clear()
+        self.addCleanup(msftocs_power._CHASSIS_STATES.clear)
 
     def test_get_properties(self):
         expected = msftocs_common.REQUIRED_PROPERTIES
@@ -70,11 +74,96 @@ class MSFTOCSPowerTestCase(db_base.DbTestCase):
             mock_c = mock.MagicMock(spec=msftocsclient.MSFTOCSClientApi)
             blade_id = task.node.driver_info['msftocs_blade_id']
             mock_gci.return_value = (mock_c, blade_id)
-            mock_c.get_blade_state.return_value = msftocsclient.POWER_STATUS_ON
+            mock_c.get_all_blades_state.return_value = {
+                blade_id: msftocsclient.POWER_STATUS_ON}
 
             self.assertEqual(states.POWER_ON,
                              task.driver.power.get_power_state(task))
             mock_gci.assert_called_once_with(task.node.driver_info)
+            mock_c.get_all_blades_state.assert_called_once_with()
+            self.assertFalse(mock_c.get_blade_state.called)
+
+    @mock.patch.object(msftocs_common, 'get_client_info', autospec=True)
+    def test_get_power_state_chassis_cached(self, mock_gci):
+        info = dict(self.info, msftocs_blade_id=2)
+        node2 = obj_utils.create_test_node(self.context,
+                                           uuid=uuidutils.generate_uuid(),
+                                           driver='fake_msftocs',
+                                           driver_info=info)
+        mock_c = mock.MagicMock(spec=msftocsclient.MSFTOCSClientApi)
+        mock_c.get_all_blades_state.return_value = {
+            1: msftocsclient.POWER_STATUS_ON,
+            2: msftocsclient.POWER_STATUS_OFF}
+        for node, expected in ((self.node, states.POWER_ON),
+                               (node2, states.POWER_OFF)):
+            with task_manager.acquire(self.context, node.uuid,
+                                      shared=True) as task:
+                blade_id = task.node.driver_info['msftocs_blade_id']
+                mock_gci.return_value = (mock_c, blade_id)
+                self.assertEqual(expected,
+                                 task.driver.power.get_power_state(task))
+        mock_c.get_all_blades_state.assert_called_once_with()
+        self.assertFalse(mock_c.get_blade_state.called)
+
+    @mock.patch.object(msftocs_power.time, 'time', autospec=True)
+    def test__get_blade_state_expired(self, mock_time):
+        mock_c = mock.MagicMock(spec=msftocsclient.MSFTOCSClientApi)
+        mock_c.get_all_blades_state.return_value = {
+            1: msftocsclient.POWER_STATUS_ON}
+        mock_time.side_effect = [100, 105, 111]
+        for i in range(3):
+            self.assertEqual(msftocsclient.POWER_STATUS_ON,
+                             msftocs_power._get_blade_state(
+                                 mock_c, 'http://fakehost:8000', 1))
+        self.assertEqual(2, mock_c.get_all_blades_state.call_count)
+
+    @mock.patch.object(msftocs_common, 'get_client_info', autospec=True)
+    def test_get_power_state_chassis_fail(self, mock_gci):
+        with task_manager.acquire(self.context, self.node.uuid,
+                                  shared=True) as task:
+            mock_c = mock.MagicMock(spec=msftocsclient.MSFTOCSClientApi)
+            blade_id = task.node.driver_info['msftocs_blade_id']
+            mock_gci.return_value = (mock_c, blade_id)
+            mock_c.get_all_blades_state.side_effect = (
+                exception.MSFTOCSClientApiException('x'))
+            mock_c.get_blade_state.return_value = msftocsclient.POWER_STATUS_ON
+
+            self.assertEqual(states.POWER_ON,
+                             task.driver.power.get_power_state(task))
+            mock_c.get_blade_state.assert_called_once_with(blade_id)
+
+    @mock.patch.object(msftocs_common, 'get_client_info', autospec=True)
+    def test_get_power_state_no_cache(self, mock_gci):
+        self.config(chassis_state_cache_ttl=0, group='msftocs')
+        with task_manager.acquire(self.context, self.node.uuid,
+                                  shared=True) as task:
+            mock_c = mock.MagicMock(spec=msftocsclient.MSFTOCSClientApi)
+            blade_id = task.node.driver_info['msftocs_blade_id']
+            mock_gci.return_value = (mock_c, blade_id)
+            mock_c.get_blade_state.return_value = msftocsclient.POWER_STATUS_ON
+
+            self.assertEqual(states.POWER_ON,
+                             task.driver.power.get_power_state(task))
+            mock_c.get_blade_state.assert_called_once_with(blade_id)
+            self.assertFalse(mock_c.get_all_blades_state.called)
+
+    @mock.patch.object(msftocs_common, 'get_client_info', autospec=True)
+    def test_set_power_state_forgets_state(self, mock_gci):
+        with task_manager.acquire(self.context, self.node.uuid,
+                                  shared=False) as task:
+            mock_c = mock.MagicMock(spec=msftocsclient.MSFTOCSClientApi)
+            blade_id = task.node.driver_info['msftocs_blade_id']
+            mock_gci.return_value = (mock_c, blade_id)
+            mock_c.get_all_blades_state.return_value = {
+                blade_id: msftocsclient.POWER_STATUS_OFF}
+            mock_c.get_blade_state.return_value = msftocsclient.POWER_STATUS_ON
+
+            self.assertEqual(states.POWER_OFF,
+                             task.driver.power.get_power_state(task))
+            task.driver.power.set_power_state(task, states.POWER_ON)
+            self.assertEqual(states.POWER_ON,
+                             task.driver.power.get_power_state(task))
+            mock_c.get_all_blades_state.assert_called_once_with()
             mock_c.get_blade_state.assert_called_once_with(blade_id)
 
     @mock.patch.object(msftocs_common, 'get_client_info', autospec=True)
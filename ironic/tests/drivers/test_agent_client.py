@@ -19,6 +19,7 @@ import requests
 import six
 
 from ironic.common import exception
+from ironic.common import metrics
 from ironic.drivers.modules import agent_client
 from ironic.tests import base
 
@@ -54,6 +55,9 @@ class MockNode(object):
 class TestAgentClient(base.TestCase):
     def setUp(self):
         super(TestAgentClient, self).setUp()
+        self.addCleanup(setattr, agent_client, '_SESSION', None)
+        agent_client._SLOTS.clear()
+        self.addCleanup(agent_client._SLOTS.clear)
         self.client = agent_client.AgentClient()
         self.client.session = mock.MagicMock(autospec=requests.Session)
         self.node = MockNode()
@@ -63,6 +67,21 @@ class TestAgentClient(base.TestCase):
         self.assertEqual('application/json',
                          client.session.headers['Content-Type'])
 
+    def test_session_shared(self):
+        self.assertIs(agent_client.AgentClient().session,
+                      agent_client.AgentClient().session)
+
+    def test_session_pool(self):
+        agent_client._SESSION = None
+        self.config(max_connections_per_agent=4, group='agent')
+        session = agent_client.AgentClient().session
+        adapter = session.get_adapter('http://127.0.0.1:9999')
+        self.assertIs(adapter, session.get_adapter('https://127.0.0.1:9999'))
+        self.assertEqual(agent_client.MAX_POOLED_AGENTS,
+                         adapter._pool_connections)
+        self.assertEqual(4, adapter._pool_maxsize)
+        self.assertFalse(adapter._pool_block)
+
     def test__get_command_url(self):
         command_url = self.client._get_command_url(self.node)
         expected = self.node.driver_internal_info['agent_url'] + '/v1/commands'
@@ -95,7 +114,30 @@ class TestAgentClient(base.TestCase):
         self.client.session.post.assert_called_once_with(
             url,
             data=body,
-            params={'wait': 'false'})
+            params={'wait': 'false'},
+            timeout=(10, 60))
+        timer = metrics.get_metrics().get_timer('agent.command.%s' % method)
+        self.assertEqual(1, timer.count)
+        self.assertEqual(0, timer.errors)
+
+    def test__command_wait_timeout(self):
+        self.config(connect_timeout=5, command_timeout=1200, group='agent')
+        self.client.session.post.return_value = MockResponse('{}')
+        self.client._command(self.node, 'image.install_bootloader', {},
+                             wait=True)
+        self.client.session.post.assert_called_once_with(
+            mock.ANY, data=mock.ANY, params={'wait': 'true'},
+            timeout=(5, 1200))
+
+    def test__command_fail_connection(self):
+        method = 'clean.failing_step'
+        self.client.session.post.side_effect = requests.ConnectionError(
+            'refused')
+        self.assertRaises(exception.AgentConnectionFailed,
+                          self.client._command,
+                          self.node, method, {})
+        timer = metrics.get_metrics().get_timer('agent.command.%s' % method)
+        self.assertEqual(1, timer.errors)
 
     def test__command_fail_json(self):
         response_text = 'this be not json matey!'
@@ -113,7 +155,8 @@ class TestAgentClient(base.TestCase):
         self.client.session.post.assert_called_once_with(
             url,
             data=body,
-            params={'wait': 'false'})
+            params={'wait': 'false'},
+            timeout=(10, 60))
 
     def test_get_commands_status(self):
         with mock.patch.object(self.client.session, 'get',
@@ -122,6 +165,35 @@ class TestAgentClient(base.TestCase):
             res.json.return_value = {'commands': []}
             mock_get.return_value = res
             self.assertEqual([], self.client.get_commands_status(self.node))
+            mock_get.assert_called_once_with(
+                self.client._get_command_url(self.node), timeout=(10, 60))
+
+    def test_get_commands_status_fail_connection(self):
+        self.client.session.get.side_effect = requests.Timeout('timed out')
+        self.assertRaises(exception.AgentConnectionFailed,
+                          self.client.get_commands_status, self.node)
+
+    def test__connection_slot(self):
+        self.config(max_connections_per_agent=1, connection_wait_timeout=0,
+                    group='agent')
+        with self.client._connection_slot(self.node):
+            self.assertRaises(exception.AgentConnectionFailed,
+                              self.client.get_commands_status, self.node)
+            self.assertFalse(self.client.session.get.called)
+        self.client.session.get.return_value = MockResponse(
+            '{"commands": []}')
+        self.assertEqual([], self.client.get_commands_status(self.node))
+
+    def test__get_slots(self):
+        slots = agent_client._get_slots('http://1.2.3.4:9999')
+        self.assertIs(slots, agent_client._get_slots('http://1.2.3.4:9999'))
+        self.assertIsNot(slots, agent_client._get_slots('http://1.2.3.5:9999'))
+
+    @mock.patch.object(agent_client, 'MAX_POOLED_AGENTS', 2)
+    def test__get_slots_least_recently_used_dropped(self):
+        for url in ('http://a', 'http://b', 'http://a', 'http://c'):
+            agent_client._get_slots(url)
+        self.assertEqual(['http://a', 'http://c'], list(agent_client._SLOTS))
 
     @mock.patch('uuid.uuid4', mock.MagicMock(spec_set=[], return_value='uuid'))
     def test_prepare_image(self):
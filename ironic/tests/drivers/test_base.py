@@ -14,9 +14,12 @@
 #    under the License.
 
 import eventlet
+import fixtures
 import mock
 
 from ironic.common import exception
+from ironic.common import metrics
+from ironic.conductor import task_manager
 from ironic.drivers import base as driver_base
 from ironic.tests import base
 
@@ -183,3 +186,103 @@ class CleanStepTestCase(base.TestCase):
         # Ensure we can execute the function.
         obj.execute_clean_step(task_mock, obj.get_clean_steps(task_mock)[0])
         method_mock.assert_called_once_with(task_mock)
+
+
+class DriverCallMetricsTestCase(base.TestCase):
+
+    def setUp(self):
+        super(DriverCallMetricsTestCase, self).setUp()
+        self.metrics = metrics.Metrics()
+        self.useFixture(fixtures.MonkeyPatch(
+            'ironic.common.metrics._METRICS', self.metrics))
+        self.task = mock.Mock(spec_set=['node'])
+        self.task.node.driver = 'fake_driver'
+
+    def test_task_method_measured(self):
+        class TestInterface(driver_base.BaseInterface):
+            interface_type = 'test'
+
+            def do_it(self, task):
+                return 'done'
+
+        self.assertEqual('done', TestInterface().do_it(self.task))
+        hist = self.metrics.get_timer('driver.fake_driver.test.do_it')
+        self.assertEqual(1, hist.count)
+        self.assertEqual(0, hist.errors)
+
+    def test_task_method_error(self):
+        class TestInterface(driver_base.BaseInterface):
+            interface_type = 'test'
+
+            def do_it(self, task):
+                raise exception.IronicException()
+
+        self.assertRaises(exception.IronicException,
+                          TestInterface().do_it, self.task)
+        hist = self.metrics.get_timer('driver.fake_driver.test.do_it')
+        self.assertEqual(1, hist.count)
+        self.assertEqual(1, hist.errors)
+
+    def test_super_call_measured_once(self):
+        class TestInterface(driver_base.BaseInterface):
+            interface_type = 'test'
+
+            def do_it(self, task):
+                pass
+
+        class TestSubInterface(TestInterface):
+            def do_it(self, task):
+                super(TestSubInterface, self).do_it(task)
+
+        TestSubInterface().do_it(task=self.task)
+        hist = self.metrics.get_timer('driver.fake_driver.test.do_it')
+        self.assertEqual(1, hist.count)
+
+    def test_exclusive_lock_method_measured(self):
+        class TestInterface(driver_base.BaseInterface):
+            interface_type = 'test'
+
+            @task_manager.require_exclusive_lock
+            def do_it(self, task):
+                return 'done'
+
+        task = mock.Mock(spec_set=['node', 'shared'], shared=False)
+        task.node.driver = 'fake_driver'
+        self.assertEqual('done', TestInterface().do_it(task))
+        hist = self.metrics.get_timer('driver.fake_driver.test.do_it')
+        self.assertEqual(1, hist.count)
+
+    def test_non_task_method_not_measured(self):
+        class TestInterface(driver_base.BaseInterface):
+            interface_type = 'test'
+
+            def helper(self, value):
+                return value
+
+        self.assertEqual(1, TestInterface().helper(1))
+        self.assertEqual({}, self.metrics.snapshot()['timers'])
+
+    def test_unknown_driver(self):
+        class TestInterface(driver_base.BaseInterface):
+            interface_type = 'test'
+
+            def do_it(self, task):
+                pass
+
+        TestInterface().do_it(mock.sentinel.task)
+        self.assertIsNotNone(
+            self.metrics.get_timer('driver.unknown.test.do_it'))
+
+    def test_passthru_measured(self):
+        class TestVendorInterface(FakeVendorInterface):
+            @driver_base.passthru(['POST'])
+            def with_task(self, task, **kwargs):
+                pass
+
+        fvi = TestVendorInterface()
+        fvi.validate(self.task)
+        fvi.with_task(self.task)
+        self.assertEqual(1, self.metrics.get_timer(
+            'driver.fake_driver.vendor.validate').count)
+        self.assertEqual(1, self.metrics.get_timer(
+            'driver.fake_driver.vendor.with_task').count)
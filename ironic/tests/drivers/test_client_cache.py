@@ -0,0 +1,86 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Test class for the registry of the vendor clients."""
+
+import mock
+
+from ironic.drivers.modules import client_cache
+from ironic.tests import base
+
+
+@mock.patch.object(client_cache.time, 'time', autospec=True)
+class ClientCacheTestCase(base.TestCase):
+
+    def setUp(self):
+        super(ClientCacheTestCase, self).setUp()
+        self.factory = mock.Mock(side_effect=lambda: object())
+        self.params = {'address': '1.2.3.4', 'password': 'secret'}
+
+    def _get(self, address='1.2.3.4', params=None):
+        return client_cache.get_client('fake', address,
+                                       params or self.params, self.factory)
+
+    def test_get_client_reused(self, time_mock):
+        time_mock.return_value = 1000
+        client = self._get()
+        self.assertIs(client, self._get())
+        self.assertEqual(1, self.factory.call_count)
+
+    def test_get_client_other_params(self, time_mock):
+        time_mock.return_value = 1000
+        client = self._get()
+        other = self._get(params=dict(self.params, password='changed'))
+        self.assertIsNot(client, other)
+        self.assertEqual(2, self.factory.call_count)
+
+    def test_get_client_idle(self, time_mock):
+        self.config(vendor_client_idle_timeout=60)
+        time_mock.return_value = 1000
+        client = self._get()
+        time_mock.return_value = 1060
+        self.assertIs(client, self._get())
+        time_mock.return_value = 1121
+        self.assertIsNot(client, self._get())
+        self.assertEqual(2, self.factory.call_count)
+
+    def test_get_client_least_recently_used(self, time_mock):
+        self.config(vendor_client_cache_size=2)
+        time_mock.return_value = 1000
+        first = self._get(address='1.1.1.1')
+        second = self._get(address='2.2.2.2')
+        # The first client becomes the most recently used one
+        self.assertIs(first, self._get(address='1.1.1.1'))
+        self._get(address='3.3.3.3')
+        self.assertEqual(2, len(client_cache._CLIENTS))
+        self.assertIs(first, self._get(address='1.1.1.1'))
+        self.assertIsNot(second, self._get(address='2.2.2.2'))
+        self.assertEqual(4, self.factory.call_count)
+
+    def test_get_client_disabled(self, time_mock):
+        self.config(vendor_client_cache_size=0)
+        time_mock.return_value = 1000
+        self.assertIsNot(self._get(), self._get())
+        self.assertEqual(2, self.factory.call_count)
+        self.assertEqual(0, len(client_cache._CLIENTS))
+
+    def test_get_client_factory_fails(self, time_mock):
+        time_mock.return_value = 1000
+        self.factory.side_effect = ValueError
+        self.assertRaises(ValueError, self._get)
+        self.assertEqual(0, len(client_cache._CLIENTS))
+
+    def test_clear(self, time_mock):
+        time_mock.return_value = 1000
+        client = self._get()
+        client_cache.clear()
+        self.assertIsNot(client, self._get())
@@ -17,22 +17,24 @@
 import base64
 import gzip
 import os
-import shutil
 import stat
 import tempfile
 import time
 import types
 
+import fixtures
 import mock
 from oslo_concurrency import processutils
 from oslo_config import cfg
 from oslo_utils import uuidutils
 import requests
+import six
 import testtools
 
 from ironic.common import boot_devices
 from ironic.common import disk_partitioner
 from ironic.common import exception
+from ironic.common import image_writer
 from ironic.common import images
 from ironic.common import states
 from ironic.common import utils as common_utils
@@ -656,8 +658,8 @@ class PhysicalWorkTestCase(tests_base.TestCase):
                                                     boot_mode="bios"),
                           mock.call.is_block_device(root_part),
                           mock.call.is_block_device(configdrive_part),
-                          mock.call.dd(mock.ANY, configdrive_part),
                           mock.call.populate_image(image_path, root_part),
+                          mock.call.dd(mock.ANY, configdrive_part),
                           mock.call.block_uuid(root_part),
                           mock.call.logout_iscsi(address, port, iqn),
                           mock.call.delete_iscsi(address, port, iqn)]
@@ -1242,6 +1244,8 @@ class GetDeviceBlockSizeTestCase(tests_base.TestCase):
         mock_exec.assert_has_calls(expected_call)
 
 
+@mock.patch.object(image_writer, 'write_image', autospec=True)
+@mock.patch.object(os, 'access', autospec=True)
 @mock.patch.object(utils, 'dd', autospec=True)
 @mock.patch.object(images, 'qemu_img_info', autospec=True)
 @mock.patch.object(images, 'convert_image', autospec=True)
@@ -1250,19 +1254,67 @@ class PopulateImageTestCase(tests_base.TestCase):
     def setUp(self):
         super(PopulateImageTestCase, self).setUp()
 
-    def test_populate_raw_image(self, mock_cg, mock_qinfo, mock_dd):
+    def _set_format(self, mock_qinfo, file_format):
         type(mock_qinfo.return_value).file_format = mock.PropertyMock(
-            return_value='raw')
+            return_value=file_format)
+
+    def test_populate_raw_image(self, mock_cg, mock_qinfo, mock_dd,
+                                mock_access, mock_write):
+        self._set_format(mock_qinfo, 'raw')
+        mock_access.return_value = True
+        utils.populate_image('src', 'dst')
+        mock_access.assert_called_once_with('dst', os.W_OK)
+        mock_write.assert_called_once_with('src', 'dst', 1024 * 1024)
+        self.assertFalse(mock_dd.called)
+        self.assertFalse(mock_cg.called)
+
+    def test_populate_raw_image_block_size(self, mock_cg, mock_qinfo,
+                                           mock_dd, mock_access, mock_write):
+        self.config(dd_block_size='512K', group='deploy')
+        self._set_format(mock_qinfo, 'raw')
+        mock_access.return_value = True
+        utils.populate_image('src', 'dst')
+        mock_write.assert_called_once_with('src', 'dst', 512 * 1024)
+
+    @mock.patch.object(utils.LOG, 'info', autospec=True)
+    def test_populate_raw_image_not_writable(self, mock_log, mock_cg,
+                                             mock_qinfo, mock_dd,
+                                             mock_access, mock_write):
+        self._set_format(mock_qinfo, 'raw')
+        mock_access.return_value = False
         utils.populate_image('src', 'dst')
         mock_dd.assert_called_once_with('src', 'dst')
+        self.assertEqual(1, mock_log.call_count)
+        self.assertFalse(mock_write.called)
         self.assertFalse(mock_cg.called)
 
-    def test_populate_qcow2_image(self, mock_cg, mock_qinfo, mock_dd):
-        type(mock_qinfo.return_value).file_format = mock.PropertyMock(
-            return_value='qcow2')
+    @mock.patch.object(utils.LOG, 'info', autospec=True)
+    def test_populate_raw_image_dd_block_size(self, mock_log, mock_cg,
+                                              mock_qinfo, mock_dd,
+                                              mock_access, mock_write):
+        self.config(dd_block_size='1MB', group='deploy')
+        self._set_format(mock_qinfo, 'raw')
+        mock_access.return_value = True
+        utils.populate_image('src', 'dst')
+        mock_dd.assert_called_once_with('src', 'dst')
+        self.assertEqual(1, mock_log.call_count)
+        self.assertFalse(mock_write.called)
+
+    def test_populate_raw_image_fails(self, mock_cg, mock_qinfo, mock_dd,
+                                      mock_access, mock_write):
+        self._set_format(mock_qinfo, 'raw')
+        mock_access.return_value = True
+        mock_write.side_effect = IOError(5, 'Input/output error')
+        self.assertRaises(exception.InstanceDeployFailure,
+                          utils.populate_image, 'src', 'dst')
+
+    def test_populate_qcow2_image(self, mock_cg, mock_qinfo, mock_dd,
+                                  mock_access, mock_write):
+        self._set_format(mock_qinfo, 'qcow2')
         utils.populate_image('src', 'dst')
         mock_cg.assert_called_once_with('src', 'dst', 'raw', True)
         self.assertFalse(mock_dd.called)
+        self.assertFalse(mock_write.called)
 
 
 @mock.patch.object(utils, 'is_block_device', lambda d: True)
@@ -1371,59 +1423,90 @@ class RealFilePartitioningTestCase(tests_base.TestCase):
                                                      [('uuid', 'path')])
 
 
-@mock.patch.object(shutil, 'copyfileobj', autospec=True)
+def _encode_configdrive(data):
+    out = six.BytesIO()
+    with gzip.GzipFile('configdrive', 'wb', fileobj=out) as gzipped:
+        gzipped.write(data)
+    return base64.b64encode(out.getvalue())
+
+
 @mock.patch.object(requests, 'get', autospec=True)
 class GetConfigdriveTestCase(tests_base.TestCase):
 
-    @mock.patch.object(gzip, 'GzipFile', autospec=True)
-    def test_get_configdrive(self, mock_gzip, mock_requests, mock_copy):
-        mock_requests.return_value = mock.MagicMock(
-            spec_set=['content'], content='Zm9vYmFy')
-        utils._get_configdrive('http://1.2.3.4/cd', 'fake-node-uuid')
-        mock_requests.assert_called_once_with('http://1.2.3.4/cd')
-        mock_gzip.assert_called_once_with('configdrive', 'rb',
-                                          fileobj=mock.ANY)
-        mock_copy.assert_called_once_with(mock.ANY, mock.ANY)
-
-    @mock.patch.object(gzip, 'GzipFile', autospec=True)
-    def test_get_configdrive_base64_string(self, mock_gzip, mock_requests,
-                                           mock_copy):
-        utils._get_configdrive('Zm9vYmFy', 'fake-node-uuid')
+    def setUp(self):
+        super(GetConfigdriveTestCase, self).setUp()
+        self.data = b'config drive' * 10000
+        self.encoded = _encode_configdrive(self.data)
+
+    def _check(self, result):
+        configdrive_mb, path = result
+        self.addCleanup(os.unlink, path)
+        self.assertEqual(1, configdrive_mb)
+        with open(path, 'rb') as f:
+            self.assertEqual(self.data, f.read())
+
+    def test_get_configdrive(self, mock_requests):
+        # Chunks not aligned on base64 groups, with line breaks
+        chunks = [self.encoded[i:i + 1001] + b'\n'
+                  for i in range(0, len(self.encoded), 1001)]
+        mock_requests.return_value.iter_content.return_value = chunks
+        self._check(utils._get_configdrive('http://1.2.3.4/cd',
+                                           'fake-node-uuid'))
+        mock_requests.assert_called_once_with('http://1.2.3.4/cd',
+                                              stream=True)
+        mock_requests.return_value.raise_for_status.assert_called_once_with()
+
+    def test_get_configdrive_base64_string(self, mock_requests):
+        self._check(utils._get_configdrive(self.encoded.decode('ascii'),
+                                           'fake-node-uuid'))
+        self.assertFalse(mock_requests.called)
+
+    def test_get_configdrive_local(self, mock_requests):
+        store_dir = self.useFixture(fixtures.TempDir()).path
+        self.config(configdrive_store_dir=store_dir,
+                    configdrive_store_url='http://1.2.3.4/cd/',
+                    group='conductor')
+        with open(os.path.join(store_dir, 'configdrive-1'), 'wb') as f:
+            f.write(self.encoded)
+        self._check(utils._get_configdrive('http://1.2.3.4/cd/configdrive-1',
+                                           'fake-node-uuid'))
         self.assertFalse(mock_requests.called)
-        mock_gzip.assert_called_once_with('configdrive', 'rb',
-                                          fileobj=mock.ANY)
-        mock_copy.assert_called_once_with(mock.ANY, mock.ANY)
 
-    def test_get_configdrive_bad_url(self, mock_requests, mock_copy):
+    def test_get_configdrive_local_missing(self, mock_requests):
+        store_dir = self.useFixture(fixtures.TempDir()).path
+        self.config(configdrive_store_dir=store_dir,
+                    configdrive_store_url='http://1.2.3.4/cd',
+                    group='conductor')
+        mock_requests.return_value.iter_content.return_value = [self.encoded]
+        self._check(utils._get_configdrive('http://1.2.3.4/cd/configdrive-1',
+                                           'fake-node-uuid'))
+        mock_requests.assert_called_once_with(
+            'http://1.2.3.4/cd/configdrive-1', stream=True)
+
+    def test_get_configdrive_bad_url(self, mock_requests):
         mock_requests.side_effect = requests.exceptions.RequestException
         self.assertRaises(exception.InstanceDeployFailure,
                           utils._get_configdrive, 'http://1.2.3.4/cd',
                           'fake-node-uuid')
-        self.assertFalse(mock_copy.called)
 
-    @mock.patch.object(base64, 'b64decode', autospec=True)
-    def test_get_configdrive_base64_error(self, mock_b64, mock_requests,
-                                          mock_copy):
-        mock_b64.side_effect = TypeError
+    def test_get_configdrive_download_error(self, mock_requests):
+        mock_requests.return_value.iter_content.side_effect = (
+            requests.exceptions.RequestException)
+        self.assertRaises(exception.InstanceDeployFailure,
+                          utils._get_configdrive, 'http://1.2.3.4/cd',
+                          'fake-node-uuid')
+
+    def test_get_configdrive_base64_error(self, mock_requests):
         self.assertRaises(exception.InstanceDeployFailure,
                           utils._get_configdrive,
                           'malformed', 'fake-node-uuid')
-        mock_b64.assert_called_once_with('malformed')
-        self.assertFalse(mock_copy.called)
-
-    @mock.patch.object(gzip, 'GzipFile', autospec=True)
-    def test_get_configdrive_gzip_error(self, mock_gzip, mock_requests,
-                                        mock_copy):
-        mock_requests.return_value = mock.MagicMock(
-            spec_set=['content'], content='Zm9vYmFy')
-        mock_copy.side_effect = IOError
+
+    def test_get_configdrive_gzip_error(self, mock_requests):
+        mock_requests.return_value.iter_content.return_value = [
+            base64.b64encode(b'not gzipped')]
         self.assertRaises(exception.InstanceDeployFailure,
                           utils._get_configdrive, 'http://1.2.3.4/cd',
                           'fake-node-uuid')
-        mock_requests.assert_called_once_with('http://1.2.3.4/cd')
-        mock_gzip.assert_called_once_with('configdrive', 'rb',
-                                          fileobj=mock.ANY)
-        mock_copy.assert_called_once_with(mock.ANY, mock.ANY)
 
 
 class VirtualMediaDeployUtilsTestCase(db_base.DbTestCase):
@@ -178,6 +178,11 @@ class CheckStatusTestCase(BaseTestCase):
         self.task.process_event.assert_called_once_with('fail')
         self.assertIn('boom', self.node.last_error)
 
+    def test_status_given(self, mock_get):
+        discoverd._check_status(self.task, {'finished': True})
+        self.assertFalse(mock_get.called)
+        self.task.process_event.assert_called_once_with('done')
+
     def test_service_url(self, mock_get):
         self.config(service_url='meow', group='discoverd')
         mock_get.return_value = {'finished': True}
@@ -191,28 +196,65 @@ class CheckStatusTestCase(BaseTestCase):
 @mock.patch.object(eventlet.greenthread, 'spawn_n',
                    lambda f, *a, **kw: f(*a, **kw))
 @mock.patch.object(ironic_discoverd, '__version_info__', (1, 0, 0))
+@mock.patch.object(keystone, 'get_admin_auth_token', autospec=True)
+@mock.patch.object(client, 'get_status', autospec=True)
 @mock.patch.object(task_manager, 'acquire', autospec=True)
 @mock.patch.object(discoverd, '_check_status', autospec=True)
 class PeriodicTaskTestCase(BaseTestCase):
-    def test_ok(self, mock_check, mock_acquire):
-        mgr = mock.MagicMock(spec=['iter_nodes'])
-        mgr.iter_nodes.return_value = [('1', 'd1'), ('2', 'd2')]
+    def setUp(self):
+        super(PeriodicTaskTestCase, self).setUp()
+        self.mgr = mock.MagicMock(spec=['iter_nodes'])
+        self.mgr.iter_nodes.return_value = [('1', 'fake_discoverd'),
+                                            ('2', 'fake_discoverd'),
+                                            ('3', 'fake_discoverd'),
+                                            ('4', 'not_discoverd')]
+        self.context = mock.MagicMock(spec_set=['auth_token'])
+
+    def test_ok(self, mock_check, mock_acquire, mock_get, mock_token):
+        statuses = {'1': {'finished': True}, '2': {'error': 'boom'},
+                    '3': {}}
+        mock_get.side_effect = lambda uuid, **kw: statuses[uuid]
+        mock_token.return_value = 'the token'
         tasks = [mock.sentinel.task1, mock.sentinel.task2]
         mock_acquire.side_effect = (
             mock.MagicMock(__enter__=mock.MagicMock(return_value=task))
             for task in tasks
         )
         discoverd.DiscoverdInspect()._periodic_check_result(
-            mgr, mock.sentinel.context)
-        mock_check.assert_any_call(tasks[0])
-        mock_check.assert_any_call(tasks[1])
+            self.mgr, self.context)
+
+        # One token for all the nodes
+        mock_token.assert_called_once_with()
+        self.assertEqual(3, mock_get.call_count)
+        mock_get.assert_any_call('3', auth_token='the token')
+        # Only the nodes whose inspection is over are locked
+        mock_acquire.assert_has_calls([mock.call(self.context, '1'),
+                                       mock.call(self.context, '2')])
         self.assertEqual(2, mock_acquire.call_count)
+        mock_check.assert_any_call(tasks[0], statuses['1'])
+        mock_check.assert_any_call(tasks[1], statuses['2'])
+
+    def test_get_status_fails(self, mock_check, mock_acquire, mock_get,
+                              mock_token):
+        mock_get.side_effect = RuntimeError('boom')
+        discoverd.DiscoverdInspect()._periodic_check_result(
+            self.mgr, self.context)
+        self.assertEqual(3, mock_get.call_count)
+        self.assertFalse(mock_acquire.called)
+        self.assertFalse(mock_check.called)
 
-    def test_node_locked(self, mock_check, mock_acquire):
-        mgr = mock.MagicMock(spec=['iter_nodes'])
-        mgr.iter_nodes.return_value = [('1', 'd1'), ('2', 'd2')]
+    def test_node_locked(self, mock_check, mock_acquire, mock_get,
+                         mock_token):
+        mock_get.return_value = {'finished': True}
         mock_acquire.side_effect = exception.NodeLocked("boom")
         discoverd.DiscoverdInspect()._periodic_check_result(
-            mgr, mock.sentinel.context)
+            self.mgr, self.context)
         self.assertFalse(mock_check.called)
-        self.assertEqual(2, mock_acquire.call_count)
+        self.assertEqual(3, mock_acquire.call_count)
+
+    def test_no_nodes(self, mock_check, mock_acquire, mock_get, mock_token):
+        self.mgr.iter_nodes.return_value = [('4', 'not_discoverd')]
+        discoverd.DiscoverdInspect()._periodic_check_result(
+            self.mgr, self.context)
+        self.assertFalse(mock_token.called)
+        self.assertFalse(mock_get.called)
@@ -37,6 +37,11 @@ INFO_DICT = db_utils.get_test_iboot_info()
 
 class IBootPrivateMethodTestCase(db_base.DbTestCase):
 
+    def setUp(self):
+        super(IBootPrivateMethodTestCase, self).setUp()
+        self.addCleanup(iboot._RELAYS.clear)
+        self.addCleanup(iboot._MAX_RELAY_IDS.clear)
+
     def test__parse_driver_info_good(self):
         node = obj_utils.create_test_node(
                 self.context,
@@ -138,7 +143,7 @@ class IBootPrivateMethodTestCase(db_base.DbTestCase):
         status = iboot._power_status(info)
 
         self.assertEqual(states.POWER_ON, status)
-        mock_get_conn.assert_called_once_with(info)
+        mock_get_conn.assert_called_once_with(info, 1)
         mock_connection.get_relays.assert_called_once_with()
 
     @mock.patch.object(iboot, '_get_connection', autospec=True)
@@ -155,7 +160,7 @@ class IBootPrivateMethodTestCase(db_base.DbTestCase):
         status = iboot._power_status(info)
 
         self.assertEqual(states.POWER_OFF, status)
-        mock_get_conn.assert_called_once_with(info)
+        mock_get_conn.assert_called_once_with(info, 1)
         mock_connection.get_relays.assert_called_once_with()
 
     @mock.patch.object(iboot, '_get_connection', autospec=True)
@@ -173,7 +178,7 @@ class IBootPrivateMethodTestCase(db_base.DbTestCase):
                           iboot._power_status,
                           info)
 
-        mock_get_conn.assert_called_once_with(info)
+        mock_get_conn.assert_called_once_with(info, 1)
         mock_connection.get_relays.assert_called_once_with()
 
     @mock.patch.object(iboot, '_get_connection', autospec=True)
@@ -193,7 +198,7 @@ class IBootPrivateMethodTestCase(db_base.DbTestCase):
                           iboot._power_status,
                           info)
 
-        mock_get_conn.assert_called_once_with(info)
+        mock_get_conn.assert_called_once_with(info, 1)
         mock_connection.get_relays.assert_called_once_with()
 
     @mock.patch.object(iboot, '_get_connection', autospec=True)
@@ -211,7 +216,7 @@ class IBootPrivateMethodTestCase(db_base.DbTestCase):
         status = iboot._power_status(info)
         self.assertEqual(states.ERROR, status)
 
-        mock_get_conn.assert_called_once_with(info)
+        mock_get_conn.assert_called_once_with(info, 1)
         mock_connection.get_relays.assert_called_once_with()
 
     @mock.patch.object(iboot, '_get_connection', autospec=True)
@@ -228,8 +233,147 @@ class IBootPrivateMethodTestCase(db_base.DbTestCase):
         status = iboot._power_status(info)
 
         self.assertEqual(states.ERROR, status)
-        mock_get_conn.assert_called_once_with(info)
+        mock_get_conn.assert_called_once_with(info, 1)
+        mock_connection.get_relays.assert_called_once_with()
+
+    def _get_info(self, **kwargs):
+        node = obj_utils.get_test_node(
+                self.context,
+                driver='fake_iboot',
+                driver_info=dict(INFO_DICT, **kwargs))
+        return iboot._parse_driver_info(node)
+
+    @mock.patch.object(iboot.iboot, 'iBootInterface', autospec=True)
+    def test__get_connection_reused(self, mock_iboot):
+        mock_iboot.side_effect = lambda *args, **kwargs: mock.Mock()
+        info = self._get_info()
+        conn = iboot._get_connection(info)
+        self.assertIs(conn, iboot._get_connection(dict(info, uuid='other')))
+        self.assertIsNot(conn, iboot._get_connection(
+            dict(info, password='other')))
+        self.assertEqual(2, mock_iboot.call_count)
+        mock_iboot.assert_any_call(info['address'], info['username'],
+                                   info['password'], port=info['port'],
+                                   num_relays=info['relay_id'])
+        iboot._get_connection(info, 4)
+        mock_iboot.assert_called_with(info['address'], info['username'],
+                                      info['password'], port=info['port'],
+                                      num_relays=4)
+
+    @mock.patch.object(iboot, '_get_connection', autospec=True)
+    def test__power_status_cached(self, mock_get_conn):
+        mock_connection = mock.MagicMock(spec_set=['get_relays'])
+        mock_connection.get_relays.return_value = [True, False]
+        mock_get_conn.return_value = mock_connection
+        info = self._get_info(iboot_relay_id=2)
+
+        self.assertEqual(states.POWER_OFF,
+                         iboot._power_status(info, cached=True))
+        # Another node of the same device
+        other_info = self._get_info(iboot_relay_id=1)
+        self.assertEqual(states.POWER_ON,
+                         iboot._power_status(other_info, cached=True))
+        mock_connection.get_relays.assert_called_once_with()
+
+    @mock.patch.object(iboot, '_get_connection', autospec=True)
+    def test__power_status_cached_relays_per_device(self, mock_get_conn):
+        self.config(relays_per_device=4, group='iboot')
+        mock_connection = mock.MagicMock(spec_set=['get_relays'])
+        mock_connection.get_relays.return_value = [True, False, True, False]
+        mock_get_conn.return_value = mock_connection
+
+        result = [iboot._power_status(self._get_info(iboot_relay_id=i),
+                                      cached=True)
+                  for i in range(1, 5)]
+        self.assertEqual([states.POWER_ON, states.POWER_OFF] * 2, result)
+        mock_connection.get_relays.assert_called_once_with()
+        mock_get_conn.assert_called_once_with(mock.ANY, 4)
+
+    @mock.patch.object(iboot.time, 'time', autospec=True)
+    @mock.patch.object(iboot, '_get_connection', autospec=True)
+    def test__power_status_cached_largest_relay_id(self, mock_get_conn,
+                                                   mock_time):
+        mock_connection = mock.MagicMock(spec_set=['get_relays'])
+        mock_connection.get_relays.side_effect = (
+            lambda: [True] * mock_get_conn.call_args[0][1])
+        mock_get_conn.return_value = mock_connection
+        infos = [self._get_info(iboot_relay_id=i) for i in range(1, 4)]
+
+        mock_time.return_value = 100
+        for info in infos:
+            iboot._power_status(info, cached=True)
+        self.assertEqual(3, mock_connection.get_relays.call_count)
+        # Once the relay ids of the nodes of the device are known, their
+        # states are read at once
+        mock_connection.get_relays.reset_mock()
+        mock_time.return_value = 200
+        for info in infos:
+            iboot._power_status(info, cached=True)
         mock_connection.get_relays.assert_called_once_with()
+        self.assertEqual(3, mock_get_conn.call_args[0][1])
+
+    @mock.patch.object(iboot, '_get_connection', autospec=True)
+    def test__power_status_cached_too_few_relays(self, mock_get_conn):
+        mock_connection = mock.MagicMock(spec_set=['get_relays'])
+        mock_connection.get_relays.side_effect = [[True], [True, False]]
+        mock_get_conn.return_value = mock_connection
+
+        iboot._power_status(self._get_info(iboot_relay_id=1), cached=True)
+        self.assertEqual(states.POWER_OFF, iboot._power_status(
+            self._get_info(iboot_relay_id=2), cached=True))
+        self.assertEqual(2, mock_connection.get_relays.call_count)
+
+    @mock.patch.object(iboot.time, 'time', autospec=True)
+    @mock.patch.object(iboot, '_get_connection', autospec=True)
+    def test__power_status_cached_expired(self, mock_get_conn, mock_time):
+        self.config(relay_state_cache_ttl=10, group='iboot')
+        mock_connection = mock.MagicMock(spec_set=['get_relays'])
+        mock_connection.get_relays.side_effect = [[True], [False]]
+        mock_get_conn.return_value = mock_connection
+        info = self._get_info()
+
+        mock_time.return_value = 100
+        self.assertEqual(states.POWER_ON,
+                         iboot._power_status(info, cached=True))
+        mock_time.return_value = 111
+        self.assertEqual(states.POWER_OFF,
+                         iboot._power_status(info, cached=True))
+
+    @mock.patch.object(iboot, '_get_connection', autospec=True)
+    def test__power_status_not_cached(self, mock_get_conn):
+        mock_connection = mock.MagicMock(spec_set=['get_relays'])
+        mock_connection.get_relays.side_effect = [[True], [False]]
+        mock_get_conn.return_value = mock_connection
+        info = self._get_info()
+
+        iboot._power_status(info, cached=True)
+        self.assertEqual(states.POWER_OFF, iboot._power_status(info))
+
+    @mock.patch.object(iboot, '_get_connection', autospec=True)
+    def test__power_status_cache_disabled(self, mock_get_conn):
+        self.config(relay_state_cache_ttl=0, group='iboot')
+        mock_connection = mock.MagicMock(spec_set=['get_relays'])
+        mock_connection.get_relays.return_value = [True]
+        mock_get_conn.return_value = mock_connection
+        info = self._get_info()
+
+        iboot._power_status(info, cached=True)
+        iboot._power_status(info, cached=True)
+        self.assertEqual(2, mock_connection.get_relays.call_count)
+        self.assertEqual({}, iboot._RELAYS)
+
+    @mock.patch.object(iboot, '_get_connection', autospec=True)
+    def test__switch_forgets_relays(self, mock_get_conn):
+        mock_connection = mock.MagicMock(spec_set=['get_relays', 'switch'])
+        mock_connection.get_relays.side_effect = [[False], [True]]
+        mock_get_conn.return_value = mock_connection
+        info = self._get_info()
+
+        iboot._power_status(info, cached=True)
+        iboot._switch(info, True)
+        self.assertEqual(states.POWER_ON,
+                         iboot._power_status(info, cached=True))
+        mock_connection.switch.assert_called_once_with(1, True)
 
 
 class IBootDriverTestCase(db_base.DbTestCase):
@@ -327,7 +471,7 @@ class IBootDriverTestCase(db_base.DbTestCase):
             self.assertEqual(state, states.POWER_ON)
 
         # ensure functions were called with the valid parameters
-        mock_power_status.assert_called_once_with(self.info)
+        mock_power_status.assert_called_once_with(self.info, cached=True)
 
     @mock.patch.object(iboot, '_parse_driver_info', autospec=True)
     def test_validate_good(self, parse_drv_info_mock):
@@ -58,6 +58,15 @@ class SNMPClientTestCase(base.TestCase):
         self.assertFalse('security' in client.__dict__)
         self.assertEqual(mock_cmdgen.return_value, client.cmd_gen)
 
+    def test__get_client_shared(self, mock_cmdgen):
+        info = {'address': self.address, 'port': 161,
+                'version': snmp.SNMP_V1, 'community': 'public'}
+        client = snmp._get_client(dict(info, outlet='1'))
+        self.assertIs(client, snmp._get_client(dict(info, outlet='2')))
+        self.assertIsNot(client,
+                         snmp._get_client(dict(info, community='other')))
+        self.assertEqual(2, mock_cmdgen.call_count)
+
     @mock.patch.object(cmdgen, 'CommunityData', autospec=True)
     def test__get_auth_v1(self, mock_community, mock_cmdgen):
         client = snmp.SNMPClient(self.address, self.port, snmp.SNMP_V1)
@@ -79,6 +88,16 @@ class SNMPClientTestCase(base.TestCase):
         mock_cmdgen.assert_called_once_with()
         mock_transport.assert_called_once_with((client.address, client.port))
 
+    @mock.patch.object(cmdgen, 'UdpTransportTarget', autospec=True)
+    @mock.patch.object(cmdgen, 'CommunityData', autospec=True)
+    def test__get_auth_and_transport_reused(self, mock_community,
+                                            mock_transport, mock_cmdgen):
+        client = snmp.SNMPClient(self.address, self.port, snmp.SNMP_V1)
+        self.assertIs(client._get_auth(), client._get_auth())
+        self.assertIs(client._get_transport(), client._get_transport())
+        self.assertEqual(1, mock_community.call_count)
+        self.assertEqual(1, mock_transport.call_count)
+
     @mock.patch.object(cmdgen, 'UdpTransportTarget', autospec=True)
     def test__get_transport_err(self, mock_transport, mock_cmdgen):
         mock_transport.side_effect = snmp_error.PySnmpError
@@ -123,6 +142,44 @@ class SNMPClientTestCase(base.TestCase):
         mock_cmdgenerator.getCmd.assert_called_once_with(mock.ANY, mock.ANY,
                                                          self.oid)
 
+    @mock.patch.object(snmp.SNMPClient, '_get_transport', autospec=True)
+    @mock.patch.object(snmp.SNMPClient, '_get_auth', autospec=True)
+    def test_get_table(self, mock_auth, mock_transport, mock_cmdgen):
+        var_bind_table = [[((1, 2, 1), 1)], [((1, 2, 2), 2)]]
+        mock_cmdgenerator = mock_cmdgen.return_value
+        mock_cmdgenerator.bulkCmd.return_value = ("", None, 0,
+                                                  var_bind_table)
+        client = snmp.SNMPClient(self.address, self.port, snmp.SNMP_V2C)
+        val = client.get_table((1, 2))
+        self.assertEqual({(1, 2, 1): 1, (1, 2, 2): 2}, val)
+        mock_cmdgenerator.bulkCmd.assert_called_once_with(
+            mock.ANY, mock.ANY, 0, snmp.BULK_MAX_REPETITIONS, (1, 2))
+        self.assertFalse(mock_cmdgenerator.nextCmd.called)
+
+    @mock.patch.object(snmp.SNMPClient, '_get_transport', autospec=True)
+    @mock.patch.object(snmp.SNMPClient, '_get_auth', autospec=True)
+    def test_get_table_v1(self, mock_auth, mock_transport, mock_cmdgen):
+        var_bind_table = [[((1, 2, 1), 1)]]
+        mock_cmdgenerator = mock_cmdgen.return_value
+        mock_cmdgenerator.nextCmd.return_value = ("", None, 0,
+                                                  var_bind_table)
+        client = snmp.SNMPClient(self.address, self.port, snmp.SNMP_V1)
+        val = client.get_table((1, 2))
+        self.assertEqual({(1, 2, 1): 1}, val)
+        mock_cmdgenerator.nextCmd.assert_called_once_with(mock.ANY,
+                                                          mock.ANY, (1, 2))
+        self.assertFalse(mock_cmdgenerator.bulkCmd.called)
+
+    @mock.patch.object(snmp.SNMPClient, '_get_transport', autospec=True)
+    @mock.patch.object(snmp.SNMPClient, '_get_auth', autospec=True)
+    def test_get_table_err_engine(self, mock_auth, mock_transport,
+                                  mock_cmdgen):
+        mock_cmdgenerator = mock_cmdgen.return_value
+        mock_cmdgenerator.bulkCmd.return_value = ("engine error", None, 0,
+                                                  [])
+        client = snmp.SNMPClient(self.address, self.port, snmp.SNMP_V3)
+        self.assertRaises(exception.SNMPFailure, client.get_table, (1, 2))
+
     @mock.patch.object(snmp.SNMPClient, '_get_transport', autospec=True)
     @mock.patch.object(snmp.SNMPClient, '_get_auth', autospec=True)
     def test_set(self, mock_auth, mock_transport, mock_cmdgen):
@@ -364,6 +421,7 @@ class SNMPDeviceDriverTestCase(db_base.DbTestCase):
             self.context,
             driver='fake_snmp',
             driver_info=INFO_DICT)
+        self.addCleanup(snmp._OUTLET_STATES.clear)
 
     def _update_driver_info(self, **kwargs):
         self.node["driver_info"].update(**kwargs)
@@ -411,6 +469,78 @@ class SNMPDeviceDriverTestCase(db_base.DbTestCase):
                           driver.power_state)
         mock_client.get.assert_called_once_with(driver._snmp_oid())
 
+    def test_power_state_cached(self, mock_get_client):
+        # Ensure the power state is read from the outlet state table
+        mock_client = mock_get_client.return_value
+        driver = snmp._get_driver(self.node)
+        table_oid = driver.oid_enterprise + driver.oid_device
+        mock_client.get_table.return_value = {
+            driver._snmp_oid(): driver.value_power_on}
+        self.assertEqual(states.POWER_ON, driver.power_state(cached=True))
+        self.assertEqual(states.POWER_ON, driver.power_state(cached=True))
+        mock_client.get_table.assert_called_once_with(table_oid)
+        self.assertFalse(mock_client.get.called)
+
+    def test_power_state_cached_shared(self, mock_get_client):
+        # Ensure the nodes of the same PDU share the outlet state table
+        mock_client = mock_get_client.return_value
+        driver = snmp._get_driver(self.node)
+        mock_client.get_table.return_value = {
+            driver._snmp_oid(): driver.value_power_on}
+        self.assertEqual(states.POWER_ON, driver.power_state(cached=True))
+        # The outlet of the other node is missing from the table
+        self._update_driver_info(snmp_outlet='2')
+        other_driver = snmp._get_driver(self.node)
+        mock_client.get.return_value = driver.value_power_off
+        self.assertEqual(states.POWER_OFF,
+                         other_driver.power_state(cached=True))
+        self.assertEqual(1, mock_client.get_table.call_count)
+        mock_client.get.assert_called_once_with(other_driver._snmp_oid())
+
+    @mock.patch.object(snmp.time, 'time', autospec=True)
+    def test_power_state_cached_expired(self, mock_time, mock_get_client):
+        self.config(outlet_state_cache_ttl=10, group='snmp')
+        mock_client = mock_get_client.return_value
+        driver = snmp._get_driver(self.node)
+        mock_client.get_table.return_value = {
+            driver._snmp_oid(): driver.value_power_on}
+        mock_time.return_value = 100
+        driver.power_state(cached=True)
+        mock_time.return_value = 111
+        driver.power_state(cached=True)
+        self.assertEqual(2, mock_client.get_table.call_count)
+
+    def test_power_state_cached_walk_failure(self, mock_get_client):
+        # Ensure the outlet is queried when the table walk fails
+        mock_client = mock_get_client.return_value
+        driver = snmp._get_driver(self.node)
+        mock_client.get_table.side_effect = self._get_snmp_failure()
+        mock_client.get.return_value = driver.value_power_off
+        self.assertEqual(states.POWER_OFF, driver.power_state(cached=True))
+        self.assertEqual(states.POWER_OFF, driver.power_state(cached=True))
+        self.assertEqual(1, mock_client.get_table.call_count)
+        self.assertEqual(2, mock_client.get.call_count)
+
+    def test_power_state_cached_disabled(self, mock_get_client):
+        self.config(outlet_state_cache_ttl=0, group='snmp')
+        mock_client = mock_get_client.return_value
+        driver = snmp._get_driver(self.node)
+        mock_client.get.return_value = driver.value_power_on
+        self.assertEqual(states.POWER_ON, driver.power_state(cached=True))
+        self.assertFalse(mock_client.get_table.called)
+
+    def test_power_on_forgets_cached_state(self, mock_get_client):
+        # Ensure a power change is not hidden by the outlet state table
+        mock_client = mock_get_client.return_value
+        driver = snmp._get_driver(self.node)
+        mock_client.get_table.return_value = {
+            driver._snmp_oid(): driver.value_power_off}
+        self.assertEqual(states.POWER_OFF, driver.power_state(cached=True))
+        mock_client.get.return_value = driver.value_power_on
+        driver.power_on()
+        self.assertEqual(states.POWER_ON, driver.power_state(cached=True))
+        self.assertEqual(1, mock_client.get_table.call_count)
+
     def test_power_on(self, mock_get_client):
         # Ensure the device is powered on correctly
         mock_client = mock_get_client.return_value
@@ -973,6 +1103,19 @@ class SNMPDeviceDriverTestCase(db_base.DbTestCase):
                 driver._snmp_oid(driver.oid_status))
         self.assertEqual(states.POWER_OFF, pstate)
 
+    def test_eaton_power_power_state_cached(self, mock_get_client):
+        # Ensure the Eaton Power driver reads the outlet status table
+        mock_client = mock_get_client.return_value
+        self._set_snmp_driver("eatonpower")
+        driver = snmp._get_driver(self.node)
+        status_oid = driver._snmp_oid(driver.oid_status)
+        mock_client.get_table.return_value = {
+            status_oid: driver.status_pending_off}
+        pstate = driver.power_state(cached=True)
+        mock_client.get_table.assert_called_once_with(
+            driver.oid_base + driver.oid_status)
+        self.assertEqual(states.POWER_ON, pstate)
+
     def test_eaton_power_power_on(self, mock_get_client):
         # Ensure the Eaton Power driver powers on correctly
         mock_client = mock_get_client.return_value
@@ -1047,7 +1190,7 @@ class SNMPDriverTestCase(db_base.DbTestCase):
         mock_driver.power_state.return_value = states.POWER_ON
         with task_manager.acquire(self.context, self.node.uuid) as task:
             pstate = task.driver.power.get_power_state(task)
-        mock_driver.power_state.assert_called_once_with()
+        mock_driver.power_state.assert_called_once_with(cached=True)
         self.assertEqual(states.POWER_ON, pstate)
 
     def test_get_power_state_off(self, mock_get_driver):
@@ -1055,7 +1198,7 @@ class SNMPDriverTestCase(db_base.DbTestCase):
         mock_driver.power_state.return_value = states.POWER_OFF
         with task_manager.acquire(self.context, self.node.uuid) as task:
             pstate = task.driver.power.get_power_state(task)
-        mock_driver.power_state.assert_called_once_with()
+        mock_driver.power_state.assert_called_once_with(cached=True)
         self.assertEqual(states.POWER_OFF, pstate)
 
     def test_get_power_state_error(self, mock_get_driver):
@@ -1063,7 +1206,7 @@ class SNMPDriverTestCase(db_base.DbTestCase):
         mock_driver.power_state.return_value = states.ERROR
         with task_manager.acquire(self.context, self.node.uuid) as task:
             pstate = task.driver.power.get_power_state(task)
-        mock_driver.power_state.assert_called_once_with()
+        mock_driver.power_state.assert_called_once_with(cached=True)
         self.assertEqual(states.ERROR, pstate)
 
     def test_get_power_state_snmp_failure(self, mock_get_driver):
@@ -1072,7 +1215,7 @@ class SNMPDriverTestCase(db_base.DbTestCase):
         with task_manager.acquire(self.context, self.node.uuid) as task:
             self.assertRaises(exception.SNMPFailure,
                               task.driver.power.get_power_state, task)
-        mock_driver.power_state.assert_called_once_with()
+        mock_driver.power_state.assert_called_once_with(cached=True)
 
     def test_set_power_state_on(self, mock_get_driver):
         mock_driver = mock_get_driver.return_value
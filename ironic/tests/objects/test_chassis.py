@@ -37,7 +37,8 @@ class TestChassisObject(base.DbTestCase):
 
             chassis = objects.Chassis.get(self.context, chassis_id)
 
-            mock_get_chassis.assert_called_once_with(chassis_id)
+            mock_get_chassis.assert_called_once_with(chassis_id,
+                                                     use_slave=False)
             self.assertEqual(self.context, chassis._context)
 
     def test_get_by_uuid(self):
@@ -48,7 +49,8 @@ class TestChassisObject(base.DbTestCase):
 
             chassis = objects.Chassis.get(self.context, uuid)
 
-            mock_get_chassis.assert_called_once_with(uuid)
+            mock_get_chassis.assert_called_once_with(uuid,
+                                                     use_slave=False)
             self.assertEqual(self.context, chassis._context)
 
     def test_get_bad_id_and_uuid(self):
@@ -67,7 +69,8 @@ class TestChassisObject(base.DbTestCase):
                 c.extra = {"test": 123}
                 c.save()
 
-                mock_get_chassis.assert_called_once_with(uuid)
+                mock_get_chassis.assert_called_once_with(uuid,
+                                                     use_slave=False)
                 mock_update_chassis.assert_called_once_with(
                         uuid, {'extra': {"test": 123}})
                 self.assertEqual(self.context, c._context)
@@ -77,7 +80,8 @@ class TestChassisObject(base.DbTestCase):
         new_uuid = uuidutils.generate_uuid()
         returns = [dict(self.fake_chassis, uuid=uuid),
                    dict(self.fake_chassis, uuid=new_uuid)]
-        expected = [mock.call(uuid), mock.call(uuid)]
+        expected = [mock.call(uuid, use_slave=False),
+                    mock.call(uuid, use_slave=False)]
         with mock.patch.object(self.dbapi, 'get_chassis_by_uuid',
                                side_effect=returns,
                                autospec=True) as mock_get_chassis:
@@ -36,7 +36,8 @@ class TestNodeObject(base.DbTestCase):
 
             node = objects.Node.get(self.context, node_id)
 
-            mock_get_node.assert_called_once_with(node_id)
+            mock_get_node.assert_called_once_with(node_id,
+                                                  use_slave=False)
             self.assertEqual(self.context, node._context)
 
     def test_get_by_uuid(self):
@@ -47,7 +48,7 @@ class TestNodeObject(base.DbTestCase):
 
             node = objects.Node.get(self.context, uuid)
 
-            mock_get_node.assert_called_once_with(uuid)
+            mock_get_node.assert_called_once_with(uuid, use_slave=False)
             self.assertEqual(self.context, node._context)
 
     def test_get_bad_id_and_uuid(self):
@@ -69,7 +70,7 @@ class TestNodeObject(base.DbTestCase):
                 n.driver = "fake-driver"
                 n.save()
 
-                mock_get_node.assert_called_once_with(uuid)
+                mock_get_node.assert_called_once_with(uuid, use_slave=False)
                 mock_update_node.assert_called_once_with(
                         uuid, {'properties': {"fake": "property"},
                                'driver': 'fake-driver',
@@ -81,7 +82,8 @@ class TestNodeObject(base.DbTestCase):
         uuid = self.fake_node['uuid']
         returns = [dict(self.fake_node, properties={"fake": "first"}),
                    dict(self.fake_node, properties={"fake": "second"})]
-        expected = [mock.call(uuid), mock.call(uuid)]
+        expected = [mock.call(uuid, use_slave=False),
+                    mock.call(uuid, use_slave=False)]
         with mock.patch.object(self.dbapi, 'get_node_by_uuid',
                                side_effect=returns,
                                autospec=True) as mock_get_node:
@@ -503,6 +503,43 @@ class _TestObject(object):
         self.assertEqual('abc', obj.bar)
         self.assertEqual(set(['foo', 'bar']), obj.obj_what_changed())
 
+    def test_fields_stored_in_slots(self):
+        obj = MyObj(self.context, foo=123, bar='abc')
+        self.assertIn('_foo', MyObj.__slots__)
+        self.assertIn('_new_field', TestSubclassedObject.__slots__)
+        self.assertNotIn('_foo', TestSubclassedObject.__slots__)
+        self.assertNotIn('_foo', obj.__dict__)
+        self.assertNotIn('_bar', obj.__dict__)
+
+    def test_obj_codecs(self):
+        self.assertEqual(sorted(MyObj.fields),
+                         [codec[0] for codec in MyObj._obj_codecs])
+        codecs = dict((codec[0], codec) for codec in MyObj._obj_codecs)
+        self.assertEqual(('foo', '_foo', int, None, None), codecs['foo'])
+        self.assertIsNotNone(codecs['created_at'][3])
+        self.assertIsNotNone(codecs['created_at'][4])
+
+    def test_as_dict(self):
+        obj = MyObj(self.context, foo=123)
+        self.assertEqual({'foo': 123}, obj.as_dict())
+
+    def test_deepcopy(self):
+        obj = MyObj(self.context, foo=123, bar='abc')
+        obj.obj_reset_changes(['bar'])
+        obj2 = obj.obj_clone()
+        self.assertIsNot(obj, obj2)
+        self.assertEqual(obj.as_dict(), obj2.as_dict())
+        self.assertEqual(set(['foo']), obj2.obj_what_changed())
+
+    def test_primitive_round_trip(self):
+        dt = datetime.datetime(1955, 11, 5, tzinfo=iso8601.iso8601.Utc())
+        obj = MyObj(self.context, foo=123, bar='abc', created_at=dt)
+        obj.obj_reset_changes()
+        obj2 = MyObj.obj_from_primitive(obj.obj_to_primitive())
+        self.assertEqual(obj.as_dict(), obj2.as_dict())
+        self.assertEqual(set(), obj2.obj_what_changed())
+        self.assertNotIn('VERSION', obj2.__dict__)
+
 
 class TestObject(_LocalTest, _TestObject):
     pass
@@ -36,7 +36,8 @@ class TestPortObject(base.DbTestCase):
 
             port = objects.Port.get(self.context, port_id)
 
-            mock_get_port.assert_called_once_with(port_id)
+            mock_get_port.assert_called_once_with(port_id,
+                                                  use_slave=False)
             self.assertEqual(self.context, port._context)
 
     def test_get_by_uuid(self):
@@ -47,7 +48,7 @@ class TestPortObject(base.DbTestCase):
 
             port = objects.Port.get(self.context, uuid)
 
-            mock_get_port.assert_called_once_with(uuid)
+            mock_get_port.assert_called_once_with(uuid, use_slave=False)
             self.assertEqual(self.context, port._context)
 
     def test_get_by_address(self):
@@ -58,7 +59,8 @@ class TestPortObject(base.DbTestCase):
 
             port = objects.Port.get(self.context, address)
 
-            mock_get_port.assert_called_once_with(address)
+            mock_get_port.assert_called_once_with(address,
+                                                  use_slave=False)
             self.assertEqual(self.context, port._context)
 
     def test_get_bad_id_and_uuid_and_address(self):
@@ -76,7 +78,7 @@ class TestPortObject(base.DbTestCase):
                 p.address = "b2:54:00:cf:2d:40"
                 p.save()
 
-                mock_get_port.assert_called_once_with(uuid)
+                mock_get_port.assert_called_once_with(uuid, use_slave=False)
                 mock_update_port.assert_called_once_with(
                         uuid, {'address': "b2:54:00:cf:2d:40"})
                 self.assertEqual(self.context, p._context)
@@ -85,7 +87,8 @@ class TestPortObject(base.DbTestCase):
         uuid = self.fake_port['uuid']
         returns = [self.fake_port,
                    utils.get_test_port(address="c3:54:00:cf:2d:40")]
-        expected = [mock.call(uuid), mock.call(uuid)]
+        expected = [mock.call(uuid, use_slave=False),
+                    mock.call(uuid, use_slave=False)]
         with mock.patch.object(self.dbapi, 'get_port_by_uuid',
                                side_effect=returns,
                                autospec=True) as mock_get_port:
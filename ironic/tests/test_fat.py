@@ -0,0 +1,186 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import os
+import struct
+
+import fixtures
+
+from ironic.common import exception
+from ironic.common import fat
+from ironic.tests import base
+
+
+class _FatReader(object):
+    """Minimal FAT12/16 reader, to check the images."""
+
+    def __init__(self, data):
+        self.data = data
+        (self.sector_size, self.cluster_sectors, reserved, num_fats,
+         root_entries, total16, _media, self.fat_sectors) = struct.unpack_from(
+            '<HBHBHHBH', data, 11)
+        self.label = data[43:54]
+        self.fs_type = data[54:62]
+        self.fat_offset = reserved * self.sector_size
+        self.root_offset = (reserved + num_fats * self.fat_sectors) * (
+            self.sector_size)
+        self.root_size = root_entries * 32
+        self.data_offset = self.root_offset + self.root_size
+        self.cluster_size = self.cluster_sectors * self.sector_size
+        self.fat_bits = 12 if self.fs_type.startswith(b'FAT12') else 16
+
+    def _next(self, cluster):
+        if self.fat_bits == 12:
+            value, = struct.unpack_from(
+                '<H', self.data, self.fat_offset + cluster * 3 // 2)
+            return value >> 4 if cluster % 2 else value & 0xFFF
+        value, = struct.unpack_from('<H', self.data,
+                                    self.fat_offset + cluster * 2)
+        return value
+
+    def read_chain(self, cluster, size=None):
+        chunks = []
+        eoc = 0xFF8 if self.fat_bits == 12 else 0xFFF8
+        while cluster and cluster < eoc:
+            offset = self.data_offset + (cluster - 2) * self.cluster_size
+            chunks.append(self.data[offset:offset + self.cluster_size])
+            cluster = self._next(cluster)
+        data = b''.join(chunks)
+        return data if size is None else data[:size]
+
+    def list_dir(self, cluster=0):
+        """Returns {long or short name: (attr, cluster, size)}."""
+        if cluster:
+            data = self.read_chain(cluster)
+        else:
+            data = self.data[self.root_offset:
+                             self.root_offset + self.root_size]
+        entries = {}
+        long_name = []
+        for offset in range(0, len(data), 32):
+            entry = data[offset:offset + 32]
+            if entry[0:1] == b'\x00':
+                break
+            attr = bytearray(entry[11:12])[0]
+            if attr == fat.ATTR_LONG_NAME:
+                part = entry[1:11] + entry[14:26] + entry[28:32]
+                long_name.insert(0, part.decode('utf-16-le'))
+                continue
+            cluster_lo, size = struct.unpack_from('<HI', entry, 26)
+            name = ''.join(long_name).split(u'\x00')[0]
+            if not name:
+                name = fat._short_name_to_str(entry[:11])
+            long_name = []
+            entries[name] = (attr, cluster_lo, size)
+        return entries
+
+
+class FatTestCase(base.TestCase):
+
+    def setUp(self):
+        super(FatTestCase, self).setUp()
+        self.output = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                   'fat.img')
+
+    def _read(self):
+        with open(self.output, 'rb') as f:
+            return _FatReader(f.read())
+
+    def test_create_image(self):
+        files = {'parameters.txt': b'a=b',
+                 'README': b'r' * 2000,
+                 'sub/dir/Long file name.conf': b'conf'}
+        fat.create_image(self.output, files, 100 * 1024, label='ir-vfd-dev')
+        self.assertEqual(100 * 1024, os.path.getsize(self.output))
+
+        reader = self._read()
+        self.assertEqual(b'FAT12   ', reader.fs_type)
+        self.assertEqual(b'ir-vfd-dev ', reader.label)
+        root = reader.list_dir()
+        self.assertIn((fat.ATTR_VOLUME_ID, 0, 0), root.values())
+        attr, cluster, size = root['parameters.txt']
+        self.assertEqual(b'a=b', reader.read_chain(cluster, size))
+        attr, cluster, size = root['README']
+        self.assertEqual(b'r' * 2000, reader.read_chain(cluster, size))
+
+        attr, cluster, size = root['sub']
+        self.assertEqual(fat.ATTR_DIRECTORY, attr)
+        sub = reader.list_dir(cluster)
+        self.assertEqual((fat.ATTR_DIRECTORY, 0, 0), sub['..'])
+        subdir = reader.list_dir(sub['dir'][1])
+        self.assertEqual(sub['dir'][1], subdir['.'][1])
+        self.assertEqual(cluster, subdir['..'][1])
+        attr, cluster, size = subdir['Long file name.conf']
+        self.assertEqual(b'conf', reader.read_chain(cluster, size))
+
+    def test_create_image_fat16(self):
+        fat.create_image(self.output, {'a': b'a'}, 20 * 1024 * 1024)
+        reader = self._read()
+        self.assertEqual(b'FAT16   ', reader.fs_type)
+        self.assertEqual(b'NO NAME    ', reader.label)
+        attr, cluster, size = reader.list_dir()['a']
+        self.assertEqual(b'a', reader.read_chain(cluster, size))
+
+    def test_create_image_empty_file(self):
+        fat.create_image(self.output, {'empty': b''}, 100 * 1024)
+        self.assertEqual((fat.ATTR_ARCHIVE, 0, 0),
+                         self._read().list_dir()['empty'])
+
+    def test_create_image_no_space(self):
+        self.assertRaises(exception.ImageCreationFailed,
+                          fat.create_image, self.output,
+                          {'big': b'b' * 200 * 1024}, 100 * 1024)
+
+    def test_create_image_file_and_dir(self):
+        self.assertRaises(exception.ImageCreationFailed,
+                          fat.create_image, self.output,
+                          {'a': b'a', 'A/b': b'b'}, 100 * 1024)
+
+    def test_create_image_label_too_long(self):
+        self.assertRaises(exception.ImageCreationFailed,
+                          fat.create_image, self.output, {}, 100 * 1024,
+                          label='a-very-long-label')
+
+
+class ShortNameTestCase(base.TestCase):
+
+    def test_valid_short_name(self):
+        self.assertEqual((b'VMLINUZ    ', False),
+                         fat._make_short_name('VMLINUZ', set()))
+        self.assertEqual((b'EFIBOOT IMG', False),
+                         fat._make_short_name('EFIBOOT.IMG', set()))
+
+    def test_lower_case(self):
+        self.assertEqual((b'VMLINUZ    ', True),
+                         fat._make_short_name('vmlinuz', set()))
+
+    def test_long_name(self):
+        taken = set()
+        name, long_name = fat._make_short_name('parameters.txt', taken)
+        self.assertEqual((b'PARAME~1TXT', True), (name, long_name))
+        taken.add(name)
+        self.assertEqual(b'PARAME~2TXT',
+                         fat._make_short_name('parameterz.txt', taken)[0])
+
+    def test_invalid_chars(self):
+        self.assertEqual((b'A_B~1      ', True),
+                         fat._make_short_name('a+b', set()))
+
+    def test_long_name_entries(self):
+        entries = fat._long_name_entries('parameters.txt', b'PARAME~1TXT')
+        self.assertEqual(2, len(entries))
+        # The last part of the name comes first
+        self.assertEqual(0x42, bytearray(entries[0])[0])
+        self.assertEqual(0x01, bytearray(entries[1])[0])
+        checksum = fat._long_name_checksum(b'PARAME~1TXT')
+        for entry in entries:
+            self.assertEqual(checksum, bytearray(entry)[13])
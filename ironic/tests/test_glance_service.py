@@ -641,6 +641,104 @@ def _create_failing_glance_client(info):
     return MyGlanceStubClient()
 
 
+class TestGlanceImageCache(base.TestCase):
+
+    def setUp(self):
+        super(TestGlanceImageCache, self).setUp()
+        self.client = stubs.StubGlanceClient()
+        self.context = context.RequestContext(auth_token=True, tenant='t1')
+        self.context.user_id = 'fake'
+        self.context.project_id = 't1'
+        self.service = service.GlanceImageService(self.client, 1,
+                                                  self.context)
+        self.image_id = self._create('image')
+        self.get_mock = mock.Mock(wraps=self.client.get)
+        self.client.images.get = self.get_mock
+
+    def _create(self, name, status='active'):
+        # NOTE: the image service drops the read-only status
+        return self.client.create(name=name, status=status,
+                                  properties={}).id
+
+    def test_show_cached(self):
+        image = self.service.show(self.image_id)
+        self.assertEqual(image, self.service.show(self.image_id))
+        self.assertEqual(1, self.get_mock.call_count)
+
+    def test_show_cached_copy(self):
+        self.service.show(self.image_id)['properties']['foo'] = 'bar'
+        self.assertEqual({}, self.service.show(self.image_id)['properties'])
+
+    def test_show_not_active(self):
+        image_id = self._create('image', status='queued')
+        self.service.show(image_id)
+        self.service.show(image_id)
+        self.assertEqual(2, self.get_mock.call_count)
+
+    def test_show_disabled(self):
+        self.config(metadata_cache_ttl=0, group='glance')
+        self.service.show(self.image_id)
+        self.service.show(self.image_id)
+        self.assertEqual(2, self.get_mock.call_count)
+
+    @mock.patch.object(base_image_service.time, 'time', autospec=True)
+    def test_show_expired(self, time_mock):
+        self.config(metadata_cache_ttl=60, group='glance')
+        time_mock.return_value = 1000
+        self.service.show(self.image_id)
+        time_mock.return_value = 1060
+        self.service.show(self.image_id)
+        self.assertEqual(1, self.get_mock.call_count)
+        time_mock.return_value = 1061
+        self.service.show(self.image_id)
+        self.assertEqual(2, self.get_mock.call_count)
+
+    def test_show_other_tenant(self):
+        self.service.show(self.image_id)
+        other = service.GlanceImageService(
+            self.client, 1, context.RequestContext(auth_token=True,
+                                                   tenant='t2'))
+        other.show(self.image_id)
+        self.assertEqual(2, self.get_mock.call_count)
+
+    def test_show_checks_availability(self):
+        self.service.show(self.image_id)
+        self.context.auth_token = None
+        self.assertRaises(exception.ImageNotFound,
+                          self.service.show, self.image_id)
+        self.assertEqual(1, self.get_mock.call_count)
+
+    def test_show_least_recently_used(self):
+        self.config(metadata_cache_size=1, group='glance')
+        other_id = self._create('other')
+        self.service.show(self.image_id)
+        self.service.show(other_id)
+        self.service.show(self.image_id)
+        self.assertEqual(3, self.get_mock.call_count)
+        self.assertEqual(1, len(base_image_service._IMAGES))
+
+    def test_update_forgets_image(self):
+        self.service.show(self.image_id)
+        self.service.update(self.image_id, {'name': 'new name'})
+        self.assertEqual('new name',
+                         self.service.show(self.image_id)['name'])
+        self.assertEqual(2, self.get_mock.call_count)
+
+    def test_detail_forgets_updated_image(self):
+        self.service.show(self.image_id)
+        self.service.detail()
+        self.service.show(self.image_id)
+        self.assertEqual(1, self.get_mock.call_count)
+        # NOTE: the stub client updates the images in place
+        self.client._images[0] = stubs.FakeImage(
+            {'id': self.image_id, 'name': 'new name', 'status': 'active',
+             'updated_at': '2015-01-01T00:00:00'})
+        self.service.detail()
+        self.assertEqual('new name',
+                         self.service.show(self.image_id)['name'])
+        self.assertEqual(2, self.get_mock.call_count)
+
+
 class TestGlanceSwiftTempURL(base.TestCase):
     def setUp(self):
         super(TestGlanceSwiftTempURL, self).setUp()
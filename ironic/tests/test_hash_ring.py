@@ -15,6 +15,7 @@
 
 import hashlib
 
+import eventlet
 import mock
 from oslo_config import cfg
 from testtools import matchers
@@ -248,3 +249,51 @@ class HashRingManagerTestCase(db_base.DbTestCase):
         self.assertRaises(exception.DriverNotFound,
                           self.ring_manager.__getitem__,
                           'driver1')
+
+    def test_hash_ring_manager_refresh_after_interval(self):
+        self.config(hash_ring_reset_interval=30)
+        self.register_conductors()
+        self.ring_manager['driver1']
+        self.dbapi.register_conductor({
+            'hostname': 'host3',
+            'drivers': ['driver3'],
+        })
+        with mock.patch.object(eventlet, 'spawn_n', autospec=True,
+                               side_effect=lambda func: func()) as mock_spawn:
+            # Not stale yet
+            self.assertRaises(exception.DriverNotFound,
+                              self.ring_manager.__getitem__,
+                              'driver3')
+            self.assertFalse(mock_spawn.called)
+
+            hash_ring.HashRingManager._updated_at -= 31
+            # The stale ring is used while it is reloaded
+            self.assertRaises(exception.DriverNotFound,
+                              self.ring_manager.__getitem__,
+                              'driver3')
+            self.assertEqual(1, mock_spawn.call_count)
+            self.assertEqual(['host3'],
+                             list(self.ring_manager['driver3'].hosts))
+            self.assertEqual(1, mock_spawn.call_count)
+
+    def test_hash_ring_manager_refresh_disabled(self):
+        self.config(hash_ring_reset_interval=0)
+        self.register_conductors()
+        self.ring_manager['driver1']
+        hash_ring.HashRingManager._updated_at -= 3600
+        with mock.patch.object(eventlet, 'spawn_n',
+                               autospec=True) as mock_spawn:
+            self.ring_manager['driver1']
+            self.assertFalse(mock_spawn.called)
+
+    @mock.patch.object(hash_ring, 'LOG', autospec=True)
+    def test_hash_ring_manager_refresh_failure(self, mock_log):
+        self.register_conductors()
+        ring = self.ring_manager['driver1']
+        with mock.patch.object(self.dbapi, 'get_active_driver_dict',
+                               autospec=True) as mock_get:
+            mock_get.side_effect = Exception('boom')
+            self.ring_manager._refresh()
+        self.assertTrue(mock_log.warn.called)
+        self.assertIs(ring, self.ring_manager['driver1'])
+        self.assertFalse(hash_ring.HashRingManager._refreshing)
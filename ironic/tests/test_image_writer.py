@@ -0,0 +1,158 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import errno
+import os
+
+import fixtures
+import mock
+
+from ironic.common import image_writer
+from ironic.tests import base
+
+MIB = image_writer.MIB
+
+
+class ImageWriterTestCase(base.TestCase):
+
+    def setUp(self):
+        super(ImageWriterTestCase, self).setUp()
+        tempdir = self.useFixture(fixtures.TempDir()).path
+        self.src = os.path.join(tempdir, 'image.raw')
+        self.dst = os.path.join(tempdir, 'disk')
+
+    def _make_image(self, size, chunks):
+        """Create a sparse image with data only at the given offsets."""
+        with open(self.src, 'wb') as f:
+            f.truncate(size)
+            for offset, data in chunks:
+                f.seek(offset)
+                f.write(data)
+        expected = bytearray(size)
+        for offset, data in chunks:
+            expected[offset:offset + len(data)] = data
+        return bytes(expected)
+
+    def _make_disk(self, size):
+        # Stale data, the holes of the image must be zeroed
+        with open(self.dst, 'wb') as f:
+            f.write(b'\xff' * size)
+
+    def _read_disk(self):
+        with open(self.dst, 'rb') as f:
+            return f.read()
+
+    def test_write_image(self):
+        size = 4 * MIB
+        expected = self._make_image(size, [(10, b'boot'),
+                                           (2 * MIB + 100, b'a' * 9000),
+                                           (size - 3, b'end')])
+        self._make_disk(size)
+        image_writer.write_image(self.src, self.dst, block_size=64 * 1024)
+        self.assertEqual(expected, self._read_disk())
+
+    def test_write_image_unaligned_size(self):
+        size = 3 * MIB + 1234
+        expected = self._make_image(size, [(MIB, b'data' * 1000),
+                                           (size - 10, b'tail')])
+        self._make_disk(size)
+        image_writer.write_image(self.src, self.dst)
+        self.assertEqual(expected, self._read_disk())
+
+    def test_write_image_empty_image(self):
+        size = 2 * MIB
+        expected = self._make_image(size, [])
+        self._make_disk(size)
+        image_writer.write_image(self.src, self.dst)
+        self.assertEqual(expected, self._read_disk())
+
+    @mock.patch.object(image_writer.LOG, 'info', autospec=True)
+    def test_write_image_progress(self, mock_info):
+        size = 2 * MIB
+        self._make_image(size, [(MIB, b'data')])
+        self._make_disk(size)
+        image_writer.write_image(self.src, self.dst)
+        params = mock_info.call_args[0][1]
+        self.assertEqual((self.src, self.dst, 0, 1),
+                         (params['src'], params['dst'], params['data'],
+                          params['holes']))
+
+    def test_write_image_missing_image(self):
+        self._make_disk(MIB)
+        self.assertRaises(IOError, image_writer.write_image,
+                          self.src, self.dst)
+
+    def test_get_extents(self):
+        size = 4 * MIB
+        self._make_image(size, [(MIB, b'a' * 4096)])
+        fd = os.open(self.src, os.O_RDONLY)
+        self.addCleanup(os.close, fd)
+        extents = list(image_writer.get_extents(fd, size))
+        # Whether holes are reported depends on the file system, but the
+        # data must be covered by the extents.
+        self.assertTrue(extents)
+        self.assertTrue(any(offset <= MIB and offset + length >= MIB + 4096
+                            for offset, length in extents))
+
+    @mock.patch.object(os, 'lseek', autospec=True)
+    def test_get_extents_not_supported(self, mock_lseek):
+        mock_lseek.side_effect = OSError(errno.EINVAL, 'Invalid argument')
+        self.assertEqual([(0, 100)], list(image_writer.get_extents(3, 100)))
+
+    @mock.patch.object(os, 'lseek', autospec=True)
+    def test_get_extents_holes(self, mock_lseek):
+        # data at [4096, 8192) and [16384, 20000), hole up to the end
+        mock_lseek.side_effect = [4096, 8192, 16384, 20000,
+                                  OSError(errno.ENXIO, 'No data')]
+        self.assertEqual([(4096, 4096), (16384, 3616)],
+                         list(image_writer.get_extents(3, 30000)))
+
+    def test__align_extents(self):
+        extents = [(10, 10), (4000, 200), (10000, 100), (20000, 10)]
+        self.assertEqual([(0, 12288), (16384, 20010)],
+                         list(image_writer._align_extents(extents, 20010)))
+
+
+class WriterZeroTestCase(base.TestCase):
+
+    def setUp(self):
+        super(WriterZeroTestCase, self).setUp()
+        tempdir = self.useFixture(fixtures.TempDir()).path
+        src = os.path.join(tempdir, 'image.raw')
+        self.dst = os.path.join(tempdir, 'disk')
+        for path in (src, self.dst):
+            with open(path, 'wb') as f:
+                f.write(b'\xff' * 8192)
+        self.writer = image_writer._Writer(src, self.dst, 4096)
+        self.addCleanup(self.writer.close)
+
+    @mock.patch('fcntl.ioctl', autospec=True)
+    def test_zero_block_device(self, mock_ioctl):
+        self.writer.is_block_device = True
+        self.writer.zero(4096, 4096)
+        mock_ioctl.assert_called_once_with(self.writer.dst.fileno(),
+                                           image_writer.BLKZEROOUT, mock.ANY)
+        with open(self.dst, 'rb') as f:
+            self.assertEqual(b'\xff' * 8192, f.read())
+
+    @mock.patch('fcntl.ioctl', autospec=True)
+    def test_zero_block_device_not_supported(self, mock_ioctl):
+        mock_ioctl.side_effect = IOError(errno.ENOTTY, 'Not supported')
+        self.writer.is_block_device = True
+        self.writer.zero(4096, 4096)
+        self.writer.zero(0, 4096)
+        self.writer.sync()
+        with open(self.dst, 'rb') as f:
+            self.assertEqual(b'\x00' * 8192, f.read())
+        # Not tried again after a failure
+        self.assertEqual(1, mock_ioctl.call_count)
+        self.assertIs(mock_ioctl.side_effect, self.writer.zero_error)
@@ -19,6 +19,7 @@
 import os
 import shutil
 
+import fixtures
 import mock
 from oslo_concurrency import processutils
 from oslo_config import cfg
@@ -26,9 +27,11 @@ import six
 import six.moves.builtins as __builtin__
 
 from ironic.common import exception
+from ironic.common import fat
 from ironic.common.glance_service import service_utils as glance_utils
 from ironic.common import image_service
 from ironic.common import images
+from ironic.common import isofs
 from ironic.common import utils
 from ironic.openstack.common import imageutils
 from ironic.tests import base
@@ -314,105 +317,38 @@ class FsImageTestCase(base.TestCase):
         dirname_mock.assert_any_call('root_dir/sub_dir/b3')
         mkdir_mock.assert_called_once_with('root_dir/sub_dir')
 
-    @mock.patch.object(images, '_create_root_fs', autospec=True)
-    @mock.patch.object(utils, 'tempdir', autospec=True)
-    @mock.patch.object(utils, 'write_to_file', autospec=True)
-    @mock.patch.object(utils, 'dd', autospec=True)
-    @mock.patch.object(utils, 'umount', autospec=True)
-    @mock.patch.object(utils, 'mount', autospec=True)
-    @mock.patch.object(utils, 'mkfs', autospec=True)
-    def test_create_vfat_image(self, mkfs_mock, mount_mock, umount_mock,
-            dd_mock, write_mock, tempdir_mock, create_root_fs_mock):
-
-        mock_file_handle = mock.MagicMock(spec=file)
-        mock_file_handle.__enter__.return_value = 'tempdir'
-        tempdir_mock.return_value = mock_file_handle
+    @mock.patch.object(fat, 'create_image', autospec=True)
+    def test_create_vfat_image(self, create_image_mock):
+        src_file = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                'a')
+        with open(src_file, 'wb') as f:
+            f.write(b'data')
 
         parameters = {'p1': 'v1'}
-        files_info = {'a': 'b'}
+        files_info = {src_file: 'b'}
         images.create_vfat_image('tgt_file', parameters=parameters,
                 files_info=files_info, parameters_file='qwe',
                 fs_size_kib=1000)
 
-        dd_mock.assert_called_once_with('/dev/zero',
-                                         'tgt_file',
-                                         'count=1',
-                                         'bs=1000KiB')
-
-        mkfs_mock.assert_called_once_with('vfat', 'tgt_file',
-                                          label="ir-vfd-dev")
-        mount_mock.assert_called_once_with('tgt_file', 'tempdir',
-                                           '-o', 'umask=0')
-
-        parameters_file_path = os.path.join('tempdir', 'qwe')
-        write_mock.assert_called_once_with(parameters_file_path, 'p1=v1')
-        create_root_fs_mock.assert_called_once_with('tempdir', files_info)
-        umount_mock.assert_called_once_with('tempdir')
-
-    @mock.patch.object(images, '_create_root_fs', autospec=True)
-    @mock.patch.object(utils, 'tempdir', autospec=True)
-    @mock.patch.object(utils, 'dd', autospec=True)
-    @mock.patch.object(utils, 'umount', autospec=True)
-    @mock.patch.object(utils, 'mount', autospec=True)
-    @mock.patch.object(utils, 'mkfs', autospec=True)
-    def test_create_vfat_image_always_umount(self, mkfs_mock, mount_mock,
-            umount_mock, dd_mock, tempdir_mock, create_root_fs_mock):
+        create_image_mock.assert_called_once_with(
+            'tgt_file', {'b': b'data', 'qwe': b'p1=v1'}, 1000 * 1024,
+            label="ir-vfd-dev")
 
-        mock_file_handle = mock.MagicMock(spec=file)
-        mock_file_handle.__enter__.return_value = 'tempdir'
-        tempdir_mock.return_value = mock_file_handle
-        files_info = {'a': 'b'}
-        create_root_fs_mock.side_effect = OSError()
+    def test_create_vfat_image_file_missing(self):
+        files_info = {'/nonexistent/file': 'b'}
         self.assertRaises(exception.ImageCreationFailed,
                           images.create_vfat_image, 'tgt_file',
                           files_info=files_info)
 
-        umount_mock.assert_called_once_with('tempdir')
-
-    @mock.patch.object(utils, 'dd', autospec=True)
-    def test_create_vfat_image_dd_fails(self, dd_mock):
-
-        dd_mock.side_effect = processutils.ProcessExecutionError
-        self.assertRaises(exception.ImageCreationFailed,
-                          images.create_vfat_image, 'tgt_file')
-
-    @mock.patch.object(utils, 'tempdir', autospec=True)
-    @mock.patch.object(utils, 'dd', autospec=True)
-    @mock.patch.object(utils, 'mkfs', autospec=True)
-    def test_create_vfat_image_mkfs_fails(self, mkfs_mock, dd_mock,
-                                          tempdir_mock):
-
-        mock_file_handle = mock.MagicMock(spec=file)
-        mock_file_handle.__enter__.return_value = 'tempdir'
-        tempdir_mock.return_value = mock_file_handle
-
-        mkfs_mock.side_effect = processutils.ProcessExecutionError
-        self.assertRaises(exception.ImageCreationFailed,
-                          images.create_vfat_image, 'tgt_file')
-
-    @mock.patch.object(images, '_create_root_fs', autospec=True)
-    @mock.patch.object(utils, 'tempdir', autospec=True)
-    @mock.patch.object(utils, 'dd', autospec=True)
-    @mock.patch.object(utils, 'umount', autospec=True)
-    @mock.patch.object(utils, 'mount', autospec=True)
-    @mock.patch.object(utils, 'mkfs', autospec=True)
-    def test_create_vfat_image_umount_fails(self, mkfs_mock, mount_mock,
-            umount_mock, dd_mock, tempdir_mock, create_root_fs_mock):
-
-        mock_file_handle = mock.MagicMock(spec=file)
-        mock_file_handle.__enter__.return_value = 'tempdir'
-        tempdir_mock.return_value = mock_file_handle
-        umount_mock.side_effect = processutils.ProcessExecutionError
-
-        self.assertRaises(exception.ImageCreationFailed,
-                          images.create_vfat_image, 'tgt_file')
-
-    @mock.patch.object(utils, 'umount', autospec=True)
-    def test__umount_without_raise(self, umount_mock):
-
-        umount_mock.side_effect = processutils.ProcessExecutionError
-        images._umount_without_raise('mountdir')
-        umount_mock.assert_called_once_with('mountdir')
+    def test_create_vfat_image_real(self):
+        tgt_file = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                'vfat.img')
+        images.create_vfat_image(tgt_file, parameters={'p1': 'v1'})
+        self.assertEqual(100 * 1024, os.path.getsize(tgt_file))
+        with open(tgt_file, 'rb') as f:
+            data = f.read()
+        self.assertEqual(b'ir-vfd-dev ', data[43:54])
+        self.assertIn(b'p1=v1', data)
 
     def test__generate_isolinux_cfg(self):
 
@@ -445,82 +381,66 @@ class FsImageTestCase(base.TestCase):
                                    options)
         self.assertEqual(expected_cfg, cfg)
 
-    @mock.patch.object(os.path, 'relpath', autospec=True)
-    @mock.patch.object(os, 'walk', autospec=True)
-    @mock.patch.object(utils, 'mount', autospec=True)
-    def test__mount_deploy_iso(self, mount_mock,
-                               walk_mock, relpath_mock):
-        walk_mock.return_value = [('/tmpdir1/EFI/ubuntu', [], ['grub.cfg']),
-                                  ('/tmpdir1/isolinux', [],
-                                   ['efiboot.img', 'isolinux.bin',
-                                    'isolinux.cfg'])]
-        relpath_mock.side_effect = iter(
-            ['EFI/ubuntu/grub.cfg', 'isolinux/efiboot.img'])
-
-        images._mount_deploy_iso('path/to/deployiso', 'tmpdir1')
-        mount_mock.assert_called_once_with('path/to/deployiso',
-                                           'tmpdir1', '-o', 'loop')
-        walk_mock.assert_called_once_with('tmpdir1')
-
-    @mock.patch.object(images, '_umount_without_raise', autospec=True)
-    @mock.patch.object(os.path, 'relpath', autospec=True)
-    @mock.patch.object(os, 'walk', autospec=True)
-    @mock.patch.object(utils, 'mount', autospec=True)
-    def test__mount_deploy_iso_fail_no_efibootimg(self, mount_mock,
-                                                  walk_mock, relpath_mock,
-                                                  umount_mock):
-        walk_mock.return_value = [('/tmpdir1/EFI/ubuntu', [], ['grub.cfg']),
-                                  ('/tmpdir1/isolinux', [],
-                                   ['isolinux.bin', 'isolinux.cfg'])]
-        relpath_mock.side_effect = iter(['EFI/ubuntu/grub.cfg'])
+    @mock.patch.object(isofs, 'IsoImage', autospec=True)
+    def test__extract_deploy_iso(self, iso_mock):
+        iso_obj_mock = iso_mock.return_value.__enter__.return_value
+        iso_obj_mock.list_files.return_value = [
+            'EFI/ubuntu/grub.cfg', 'isolinux/efiboot.img',
+            'isolinux/isolinux.bin', 'isolinux/isolinux.cfg']
+
+        result = images._extract_deploy_iso('path/to/deployiso', 'tmpdir1')
+
+        iso_mock.assert_called_once_with('path/to/deployiso')
+        iso_obj_mock.extract.assert_has_calls([
+            mock.call('isolinux/efiboot.img', 'tmpdir1/efiboot.img'),
+            mock.call('EFI/ubuntu/grub.cfg', 'tmpdir1/grub.cfg')])
+        expected = ({'tmpdir1/efiboot.img': 'isolinux/efiboot.img',
+                     'tmpdir1/grub.cfg': 'EFI/ubuntu/grub.cfg'},
+                    'isolinux/efiboot.img', 'EFI/ubuntu/grub.cfg')
+        self.assertEqual(expected, result)
+
+    @mock.patch.object(isofs, 'IsoImage', autospec=True)
+    def test__extract_deploy_iso_fail_no_efibootimg(self, iso_mock):
+        iso_obj_mock = iso_mock.return_value.__enter__.return_value
+        iso_obj_mock.list_files.return_value = [
+            'EFI/ubuntu/grub.cfg', 'isolinux/isolinux.bin',
+            'isolinux/isolinux.cfg']
 
         self.assertRaises(exception.ImageCreationFailed,
-                          images._mount_deploy_iso,
+                          images._extract_deploy_iso,
                           'path/to/deployiso', 'tmpdir1')
-        mount_mock.assert_called_once_with('path/to/deployiso',
-                                           'tmpdir1', '-o', 'loop')
-        walk_mock.assert_called_once_with('tmpdir1')
-        umount_mock.assert_called_once_with('tmpdir1')
+        self.assertFalse(iso_obj_mock.extract.called)
 
-    @mock.patch.object(images, '_umount_without_raise', autospec=True)
-    @mock.patch.object(os.path, 'relpath', autospec=True)
-    @mock.patch.object(os, 'walk', autospec=True)
-    @mock.patch.object(utils, 'mount', autospec=True)
-    def test__mount_deploy_iso_fails_no_grub_cfg(self, mount_mock,
-                                                 walk_mock, relpath_mock,
-                                                 umount_mock):
-        walk_mock.return_value = [('/tmpdir1/EFI/ubuntu', '', []),
-                                  ('/tmpdir1/isolinux', '',
-                                   ['efiboot.img', 'isolinux.bin',
-                                    'isolinux.cfg'])]
-        relpath_mock.side_effect = iter(['isolinux/efiboot.img'])
+    @mock.patch.object(isofs, 'IsoImage', autospec=True)
+    def test__extract_deploy_iso_fails_no_grub_cfg(self, iso_mock):
+        iso_obj_mock = iso_mock.return_value.__enter__.return_value
+        iso_obj_mock.list_files.return_value = [
+            'isolinux/efiboot.img', 'isolinux/isolinux.bin',
+            'isolinux/isolinux.cfg']
 
         self.assertRaises(exception.ImageCreationFailed,
-                          images._mount_deploy_iso,
+                          images._extract_deploy_iso,
                           'path/to/deployiso', 'tmpdir1')
-        mount_mock.assert_called_once_with('path/to/deployiso',
-                                           'tmpdir1', '-o', 'loop')
-        walk_mock.assert_called_once_with('tmpdir1')
-        umount_mock.assert_called_once_with('tmpdir1')
-
-    @mock.patch.object(utils, 'mount', autospec=True)
-    def test__mount_deploy_iso_fail_with_ExecutionError(self, mount_mock):
-        mount_mock.side_effect = processutils.ProcessExecutionError
+        self.assertFalse(iso_obj_mock.extract.called)
+
+    def test__extract_deploy_iso_not_an_iso(self):
+        tempdir = self.useFixture(fixtures.TempDir()).path
+        deploy_iso = os.path.join(tempdir, 'deploy.iso')
+        with open(deploy_iso, 'wb') as f:
+            f.write(b'\0' * 40960)
         self.assertRaises(exception.ImageCreationFailed,
-                          images._mount_deploy_iso,
-                          'path/to/deployiso', 'tmpdir1')
+                          images._extract_deploy_iso, deploy_iso, tempdir)
 
-    @mock.patch.object(images, '_umount_without_raise', autospec=True)
     @mock.patch.object(images, '_create_root_fs', autospec=True)
     @mock.patch.object(utils, 'write_to_file', autospec=True)
     @mock.patch.object(utils, 'execute', autospec=True)
-    @mock.patch.object(images, '_mount_deploy_iso', autospec=True)
+    @mock.patch.object(images, '_extract_deploy_iso', autospec=True)
     @mock.patch.object(utils, 'tempdir', autospec=True)
     @mock.patch.object(images, '_generate_cfg', autospec=True)
     def test_create_isolinux_image_for_uefi(self, gen_cfg_mock,
-                                   tempdir_mock, mount_mock, execute_mock,
+                                   tempdir_mock, extract_mock, execute_mock,
                                    write_to_file_mock,
-                                   create_root_fs_mock, umount_mock):
+                                   create_root_fs_mock):
 
         files_info = {
                 'path/to/kernel': 'vmlinuz',
@@ -549,17 +469,18 @@ class FsImageTestCase(base.TestCase):
         mock_file_handle = mock.MagicMock(spec=file)
         mock_file_handle.__enter__.return_value = 'tmpdir'
         mock_file_handle1 = mock.MagicMock(spec=file)
-        mock_file_handle1.__enter__.return_value = 'mountdir'
+        mock_file_handle1.__enter__.return_value = 'extractdir'
         tempdir_mock.side_effect = iter(
             [mock_file_handle, mock_file_handle1])
-        mount_mock.return_value = (uefi_path_info,
-                                   e_img_rel_path, grub_rel_path)
+        extract_mock.return_value = (uefi_path_info,
+                                     e_img_rel_path, grub_rel_path)
 
         images.create_isolinux_image_for_uefi('tgt_file', 'path/to/deploy_iso',
                                               'path/to/kernel',
                                               'path/to/ramdisk',
                                               kernel_params=params)
-        mount_mock.assert_called_once_with('path/to/deploy_iso', 'mountdir')
+        extract_mock.assert_called_once_with('path/to/deploy_iso',
+                                             'extractdir')
         create_root_fs_mock.assert_called_once_with('tmpdir', files_info)
         gen_cfg_mock.assert_any_call(params, CONF.isolinux_config_template,
                                      isolinux_options)
@@ -573,7 +494,6 @@ class FsImageTestCase(base.TestCase):
                  '4', '-boot-info-table', '-b', 'isolinux/isolinux.bin',
                  '-eltorito-alt-boot', '-e', 'path/to/efiboot.img',
                  '-no-emul-boot', '-o', 'tgt_file', 'tmpdir')
-        umount_mock.assert_called_once_with('mountdir')
 
     @mock.patch.object(images, '_create_root_fs', autospec=True)
     @mock.patch.object(utils, 'write_to_file', autospec=True)
@@ -618,23 +538,22 @@ class FsImageTestCase(base.TestCase):
                  '4', '-boot-info-table', '-b', 'isolinux/isolinux.bin',
                  '-o', 'tgt_file', 'tmpdir')
 
-    @mock.patch.object(images, '_umount_without_raise', autospec=True)
     @mock.patch.object(images, '_create_root_fs', autospec=True)
     @mock.patch.object(utils, 'tempdir', autospec=True)
     @mock.patch.object(utils, 'execute', autospec=True)
-    @mock.patch.object(os, 'walk', autospec=True)
-    def test_create_isolinux_image_uefi_rootfs_fails(self, walk_mock,
+    @mock.patch.object(images, '_extract_deploy_iso', autospec=True)
+    def test_create_isolinux_image_uefi_rootfs_fails(self, extract_mock,
                                                      utils_mock,
                                                      tempdir_mock,
-                                                     create_root_fs_mock,
-                                                     umount_mock):
+                                                     create_root_fs_mock):
 
         mock_file_handle = mock.MagicMock(spec=file)
         mock_file_handle.__enter__.return_value = 'tmpdir'
         mock_file_handle1 = mock.MagicMock(spec=file)
-        mock_file_handle1.__enter__.return_value = 'mountdir'
+        mock_file_handle1.__enter__.return_value = 'extractdir'
         tempdir_mock.side_effect = iter(
             [mock_file_handle, mock_file_handle1])
+        extract_mock.return_value = ({'a': 'a'}, 'b', 'c')
         create_root_fs_mock.side_effect = IOError
 
         self.assertRaises(exception.ImageCreationFailed,
@@ -642,7 +561,7 @@ class FsImageTestCase(base.TestCase):
                           'tgt_file', 'path/to/deployiso',
                           'path/to/kernel',
                           'path/to/ramdisk')
-        umount_mock.assert_called_once_with('mountdir')
+        self.assertFalse(utils_mock.called)
 
     @mock.patch.object(images, '_create_root_fs', autospec=True)
     @mock.patch.object(utils, 'tempdir', autospec=True)
@@ -659,28 +578,26 @@ class FsImageTestCase(base.TestCase):
                           'tgt_file', 'path/to/kernel',
                           'path/to/ramdisk')
 
-    @mock.patch.object(images, '_umount_without_raise', autospec=True)
     @mock.patch.object(images, '_create_root_fs', autospec=True)
     @mock.patch.object(utils, 'write_to_file', autospec=True)
     @mock.patch.object(utils, 'tempdir', autospec=True)
     @mock.patch.object(utils, 'execute', autospec=True)
-    @mock.patch.object(images, '_mount_deploy_iso', autospec=True)
+    @mock.patch.object(images, '_extract_deploy_iso', autospec=True)
     @mock.patch.object(images, '_generate_cfg', autospec=True)
     def test_create_isolinux_image_mkisofs_fails(self,
                                                  gen_cfg_mock,
-                                                 mount_mock,
+                                                 extract_mock,
                                                  utils_mock,
                                                  tempdir_mock,
                                                  write_to_file_mock,
-                                                 create_root_fs_mock,
-                                                 umount_mock):
+                                                 create_root_fs_mock):
         mock_file_handle = mock.MagicMock(spec=file)
         mock_file_handle.__enter__.return_value = 'tmpdir'
         mock_file_handle1 = mock.MagicMock(spec=file)
-        mock_file_handle1.__enter__.return_value = 'mountdir'
+        mock_file_handle1.__enter__.return_value = 'extractdir'
         tempdir_mock.side_effect = iter(
             [mock_file_handle, mock_file_handle1])
-        mount_mock.return_value = ({'a': 'a'}, 'b', 'c')
+        extract_mock.return_value = ({'a': 'a'}, 'b', 'c')
         utils_mock.side_effect = processutils.ProcessExecutionError
 
         self.assertRaises(exception.ImageCreationFailed,
@@ -688,7 +605,6 @@ class FsImageTestCase(base.TestCase):
                           'tgt_file', 'path/to/deployiso',
                           'path/to/kernel',
                           'path/to/ramdisk')
-        umount_mock.assert_called_once_with('mountdir')
 
     @mock.patch.object(images, '_create_root_fs', autospec=True)
     @mock.patch.object(utils, 'write_to_file', autospec=True)
@@ -0,0 +1,137 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import os
+import struct
+
+import fixtures
+
+from ironic.common import exception
+from ironic.common import isofs
+from ironic.tests import base
+
+BLOCK = isofs.BLOCK_SIZE
+
+
+def _record(extent, size, flags, name, system_use=b''):
+    pad = b'' if len(name) % 2 else b'\x00'
+    length = 33 + len(name) + len(pad) + len(system_use)
+    return struct.pack('<BBI4xI4x7sBBBH2xB', length, 0, extent, size,
+                       b'\x00' * 7, flags, 0, 0, 1, len(name)) + (
+        name + pad + system_use)
+
+
+def _nm(name):
+    return b'NM' + struct.pack('<BBB', 5 + len(name), 1, 0) + name
+
+
+def _make_iso(rock_ridge):
+    """Builds an image with /EFI/BOOT/GRUB.CFG and /EFIBOOT.IMG."""
+    root, efi, boot, grub, efiboot = 18, 19, 20, 21, 22
+    grub_data = b'set default=0\n'
+    efiboot_data = b'e' * (BLOCK + 10)
+
+    def names(name, rr_name):
+        return (name, _nm(rr_name)) if rock_ridge else (name, b'')
+
+    def directory(extent, parent, children, sp=False):
+        dot_su = b'SP\x07\x01\xbe\xef\x00' if sp and rock_ridge else b''
+        data = (_record(extent, BLOCK, isofs.FLAG_DIRECTORY, b'\x00',
+                        dot_su) +
+                _record(parent, BLOCK, isofs.FLAG_DIRECTORY, b'\x01'))
+        for child in children:
+            data += _record(*child)
+        return data.ljust(BLOCK, b'\x00')
+
+    blocks = {
+        root: directory(root, root, [
+            (efi, BLOCK, isofs.FLAG_DIRECTORY) + names(b'EFI', b'EFI'),
+            (efiboot, len(efiboot_data), 0) + names(b'EFIBOOT.IMG;1',
+                                                    b'efiboot.img')],
+            sp=True),
+        efi: directory(efi, root, [
+            (boot, BLOCK, isofs.FLAG_DIRECTORY) + names(b'BOOT', b'BOOT')]),
+        boot: directory(boot, efi, [
+            (grub, len(grub_data), 0) + names(b'GRUB.CFG;1', b'grub.cfg')]),
+        grub: grub_data,
+        efiboot: efiboot_data,
+    }
+
+    pvd = bytearray(BLOCK)
+    pvd[0:7] = b'\x01CD001\x01'
+    pvd[128:132] = struct.pack('<H', BLOCK) + struct.pack('>H', BLOCK)
+    root_record = _record(root, BLOCK, isofs.FLAG_DIRECTORY, b'\x00')
+    pvd[156:156 + len(root_record)] = root_record
+    blocks[16] = bytes(pvd)
+    blocks[17] = b'\xffCD001\x01'
+
+    image = b''
+    for index in range(max(blocks) + 1):
+        image += blocks.get(index, b'').ljust(BLOCK, b'\x00')
+    image += b'\x00' * BLOCK
+    return image, grub_data, efiboot_data
+
+
+class IsoImageTestCase(base.TestCase):
+
+    def setUp(self):
+        super(IsoImageTestCase, self).setUp()
+        self.tempdir = self.useFixture(fixtures.TempDir()).path
+        self.path = os.path.join(self.tempdir, 'image.iso')
+
+    def _write(self, data):
+        with open(self.path, 'wb') as f:
+            f.write(data)
+
+    def test_list_files_rock_ridge(self):
+        self._write(_make_iso(rock_ridge=True)[0])
+        with isofs.IsoImage(self.path) as iso:
+            self.assertEqual(['EFI/BOOT/grub.cfg', 'efiboot.img'],
+                             iso.list_files())
+
+    def test_list_files_iso9660(self):
+        self._write(_make_iso(rock_ridge=False)[0])
+        with isofs.IsoImage(self.path) as iso:
+            self.assertEqual(['efi/boot/grub.cfg', 'efiboot.img'],
+                             iso.list_files())
+
+    def test_extract(self):
+        image, grub_data, efiboot_data = _make_iso(rock_ridge=True)
+        self._write(image)
+        target = os.path.join(self.tempdir, 'out')
+        with isofs.IsoImage(self.path) as iso:
+            iso.extract('EFI/BOOT/grub.cfg', target)
+            with open(target, 'rb') as f:
+                self.assertEqual(grub_data, f.read())
+            iso.extract('efiboot.img', target)
+            with open(target, 'rb') as f:
+                self.assertEqual(efiboot_data, f.read())
+
+    def test_extract_missing_file(self):
+        self._write(_make_iso(rock_ridge=True)[0])
+        with isofs.IsoImage(self.path) as iso:
+            self.assertRaises(exception.ImageCreationFailed, iso.extract,
+                              'missing', os.path.join(self.tempdir, 'out'))
+
+    def test_not_an_iso(self):
+        self._write(b'\x00' * BLOCK * 20)
+        self.assertRaises(exception.ImageCreationFailed, isofs.IsoImage,
+                          self.path)
+
+    def test_truncated(self):
+        self._write(b'\x00' * BLOCK * 10)
+        self.assertRaises(exception.ImageCreationFailed, isofs.IsoImage,
+                          self.path)
+
+    def test_missing_file(self):
+        self.assertRaises(exception.ImageCreationFailed, isofs.IsoImage,
+                          os.path.join(self.tempdir, 'missing.iso'))
@@ -33,6 +33,15 @@ class FakeClient:
         return True
 
 
+class FakeAuthRef(object):
+    def __init__(self, auth_token, expires_in=3600):
+        self.auth_token = auth_token
+        self.expires_in = expires_in
+
+    def will_expire_soon(self, stale_duration=None):
+        return self.expires_in < stale_duration
+
+
 class KeystoneTestCase(base.TestCase):
 
     def setUp(self):
@@ -117,10 +126,72 @@ class KeystoneTestCase(base.TestCase):
 
     @mock.patch('keystoneclient.v2_0.client.Client', autospec=True)
     def test_get_admin_auth_token(self, mock_ks):
+        fake_client = FakeClient()
+        fake_client.auth_ref = FakeAuthRef('123456')
+        mock_ks.return_value = fake_client
+        self.assertEqual('123456', keystone.get_admin_auth_token())
+
+    @mock.patch('keystoneclient.v2_0.client.Client', autospec=True)
+    def test_get_admin_auth_token_cached(self, mock_ks):
+        fake_client = FakeClient()
+        fake_client.auth_ref = FakeAuthRef('123456')
+        mock_ks.return_value = fake_client
+        self.assertEqual('123456', keystone.get_admin_auth_token())
+        self.assertEqual('123456', keystone.get_admin_auth_token())
+        self.assertEqual(1, mock_ks.call_count)
+
+    @mock.patch('keystoneclient.v2_0.client.Client', autospec=True)
+    def test_get_admin_auth_token_not_cached(self, mock_ks):
+        self.config(group='keystone', admin_token_refresh_time=0)
         fake_client = FakeClient()
         fake_client.auth_token = '123456'
         mock_ks.return_value = fake_client
         self.assertEqual('123456', keystone.get_admin_auth_token())
+        self.assertEqual('123456', keystone.get_admin_auth_token())
+        self.assertEqual(2, mock_ks.call_count)
+
+    @mock.patch('keystoneclient.v2_0.client.Client', autospec=True)
+    def test_get_admin_auth_token_expired(self, mock_ks):
+        old_client, new_client = FakeClient(), FakeClient()
+        old_client.auth_ref = FakeAuthRef('old', expires_in=10)
+        new_client.auth_ref = FakeAuthRef('new')
+        mock_ks.side_effect = [old_client, new_client]
+        self.assertEqual('old', keystone.get_admin_auth_token())
+        self.assertEqual('new', keystone.get_admin_auth_token())
+        self.assertEqual('new', keystone.get_admin_auth_token())
+        self.assertEqual(2, mock_ks.call_count)
+
+    @mock.patch('eventlet.spawn_n', autospec=True)
+    @mock.patch('keystoneclient.v2_0.client.Client', autospec=True)
+    def test_get_admin_auth_token_refresh(self, mock_ks, mock_spawn):
+        old_client, new_client = FakeClient(), FakeClient()
+        old_client.auth_ref = FakeAuthRef('old', expires_in=100)
+        new_client.auth_ref = FakeAuthRef('new')
+        mock_ks.side_effect = [old_client, new_client]
+        self.assertEqual('old', keystone.get_admin_auth_token())
+        # The current token is still returned while it is renewed, and
+        # only one renewal is started
+        self.assertEqual('old', keystone.get_admin_auth_token())
+        self.assertEqual('old', keystone.get_admin_auth_token())
+        mock_spawn.assert_called_once_with(mock.ANY)
+
+        mock_spawn.call_args[0][0]()
+        self.assertEqual('new', keystone.get_admin_auth_token())
+        self.assertEqual(2, mock_ks.call_count)
+
+    @mock.patch('eventlet.spawn_n', autospec=True)
+    @mock.patch('keystoneclient.v2_0.client.Client', autospec=True)
+    def test_get_admin_auth_token_refresh_fails(self, mock_ks, mock_spawn):
+        old_client = FakeClient()
+        old_client.auth_ref = FakeAuthRef('old', expires_in=100)
+        mock_ks.side_effect = [old_client,
+                               ksexception.AuthorizationFailure('boom')]
+        self.assertEqual('old', keystone.get_admin_auth_token())
+        self.assertEqual('old', keystone.get_admin_auth_token())
+        mock_spawn.call_args[0][0]()
+        self.assertEqual('old', keystone.get_admin_auth_token())
+        # A new renewal is started
+        self.assertEqual(2, mock_spawn.call_count)
 
     @mock.patch('keystoneclient.v2_0.client.Client', autospec=True)
     def test_get_region_name_v2(self, mock_ks):
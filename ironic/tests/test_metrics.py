@@ -0,0 +1,172 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import json
+import os
+import socket
+
+import fixtures
+import mock
+
+from ironic.common import metrics
+from ironic.tests import base
+
+
+class HistogramTestCase(base.TestCase):
+
+    def test_add(self):
+        hist = metrics.Histogram()
+        hist.add(0.5)
+        hist.add(7)
+        hist.add(120000, error=True)
+        result = hist.as_dict()
+        self.assertEqual(3, result['count'])
+        self.assertEqual(1, result['errors'])
+        self.assertEqual(120000, result['max_ms'])
+        self.assertEqual(1, result['buckets']['1'])
+        self.assertEqual(1, result['buckets']['10'])
+        self.assertEqual(1, result['buckets']['inf'])
+        self.assertEqual(0, result['buckets']['5'])
+
+
+class MetricsTestCase(base.TestCase):
+
+    def setUp(self):
+        super(MetricsTestCase, self).setUp()
+        self.metrics = metrics.Metrics()
+
+    def test_timing(self):
+        self.metrics.timing('foo', 3)
+        self.metrics.timing('foo', 4, error=True)
+        hist = self.metrics.get_timer('foo')
+        self.assertEqual(2, hist.count)
+        self.assertEqual(1, hist.errors)
+        self.assertIsNone(self.metrics.get_timer('bar'))
+
+    def test_timer(self):
+        with self.metrics.timer('foo'):
+            pass
+        self.assertEqual(1, self.metrics.get_timer('foo').count)
+        self.assertEqual(0, self.metrics.get_timer('foo').errors)
+
+    def test_timer_error(self):
+        def fail():
+            with self.metrics.timer('foo'):
+                raise ValueError()
+        self.assertRaises(ValueError, fail)
+        self.assertEqual(1, self.metrics.get_timer('foo').errors)
+
+    def test_incr(self):
+        self.metrics.incr('foo')
+        self.metrics.incr('foo', 2)
+        self.assertEqual(3, self.metrics.get_counter('foo'))
+        self.assertEqual(0, self.metrics.get_counter('bar'))
+
+    def test_snapshot(self):
+        self.metrics.timing('foo', 3)
+        self.metrics.incr('bar')
+        snapshot = self.metrics.snapshot()
+        self.assertEqual({'bar': 1}, snapshot['counters'])
+        self.assertEqual(1, snapshot['timers']['foo']['count'])
+
+    def test_sink(self):
+        sink = mock.Mock(spec=metrics.NoopSink)
+        registry = metrics.Metrics(sink)
+        registry.timing('foo', 3, error=True)
+        registry.incr('bar', 2)
+        sink.timing.assert_called_once_with('foo', 3, error=True)
+        sink.counter.assert_called_once_with('bar', 2)
+        self.assertEqual(2, sink.flush.call_count)
+
+
+class StatsdSinkTestCase(base.TestCase):
+
+    def setUp(self):
+        super(StatsdSinkTestCase, self).setUp()
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.server.bind(('127.0.0.1', 0))
+        self.server.settimeout(5)
+        self.addCleanup(self.server.close)
+        self.sink = metrics.StatsdSink('127.0.0.1',
+                                       self.server.getsockname()[1], 'ironic')
+
+    def test_timing(self):
+        self.sink.timing('foo.bar', 1.5)
+        self.assertEqual(b'ironic.foo.bar:1.500|ms', self.server.recv(1024))
+
+    def test_timing_error(self):
+        self.sink.timing('foo', 2, error=True)
+        self.assertEqual(b'ironic.foo:2.000|ms', self.server.recv(1024))
+        self.assertEqual(b'ironic.foo.errors:1|c', self.server.recv(1024))
+
+    @mock.patch.object(socket.socket, 'sendto', autospec=True)
+    def test_send_failure_ignored(self, mock_sendto):
+        mock_sendto.side_effect = socket.error()
+        self.sink.counter('foo', 1)
+
+
+class FileSinkTestCase(base.TestCase):
+
+    def setUp(self):
+        super(FileSinkTestCase, self).setUp()
+        self.path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                 'metrics.json')
+
+    def test_flush(self):
+        registry = metrics.Metrics(metrics.FileSink(self.path, 60, 'ironic'))
+        registry.timing('foo', 3)
+        with open(self.path) as f:
+            summary = json.load(f)
+        self.assertEqual('ironic', summary['prefix'])
+        self.assertEqual(1, summary['timers']['foo']['count'])
+
+    @mock.patch.object(metrics.time, 'time', autospec=True)
+    def test_flush_interval(self, mock_time):
+        mock_time.return_value = 1000
+        registry = metrics.Metrics(metrics.FileSink(self.path, 60, 'ironic'))
+        registry.timing('foo', 3)
+        mock_time.return_value = 1030
+        registry.timing('foo', 3)
+        with open(self.path) as f:
+            self.assertEqual(1, json.load(f)['timers']['foo']['count'])
+        mock_time.return_value = 1061
+        registry.timing('foo', 3)
+        with open(self.path) as f:
+            self.assertEqual(3, json.load(f)['timers']['foo']['count'])
+
+
+class GetMetricsTestCase(base.TestCase):
+
+    def setUp(self):
+        super(GetMetricsTestCase, self).setUp()
+        self.useFixture(fixtures.MonkeyPatch(
+            'ironic.common.metrics._METRICS', None))
+
+    def test_get_metrics_default(self):
+        registry = metrics.get_metrics()
+        self.assertIsInstance(registry._sink, metrics.NoopSink)
+        self.assertIs(registry, metrics.get_metrics())
+
+    def test_get_metrics_statsd(self):
+        self.config(backend='statsd', group='metrics')
+        self.assertIsInstance(metrics.get_metrics()._sink,
+                              metrics.StatsdSink)
+
+    def test_get_metrics_file(self):
+        self.config(backend='file', file_path='/tmp/metrics.json',
+                    group='metrics')
+        self.assertIsInstance(metrics.get_metrics()._sink, metrics.FileSink)
+
+    def test_get_metrics_file_without_path(self):
+        self.config(backend='file', group='metrics')
+        self.assertIs(metrics.NoopSink,
+                      type(metrics.get_metrics()._sink))
@@ -15,6 +15,10 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import mock
+from oslo_policy import policy as oslo_policy
+from webob import exc
+
 from ironic.common import policy
 from ironic.tests import base
 
@@ -72,3 +76,45 @@ class PolicyTestCaseNegative(base.TestCase):
     def test_show_password(self):
         creds = {'roles': [u'admin'], 'tenant': 'demo'}
         self.assertFalse(policy.enforce('show_password', creds, creds))
+
+
+class CheckCredsTestCase(base.TestCase):
+
+    def setUp(self):
+        super(CheckCredsTestCase, self).setUp()
+        self.enforcer = policy.get_enforcer()
+        self.creds = {'roles': ['admin'], 'tenant': 'admin',
+                      'auth_token': 'token1'}
+
+    def test_check_creds(self):
+        self.assertTrue(policy.check_creds('admin_api', self.creds))
+        self.assertTrue(policy.check_creds('show_password', self.creds))
+        self.assertFalse(policy.check_creds('admin_api',
+                                            {'roles': ['Member']}))
+
+    def test_memoized(self):
+        with mock.patch.object(self.enforcer, 'enforce',
+                               wraps=self.enforcer.enforce) as mock_enforce:
+            policy.check_creds('admin_api', self.creds)
+            # Same credentials apart from the token
+            policy.check_creds('admin_api', dict(self.creds,
+                                                 auth_token='token2'))
+            self.assertEqual(1, mock_enforce.call_count)
+            policy.check_creds('admin_api', dict(self.creds,
+                                                 tenant='demo'))
+            self.assertEqual(2, mock_enforce.call_count)
+
+    def test_invalidated_on_reload(self):
+        self.assertTrue(policy.check_creds('admin_api', self.creds))
+        self.enforcer.set_rules(oslo_policy.Rules.load_json(
+            '{"admin_api": "!"}'), use_conf=False)
+        self.assertFalse(policy.check_creds('admin_api', self.creds))
+
+    def test_do_raise(self):
+        creds = {'roles': ['Member']}
+        self.assertRaises(oslo_policy.PolicyNotAuthorized,
+                          policy.check_creds, 'admin_api', creds,
+                          do_raise=True)
+        self.assertRaises(exc.HTTPForbidden,
+                          policy.check_creds, 'admin_api', creds,
+                          do_raise=True, exc=exc.HTTPForbidden)
@@ -16,6 +16,8 @@
 
 import os
 
+import fixtures
+import jinja2
 import mock
 from oslo_config import cfg
 import six
@@ -127,6 +129,66 @@ class TestPXEUtils(db_base.DbTestCase):
 
         self.assertEqual(six.text_type(expected_template), rendered_template)
 
+    def test__get_template_cached(self):
+        self.useFixture(fixtures.MonkeyPatch(
+            'ironic.common.pxe_utils._TEMPLATE_CACHE', {}))
+        template = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                'template')
+        with open(template, 'w') as f:
+            f.write('{{ pxe_options.foo }}')
+        os.utime(template, (1000, 1000))
+
+        compiled = pxe_utils._get_template(template)
+        self.assertIs(compiled, pxe_utils._get_template(template))
+        self.assertEqual('bar', pxe_utils._build_pxe_config({'foo': 'bar'},
+                                                            template))
+
+        with open(template, 'w') as f:
+            f.write('{{ pxe_options.foo }}!')
+        os.utime(template, (2000, 2000))
+        self.assertIsNot(compiled, pxe_utils._get_template(template))
+        self.assertEqual('bar!', pxe_utils._build_pxe_config({'foo': 'bar'},
+                                                             template))
+
+    def test__get_template_compile_fails(self):
+        self.useFixture(fixtures.MonkeyPatch(
+            'ironic.common.pxe_utils._TEMPLATE_CACHE', {}))
+        template = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                                'template')
+        with open(template, 'w') as f:
+            f.write('{{ pxe_options.foo ')
+
+        self.assertRaises(jinja2.TemplateSyntaxError,
+                          pxe_utils._get_template, template)
+        self.assertNotIn(template, pxe_utils._TEMPLATE_CACHE)
+        self.assertRaises(jinja2.TemplateSyntaxError,
+                          pxe_utils._get_template, template)
+
+        with open(template, 'w') as f:
+            f.write('{{ pxe_options.foo }}')
+        self.assertEqual('bar', pxe_utils._build_pxe_config({'foo': 'bar'},
+                                                            template))
+
+    @mock.patch('ironic.common.utils.create_link_without_raise', autospec=True)
+    @mock.patch('ironic.common.utils.unlink_without_raise', autospec=True)
+    def test__link_pxe_configs_existing(self, unlink_mock, create_link_mock):
+        tempdir = self.useFixture(fixtures.TempDir()).path
+        config = os.path.join(tempdir, 'config')
+        good_link = os.path.join(tempdir, 'good')
+        bad_link = os.path.join(tempdir, 'bad')
+        missing_link = os.path.join(tempdir, 'missing')
+        os.symlink(config, good_link)
+        os.symlink(os.path.join(tempdir, 'old-config'), bad_link)
+
+        pxe_utils._link_pxe_configs(config,
+                                    [good_link, bad_link, missing_link])
+
+        unlink_mock.assert_has_calls([mock.call(bad_link),
+                                      mock.call(missing_link)])
+        create_link_mock.assert_has_calls([mock.call(config, bad_link),
+                                           mock.call(config, missing_link)])
+        self.assertEqual(2, create_link_mock.call_count)
+
     @mock.patch('ironic.common.utils.create_link_without_raise', autospec=True)
     @mock.patch('ironic.common.utils.unlink_without_raise', autospec=True)
     @mock.patch('ironic.drivers.utils.get_node_mac_addresses', autospec=True)
@@ -12,11 +12,15 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import json
 import sys
+import threading
 
+import fixtures
 import mock
 from oslo_config import cfg
 import six
+from six.moves import BaseHTTPServer
 from six.moves import builtins as __builtin__
 from swiftclient import client as swift_client
 from swiftclient import exceptions as swift_exception
@@ -54,7 +58,7 @@ class SwiftTestCase(base.TestCase):
         six.moves.reload_module(sys.modules['ironic.common.swift'])
 
     def test___init__(self, connection_mock):
-        swift.SwiftAPI()
+        swift.SwiftAPI().head_object('container', 'object')
         params = {'retries': 2,
                   'insecure': 0,
                   'user': 'admin',
@@ -64,6 +68,65 @@ class SwiftTestCase(base.TestCase):
                   'auth_version': '2'}
         connection_mock.assert_called_once_with(**params)
 
+    def test_connection_reused(self, connection_mock):
+        swift.SwiftAPI().head_object('container', 'object')
+        swift.SwiftAPI().head_object('container', 'object')
+        self.assertEqual(1, connection_mock.call_count)
+        self.assertEqual(2, connection_mock.return_value.head_object.
+                         call_count)
+
+    def test_connection_error_not_reused(self, connection_mock):
+        connection_obj_mock = connection_mock.return_value
+        connection_obj_mock.head_object.side_effect = IOError()
+        swiftapi = swift.SwiftAPI()
+        self.assertRaises(IOError, swiftapi.head_object, 'container',
+                          'object')
+        connection_obj_mock.head_object.side_effect = None
+        swiftapi.head_object('container', 'object')
+        self.assertEqual(2, connection_mock.call_count)
+        connection_obj_mock.close.assert_called_once_with()
+
+    def test_token_shared(self, connection_mock):
+        pool = swift.SwiftAPI()._pool
+        with pool.connection() as conn1:
+            conn1.url = 'http://swift/v1/AUTH_tenant'
+            conn1.token = 'token'
+            with pool.connection():
+                pass
+        # The second connection was created before the first one
+        # authenticated
+        connection_mock.assert_called_with(**pool._params)
+        self.assertEqual(2, connection_mock.call_count)
+        pool._free = []
+        with pool.connection():
+            pass
+        connection_mock.assert_called_with(
+            preauthurl='http://swift/v1/AUTH_tenant', preauthtoken='token',
+            **pool._params)
+
+    @mock.patch.object(__builtin__, 'open', autospec=True)
+    def test_create_object_known_container(self, open_mock,
+                                           connection_mock):
+        connection_obj_mock = connection_mock.return_value
+        swift.SwiftAPI().create_object('container', 'object', 'file1')
+        swift.SwiftAPI().create_object('container', 'object', 'file2')
+        connection_obj_mock.put_container.assert_called_once_with('container')
+        self.assertEqual(2, connection_obj_mock.put_object.call_count)
+
+    @mock.patch.object(__builtin__, 'open', autospec=True)
+    def test_create_object_container_deleted(self, open_mock,
+                                             connection_mock):
+        connection_obj_mock = connection_mock.return_value
+        swift.SwiftAPI().create_object('container', 'object', 'file1')
+        connection_obj_mock.put_object.side_effect = [
+            swift_exception.ClientException('', http_status=404),
+            'object-uuid']
+        result = swift.SwiftAPI().create_object('container', 'object',
+                                                'file2')
+        self.assertEqual('object-uuid', result)
+        self.assertEqual(2, connection_obj_mock.put_container.call_count)
+        self.assertEqual(3, connection_obj_mock.put_object.call_count)
+
     @mock.patch.object(__builtin__, 'open', autospec=True)
     def test_create_object(self, open_mock, connection_mock):
         swiftapi = swift.SwiftAPI()
@@ -151,3 +214,121 @@ class SwiftTestCase(base.TestCase):
         swiftapi.update_object_meta('container', 'object', headers)
         connection_obj_mock.post_object.assert_called_once_with('container',
                 'object', headers)
+
+    def test_update_object_meta_not_found(self, connection_mock):
+        swiftapi = swift.SwiftAPI()
+        connection_obj_mock = connection_mock.return_value
+        connection_obj_mock.post_object.side_effect = (
+            swift_exception.ClientException('not found', http_status=404))
+        self.assertRaises(exception.SwiftObjectNotFoundError,
+                          swiftapi.update_object_meta, 'container',
+                          'object', {})
+
+    def test_list_objects(self, connection_mock):
+        swiftapi = swift.SwiftAPI()
+        connection_obj_mock = connection_mock.return_value
+        connection_obj_mock.get_container.return_value = (
+            {}, [{'name': 'obj1'}, {'name': 'obj2'}])
+        self.assertEqual(['obj1', 'obj2'],
+                         swiftapi.list_objects('container', prefix='obj'))
+        connection_obj_mock.get_container.assert_called_once_with(
+            'container', prefix='obj', full_listing=True)
+
+
+class _FakeSwiftHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Minimal Keystone v2 and Swift server."""
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body=b'', headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _authorized(self):
+        self.server.requests.append((self.command, self.path))
+        if self.headers.get('X-Auth-Token') != self.server.token:
+            self._reply(401)
+            return False
+        return True
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        if self.path != '/v2.0/tokens':
+            if self._authorized():
+                self._reply(202)
+            return
+        self.server.auth_count += 1
+        self.server.token = 'token-%d' % self.server.auth_count
+        url = 'http://127.0.0.1:%d/v1/AUTH_tenant' % self.server.server_port
+        body = {'access': {
+            'token': {'id': self.server.token,
+                      'expires': '2100-01-01T00:00:00Z',
+                      'tenant': {'id': 'tenant', 'name': 'tenant'}},
+            'user': {'id': 'admin', 'name': 'admin', 'roles': []},
+            'serviceCatalog': [{'type': 'object-store', 'name': 'swift',
+                                'endpoints': [{'publicURL': url,
+                                               'internalURL': url,
+                                               'adminURL': url,
+                                               'region': 'RegionOne'}]}]}}
+        self._reply(200, json.dumps(body).encode('utf-8'),
+                    {'Content-Type': 'application/json'})
+
+    def do_PUT(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        if self._authorized():
+            self._reply(201, headers={'Etag': 'etag'})
+
+    def do_HEAD(self):
+        if self._authorized():
+            self._reply(204)
+
+
+class SwiftFakeServerTestCase(base.TestCase):
+
+    def setUp(self):
+        super(SwiftFakeServerTestCase, self).setUp()
+        self.server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0),
+                                                _FakeSwiftHandler)
+        self.server.auth_count = 0
+        self.server.token = None
+        self.server.requests = []
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.config(admin_user='admin', group='keystone_authtoken')
+        self.config(admin_tenant_name='tenant', group='keystone_authtoken')
+        self.config(admin_password='password', group='keystone_authtoken')
+        self.config(auth_uri='http://127.0.0.1:%d' % self.server.server_port,
+                    group='keystone_authtoken')
+        self.config(auth_version='2', group='keystone_authtoken')
+        six.moves.reload_module(sys.modules['ironic.common.swift'])
+        self.tempfile = self.useFixture(fixtures.TempDir()).path + '/file'
+        with open(self.tempfile, 'w') as f:
+            f.write('data')
+
+    def test_auth_and_container_reused(self):
+        for i in range(3):
+            swift.SwiftAPI().create_object('container', 'object%d' % i,
+                                           self.tempfile)
+        self.assertEqual(1, self.server.auth_count)
+        self.assertEqual(1, self.server.requests.count(
+            ('PUT', '/v1/AUTH_tenant/container')))
+
+    def test_expired_token(self):
+        swift.SwiftAPI().head_object('container', 'object')
+        # Swift no longer accepts the token
+        self.server.token = 'revoked'
+        swift.SwiftAPI().head_object('container', 'object')
+        self.assertEqual(2, self.server.auth_count)
+        swift.SwiftAPI().head_object('container', 'object')
+        self.assertEqual(2, self.server.auth_count)
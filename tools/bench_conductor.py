@@ -0,0 +1,321 @@
+#!/usr/bin/env python
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Conductor scale simulator.
+
+Populates a database with N synthetic nodes using the "fake" driver,
+starts M conductor managers in this process (each one registered in the
+conductors table, so that the hash ring spreads the nodes between them)
+and then runs a number of passes of the conductor periodic tasks and of
+the API node listing. For every pass and every task it reports:
+
+* the wall time,
+* the number of SQL statements and the time spent executing them,
+* the memory allocated (peak traced memory when tracemalloc is
+  available, otherwise the growth of the number of gc-tracked objects).
+
+The numbers are meant to be used as a regression baseline, so run it
+with the same parameters before and after a change. By default a
+temporary SQLite database is used; any SQLAlchemy URL may be given with
+--connection (eg, a scratch MySQL database), its tables must be empty.
+
+Usage: tools/bench_conductor.py [-n 10000] [-m 3] [-p 3]
+"""
+
+import datetime
+import gc
+import optparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+top_dir = os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                       os.pardir))
+sys.path.insert(0, top_dir)
+
+import eventlet
+from oslo_config import cfg
+from oslo_context import context as ironic_context
+from oslo_log import log
+from oslo_policy import opts as policy_opts
+from oslo_utils import timeutils
+from oslo_utils import uuidutils
+import sqlalchemy
+import webob
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from ironic.api import app as api_app
+from ironic.common import config
+from ironic.common import keystone
+from ironic.common import rpc
+from ironic.common import states
+from ironic.conductor import manager
+from ironic.db.sqlalchemy import api as sqla_api
+from ironic.db.sqlalchemy import models
+
+CONF = cfg.CONF
+CONF.import_opt('host', 'ironic.common.service')
+
+# Share of the nodes in each provision state, the remainder is AVAILABLE
+STATE_MIX = ((states.ACTIVE, 0.80),
+             (states.DEPLOYWAIT, 0.05))
+MAINTENANCE_RATIO = 0.05
+
+
+class QueryCounter(object):
+    """Count the SQL statements executed on an engine."""
+
+    def __init__(self, engine):
+        self.queries = 0
+        self.elapsed = 0.0
+        sqlalchemy.event.listen(engine, 'before_cursor_execute',
+                                self._before)
+        sqlalchemy.event.listen(engine, 'after_cursor_execute', self._after)
+
+    def _before(self, conn, cursor, statement, parameters, context,
+                executemany):
+        context._bench_start = time.time()
+
+    def _after(self, conn, cursor, statement, parameters, context,
+               executemany):
+        self.queries += 1
+        self.elapsed += time.time() - context._bench_start
+
+    def snapshot(self):
+        return self.queries, self.elapsed
+
+
+class AllocationCounter(object):
+    """Measure the memory allocated while running a callable."""
+
+    def start(self):
+        if tracemalloc:
+            tracemalloc.start()
+        else:
+            gc.collect()
+            self._objects = len(gc.get_objects())
+
+    def stop(self):
+        if tracemalloc:
+            _current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            return '%d KiB' % (peak // 1024)
+        return '%+d objs' % (len(gc.get_objects()) - self._objects)
+
+
+def make_node_rows(count, conductor_ids):
+    now = timeutils.utcnow()
+    deploy_expired = now - datetime.timedelta(
+        seconds=CONF.conductor.deploy_callback_timeout + 60)
+    bounds = []
+    total = 0
+    for state, ratio in STATE_MIX:
+        total += int(count * ratio)
+        bounds.append((total, state))
+
+    rows = []
+    for index in range(count):
+        provision_state = states.AVAILABLE
+        for bound, state in bounds:
+            if index < bound:
+                provision_state = state
+                break
+        power_state = (states.POWER_ON if provision_state == states.ACTIVE
+                       else states.POWER_OFF)
+        updated_at = (deploy_expired
+                      if provision_state == states.DEPLOYWAIT else now)
+        rows.append({
+            'uuid': uuidutils.generate_uuid(),
+            'name': 'bench-node-%d' % index,
+            'driver': 'fake',
+            'driver_info': {},
+            'driver_internal_info': {},
+            'instance_info': {},
+            'properties': {'cpus': 8, 'memory_mb': 32768, 'local_gb': 500,
+                           'cpu_arch': 'x86_64'},
+            'extra': {},
+            'instance_uuid': (uuidutils.generate_uuid()
+                              if provision_state == states.ACTIVE else None),
+            'power_state': power_state,
+            'target_power_state': states.NOSTATE,
+            'provision_state': provision_state,
+            'target_provision_state': (states.ACTIVE
+                                       if provision_state ==
+                                       states.DEPLOYWAIT
+                                       else states.NOSTATE),
+            'provision_updated_at': updated_at,
+            'maintenance': (index % int(1 / MAINTENANCE_RATIO) == 0),
+            # Half of the active nodes were last managed by another
+            # conductor, so they have to be taken over by _sync_local_state
+            'conductor_affinity': conductor_ids[index % len(conductor_ids)]
+                                  if index % 2 else None,
+            'console_enabled': False,
+            'created_at': now,
+        })
+    return rows
+
+
+def populate(engine, count, conductor_ids, batch=1000):
+    rows = make_node_rows(count, conductor_ids)
+    table = models.Node.__table__
+    for start in range(0, len(rows), batch):
+        engine.execute(table.insert(), rows[start:start + batch])
+
+
+def start_conductors(count):
+    conductors = []
+    for index in range(count):
+        cdr = manager.ConductorManager('bench-conductor-%d' % index,
+                                       'bench-topic')
+        cdr.init_host()
+        conductors.append(cdr)
+    return conductors
+
+
+def wait_for_workers(conductors):
+    # NOTE: the keepalive thread of each conductor also runs in its pool
+    for cdr in conductors:
+        while cdr._worker_pool.running() > 1:
+            eventlet.sleep(0.01)
+
+
+def list_nodes(wsgi_app, path, limit):
+    marker = None
+    pages = 0
+    while True:
+        url = '%s?limit=%d' % (path, limit)
+        if marker:
+            url += '&marker=%s' % marker
+        resp = webob.Request.blank(url).get_response(wsgi_app)
+        if resp.status_int != 200:
+            raise RuntimeError('%s returned %s' % (url, resp.status))
+        nodes = resp.json['nodes']
+        pages += 1
+        if len(nodes) < limit:
+            return pages
+        marker = nodes[-1]['uuid']
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option("-n", "--nodes", dest="nodes", type="int",
+                      help="number of nodes (default: 10000)",
+                      default=10000)
+    parser.add_option("-m", "--conductors", dest="conductors", type="int",
+                      help="number of conductors (default: 3)", default=3)
+    parser.add_option("-p", "--passes", dest="passes", type="int",
+                      help="number of passes (default: 3)", default=3)
+    parser.add_option("-l", "--limit", dest="limit", type="int",
+                      help="API page size (default: 1000)", default=1000)
+    parser.add_option("-c", "--connection", dest="connection",
+                      help="SQLAlchemy connection URL of an empty database "
+                           "(default: a temporary SQLite database)")
+    (options, args) = parser.parse_args()
+
+    tempdir = None
+    connection = options.connection
+    if not connection:
+        tempdir = tempfile.mkdtemp(prefix='ironic-bench-')
+        connection = 'sqlite:///%s' % os.path.join(tempdir, 'ironic.sqlite')
+
+    CONF.set_default('connection', connection, group='database')
+    CONF.set_default('sqlite_synchronous', False, group='database')
+    log.register_options(CONF)
+    # The expected failures (eg, the deploy timeouts) would otherwise
+    # flood the report
+    log.set_defaults(default_log_levels=['ironic=CRITICAL',
+                                         'sqlalchemy=WARN',
+                                         'stevedore=WARN'])
+    config.parse_args([sys.argv[0]], default_config_files=[])
+    log.setup(CONF, 'ironic')
+    # Nothing is sent over RPC, but do not depend on a message broker
+    CONF.set_override('rpc_backend', 'fake')
+    rpc.cleanup()
+    rpc.init(CONF)
+    CONF.set_override('enabled_drivers', ['fake'])
+    CONF.set_override('auth_strategy', 'noauth')
+    CONF.set_override('max_limit', options.limit, group='api')
+    policy_opts.set_defaults(CONF)
+    CONF.set_override('policy_file',
+                      os.path.join(top_dir, 'etc', 'ironic', 'policy.json'),
+                      group='oslo_policy')
+
+    # There is no keystone to talk to, _sync_local_state only needs a token
+    keystone.get_admin_auth_token = lambda: 'bench-token'
+
+    conductors = []
+    try:
+        engine = sqla_api.get_engine()
+        models.Base.metadata.create_all(engine)
+
+        conductors = start_conductors(options.conductors)
+        start = time.time()
+        populate(engine, options.nodes,
+                 [cdr.conductor.id for cdr in conductors])
+        print('%d nodes, %d conductors, populated in %.2f s'
+              % (options.nodes, options.conductors, time.time() - start))
+
+        counter = QueryCounter(engine)
+        allocations = AllocationCounter()
+        wsgi_app = api_app.VersionSelectorApplication()
+        context = ironic_context.get_admin_context()
+
+        def run_periodic(name):
+            for cdr in conductors:
+                getattr(cdr, name)(context)
+            wait_for_workers(conductors)
+
+        tasks = [('_sync_power_states',
+                  lambda: run_periodic('_sync_power_states')),
+                 ('_check_deploy_timeouts',
+                  lambda: run_periodic('_check_deploy_timeouts')),
+                 ('_sync_local_state',
+                  lambda: run_periodic('_sync_local_state')),
+                 ('GET /v1/nodes',
+                  lambda: list_nodes(wsgi_app, '/v1/nodes', options.limit)),
+                 ('GET /v1/nodes/detail',
+                  lambda: list_nodes(wsgi_app, '/v1/nodes/detail',
+                                     options.limit))]
+
+        print('%-6s %-24s %10s %9s %10s %14s'
+              % ('pass', 'task', 'wall (s)', 'queries', 'db (s)', 'allocated'))
+        for npass in range(1, options.passes + 1):
+            for name, fn in tasks:
+                queries, db_time = counter.snapshot()
+                allocations.start()
+                start = time.time()
+                fn()
+                wall = time.time() - start
+                allocated = allocations.stop()
+                new_queries, new_db_time = counter.snapshot()
+                print('%-6d %-24s %10.3f %9d %10.3f %14s'
+                      % (npass, name, wall, new_queries - queries,
+                         new_db_time - db_time, allocated))
+                # Let the keepalive threads run between the tasks
+                eventlet.sleep(0)
+    finally:
+        for cdr in conductors:
+            cdr.del_host()
+        if tempdir:
+            shutil.rmtree(tempdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
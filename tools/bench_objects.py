@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Benchmark the IronicObjectSerializer round trip of Node objects.
+
+Builds N synthetic Node objects (no database is needed) and times their
+creation, serialization, deserialization and as_dict() conversion, which
+is what an RPC call returning a large node listing goes through.
+
+Usage: tools/bench_objects.py [-n 10000] [-r 3]
+"""
+
+import datetime
+import optparse
+import os
+import sys
+import time
+
+top_dir = os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                       os.pardir))
+sys.path.insert(0, top_dir)
+
+from oslo_utils import uuidutils
+
+from ironic.common import states
+from ironic.objects import base
+from ironic.objects import node as node_obj
+
+
+def make_node_dict(index):
+    now = datetime.datetime(2015, 5, 12, 10, 0, 0)
+    return {
+        'id': index,
+        'uuid': uuidutils.generate_uuid(),
+        'name': 'node-%d' % index,
+        'chassis_id': None,
+        'instance_uuid': None,
+        'driver': 'fake',
+        'driver_info': {'ipmi_address': '10.0.%d.%d' % (index // 256,
+                                                        index % 256),
+                        'ipmi_username': 'admin',
+                        'ipmi_password': 'secret'},
+        'driver_internal_info': {'is_whole_disk_image': False},
+        'clean_step': {},
+        'instance_info': {'image_source': 'glance://image_uuid',
+                          'root_gb': 10},
+        'properties': {'cpus': 8, 'memory_mb': 32768, 'local_gb': 500,
+                       'cpu_arch': 'x86_64'},
+        'reservation': None,
+        'conductor_affinity': 1,
+        'power_state': states.POWER_OFF,
+        'target_power_state': states.NOSTATE,
+        'provision_state': states.AVAILABLE,
+        'provision_updated_at': now,
+        'target_provision_state': states.NOSTATE,
+        'maintenance': False,
+        'maintenance_reason': None,
+        'console_enabled': False,
+        'last_error': None,
+        'inspection_finished_at': None,
+        'inspection_started_at': None,
+        'extra': {'rack': 'r%d' % (index // 40)},
+        'created_at': now,
+        'updated_at': now,
+    }
+
+
+def timed(label, fn, repeat):
+    best = None
+    for _i in range(repeat):
+        start = time.time()
+        result = fn()
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    print('%-28s %8.3f s' % (label, best))
+    return result
+
+
+def main():
+    parser = optparse.OptionParser()
+    parser.add_option("-n", "--nodes", dest="nodes", type="int",
+                      help="number of nodes (default: 10000)",
+                      default=10000)
+    parser.add_option("-r", "--repeat", dest="repeat", type="int",
+                      help="repetitions, the best is reported (default: 3)",
+                      default=3)
+    (options, args) = parser.parse_args()
+
+    serializer = base.IronicObjectSerializer()
+    db_nodes = [make_node_dict(i) for i in range(options.nodes)]
+
+    def build():
+        return [node_obj.Node._from_db_object(node_obj.Node(None), db_node)
+                for db_node in db_nodes]
+
+    def serialize():
+        return serializer.serialize_entity(None, nodes)
+
+    def deserialize():
+        return serializer.deserialize_entity(None, primitive)
+
+    def as_dict():
+        return [n.as_dict() for n in nodes]
+
+    print('%d nodes, best of %d' % (options.nodes, options.repeat))
+    nodes = timed('build from db', build, options.repeat)
+    primitive = timed('serialize_entity', serialize, options.repeat)
+    timed('deserialize_entity', deserialize, options.repeat)
+    timed('as_dict', as_dict, options.repeat)
+
+
+if __name__ == '__main__':
+    main()